@@ -2,6 +2,7 @@
 ASGI config for ai_job_hunt_portal project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+For production, serve it with gunicorn and uvicorn workers (see gunicorn_asgi.py).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
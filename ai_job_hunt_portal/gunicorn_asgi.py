@@ -0,0 +1,36 @@
+"""
+Gunicorn settings for serving the project over ASGI with uvicorn workers:
+
+    gunicorn -c ai_job_hunt_portal/gunicorn_asgi.py
+
+Each worker runs one event loop. The async AI views (bullet generation and enhancement) await
+the provider call, so a worker can keep hundreds of them in flight instead of one per thread;
+sync views keep working and run in the worker's thread pool. Leave DATABASES CONN_MAX_AGE at 0
+under ASGI: async requests don't reuse persistent connections.
+
+Every value can be overridden through the environment variable named next to it.
+"""
+
+import os
+import multiprocessing
+
+wsgi_app = 'ai_job_hunt_portal.asgi:application'
+worker_class = 'uvicorn_worker.UvicornWorker'
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+# One event loop per core is enough; concurrency comes from the loop, not from more processes
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+
+# Above the 60 s AI client timeout, so a slow provider call fails in the client rather than
+# having the worker killed mid-request
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = os.getenv('GUNICORN_ERROR_LOG', '-')
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
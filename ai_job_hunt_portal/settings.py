@@ -174,7 +174,7 @@ OPENAI_MODEL = 'gpt-3.5-turbo'  # Optional, defaults to gpt-3.5-turbo
 OPENAI_MAX_TOKENS = 2048  # Optional, defaults to 2048
 OPENAI_TEMPERATURE = 0.1  # Optional, defaults to 0.1
 
-DEFAULT_AI_SERVICE = 'chatgpt'  # Options: 'chatgpt', 'gemini'
+DEFAULT_AI_SERVICE = 'chatgpt'  # Options: 'chatgpt', 'gemini', 'replay' (offline, see AI_SETTINGS['replay'])
 OPENAI_API_KEY = os.getenv('API_KEY_CHATGPT')  # Replace with environment variable
 GOOGLE_GENAI_API_KEY = os.getenv('API_KEY_GEMINI')
 
@@ -184,6 +184,67 @@ GOOGLE_GENAI_API_KEY = os.getenv('API_KEY_GEMINI')
 RESUME_FILE_MAX_SIZE = 5 * 1024 * 1024  # 5MB
 ALLOWED_RESUME_EXTENSIONS = ['.pdf', '.doc', '.docx']
 
+# Content-addressed cache for parsed resumes (keyed by file SHA-256 + provider + model + prompt version)
+RESUME_PARSE_CACHE = {
+    'enabled': True,
+    'directory': os.path.join(BASE_DIR, 'parse_cache'),
+    'max_entries': 500,
+    'max_size_bytes': 50 * 1024 * 1024,  # 50MB
+    'max_age_seconds': 7 * 24 * 60 * 60,  # 7 days
+}
+
+# Bounds for PDF text extraction; documents above parallel_page_threshold pages are sharded across processes
+RESUME_PDF_EXTRACTION = {
+    'max_pages': 50,
+    'time_budget_seconds': 20.0,
+    'parallel_page_threshold': 12,
+    'max_workers': 4,
+    'layout_analysis': True,  # Font/geometry-based column ordering and section segmentation
+}
+
+# Section parsing: "tiered" parses locally and sends only sections scored below the threshold
+# to the LLM, "sectioned" sends every section concurrently, "full" sends one whole-resume prompt
+RESUME_SECTION_PARSING = {
+    'mode': 'tiered',
+    'confidence_threshold': 0.75,
+    'max_tokens_per_section': 1500,
+    'max_concurrency': 6,
+}
+
+# Prompt compaction before resume text goes to an LLM; the token budget is AI_SETTINGS['max_resume_tokens']
+RESUME_PROMPT_COMPACTION = {
+    'enabled': True,
+    'token_counter': None,  # Dotted path to a callable(text) -> int; None uses tiktoken when installed
+    'furniture_edge_lines': 3,
+}
+
+# Files parsed per second per provider for `manage.py import_resumes` (0 = unlimited). Paced per
+# file, not per provider call: a tiered/sectioned parse can make up to one call per section.
+RESUME_IMPORT_RATE_LIMITS = {
+    'chatgpt': 2.0,
+    'gemini': 1.0,
+    'heuristic': 0,
+}
+
+# An upload that closely matches one of the user's recent parsed uploads is treated as a revision:
+# only changed sections are re-parsed and, if that resume is still a draft, only its changed rows are patched
+RESUME_REVISION_DETECTION = {
+    'enabled': True,
+    'similarity_threshold': 0.6,
+    'max_candidates': 5,
+}
+
+# PDF/DOCX extraction runs in pre-forked worker processes with memory/CPU ceilings and a hard
+# timeout, so a hostile file can't take a web worker down (PDF pages are read serially there)
+RESUME_EXTRACTION_SANDBOX = {
+    'enabled': True,
+    'workers': 2,
+    'memory_limit_mb': 512,
+    'cpu_seconds': 30,
+    'timeout_seconds': 30.0,
+    'max_jobs_per_worker': 50,
+}
+
 # Error logging for AI components
 LOGGING = {
     'version': 1,
@@ -221,6 +282,84 @@ AI_SETTINGS = {
     'gemini': {
         'model': 'gemini-1.5-pro',
         'temperature': 0.2,
-    }
+    },
+    # Record/replay provider for offline load testing (services/providers/replay_provider.py).
+    # "record" saves live responses; "replay" serves them back without API keys.
+    # Setting DEFAULT_AI_SERVICE = 'replay' also switches to replay mode.
+    'replay': {
+        'mode': 'live',
+        'directory': os.path.join(BASE_DIR, 'replay_recordings'),
+        'latency_scale': 1.0,
+        'latency_seconds': None,
+        'latency_jitter_seconds': 0.0,
+        'error_rate': 0.0,
+        'miss_policy': 'synthetic',
+        'seed': None,
+    },
+    # Live provider clients pooled per API key (services/providers/client_registry.py)
+    'client_pool': {
+        'max_clients': 64,
+        'ttl_seconds': 900,
+        'max_connections': 20,
+        'max_keepalive_connections': 10,
+        'keepalive_expiry_seconds': 30.0,
+        'timeout_seconds': 60.0,
+    },
+    # Cache for bullet generation/enhancement responses (services/response_cache.py)
+    'response_cache': {
+        'enabled': True,
+        'max_entries': 2048,
+        'ttl_seconds': 24 * 60 * 60,
+    },
+    # Identical concurrent bullet generation/enhancement calls share one provider call
+    # (services/single_flight.py); duplicates stop waiting after wait_timeout_seconds
+    'single_flight': {
+        'enabled': True,
+        'wait_timeout_seconds': 90.0,
+    },
+    # Hedging, failover and circuit breakers between ChatGPT and Gemini for the bullet endpoints
+    # (services/providers/provider_router.py). A slow call is hedged to the other provider after
+    # the provider's p95 latency (hedge_default_delay_seconds until hedge_min_samples are seen).
+    'provider_router': {
+        'hedging_enabled': True,
+        'latency_window': 200,
+        'hedge_min_samples': 20,
+        'hedge_default_delay_seconds': 8.0,
+        'hedge_min_delay_seconds': 1.0,
+        'hedge_max_delay_seconds': 15.0,
+        'breaker_failure_threshold': 5,
+        'breaker_reset_seconds': 30.0,
+        'max_hedge_threads': 16,
+    },
+    # Time budget and retry policy for bullet/project AI calls (services/deadlines.py). Every provider
+    # call of a request shares request_budget_seconds; transient errors are retried with capped,
+    # jittered exponential backoff that never runs past the budget.
+    'deadlines': {
+        'request_budget_seconds': 30.0,
+        'call_budget_seconds': 60.0,
+        'max_attempts': 3,
+        'backoff_base_seconds': 0.5,
+        'backoff_max_seconds': 4.0,
+        'min_attempt_seconds': 0.5,
+    },
+    # Token-bucket limits checked before every bullet/project AI call (services/rate_limiter.py).
+    # Each call takes a token from the user's bucket (by subscription_type), then from the API key's
+    # and the provider's buckets; bursts queue up to max_wait_seconds, beyond that the view returns 429.
+    'rate_limits': {
+        'enabled': True,
+        'max_wait_seconds': 10.0,
+        'tiers': {
+            'free': {'rate_per_minute': 10, 'burst': 5},
+            'premium': {'rate_per_minute': 60, 'burst': 20},
+        },
+        'default_tier': 'free',
+        'api_key': {'rate_per_minute': 120, 'burst': 30},
+        'providers': {
+            'chatgpt': {'rate_per_minute': 500, 'burst': 50},
+            'gemini': {'rate_per_minute': 300, 'burst': 30},
+        },
+        'idle_bucket_ttl_seconds': 3600,
+        'max_buckets': 10000,
+    },
 }
 
@@ -13,6 +13,7 @@ from .views import (
     download_resume_view,
     project_enhancement_view,
     experience_enhancement_view,
+    batch_enhancement_view,
     api_usage_status_view
 )
 from .views.change_template_view import change_template_view
@@ -31,6 +32,8 @@ urlpatterns = [
     path('resumes/create/', modification_resume_view.create_resume_meta_view, name='create_resume_meta'),
 
     path('resumes/upload/', resume_upload_view.upload_resume, name='upload_resume'),
+    path('resumes/upload/jobs/<int:job_id>/status/', resume_upload_view.upload_job_status,
+         name='upload_job_status'),
 
     path('resumes/<int:resume_id>/select-template/',
          template_selection_view.TemplateSelectionView.as_view(),
@@ -64,6 +67,7 @@ urlpatterns = [
     path('ai/enhance-bullet/', experience_enhancement_view.enhance_bullet, name='enhance_bullet'),
     path('ai/check-bullet-strength/', experience_enhancement_view.check_bullet_strength, name='check_bullet_strength'),
     path('ai/enhance-project-bullet/', project_enhancement_view.enhance_project_bullet, name='enhance_project_bullet'),
+    path('ai/enhance-bullets-batch/', batch_enhancement_view.enhance_bullets_batch, name='enhance_bullets_batch'),
     path('ai/project-bullet-form/', project_enhancement_view.project_bullet_enhancement_form,
          name='project_bullet_form'),
 
@@ -71,6 +75,7 @@ urlpatterns = [
 
     # API usage stats
     path('api/usage-stats/', api_usage_status_view.get_ai_usage_stats, name='api_usage_stats'),
+    path('api/rate-limits/', api_usage_status_view.get_rate_limit_status, name='rate_limit_status'),
 
     # Demo Resume Paths
     path('demo/<str:resume_type_slug>/<slug:template_slug>/',
@@ -0,0 +1,85 @@
+# job_portal/management/commands/benchmark_parser.py
+
+import os
+import json
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from services.parser.benchmark_corpus import generate_corpus
+from services.parser.parser_benchmark import (
+    BENCHMARK_PATHS, compare_to_baseline, load_baseline, run_benchmark, save_baseline
+)
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE_PATH = os.path.join(settings.BASE_DIR, 'benchmarks', 'parser_baseline.json')
+
+
+class Command(BaseCommand):
+    help = ("Benchmark ResumeParserService on a corpus of resumes with ground-truth JSON: extraction time, "
+            "memory, tokens sent and field-level accuracy for the basic, heuristic, replay (full LLM parse) "
+            "and replay-tiered paths.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('corpus', help="Corpus directory (resume files plus <name>.json ground truth).")
+        parser.add_argument('--generate', action='store_true',
+                            help="Generate a synthetic corpus into the directory first.")
+        parser.add_argument('--count', type=int, default=18, help="Resumes to generate (default: 18).")
+        parser.add_argument('--seed', type=int, default=0, help="Seed for the generated corpus (default: 0).")
+        parser.add_argument('--paths', nargs='+', choices=BENCHMARK_PATHS, default=list(BENCHMARK_PATHS),
+                            help="Parser paths to measure (default: all). The replay paths need recorded responses.")
+        parser.add_argument('--repeat', type=int, default=1, help="Runs per file and path (default: 1).")
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH,
+                            help="Baseline JSON path (default: benchmarks/parser_baseline.json).")
+        parser.add_argument('--save-baseline', action='store_true', help="Save this run as the new baseline.")
+        parser.add_argument('--compare', action='store_true',
+                            help="Compare against the baseline and exit non-zero on regressions.")
+        parser.add_argument('--json', dest='json_output', default=None, help="Also write per-file results here.")
+
+    def handle(self, *args, **options):
+        corpus_dir = os.path.abspath(options['corpus'])
+        if options['generate']:
+            written = generate_corpus(corpus_dir, count=options['count'], seed=options['seed'])
+            self.stdout.write(f"Generated {len(written)} resume(s) in {corpus_dir}.")
+        if not os.path.isdir(corpus_dir):
+            raise CommandError(f"Not a directory: {corpus_dir}")
+
+        report = run_benchmark(corpus_dir, paths=options['paths'], repeat=max(1, options['repeat']))
+        if not report['results']:
+            raise CommandError(f"No resumes with ground-truth JSON found in {corpus_dir}")
+        summary = report['summary']
+
+        self.stdout.write(f"{'path':<10}{'format':<8}{'files':>6}{'accuracy':>10}{'extract ms':>12}"
+                          f"{'total ms':>10}{'p95 ms':>9}{'tokens':>8}{'alloc MB':>10}{'errors':>8}")
+        for path_name, formats in summary.items():
+            for file_format, metrics in formats.items():
+                self.stdout.write(
+                    f"{path_name:<10}{file_format:<8}{metrics['files']:>6}{metrics['accuracy']:>10.3f}"
+                    f"{metrics['extraction_ms']:>12.1f}{metrics['total_ms']:>10.1f}{metrics['p95_total_ms']:>9.1f}"
+                    f"{metrics['tokens_sent']:>8.0f}{metrics['peak_python_alloc_mb']:>10.2f}{metrics['errors']:>8}"
+                )
+        any_path = next(iter(summary.values()))['all']
+        if any_path['process_peak_rss_mb'] is not None:
+            self.stdout.write(f"Peak RSS: {any_path['process_peak_rss_mb']:.1f} MB "
+                              f"(extraction workers: {any_path['children_peak_rss_mb']:.1f} MB)")
+
+        if options['json_output']:
+            with open(options['json_output'], 'w', encoding='utf-8') as output_file:
+                json.dump(report, output_file, indent=2)
+
+        if options['compare']:
+            if not os.path.exists(options['baseline']):
+                raise CommandError(f"No baseline at {options['baseline']}; run with --save-baseline first.")
+            regressions = compare_to_baseline(summary, load_baseline(options['baseline']))
+            if regressions:
+                for regression in regressions:
+                    self.stderr.write(f"REGRESSION {regression}")
+                raise CommandError(f"{len(regressions)} regression(s) against {options['baseline']}")
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+        if options['save_baseline']:
+            save_baseline(summary, options['baseline'])
+            self.stdout.write(f"Baseline saved to {options['baseline']}.")
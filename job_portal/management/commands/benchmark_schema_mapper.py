@@ -0,0 +1,50 @@
+# job_portal/management/commands/benchmark_schema_mapper.py
+
+import time
+import random
+import logging
+
+from django.core.management.base import BaseCommand
+
+from services.parser.benchmark_corpus import CORPUS_SIZES, generate_ground_truth
+from job_portal import schema_mapper
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = ("Micro-benchmark the per-resume cost of converting parser output to model fields "
+            "(schema_mapper.map_parsed_resume) on generated resumes.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200, help="Resumes per size (default: 200).")
+        parser.add_argument('--repeat', type=int, default=5, help="Conversions per resume (default: 5).")
+        parser.add_argument('--seed', type=int, default=0, help="Seed for the generated resumes (default: 0).")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        repeat = max(1, options['repeat'])
+
+        # The first call compiles the validators; report it separately from the steady state
+        started = time.perf_counter()
+        schema_mapper.map_parsed_resume(generate_ground_truth(rng, 'small'))
+        self.stdout.write(f"First conversion (includes compiling validators): "
+                          f"{(time.perf_counter() - started) * 1000:.1f} ms")
+
+        self.stdout.write(f"{'size':<8}{'resumes':>8}{'rows':>7}{'mean us':>10}{'p50 us':>9}{'p95 us':>9}")
+        for size in CORPUS_SIZES:
+            resumes = [generate_ground_truth(rng, size) for _ in range(max(1, options['count']))]
+            timings = []
+            rows = 0
+            for parsed in resumes:
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    mapped = schema_mapper.map_parsed_resume(parsed)
+                timings.append((time.perf_counter() - started) / repeat * 1_000_000)
+                rows += sum(len(value) for value in mapped.data.values() if isinstance(value, list))
+            timings.sort()
+            self.stdout.write(
+                f"{size:<8}{len(resumes):>8}{rows / len(resumes):>7.1f}{sum(timings) / len(timings):>10.1f}"
+                f"{timings[len(timings) // 2]:>9.1f}{timings[min(len(timings) - 1, int(len(timings) * 0.95))]:>9.1f}"
+            )
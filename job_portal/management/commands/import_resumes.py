@@ -0,0 +1,177 @@
+# job_portal/management/commands/import_resumes.py
+
+import os
+import time
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Q
+
+from auth_app.models import CustomUser
+from job_portal.resume_import import (
+    ImportCheckpoint, SubmissionPacer, create_imported_resumes, find_resume_files, get_import_rate_limits,
+    parse_resume_file, resolve_provider
+)
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILENAME = '.import_resumes_checkpoint.jsonl'
+
+
+class Command(BaseCommand):
+    help = "Bulk-import a directory of resumes (PDF, DOCX, TXT) as draft Resumes for one user."
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help="Directory holding the resume files.")
+        parser.add_argument('--user', required=True, help="Username or email of the account that will own the resumes.")
+        parser.add_argument('--ai-provider', choices=['gemini', 'chatgpt'], default='gemini',
+                            help="AI provider to parse with, using the user's API key (default: gemini).")
+        parser.add_argument('--no-ai', action='store_true', help="Use the heuristic parser only.")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Parser processes (default: CPU count; 0 parses in this process).")
+        parser.add_argument('--batch-size', type=int, default=25,
+                            help="Resumes written per database transaction (default: 25).")
+        parser.add_argument('--rate-limit', type=float, default=None,
+                            help="Files whose parse starts per second (not provider calls; a sectioned parse makes "
+                                 "several); defaults to RESUME_IMPORT_RATE_LIMITS for the provider.")
+        parser.add_argument('--checkpoint', default=None,
+                            help=f"Checkpoint JSONL path (default: <directory>/{CHECKPOINT_FILENAME}).")
+        parser.add_argument('--retry-failed', action='store_true',
+                            help="Retry files the checkpoint records as failed.")
+        parser.add_argument('--no-recursive', action='store_true', help="Don't descend into subdirectories.")
+
+    def handle(self, *args, **options):
+        directory = os.path.abspath(options['directory'])
+        if not os.path.isdir(directory):
+            raise CommandError(f"Not a directory: {directory}")
+
+        user = CustomUser.objects.filter(Q(username=options['user']) | Q(email=options['user'])).first()
+        if user is None:
+            raise CommandError(f"No user with username or email '{options['user']}'")
+
+        ai_parsing_enabled = not options['no_ai']
+        provider = resolve_provider(user, ai_parsing_enabled, options['ai_provider'])
+        rate_limit = options['rate_limit'] if options['rate_limit'] is not None else get_import_rate_limits().get(provider, 0)
+        self.batch_size = max(1, options['batch_size'])
+
+        self.directory = directory
+        self.user = user
+        self.checkpoint = ImportCheckpoint(options['checkpoint'] or os.path.join(directory, CHECKPOINT_FILENAME))
+        files = find_resume_files(directory, recursive=not options['no_recursive'])
+        pending = [path for path in files if not self.checkpoint.is_done(path, options['retry_failed'])]
+        skipped = len(files) - len(pending)
+
+        self.stdout.write(
+            f"Importing {len(pending)} file(s) for {user.username} with {provider} "
+            f"({skipped} already in checkpoint, rate limit {rate_limit or 'none'} file(s)/s)."
+        )
+
+        self.succeeded = 0
+        self.failures = Counter()
+        self.parse_seconds = []
+        self.batch = []
+        parse_args = (user.chatgpt_api_key, user.gemini_api_key, ai_parsing_enabled, options['ai_provider'])
+        pacer = SubmissionPacer(rate_limit)
+
+        started = time.perf_counter()
+        try:
+            if options['workers'] > 0:
+                self._run_pool(pending, parse_args, pacer, options['workers'])
+            else:
+                for path in pending:
+                    pacer.wait()
+                    self._collect(parse_resume_file(directory, path, *parse_args))
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("Interrupted; saving finished files. Re-run to resume."))
+        finally:
+            self._flush()
+        elapsed = time.perf_counter() - started
+
+        self._report(elapsed, skipped)
+
+    def _run_pool(self, pending, parse_args, pacer, workers):
+        # Forked workers must not share the parent's database sockets
+        connections.close_all()
+        max_in_flight = workers * 2
+        remaining = iter(pending)
+        in_flight = set()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            try:
+                while True:
+                    for path in remaining:
+                        pacer.wait()
+                        in_flight.add(executor.submit(parse_resume_file, self.directory, path, *parse_args))
+                        if len(in_flight) >= max_in_flight:
+                            break
+                    if not in_flight:
+                        break
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._collect(future.result())
+            except KeyboardInterrupt:
+                for future in in_flight:
+                    future.cancel()
+                raise
+
+    def _collect(self, result):
+        self.parse_seconds.append(result['seconds'])
+        if result['error']:
+            self._record_failures([result], result['error'])
+            return
+        self.batch.append(result)
+        if len(self.batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        """Write the pending batch to the database, then checkpoint it."""
+        batch, self.batch = self.batch, []
+        if not batch:
+            return
+        try:
+            created = create_imported_resumes(self.user, self.directory, batch)
+        except Exception as e:
+            # One bad resume shouldn't sink the batch: retry individually to isolate it
+            logger.error(f"Batch import failed, retrying one by one: {str(e)}")
+            created = {}
+            for result in batch:
+                try:
+                    created.update(create_imported_resumes(self.user, self.directory, [result]))
+                except Exception as item_error:
+                    self._record_failures([result], f"Database error: {str(item_error)}")
+
+        self.checkpoint.record([
+            {'path': result['path'], 'status': 'success', 'resume_id': created[result['path']],
+             'seconds': round(result['seconds'], 3)}
+            for result in batch if result['path'] in created
+        ])
+        self.succeeded += len(created)
+        self.stdout.write(f"Saved {self.succeeded} resume(s) so far.")
+
+    def _record_failures(self, results, error):
+        self.failures[error[:120]] += len(results)
+        self.checkpoint.record([
+            {'path': result['path'], 'status': 'failed', 'error': error, 'seconds': round(result['seconds'], 3)}
+            for result in results
+        ])
+        for result in results:
+            self.stdout.write(self.style.ERROR(f"{result['path']}: {error}"))
+
+    def _report(self, elapsed, skipped):
+        failed = sum(self.failures.values())
+        processed = self.succeeded + failed
+        throughput = processed / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.succeeded}/{processed} file(s) in {elapsed:.1f}s "
+            f"({throughput:.2f} files/s), {failed} failed, {skipped} skipped."
+        ))
+        if self.parse_seconds:
+            timings = sorted(self.parse_seconds)
+            p50 = timings[len(timings) // 2]
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(f"Parse time per file: p50 {p50:.2f}s, p95 {p95:.2f}s, max {timings[-1]:.2f}s.")
+        for error, count in self.failures.most_common(5):
+            self.stdout.write(f"  {count} x {error}")
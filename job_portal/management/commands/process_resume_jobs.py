@@ -0,0 +1,59 @@
+# job_portal/management/commands/process_resume_jobs.py
+
+import time
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from job_portal.resume_parse_jobs import claim_next_job, requeue_stale_jobs, run_resume_parse_job
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Process queued resume uploads (ResumeParseJob) off the request path."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the pending queue once and exit instead of polling.")
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds to sleep when the queue is empty (default: 2).")
+        parser.add_argument('--max-jobs', type=int, default=0,
+                            help="Exit after processing this many jobs (0 = unlimited).")
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help="Requeue jobs left running longer than this many seconds (default: 600).")
+
+    def handle(self, *args, **options):
+        once = options['once']
+        poll_interval = options['poll_interval']
+        max_jobs = options['max_jobs']
+        stale_after = options['stale_after']
+
+        requeued = requeue_stale_jobs(stale_after)
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale job(s)."))
+
+        processed = 0
+        succeeded = 0
+        try:
+            while not max_jobs or processed < max_jobs:
+                close_old_connections()
+                job = claim_next_job()
+                if job is None:
+                    if once:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                started = time.monotonic()
+                ok = run_resume_parse_job(job)
+                processed += 1
+                succeeded += int(ok)
+                status = self.style.SUCCESS("success") if ok else self.style.ERROR("failed")
+                self.stdout.write(f"Job {job.id}: {status} in {time.monotonic() - started:.2f}s")
+        except KeyboardInterrupt:
+            self.stdout.write("Interrupted, stopping worker.")
+
+        self.stdout.write(f"Processed {processed} job(s), {succeeded} succeeded.")
@@ -947,6 +947,7 @@ class APIUsage(models.Model):
         ('pending', 'Pending'),  # Request initiated, awaiting response
         ('success', 'Success'),  # API call successful
         ('failed', 'Failed'),  # API call failed (e.g., network issue, API error)
+        ('timeout', 'Timed Out'),  # API call ran out of its request time budget
         ('error', 'Application Error')  # Error in our application logic before/after API call
     ]
 
@@ -1076,6 +1077,73 @@ class APIUsage(models.Model):
         super().save(*args, **kwargs)
 
 
+class ResumeParseJob(models.Model):
+    """
+    Queued resume upload waiting to be parsed off the request path.
+    The upload view creates a pending job, the process_resume_jobs worker claims it,
+    parses the file and creates the draft Resume, and the status view polls it.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCESS = 'success'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCESS, 'Success'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='resume_parse_jobs')
+    resume_file = models.FileField(
+        upload_to=resume_upload_path,
+        help_text="Uploaded file; reused as the draft resume's source file once parsed."
+    )
+    original_filename = models.CharField(max_length=255, blank=True)
+    ai_engine = models.CharField(max_length=20, default='gemini')
+    ai_parsing_enabled = models.BooleanField(default=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    resume = models.ForeignKey(
+        Resume, on_delete=models.SET_NULL, null=True, blank=True, related_name='parse_jobs',
+        help_text="Draft resume created from this upload."
+    )
+    error_message = models.TextField(blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    parse_snapshot = models.JSONField(
+        blank=True, null=True,
+        help_text="Parser, extracted text, section texts and parsed data, kept so a later upload "
+                  "of a revised version can be re-parsed incrementally."
+    )
+    changed_sections = models.JSONField(
+        blank=True, null=True,
+        help_text="Sections re-parsed when this upload was handled as a revision of an earlier one."
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = "Resume Parse Job"
+        verbose_name_plural = "Resume Parse Jobs"
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Parse job {self.id} for {self.original_filename} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCESS, self.STATUS_FAILED)
+
+    @property
+    def is_revision(self):
+        return self.changed_sections is not None
+
+
 
 # def resume_upload_path(instance, filename):
 #     """Generate a unique path for uploaded resume files."""
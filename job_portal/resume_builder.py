@@ -0,0 +1,167 @@
+# job_portal/resume_builder.py
+
+import logging
+from functools import lru_cache
+
+from django.db import transaction
+
+from .models import (
+    Skill, Experience, Education, Certification, Project, Language, CustomData,
+    ExperienceBulletPoint, ProjectBulletPoint
+)
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Related model -> keys of parsed data holding its items (alternate spellings are merged, in order)
+RELATED_SECTIONS = {
+    Experience: ('experiences', 'experience'),
+    Education: ('educations', 'education'),
+    Skill: ('skills',),
+    Project: ('projects', 'project'),
+    Certification: ('certifications', 'certification'),
+    Language: ('languages', 'language'),
+    CustomData: ('custom_sections', 'custom_data'),
+}
+
+# Parent model -> (bullet model, bullet foreign key field)
+BULLET_MODELS = {
+    Experience: (ExperienceBulletPoint, 'experience'),
+    Project: (ProjectBulletPoint, 'project'),
+}
+
+
+@lru_cache(maxsize=None)
+def model_field_map(model_class):
+    """
+    Field name -> Field for the values parsed data may set on model_class, computed once per model.
+    Relations, the primary key and auto timestamps are excluded.
+    """
+    return {
+        field.name: field for field in model_class._meta.concrete_fields
+        if not field.primary_key and not field.is_relation
+        and not getattr(field, 'auto_now', False) and not getattr(field, 'auto_now_add', False)
+    }
+
+
+def section_items(parsed_data, model_class):
+    """All parsed items for one related model, across its alternate keys."""
+    items = []
+    for data_key in RELATED_SECTIONS[model_class]:
+        value = parsed_data.get(data_key)
+        if isinstance(value, list):
+            items.extend(item for item in value if item)
+    return items
+
+
+def bullet_descriptions(bullets_data):
+    descriptions = []
+    for bullet in bullets_data or []:
+        if isinstance(bullet, dict):
+            bullet = bullet.get('description')
+        if isinstance(bullet, str) and bullet.strip():
+            descriptions.append(bullet.strip())
+    return descriptions
+
+
+def prepare_item(model_class, item_data):
+    """
+    Split one item of model field values (see schema_mapper.map_parsed_resume) into the values
+    the model stores and its bullet descriptions. Unknown keys are ignored.
+
+    Returns:
+        tuple: (field values, bullet descriptions); field values are empty if nothing maps
+    """
+    field_map = model_field_map(model_class)
+    values = {key: value for key, value in item_data.items() if key in field_map}
+    if model_class is Experience and values.get('is_current'):
+        values['end_date'] = None  # Mirrors Experience.save(), which bulk_create bypasses
+    bullets = bullet_descriptions(item_data.get('bullet_points')) if model_class in BULLET_MODELS else []
+    return values, bullets
+
+
+def build_related_instances(resume_instance, parsed_data):
+    """
+    Build unsaved related rows for a resume from parsed data.
+
+    Returns:
+        list of tuple: (model class, [instances], [bullet descriptions per instance]) in RELATED_SECTIONS order
+    """
+    built = []
+    for model_class in RELATED_SECTIONS:
+        instances, bullets = [], []
+        for item_data in section_items(parsed_data, model_class):
+            if not isinstance(item_data, dict):
+                continue
+            values, item_bullets = prepare_item(model_class, item_data)
+            if values:
+                instances.append(model_class(resume=resume_instance, **values))
+                bullets.append(item_bullets)
+        if instances:
+            built.append((model_class, instances, bullets))
+    return built
+
+
+def apply_resume_fields(resume_instance, parsed_data):
+    """Set personal details and the summary on the resume; returns the names of the fields set."""
+    updated = []
+    for field, value in (parsed_data.get('personal_info') or {}).items():
+        if hasattr(resume_instance, field) and value is not None:
+            setattr(resume_instance, field, value)
+            updated.append(field)
+
+    summary = parsed_data.get('summary')
+    summary_text = summary.get('summary_text', '') if isinstance(summary, dict) else summary
+    if summary_text:
+        resume_instance.summary = summary_text
+        updated.append('summary')
+    return updated
+
+
+def bulk_create_related(built):
+    """
+    Write rows from build_related_instances(): one INSERT per related table, then one per bullet
+    table. Needs a database that returns primary keys from bulk inserts (PostgreSQL, SQLite 3.35+).
+
+    Returns:
+        int: Number of rows written
+    """
+    pending_bullets = {}
+    written = 0
+    for model_class, instances, bullets in built:
+        model_class.objects.bulk_create(instances)
+        written += len(instances)
+        if model_class not in BULLET_MODELS:
+            continue
+        bullet_model, foreign_key_field = BULLET_MODELS[model_class]
+        for parent, descriptions in zip(instances, bullets):
+            if parent.pk is None:
+                raise RuntimeError(f"{model_class.__name__} bulk insert did not return primary keys")
+            pending_bullets.setdefault(bullet_model, []).extend(
+                bullet_model(**{foreign_key_field: parent, 'description': description}) for description in descriptions
+            )
+
+    for bullet_model, bullet_instances in pending_bullets.items():
+        if bullet_instances:
+            bullet_model.objects.bulk_create(bullet_instances)
+            written += len(bullet_instances)
+    return written
+
+
+def bulk_populate_resume(resume_instance, parsed_data):
+    """
+    Populate a Resume and its related rows from parsed data in a fixed, small number of queries:
+    the resume save, one bulk INSERT per non-empty related table and one per bullet table.
+
+    Args:
+        resume_instance (Resume): Saved or unsaved resume to populate
+        parsed_data (dict): Model field values keyed like RELATED_SECTIONS plus 'personal_info' and
+            'summary', as produced by schema_mapper.map_parsed_resume
+
+    Returns:
+        int: Number of related rows written
+    """
+    with transaction.atomic():
+        apply_resume_fields(resume_instance, parsed_data)
+        resume_instance.save()
+        return bulk_create_related(build_related_instances(resume_instance, parsed_data))
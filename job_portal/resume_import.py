@@ -0,0 +1,171 @@
+# job_portal/resume_import.py
+
+import os
+import json
+import time
+import logging
+import threading
+import traceback
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from services.parser.resume_parser_service import ResumeParserService
+from .models import Resume
+from .resume_parse_jobs import populate_resume_from_parsed_data
+from .schema_mapper import map_parsed_resume
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+IMPORTABLE_EXTENSIONS = ('pdf', 'docx', 'txt')
+
+# Files whose parse may start per second for each provider during bulk imports (0 = unlimited).
+# This paces files, not provider calls: a tiered or sectioned parse can make several calls per file.
+DEFAULT_IMPORT_RATE_LIMITS = {
+    'chatgpt': 2.0,
+    'gemini': 1.0,
+    'heuristic': 0,
+}
+
+
+def get_import_rate_limits():
+    """Return settings.RESUME_IMPORT_RATE_LIMITS merged over the defaults."""
+    return {**DEFAULT_IMPORT_RATE_LIMITS, **getattr(settings, 'RESUME_IMPORT_RATE_LIMITS', {})}
+
+
+def find_resume_files(directory, recursive=True):
+    """Return importable resume paths under directory, relative to it and sorted for a stable order."""
+    found = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for filename in files:
+            if os.path.splitext(filename)[1].lower().strip('.') in IMPORTABLE_EXTENSIONS:
+                found.append(os.path.relpath(os.path.join(root, filename), directory))
+        if not recursive:
+            break
+    return sorted(found)
+
+
+def resolve_provider(user, ai_parsing_enabled, ai_provider):
+    """The provider a parse will actually use, so the right rate limit applies."""
+    if not ai_parsing_enabled:
+        return 'heuristic'
+    if ai_provider == 'chatgpt' and getattr(user, 'chatgpt_api_key', None):
+        return 'chatgpt'
+    if ai_provider == 'gemini' and getattr(user, 'gemini_api_key', None):
+        return 'gemini'
+    return 'heuristic'
+
+
+class SubmissionPacer:
+    """
+    Spaces out file submissions to at most rate_per_second; a rate of 0 disables pacing.
+    Pacing is per file, so a provider sees up to rate_per_second times the calls one parse makes.
+    """
+
+    def __init__(self, rate_per_second):
+        self.interval = 1.0 / rate_per_second if rate_per_second else 0
+        self.next_allowed = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self.next_allowed - now
+            self.next_allowed = max(now, self.next_allowed) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def parse_resume_file(directory, path, openai_key, gemini_key, ai_parsing_enabled, ai_provider):
+    """
+    Parse one resume (path relative to directory) in a pool worker.
+    Touches no database, so workers need no connections.
+
+    Returns:
+        dict: path, parsed (or None), error (or None), seconds
+    """
+    started = time.perf_counter()
+    try:
+        parser_service = ResumeParserService(user_openai_key=openai_key, user_gemini_key=gemini_key)
+        parsed = parser_service.parse_resume(
+            file_path=os.path.join(directory, path),
+            ai_parsing_enabled=ai_parsing_enabled,
+            ai_provider=ai_provider
+        )
+        error = parsed.get("error") if isinstance(parsed, dict) else "Parser returned no data"
+    except Exception as e:
+        logger.error(f"Error importing {path}: {str(e)}\n{traceback.format_exc()}")
+        parsed, error = None, str(e)
+    return {
+        'path': path,
+        'parsed': None if error else parsed,
+        'error': error,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def create_imported_resumes(user, directory, results):
+    """
+    Create draft Resumes for a batch of successful parse results in one transaction.
+    The original file is stored like an upload would be.
+
+    Returns:
+        dict: {relative path: resume id}
+    """
+    created = {}
+    max_title_length = Resume._meta.get_field('title').max_length
+    with transaction.atomic():
+        for result in results:
+            filename = os.path.basename(result['path'])
+            title = f"Imported from {filename}"
+            if len(title) > max_title_length:
+                title = title[:max_title_length - 3] + "..."
+
+            resume = Resume(user=user, title=title, publication_status=Resume.DRAFT, status='uploaded')
+            with open(os.path.join(directory, result['path']), 'rb') as source_file:
+                resume.source_uploaded_file.save(filename, ContentFile(source_file.read()), save=False)
+            resume.save()
+            populate_resume_from_parsed_data(resume, map_parsed_resume(result['parsed']).data)
+            created[result['path']] = resume.id
+    return created
+
+
+class ImportCheckpoint:
+    """
+    Append-only JSONL record of finished files, one line per file, so an interrupted
+    import can pick up where it stopped. Later lines win for a repeated path.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as checkpoint_file:
+                for line_number, line in enumerate(checkpoint_file, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                        self.entries[entry['path']] = entry
+                    except (ValueError, KeyError):
+                        # A run killed mid-write leaves a partial last line
+                        logger.warning(f"Skipping unreadable checkpoint line {line_number} in {path}")
+
+    def is_done(self, path, retry_failed=False):
+        entry = self.entries.get(path)
+        if entry is None:
+            return False
+        return entry['status'] == 'success' or not retry_failed
+
+    def record(self, entries):
+        with open(self.path, 'a', encoding='utf-8') as checkpoint_file:
+            for entry in entries:
+                checkpoint_file.write(json.dumps(entry) + "\n")
+                self.entries[entry['path']] = entry
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
@@ -0,0 +1,288 @@
+# job_portal/resume_parse_jobs.py
+
+import os
+import logging
+import traceback
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from services.parser.resume_parser_service import ResumeParserService
+from services.parser.revision_diff import get_revision_settings
+from .models import (
+    Resume, Skill, Experience, Education, Certification, Project, Language, CustomData, ResumeParseJob
+)
+from .resume_builder import (
+    BULLET_MODELS, bulk_create_related, bulk_populate_resume, model_field_map, prepare_item,
+    section_items
+)
+from .schema_mapper import map_parsed_resume
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Parsed-schema section -> related model whose rows hold it
+PATCHABLE_SECTIONS = {
+    "Work Experience": Experience,
+    "Education": Education,
+    "Skills": Skill,
+    "Projects": Project,
+    "Certifications": Certification,
+    "Languages": Language,
+    "Custom Sections": CustomData,
+}
+
+
+def claim_next_job():
+    """
+    Atomically claim the oldest pending job and mark it running.
+    The conditional UPDATE means two workers can never claim the same job.
+    Returns the claimed ResumeParseJob or None if the queue is empty.
+    """
+    pending_ids = ResumeParseJob.objects.filter(
+        status=ResumeParseJob.STATUS_PENDING
+    ).order_by('created_at').values_list('id', flat=True)[:10]
+
+    for job_id in pending_ids:
+        claimed = ResumeParseJob.objects.filter(
+            id=job_id, status=ResumeParseJob.STATUS_PENDING
+        ).update(status=ResumeParseJob.STATUS_RUNNING, started_at=timezone.now(), attempts=F('attempts') + 1)
+        if claimed:
+            return ResumeParseJob.objects.select_related('user').get(id=job_id)
+    return None
+
+
+def requeue_stale_jobs(stale_after_seconds):
+    """Return jobs stuck in running (e.g. the worker died) to the pending queue."""
+    cutoff = timezone.now() - timedelta(seconds=stale_after_seconds)
+    return ResumeParseJob.objects.filter(
+        status=ResumeParseJob.STATUS_RUNNING, started_at__lt=cutoff
+    ).update(status=ResumeParseJob.STATUS_PENDING, started_at=None)
+
+
+def _previous_parse_jobs(job):
+    """
+    The user's most recent successful uploads that still carry a parse snapshot, newest first.
+    None when there are none, so the parser can serve a parse-cache hit without revision checks.
+    """
+    revision_settings = get_revision_settings()
+    if not revision_settings['enabled']:
+        return None
+    return list(
+        ResumeParseJob.objects.filter(
+            user=job.user, status=ResumeParseJob.STATUS_SUCCESS, resume__isnull=False, parse_snapshot__isnull=False
+        ).exclude(id=job.id).select_related('resume').order_by('-completed_at')[:revision_settings['max_candidates']]
+    ) or None
+
+
+def run_resume_parse_job(job):
+    """
+    Parse the job's uploaded file and record the outcome on the job.
+
+    A new upload that is a close revision of one of the user's earlier uploads is re-parsed
+    incrementally; if that earlier upload's resume is still a draft, only the rows of the
+    changed sections are patched. Otherwise a new draft Resume is created.
+    Returns True on success, False on failure.
+    """
+    user = job.user
+    parser_service = ResumeParserService(
+        user_openai_key=getattr(user, 'chatgpt_api_key', None),
+        user_gemini_key=getattr(user, 'gemini_api_key', None)
+    )
+
+    try:
+        # Read the stored upload once; the parser hashes and extracts from these bytes in memory
+        with job.resume_file.open('rb') as stored_file:
+            file_bytes = stored_file.read()
+
+        file_extension = os.path.splitext(job.resume_file.name)[1].lower().strip('.')
+        previous_jobs = _previous_parse_jobs(job)
+        parsed_result = parser_service.parse_resume(
+            file_bytes=file_bytes,
+            file_type=file_extension,
+            ai_parsing_enabled=job.ai_parsing_enabled,
+            ai_provider=job.ai_engine,
+            previous_versions=None if previous_jobs is None else [
+                {**previous_job.parse_snapshot, 'key': previous_job.id} for previous_job in previous_jobs
+            ]
+        )
+
+        if "error" in parsed_result:
+            _mark_job_failed(job, parsed_result["error"])
+            return False
+
+        # Parser output (in the LLM schema) -> model field values, validated in one pass
+        mapped = map_parsed_resume(parsed_result)
+
+        revision = parser_service.last_revision
+        base_resume = None
+        if revision:
+            base_resume = next(previous_job.resume for previous_job in previous_jobs
+                               if previous_job.id == revision['base'])
+            if base_resume.publication_status != Resume.DRAFT:
+                base_resume = None  # Never rewrite a published resume; the revision becomes a new draft
+
+        if base_resume is not None:
+            with transaction.atomic():
+                patch_resume_from_parsed_data(base_resume, mapped.data, revision['changed_sections'])
+                base_resume.source_uploaded_file = job.resume_file.name
+                base_resume.save(update_fields=['source_uploaded_file', 'updated_at'])
+                # Only the newest parse of a resume can serve as the base for its next revision
+                ResumeParseJob.objects.filter(resume=base_resume).update(parse_snapshot=None)
+                _mark_job_succeeded(job, base_resume, parser_service.build_parse_snapshot(parsed_result),
+                                    revision['changed_sections'])
+
+            logger.info(f"Parse job {job.id} patched draft resume {base_resume.id} "
+                        f"(changed sections: {', '.join(revision['changed_sections']) or 'none'})")
+            return True
+
+        new_resume_title = f"Draft from {job.original_filename}"
+        max_title_length = Resume._meta.get_field('title').max_length
+        if len(new_resume_title) > max_title_length:
+            new_resume_title = new_resume_title[:max_title_length - 3] + "..."
+
+        with transaction.atomic():
+            new_resume = Resume.objects.create(
+                user=user,
+                title=new_resume_title,
+                publication_status=Resume.DRAFT,
+                status='uploaded',  # Mark as uploaded
+                source_uploaded_file=job.resume_file.name  # Reuse the stored upload, no second write
+            )
+            populate_resume_from_parsed_data(new_resume, mapped.data)
+            _mark_job_succeeded(job, new_resume, parser_service.build_parse_snapshot(parsed_result),
+                                revision['changed_sections'] if revision else None)
+
+        logger.info(f"Parse job {job.id} created draft resume {new_resume.id}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Parse job {job.id} failed: {str(e)}\n{traceback.format_exc()}")
+        _mark_job_failed(job, f"An error occurred while processing the resume: {str(e)}")
+        return False
+
+
+def _mark_job_succeeded(job, resume, parse_snapshot, changed_sections):
+    job.resume = resume
+    job.status = ResumeParseJob.STATUS_SUCCESS
+    job.error_message = None
+    job.parse_snapshot = parse_snapshot
+    job.changed_sections = changed_sections
+    job.completed_at = timezone.now()
+    job.save(update_fields=['resume', 'status', 'error_message', 'parse_snapshot', 'changed_sections',
+                            'completed_at', 'updated_at'])
+
+
+def _mark_job_failed(job, error_message):
+    job.status = ResumeParseJob.STATUS_FAILED
+    job.error_message = error_message
+    job.completed_at = timezone.now()
+    job.save(update_fields=['status', 'error_message', 'completed_at', 'updated_at'])
+
+
+def populate_resume_from_parsed_data(resume_instance, parsed_data_dict):
+    """
+    Helper to populate a Resume instance and its related objects from mapped parser output
+    (see schema_mapper.map_parsed_resume). Rows are written with one bulk INSERT per table (see resume_builder.bulk_populate_resume).
+    """
+    return bulk_populate_resume(resume_instance, parsed_data_dict)
+
+
+def _differs(field, current_value, new_value):
+    """Compare a parsed value with a stored one in the field's Python type (e.g. date strings vs dates)."""
+    try:
+        new_value = field.to_python(new_value)
+    except ValidationError:
+        pass
+    return current_value != new_value
+
+
+def _patch_related(resume_instance, model_class, items_data):
+    """
+    Bring one related section in line with parsed items without rebuilding it: rows are
+    matched to items by creation order, changed fields are updated in place, extra items
+    are created and rows with no item left are deleted.
+
+    Returns:
+        dict: counts of 'updated', 'created' and 'deleted' rows
+    """
+    counts = {'updated': 0, 'created': 0, 'deleted': 0}
+    prepared = [prepare_item(model_class, item_data) for item_data in items_data if isinstance(item_data, dict)]
+    prepared = [(values, bullets) for values, bullets in prepared if values]
+    field_map = model_field_map(model_class)
+
+    existing = list(model_class.objects.filter(resume=resume_instance).order_by('id'))
+    for obj, (values, bullets) in zip(existing, prepared):
+        changed_fields = [name for name, value in values.items() if _differs(field_map[name], getattr(obj, name), value)]
+        for name in changed_fields:
+            setattr(obj, name, values[name])
+        if changed_fields:
+            obj.save(update_fields=changed_fields + ['updated_at'])
+
+        bullets_changed = False
+        if model_class in BULLET_MODELS:
+            bullet_model, foreign_key_field = BULLET_MODELS[model_class]
+            if list(obj.bullet_points.order_by('id').values_list('description', flat=True)) != bullets:
+                obj.bullet_points.all().delete()
+                bullet_model.objects.bulk_create(
+                    [bullet_model(**{foreign_key_field: obj, 'description': description}) for description in bullets])
+                bullets_changed = True
+        if changed_fields or bullets_changed:
+            counts['updated'] += 1
+
+    extra = prepared[len(existing):]
+    if extra:
+        bulk_create_related([(
+            model_class,
+            [model_class(resume=resume_instance, **values) for values, _ in extra],
+            [bullets for _, bullets in extra],
+        )])
+        counts['created'] = len(extra)
+
+    stale_ids = [obj.id for obj in existing[len(prepared):]]
+    if stale_ids:
+        model_class.objects.filter(id__in=stale_ids).delete()
+        counts['deleted'] = len(stale_ids)
+    return counts
+
+
+def patch_resume_from_parsed_data(resume_instance, parsed_data_dict, changed_sections):
+    """
+    Apply a revision's mapped parser output (see schema_mapper.map_parsed_resume) to an existing
+    resume, touching only the changed sections.
+
+    Personal details and the summary are written field by field when they differ; related
+    sections are patched row by row (see _patch_related). Sections not listed in
+    changed_sections are left exactly as they are, including any edits the user made.
+
+    Returns:
+        dict: schema section -> row counts, for logging
+    """
+    report = {}
+    with transaction.atomic():
+        resume_fields = []
+        if "Personal Information" in changed_sections:
+            for field, value in (parsed_data_dict.get('personal_info') or {}).items():
+                if hasattr(resume_instance, field) and value is not None and getattr(resume_instance, field) != value:
+                    setattr(resume_instance, field, value)
+                    resume_fields.append(field)
+
+        if "Professional Summary" in changed_sections:
+            summary = parsed_data_dict.get('summary')
+            summary_text = summary.get('summary_text', '') if isinstance(summary, dict) else summary
+            if summary_text and summary_text != resume_instance.summary:
+                resume_instance.summary = summary_text
+                resume_fields.append('summary')
+
+        if resume_fields:
+            resume_instance.save(update_fields=resume_fields + ['updated_at'])
+            report["Resume"] = {'updated': len(resume_fields)}
+
+        for schema_key, model_class in PATCHABLE_SECTIONS.items():
+            if schema_key in changed_sections:
+                report[schema_key] = _patch_related(resume_instance, model_class,
+                                                    section_items(parsed_data_dict, model_class))
+    return report
@@ -0,0 +1,484 @@
+# job_portal/schema_mapper.py
+
+import re
+import logging
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Annotated, Callable, Optional
+from urllib.parse import urlparse
+
+from django.db import models as django_models
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, TypeAdapter, create_model
+
+from .models import Resume, Skill, Experience, Education, Certification, Project, Language
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+MONTHS = {name: number for number, name in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), 1)}
+ISO_DATE_RE = re.compile(r'^(?P<year>(?:19|20)\d{2})(?:[-/.](?P<month>\d{1,2}))?(?:[-/.](?P<day>\d{1,2}))?')
+MONTH_NAME_DATE_RE = re.compile(r'(?P<month>[A-Za-z]{3})[a-z]*\.?,?\s+(?P<year>(?:19|20)\d{2})')
+MONTH_FIRST_DATE_RE = re.compile(r'^(?P<month>\d{1,2})/(?P<year>(?:19|20)\d{2})')
+NUMBER_RE = re.compile(r'-?\d+(?:\.\d+)?')
+PRESENT_RE = re.compile(r'^(?:present|current|now|ongoing|today)$', re.IGNORECASE)
+TRUE_STRINGS = {'true', 'yes', 'y', '1', 'current', 'present'}
+
+DEGREE_TYPE_PATTERNS = (
+    ('high_school', re.compile(r'high school|secondary|\bged\b', re.IGNORECASE)),
+    ('associate', re.compile(r'associate', re.IGNORECASE)),
+    ('doctorate', re.compile(r'doctor|ph\.?\s?d', re.IGNORECASE)),
+    ('master', re.compile(r'master|m\.?b\.?a|^m\.?\s?(?:s|a|sc|eng|tech)\b', re.IGNORECASE)),
+    ('bachelor', re.compile(r'bachelor|^b\.?\s?(?:s|a|sc|eng|tech|com)\b', re.IGNORECASE)),
+    ('professional', re.compile(r'professional|\b(?:md|jd|dds|pharmd)\b', re.IGNORECASE)),
+    ('diploma', re.compile(r'diploma|certificate', re.IGNORECASE)),
+    ('coursework', re.compile(r'coursework|bootcamp|exchange', re.IGNORECASE)),
+)
+SKILL_CATEGORY_PATTERNS = (
+    ('INTERPERSONAL', re.compile(r'soft|interpersonal|communication|leadership|people', re.IGNORECASE)),
+    ('TOOLS_SOFTWARE', re.compile(r'tool|software|platform', re.IGNORECASE)),
+    ('TECHNICAL_DIGITAL', re.compile(
+        r'program|language|framework|librar|technical|technolog|database|cloud|devops|web|data|digital|\bit\b',
+        re.IGNORECASE)),
+    ('CORE_COMPETENCY', re.compile(r'core|professional|management|business|domain', re.IGNORECASE)),
+)
+LANGUAGE_LEVEL_WORDS = (
+    ('NATIVE_OR_BILINGUAL', re.compile(r'native|bilingual|mother', re.IGNORECASE)),
+    ('FULL_PROFESSIONAL', re.compile(r'fluent|full|advanced|proficient|c1|c2', re.IGNORECASE)),
+    ('PROFESSIONAL_WORKING', re.compile(r'professional|working|intermediate|b2', re.IGNORECASE)),
+    ('LIMITED_WORKING', re.compile(r'limited|conversational|b1|a2', re.IGNORECASE)),
+    ('ELEMENTARY', re.compile(r'elementary|basic|beginner|a1', re.IGNORECASE)),
+)
+# Lower bound of the 0-100 proficiency score for each Language level, highest first
+LANGUAGE_LEVEL_SCORES = (
+    (90, 'NATIVE_OR_BILINGUAL'), (75, 'FULL_PROFESSIONAL'), (55, 'PROFESSIONAL_WORKING'), (30, 'LIMITED_WORKING'),
+    (0, 'ELEMENTARY'),
+)
+
+
+# --- Value converters: lenient, never raise; unusable values become None ---
+
+def to_text(value, max_length=None):
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        value = ", ".join(str(part) for part in value if part is not None)
+    text = " ".join(str(value).split())
+    if not text or text.lower() in ('null', 'none', 'n/a'):
+        return None
+    return text[:max_length] if max_length else text
+
+
+def to_date(value):
+    """'2020-03-15', '2020-03', '2020', 'Mar 2020' or '03/2020' -> date (missing month/day default to 1)."""
+    if isinstance(value, date):
+        return value
+    text = to_text(value)
+    if not text:
+        return None
+    match = ISO_DATE_RE.match(text)
+    if match:
+        year, month, day = int(match['year']), int(match['month'] or 1), int(match['day'] or 1)
+    else:
+        match = MONTH_NAME_DATE_RE.search(text)
+        if match and match['month'].lower() in MONTHS:
+            year, month, day = int(match['year']), MONTHS[match['month'].lower()], 1
+        else:
+            match = MONTH_FIRST_DATE_RE.match(text)
+            if not match:
+                return None
+            year, month, day = int(match['year']), int(match['month']), 1
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return date(year, month, 1) if 1 <= month <= 12 else date(year, 1, 1)
+
+
+def to_bool(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return bool(value)
+    return str(value).strip().lower() in TRUE_STRINGS if value is not None else False
+
+
+def to_number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float, Decimal)):
+        return value
+    match = NUMBER_RE.search(str(value)) if value is not None else None
+    return float(match.group(0)) if match else None
+
+
+def to_int(value, minimum=None, maximum=None):
+    number = to_number(value)
+    if number is None:
+        return None
+    number = int(round(number))
+    if minimum is not None:
+        number = max(minimum, number)
+    if maximum is not None:
+        number = min(maximum, number)
+    return number
+
+
+def to_decimal(value, max_digits, decimal_places):
+    number = to_number(value)
+    if number is None:
+        return None
+    try:
+        number = Decimal(str(number)).quantize(Decimal(1).scaleb(-decimal_places))
+    except InvalidOperation:
+        return None
+    return number if len(number.as_tuple().digits) <= max_digits else None
+
+
+def to_url(value, max_length=None):
+    text = to_text(value)
+    if not text or ' ' in text:
+        return None
+    if not re.match(r'^[a-z][a-z0-9+.-]*://', text, re.IGNORECASE):
+        text = f"https://{text.lstrip('/')}"
+    if '.' not in urlparse(text).netloc:
+        return None
+    return text if not max_length or len(text) <= max_length else None
+
+
+def to_bullets(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.splitlines()
+    bullets = []
+    for bullet in value if isinstance(value, (list, tuple)) else [value]:
+        if isinstance(bullet, dict):
+            bullet = bullet.get('description') or bullet.get('Description')
+        text = to_text(bullet)
+        if text:
+            bullets.append(text)
+    return bullets
+
+
+def to_degree_type(value):
+    text = to_text(value)
+    if not text:
+        return None
+    return next((key for key, pattern in DEGREE_TYPE_PATTERNS if pattern.search(text)), 'other')
+
+
+def to_language_level(value):
+    if isinstance(value, str) and not NUMBER_RE.search(value):
+        return next((key for key, pattern in LANGUAGE_LEVEL_WORDS if pattern.search(value)), None)
+    score = to_int(value, 0, 100)
+    if score is None:
+        return None
+    return next(level for lower_bound, level in LANGUAGE_LEVEL_SCORES if score >= lower_bound)
+
+
+def _django_field_converter(model_field):
+    """Converter and Python type for a Django field, from its class and constraints."""
+    max_length = getattr(model_field, 'max_length', None)
+    if isinstance(model_field, django_models.DateField):
+        return to_date, Optional[date]
+    if isinstance(model_field, django_models.BooleanField):
+        return to_bool, bool
+    if isinstance(model_field, django_models.DecimalField):
+        return (lambda value: to_decimal(value, model_field.max_digits, model_field.decimal_places)), Optional[Decimal]
+    if isinstance(model_field, django_models.IntegerField):
+        return to_int, Optional[int]
+    if isinstance(model_field, django_models.URLField):
+        return (lambda value: to_url(value, max_length)), Optional[str]
+    return (lambda value: to_text(value, max_length)), Optional[str]
+
+
+# --- Declarative mapping from LLM schema keys to model fields ---
+
+@dataclass(frozen=True, eq=False)
+class SectionMapping:
+    """
+    How one list section of the parsed schema becomes rows of a related model.
+
+    fields maps parsed keys to model fields; converters override the converter derived from
+    the Django field; identity lists fields of which at least one must be non-empty; unique
+    names a field deduplicated case-insensitively (for unique_together constraints); scalar_key
+    is the parsed key a bare string item stands for (some providers return ["Python", ...]);
+    finalize adjusts each converted item with access to the raw parsed item.
+    """
+    schema_key: str
+    data_key: str
+    model: type
+    fields: dict
+    identity: tuple
+    converters: dict = field(default_factory=dict)
+    extra_fields: tuple = ()
+    bullets_key: Optional[str] = None
+    unique: Optional[str] = None
+    scalar_key: Optional[str] = None
+    finalize: Optional[Callable] = None
+
+
+def _finalize_experience(values, raw_item):
+    end_text = to_text(raw_item.get("End date"))
+    if end_text and PRESENT_RE.match(end_text):
+        values['is_current'] = True
+    if values.get('is_current'):
+        values['end_date'] = None  # Experience.save() enforces the same; bulk_create bypasses it
+    return values
+
+
+def _finalize_education(values, raw_item):
+    if not values.get('degree_name'):
+        # degree_name is required; fall back to the type's label when only the type was parsed
+        values['degree_name'] = dict(Education.DEGREE_TYPES).get(values.get('degree_type'), '')
+    if not values.get('degree_type'):
+        values['degree_type'] = to_degree_type(values.get('degree_name'))
+    return values
+
+
+def _finalize_skill(values, raw_item):
+    category = values.pop('category', None)
+    other_category = values.pop('other_category', None)
+    choice = next((key for key, pattern in SKILL_CATEGORY_PATTERNS if category and pattern.search(category)), None)
+    if category and not choice:
+        choice, other_category = 'OTHER', other_category or category
+    values['skill_category_choice'] = choice
+    values['skill_category_other'] = other_category[:100] if choice == 'OTHER' and other_category else None
+    return values
+
+
+SECTION_MAPPINGS = (
+    SectionMapping(
+        "Work Experience", 'experiences', Experience,
+        fields={"Job title": 'job_title', "Employer/Company name": 'employer', "Location": 'location',
+                "Start date": 'start_date', "End date": 'end_date', "Is current job": 'is_current'},
+        identity=('job_title', 'employer'), bullets_key="Bullet points", finalize=_finalize_experience,
+    ),
+    SectionMapping(
+        "Education", 'educations', Education,
+        fields={"School name": 'school_name', "Location": 'location', "Degree": 'degree_name',
+                "Degree type": 'degree_type', "Field of study": 'field_of_study',
+                "Graduation date": 'graduation_date', "GPA": 'gpa', "Description": 'description'},
+        identity=('school_name',), converters={'degree_type': to_degree_type}, finalize=_finalize_education,
+    ),
+    SectionMapping(
+        "Skills", 'skills', Skill,
+        fields={"Skill name": 'skill_name', "Estimated proficiency level": 'proficiency_level'},
+        extra_fields=(("Category", 'category'), ("Other category", 'other_category')),
+        identity=('skill_name',), converters={'proficiency_level': lambda value: to_int(value, 0, 100)},
+        unique='skill_name', scalar_key="Skill name", finalize=_finalize_skill,
+    ),
+    SectionMapping(
+        "Projects", 'projects', Project,
+        fields={"Project name": 'project_name', "Summary/description": 'summary', "Start date": 'start_date',
+                "Completion date": 'completion_date', "Project URL": 'project_link', "GitHub URL": 'github_link'},
+        identity=('project_name',), bullets_key="Bullet points",
+    ),
+    SectionMapping(
+        "Certifications", 'certifications', Certification,
+        fields={"Name": 'name', "Institute/Issuing organization": 'issuing_organization',
+                "Completion date": 'issue_date', "Expiration date": 'expiration_date', "Score": 'score',
+                "URL/Link": 'link', "Description": 'description'},
+        identity=('name',),
+    ),
+    SectionMapping(
+        "Languages", 'languages', Language,
+        fields={"Language name": 'language_name',
+                "Proficiency (0-100 where 100 is native and 0 is basic)": 'proficiency'},
+        identity=('language_name',), converters={'proficiency': to_language_level}, unique='language_name',
+        scalar_key="Language name",
+    ),
+)
+
+# Parsed "Personal Information" key -> Resume field
+PERSONAL_INFO_FIELDS = {
+    "First name": 'first_name', "Middle name": 'mid_name', "Last name": 'last_name', "Email": 'email',
+    "Phone number": 'phone', "Address": 'address', "LinkedIn URL": 'linkedin', "GitHub URL": 'github',
+    "Portfolio URL": 'portfolio',
+}
+
+
+def _annotated(converter, python_type):
+    return Annotated[python_type, BeforeValidator(converter)]
+
+
+def _list_of_dicts(value):
+    return [item for item in value if isinstance(item, dict)] if isinstance(value, list) else []
+
+
+@lru_cache(maxsize=None)
+def compile_section(mapping):
+    """
+    Build (once per mapping) a pydantic TypeAdapter that validates and converts a whole parsed
+    list section in one pass. Field types, lengths and digits come from the Django model.
+    """
+    definitions = {}
+    for parsed_key, field_name in mapping.fields.items():
+        model_field = mapping.model._meta.get_field(field_name)
+        converter, python_type = _django_field_converter(model_field)
+        if field_name in mapping.converters:
+            converter, python_type = mapping.converters[field_name], Optional[python_type]
+        default = False if python_type is bool else None
+        definitions[field_name] = (_annotated(converter, python_type), Field(default, alias=parsed_key))
+    for parsed_key, field_name in mapping.extra_fields:
+        definitions[field_name] = (_annotated(to_text, Optional[str]), Field(None, alias=parsed_key))
+    if mapping.bullets_key:
+        definitions['bullet_points'] = (_annotated(to_bullets, list), Field(default_factory=list,
+                                                                            alias=mapping.bullets_key))
+
+    item_model = create_model(
+        f"Parsed{mapping.model.__name__}", __config__=ConfigDict(extra='ignore'), **definitions
+    )
+    return TypeAdapter(Annotated[list[item_model], BeforeValidator(_list_of_dicts)])
+
+
+@lru_cache(maxsize=None)
+def _model_constraints(model):
+    """Fields that can't store NULL: {name: (has default, is text)}."""
+    constraints = {}
+    for model_field in model._meta.concrete_fields:
+        if model_field.null or model_field.primary_key or model_field.is_relation:
+            continue
+        is_text = isinstance(model_field, (django_models.CharField, django_models.TextField))
+        constraints[model_field.name] = (model_field.has_default(), is_text)
+    return constraints
+
+
+def _section_items(mapping, raw_items):
+    if not isinstance(raw_items, list):
+        return []
+    if mapping.scalar_key:
+        raw_items = [{mapping.scalar_key: item} if isinstance(item, str) else item for item in raw_items]
+    return _list_of_dicts(raw_items)
+
+
+def _convert_section(mapping, raw_items, warnings):
+    raw_dicts = _section_items(mapping, raw_items)
+    constraints = _model_constraints(mapping.model)
+    rows, seen = [], set()
+    for raw_item, item in zip(raw_dicts, compile_section(mapping).validate_python(raw_dicts)):
+        values = item.model_dump()
+        if mapping.finalize:
+            values = mapping.finalize(values, raw_item)
+        if not any(values.get(name) for name in mapping.identity):
+            warnings.append(f"{mapping.schema_key}: skipped an entry with no {' or '.join(mapping.identity)}")
+            continue
+
+        usable = True
+        for name in list(values):
+            if values[name] is not None or name not in constraints:
+                continue
+            has_default, is_text = constraints[name]
+            if has_default:
+                del values[name]  # Let the model default apply
+            elif is_text:
+                values[name] = ''
+            else:
+                warnings.append(f"{mapping.schema_key}: skipped '{values.get(mapping.identity[0])}' "
+                                f"with no {name.replace('_', ' ')}")
+                usable = False
+                break
+        if not usable:
+            continue
+
+        if mapping.unique:
+            unique_value = values[mapping.unique].casefold()
+            if unique_value in seen:
+                continue
+            seen.add(unique_value)
+        rows.append(values)
+    return rows
+
+
+class _CustomEntry(BaseModel):
+    model_config = ConfigDict(extra='ignore')
+
+    title: Annotated[Optional[str], BeforeValidator(to_text)] = Field(None, alias="Entry title")
+    description: Annotated[Optional[str], BeforeValidator(to_text)] = Field(None, alias="Description")
+    start_date: Annotated[Optional[date], BeforeValidator(to_date)] = Field(None, alias="Start date")
+    end_date: Annotated[Optional[date], BeforeValidator(to_date)] = Field(None, alias="End date")
+    link: Annotated[Optional[str], BeforeValidator(lambda value: to_url(value, 255))] = Field(None, alias="Link")
+
+
+class _CustomSection(BaseModel):
+    model_config = ConfigDict(extra='ignore')
+
+    title: Annotated[Optional[str], BeforeValidator(lambda value: to_text(value, 150))] = Field(
+        None, alias="Section title")
+    entries: Annotated[list[_CustomEntry], BeforeValidator(_list_of_dicts)] = Field(default_factory=list,
+                                                                                     alias="Entries")
+
+
+CUSTOM_SECTIONS_ADAPTER = TypeAdapter(Annotated[list[_CustomSection], BeforeValidator(_list_of_dicts)])
+
+
+def _convert_custom_sections(raw_sections):
+    """One CustomData row per parsed custom section; its entries become the row's bullet lines."""
+    rows = []
+    for section in CUSTOM_SECTIONS_ADAPTER.validate_python(raw_sections):
+        lines = [" - ".join(part for part in (entry.title, entry.description) if part) for entry in section.entries]
+        lines = [line for line in lines if line]
+        if not section.title and not lines:
+            continue
+        dates = [entry.end_date or entry.start_date for entry in section.entries if entry.end_date or entry.start_date]
+        rows.append({
+            'name': section.title or "Additional Information",
+            'bullet_points': "\n".join(lines) or None,
+            'completion_date': max(dates) if dates else None,
+            'link': next((entry.link for entry in section.entries if entry.link), None),
+        })
+    return rows
+
+
+_PERSONAL_INFO_ADAPTER = None
+
+
+def _personal_info_adapter():
+    global _PERSONAL_INFO_ADAPTER
+    if _PERSONAL_INFO_ADAPTER is None:
+        definitions = {}
+        for parsed_key, field_name in PERSONAL_INFO_FIELDS.items():
+            converter, python_type = _django_field_converter(Resume._meta.get_field(field_name))
+            definitions[field_name] = (_annotated(converter, python_type), Field(None, alias=parsed_key))
+        _PERSONAL_INFO_ADAPTER = TypeAdapter(
+            create_model("ParsedPersonalInformation", __config__=ConfigDict(extra='ignore'), **definitions))
+    return _PERSONAL_INFO_ADAPTER
+
+
+@dataclass
+class MappedResume:
+    """Model kwargs for a Resume and its related rows, shaped for resume_builder, plus what was dropped."""
+    data: dict
+    warnings: list
+
+
+def map_parsed_resume(parsed_data):
+    """
+    Validate and convert a parser payload ("Personal Information", "Work Experience", ...) from any
+    provider into model field values in one pass.
+
+    Returns:
+        MappedResume: data keyed 'personal_info', 'summary', 'experiences', 'educations', 'skills',
+            'projects', 'certifications', 'languages' and 'custom_sections'
+    """
+    parsed_data = parsed_data if isinstance(parsed_data, dict) else {}
+    warnings = []
+
+    personal_info = parsed_data.get("Personal Information")
+    personal_info = personal_info if isinstance(personal_info, dict) else {}
+    data = {
+        'personal_info': {
+            name: value for name, value in
+            _personal_info_adapter().validate_python(personal_info).model_dump().items() if value is not None
+        },
+        'summary': to_text(parsed_data.get("Professional Summary")),
+    }
+    for mapping in SECTION_MAPPINGS:
+        data[mapping.data_key] = _convert_section(mapping, parsed_data.get(mapping.schema_key), warnings)
+    data['custom_sections'] = _convert_custom_sections(parsed_data.get("Custom Sections"))
+
+    if warnings:
+        logger.info(f"Schema mapping dropped {len(warnings)} entr(y/ies): {'; '.join(warnings)}")
+    return MappedResume(data=data, warnings=warnings)
@@ -1,3 +1,1429 @@
-from django.test import TestCase
+import io
+import os
+import re
+import json
+import random
+import asyncio
+import time
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import httpx
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.conf import settings
+from django.urls import reverse
+
+from auth_app.models import CustomUser
+from services.parser.parse_cache import ParseResultCache
+from services.parser import pdf_extractor
+from services.parser.pdf_extractor import extract_pdf, fitz
+from services.parser.docx_extractor import extract_docx
+from services.parser.extraction_sandbox import ExtractionSandbox
+from services.parser.heuristic_parser import HeuristicResumeParser
+from services.parser.layout_segmenter import LayoutSegmenter
+from services.parser.benchmark_corpus import generate_corpus, generate_ground_truth
+from services.parser.parser_benchmark import compare_to_baseline, run_benchmark, score_parse
+from services.parser.prompt_compaction import compact_resume_text, estimate_tokens
+from services.parser.resume_parser_service import ResumeParserService
+from services.providers.client_registry import ClientRegistry, DEFAULT_CLIENT_POOL_SETTINGS
+from services.providers.provider_router import ProviderRouter, DEFAULT_PROVIDER_ROUTER_SETTINGS
+from services.providers.replay_provider import (
+    RecordingOpenAIClient, ReplayInjectedError, build_gemini_model, build_openai_client
+)
+from services import bullets_ai_services
+from services.bullets_ai_services import (
+    AIClientManager, aenhance_bullet_chatgpt, enhance_bullet_chatgpt, enhance_bullets_batch_chatgpt
+)
+from services.response_cache import get_response_cache, last_call_was_cached
+from services.single_flight import SingleFlight
+from services.deadlines import ai_deadline, call_with_deadline, acall_with_deadline
+from services.rate_limiter import DEFAULT_RATE_LIMIT_SETTINGS, RateLimiter, RateLimitExceeded
+from .models import APIUsage, ResumeParseJob, Resume, Experience, ExperienceBulletPoint, Project, ProjectBulletPoint
+from .schema_mapper import map_parsed_resume
+from .resume_parse_jobs import (
+    claim_next_job, run_resume_parse_job, populate_resume_from_parsed_data, patch_resume_from_parsed_data
+)
+
+
+class ParseResultCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = ParseResultCache(self.temp_dir.name, max_entries=2, max_size_bytes=0, max_age_seconds=3600)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_key_depends_on_provider_model_and_prompt(self):
+        base_key = ParseResultCache.build_key('abc', 'chatgpt:pdf', 'gpt-4o-mini', 'v1')
+        self.assertEqual(base_key, ParseResultCache.build_key('abc', 'chatgpt:pdf', 'gpt-4o-mini', 'v1'))
+        self.assertNotEqual(base_key, ParseResultCache.build_key('abc', 'gemini:pdf', 'gpt-4o-mini', 'v1'))
+        self.assertNotEqual(base_key, ParseResultCache.build_key('abc', 'chatgpt:pdf', 'gpt-4o', 'v1'))
+        self.assertNotEqual(base_key, ParseResultCache.build_key('abc', 'chatgpt:pdf', 'gpt-4o-mini', 'v2'))
+
+    def test_hit_and_miss_counters(self):
+        self.assertIsNone(self.cache.get('missing'))
+        self.cache.set('present', {'Skills': []})
+        self.assertEqual(self.cache.get('present'), {'Skills': []})
+
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['entries'], 1)
+
+    def test_evicts_least_recently_used_beyond_max_entries(self):
+        now = time.time()
+        for index, key in enumerate(['first', 'second', 'third']):
+            self.cache.set(key, {'index': index})
+            path = os.path.join(self.temp_dir.name, f"{key}.json")
+            os.utime(path, (now - 100 + index, now - 100 + index))
+        self.cache.evict()
+
+        self.assertIsNone(self.cache.get('first'))
+        self.assertEqual(self.cache.get('third'), {'index': 2})
+
+    def test_expired_entries_are_misses(self):
+        self.cache.max_age_seconds = -1
+        self.cache.set('stale', {'Skills': []})
+        self.assertIsNone(self.cache.get('stale'))
+
+
+SAMPLE_RESUME_TEXT = """Jane Doe
+jane.doe@example.com | (555) 123-4567 | Austin, TX
+
+SUMMARY
+Backend engineer with eight years of experience building Django services.
+
+EXPERIENCE
+Senior Software Engineer, Acme Corp, 2019 - Present
+- Led migration of billing services to Django and PostgreSQL
+
+EDUCATION
+B.S. Computer Science, University of Texas, 2015
+
+SKILLS
+Python, Django, PostgreSQL, Docker
+"""
+
+
+class ResumeParseJobTest(TestCase):
+    def setUp(self):
+        self.media_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_dir.name,
+            RESUME_PARSE_CACHE={**settings.RESUME_PARSE_CACHE, 'directory': self.cache_dir.name},
+        )
+        self.settings_override.enable()
+        self.user = CustomUser.objects.create_user(username='jobuser', email='job@example.com', password='pass12345')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.media_dir.cleanup()
+        self.cache_dir.cleanup()
+
+    def _create_job(self, text=SAMPLE_RESUME_TEXT):
+        job = ResumeParseJob(user=self.user, original_filename='resume.txt', ai_parsing_enabled=False)
+        job.resume_file.save('resume.txt', ContentFile(text.encode('utf-8')), save=True)
+        return job
+
+    def test_claim_next_job_marks_running_once(self):
+        job = self._create_job()
+
+        claimed = claim_next_job()
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual(claimed.status, ResumeParseJob.STATUS_RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(claim_next_job())
+
+    def test_run_job_creates_draft_resume(self):
+        job = self._create_job()
+
+        self.assertTrue(run_resume_parse_job(claim_next_job()))
+        job.refresh_from_db()
+        self.assertEqual(job.status, ResumeParseJob.STATUS_SUCCESS)
+        self.assertEqual(job.resume.source_uploaded_file.name, job.resume_file.name)
+        self.assertEqual(job.resume.first_name, "Jane")
+        self.assertEqual(job.resume.experiences.get().employer, "Acme Corp")
+        self.assertEqual(list(job.resume.skills.values_list('skill_name', flat=True).order_by('skill_name')),
+                         ["Django", "Docker", "PostgreSQL", "Python"])
+
+    def test_revised_upload_patches_existing_draft(self):
+        first_job = self._create_job()
+        self.assertTrue(run_resume_parse_job(claim_next_job()))
+        first_job.refresh_from_db()
+        self.assertIsNone(first_job.changed_sections)
+
+        second_job = self._create_job(SAMPLE_RESUME_TEXT.replace("Python, Django", "Python, Go, Django"))
+        self.assertTrue(run_resume_parse_job(claim_next_job()))
+        second_job.refresh_from_db()
+        first_job.refresh_from_db()
+
+        self.assertEqual(second_job.resume_id, first_job.resume_id)
+        self.assertEqual(second_job.changed_sections, ["Skills"])
+        self.assertEqual(second_job.resume.source_uploaded_file.name, second_job.resume_file.name)
+        self.assertEqual(Resume.objects.filter(user=self.user).count(), 1)
+        self.assertIsNone(first_job.parse_snapshot)
+        self.assertIn("Python, Go, Django", second_job.parse_snapshot['text'])
+
+    def test_cached_reupload_skips_extraction(self):
+        first_job = self._create_job()
+        self.assertTrue(run_resume_parse_job(claim_next_job()))
+        first_job.refresh_from_db()
+
+        # The parse-cache entry carries the text, so the revision check runs without re-extracting
+        second_job = self._create_job()
+        with mock.patch.object(ResumeParserService, '_extract_text_and_links') as extract:
+            self.assertTrue(run_resume_parse_job(claim_next_job()))
+        extract.assert_not_called()
+        second_job.refresh_from_db()
+        self.assertEqual((second_job.resume_id, second_job.changed_sections), (first_job.resume_id, []))
+        self.assertEqual(second_job.parse_snapshot['section_texts'], first_job.parse_snapshot['section_texts'])
+
+    def test_patch_updates_only_changed_rows(self):
+        resume = Resume.objects.create(user=self.user, title='Draft')
+        populate_resume_from_parsed_data(resume, {'experiences': [
+            {'job_title': 'Engineer', 'employer': 'Acme', 'start_date': '2019-01-01', 'bullet_points': ['Built APIs']},
+            {'job_title': 'Intern', 'employer': 'Initech', 'start_date': '2017-06-01'},
+        ]})
+        first_id = Experience.objects.filter(resume=resume).order_by('id').first().id
+
+        report = patch_resume_from_parsed_data(resume, {'experiences': [
+            {'job_title': 'Senior Engineer', 'employer': 'Acme', 'start_date': '2019-01-01',
+             'bullet_points': ['Built APIs']},
+        ], 'skills': [{'skill_name': 'Go'}]}, ["Work Experience"])
+
+        self.assertEqual(report["Work Experience"], {'updated': 1, 'created': 0, 'deleted': 1})
+        experience = Experience.objects.get(resume=resume)
+        self.assertEqual((experience.id, experience.job_title), (first_id, 'Senior Engineer'))
+        self.assertEqual(list(experience.bullet_points.values_list('description', flat=True)), ['Built APIs'])
+        self.assertFalse(resume.skills.exists())  # Skills weren't in changed_sections
+
+    def test_populate_writes_each_table_once(self):
+        resume = Resume.objects.create(user=self.user, title='Draft')
+        parsed = {
+            'personal_info': {'first_name': 'Jane', 'last_name': 'Doe'},
+            'summary': {'summary_text': 'Backend engineer.'},
+            'experiences': [{'job_title': f'Engineer {i}', 'employer': 'Acme', 'start_date': '2019-01-01',
+                             'is_current': i == 0, 'end_date': '2020-01-01', 'bullet_points': ['One', 'Two']}
+                            for i in range(3)],
+            'experience': [{'job_title': 'Intern', 'employer': 'Initech', 'start_date': '2017-06-01'}],
+            'education': [{'school_name': 'UT', 'degree_name': 'B.S.'}],
+            'skills': [{'skill_name': name} for name in ('Python', 'Django', 'Go', 'SQL')],
+            'projects': [{'project_name': 'Billing', 'bullet_points': [{'description': 'Shipped'}]}],
+            'languages': [{'language_name': 'English'}],
+        }
+
+        # Savepoint, resume UPDATE, 5 related tables, 2 bullet tables and the savepoint release
+        with self.assertNumQueries(10):
+            written = populate_resume_from_parsed_data(resume, parsed)
+
+        self.assertEqual(written, 11 + 7)
+        self.assertEqual(resume.experiences.count(), 4)
+        self.assertIsNone(resume.experiences.get(job_title='Engineer 0').end_date)
+        self.assertEqual(resume.educations.get().degree_name, 'B.S.')
+        self.assertEqual(resume.projects.get().project_name, 'Billing')
+        self.assertEqual(ExperienceBulletPoint.objects.filter(experience__resume=resume).count(), 6)
+
+    def test_upload_redirects_to_job_status(self):
+        self.client.force_login(self.user)
+        upload = ContentFile(SAMPLE_RESUME_TEXT.encode('utf-8'), name='resume.txt')
+        response = self.client.post(reverse('job_portal:upload_resume'),
+                                    {'resume_file': upload, 'ai_engine': 'gemini'})
+
+        job = ResumeParseJob.objects.get(user=self.user)
+        self.assertRedirects(response, reverse('job_portal:upload_job_status', args=[job.id]))
+        self.assertEqual(ResumeParseJob.objects.filter(user=self.user).count(), 1)
+
+    def test_status_endpoint_polls_then_redirects(self):
+        job = self._create_job()
+        self.client.force_login(self.user)
+        url = reverse('job_portal:upload_job_status', args=[job.id])
+
+        response = self.client.get(url, HTTP_HX_REQUEST='true')
+        self.assertContains(response, 'hx-trigger="every 2s"')
+
+        resume = Resume.objects.create(user=self.user, title='Draft')
+        ResumeParseJob.objects.filter(id=job.id).update(status=ResumeParseJob.STATUS_SUCCESS, resume=resume)
+        response = self.client.get(url, HTTP_HX_REQUEST='true')
+        self.assertIn(str(resume.id), response['HX-Redirect'])
+
+
+class ImportResumesCommandTest(TestCase):
+    def setUp(self):
+        self.media_dir = tempfile.TemporaryDirectory()
+        self.import_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_dir.name,
+            RESUME_PARSE_CACHE={**settings.RESUME_PARSE_CACHE, 'directory': self.cache_dir.name},
+        )
+        self.settings_override.enable()
+        self.user = CustomUser.objects.create_user(username='cohort', email='cohort@example.com', password='pass12345')
+        for filename, text in (('jane.txt', SAMPLE_RESUME_TEXT), ('empty.txt', 'too short')):
+            with open(os.path.join(self.import_dir.name, filename), 'w', encoding='utf-8') as resume_file:
+                resume_file.write(text)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.media_dir.cleanup()
+        self.import_dir.cleanup()
+        self.cache_dir.cleanup()
+
+    def _import(self, workers=0):
+        output = io.StringIO()
+        call_command('import_resumes', self.import_dir.name, user='cohort@example.com', no_ai=True,
+                     workers=workers, stdout=output)
+        return output.getvalue()
+
+    def test_imports_and_resumes_from_checkpoint(self):
+        output = self._import()
+
+        self.assertIn("Imported 1/2 file(s)", output)
+        self.assertIn("files/s", output)
+        resume = Resume.objects.get(user=self.user)
+        self.assertEqual(resume.title, "Imported from jane.txt")
+        self.assertTrue(resume.source_uploaded_file.name)
+
+        checkpoint_path = os.path.join(self.import_dir.name, '.import_resumes_checkpoint.jsonl')
+        with open(checkpoint_path, encoding='utf-8') as checkpoint_file:
+            entries = [json.loads(line) for line in checkpoint_file]
+        self.assertEqual(sorted(entry['status'] for entry in entries), ['failed', 'success'])
+
+        output = self._import()
+        self.assertIn("2 already in checkpoint", output)
+        self.assertEqual(Resume.objects.filter(user=self.user).count(), 1)
+
+    def test_imports_with_worker_processes(self):
+        import docx
+
+        # A DOCX goes through the extraction sandbox, which each worker process starts for itself
+        document = docx.Document()
+        for line in SAMPLE_RESUME_TEXT.replace("Jane Doe", "John Roe").splitlines():
+            document.add_paragraph(line)
+        document.save(os.path.join(self.import_dir.name, 'john.docx'))
+
+        output = self._import(workers=2)
+
+        self.assertIn("Imported 2/3 file(s)", output)
+        self.assertEqual(sorted(Resume.objects.filter(user=self.user).values_list('first_name', flat=True)),
+                         ["Jane", "John"])
+        checkpoint_path = os.path.join(self.import_dir.name, '.import_resumes_checkpoint.jsonl')
+        with open(checkpoint_path, encoding='utf-8') as checkpoint_file:
+            entries = {entry['path']: entry for entry in map(json.loads, checkpoint_file)}
+        self.assertEqual({path: entry['status'] for path, entry in entries.items()},
+                         {'jane.txt': 'success', 'john.docx': 'success', 'empty.txt': 'failed'})
+        self.assertEqual(entries['john.docx']['resume_id'],
+                         Resume.objects.get(user=self.user, first_name="John").id)
+
+
+class ResumeParserServiceTest(SimpleTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = ParseResultCache(self.temp_dir.name)
+        self.service = ResumeParserService(parse_cache=self.cache)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_parses_bytes_and_buffers_without_touching_disk(self):
+        file_bytes = SAMPLE_RESUME_TEXT.encode('utf-8')
+
+        from_bytes = self.service.parse_resume(file_bytes=file_bytes, file_type='txt', ai_parsing_enabled=False)
+        from_buffer = self.service.parse_resume(file_bytes=io.BytesIO(file_bytes), file_type='txt',
+                                                ai_parsing_enabled=False)
+
+        self.assertNotIn('error', from_bytes)
+        self.assertEqual(from_bytes, from_buffer)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def _use_fake_openai(self, replies, delay=0.0):
+        fake_client = FakeAsyncOpenAI(replies, delay)
+        self.service.openai_client = object()  # Only the async client is used for section requests
+        self.service._make_async_openai_client = lambda: fake_client
+        return fake_client
+
+    def test_tiered_mode_sends_only_low_confidence_sections(self):
+        resume_text = SAMPLE_RESUME_TEXT.replace("Senior Software Engineer, Acme Corp, 2019 - Present", "Acme")
+        fake_client = self._use_fake_openai({
+            "Work Experience": [{"Job title": "Senior Software Engineer", "Employer/Company name": "Acme Corp"}],
+        })
+        parsed = self.service.parse_resume(file_bytes=resume_text.encode('utf-8'), file_type='txt',
+                                           ai_provider='chatgpt', parsing_mode='tiered')
+
+        self.assertEqual(fake_client.requested, ["Work Experience"])
+        self.assertEqual(parsed["Work Experience"][0]["Employer/Company name"], "Acme Corp")
+        self.assertEqual(parsed["Personal Information"]["Email"], "jane.doe@example.com")
+        self.assertEqual(self.service.last_section_stats['sections_sent'], ["Work Experience"])
+
+    def test_revision_reparses_only_changed_sections(self):
+        self._use_fake_openai({"Skills": [{"Skill name": "Python"}, {"Skill name": "Go"}]})
+        self.service.parse_resume(file_bytes=SAMPLE_RESUME_TEXT.encode('utf-8'), file_type='txt',
+                                  ai_provider='chatgpt', parsing_mode='sectioned', previous_versions=[])
+        snapshot = {**self.service.build_parse_snapshot({"Skills": [], "Education": ["kept"]}), 'key': 7}
+
+        fake_client = self._use_fake_openai({"Skills": [{"Skill name": "Python"}, {"Skill name": "Go"}]})
+        revised_text = SAMPLE_RESUME_TEXT.replace("Python, Django", "Python, Go, Django")
+        parsed = self.service.parse_resume(file_bytes=revised_text.encode('utf-8'), file_type='txt',
+                                           ai_provider='chatgpt', previous_versions=[snapshot])
+
+        self.assertEqual(fake_client.requested, ["Skills"])
+        self.assertEqual(self.service.last_revision['base'], 7)
+        self.assertEqual(self.service.last_revision['changed_sections'], ["Skills"])
+        self.assertEqual(parsed["Education"], ["kept"])
+        self.assertIn("Go", [skill["Skill name"] for skill in parsed["Skills"]])
+
+    def test_sectioned_mode_runs_sections_concurrently(self):
+        fake_client = self._use_fake_openai({
+            "Personal Information": {"First name": "Jane", "Last name": "Doe", "Email": None},
+            "Professional Summary": "Backend engineer.",
+            "Work Experience": [],
+            "Education": [],
+            "Skills": "not a list",  # Wrong shape: the heuristic section is kept
+        }, delay=0.2)
+        parsed = self.service.parse_resume(file_bytes=SAMPLE_RESUME_TEXT.encode('utf-8'), file_type='txt',
+                                           ai_provider='chatgpt', parsing_mode='sectioned')
+
+        stats = self.service.last_section_stats
+        self.assertEqual(len(fake_client.requested), 5)
+        self.assertLess(stats['elapsed_seconds'], 0.2 * 3)
+        self.assertEqual(stats['sections_sent'], ["Personal Information", "Professional Summary", "Skills",
+                                                  "Work Experience", "Education"])
+        self.assertEqual(parsed["Professional Summary"], "Backend engineer.")
+        self.assertEqual(parsed["Personal Information"]["Email"], "jane.doe@example.com")
+        self.assertEqual(parsed["Work Experience"], [])
+        self.assertEqual(len(parsed["Skills"]), 4)
+        self.assertTrue(fake_client.closed)
+
+    @override_settings(AI_SETTINGS={**settings.AI_SETTINGS, 'max_resume_tokens': 150})
+    def test_section_prompts_are_compacted_to_the_token_budget(self):
+        bullets = "\n".join(f"- Shipped release {number} of the billing platform" for number in range(200))
+        resume_text = SAMPLE_RESUME_TEXT.replace("- Led migration of billing services to Django and PostgreSQL",
+                                                 bullets)
+        fake_client = self._use_fake_openai({"Work Experience": []})
+        self.service.parse_resume(file_bytes=resume_text.encode('utf-8'), file_type='txt',
+                                  ai_provider='chatgpt', parsing_mode='sectioned')
+
+        stats = self.service.last_compaction_stats
+        self.assertTrue(stats['truncated'])
+        self.assertLessEqual(stats['tokens_after'], 150)
+        self.assertGreater(stats['tokens_before'], 1000)
+        self.assertIn("release 0 of", fake_client.prompts["Work Experience"])
+        self.assertNotIn("release 199 of", fake_client.prompts["Work Experience"])
+        self.assertIn("jane.doe@example.com", fake_client.prompts["Personal Information"])  # Short sections stay whole
+
+
+class FakeAsyncOpenAI:
+    """Stands in for openai.AsyncOpenAI, answering section prompts from canned replies."""
+
+    def __init__(self, replies, delay):
+        self.replies = replies
+        self.delay = delay
+        self.requested = []
+        self.prompts = {}
+        self.closed = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, messages, **kwargs):
+        schema_key = re.search(r'Extract the "([^"]+)" section', messages[-1]['content']).group(1)
+        self.requested.append(schema_key)
+        self.prompts[schema_key] = messages[-1]['content']
+        await asyncio.sleep(self.delay)
+        content = json.dumps({schema_key: self.replies.get(schema_key)})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    async def close(self):
+        self.closed = True
+
+
+@unittest.skipIf(fitz is None, "PyMuPDF not installed")
+class PdfExtractorTest(SimpleTestCase):
+    def _build_pdf(self, page_count):
+        doc = fitz.open()
+        for page_num in range(page_count):
+            page = doc.new_page()
+            page.insert_text((72, 72), f"Page {page_num} content")
+            page.insert_link({'kind': fitz.LINK_URI, 'uri': 'https://github.com/jane', 'from': fitz.Rect(72, 60, 200, 80)})
+        return doc.tobytes()
+
+    def test_parallel_extraction_matches_serial_order(self):
+        pdf_bytes = self._build_pdf(20)
+
+        serial = extract_pdf(pdf_bytes, parallel_page_threshold=100)
+        parallel = extract_pdf(pdf_bytes, parallel_page_threshold=4, max_workers=2)
+
+        self.assertEqual(serial['text'], parallel['text'])
+        self.assertEqual(serial['links'], ['https://github.com/jane'])
+        self.assertEqual(len(parallel['page_timings']), 20)
+
+    def test_page_and_time_budgets(self):
+        pdf_bytes = self._build_pdf(5)
+
+        capped = extract_pdf(pdf_bytes, max_pages=2)
+        self.assertEqual(capped['pages_extracted'], 2)
+        self.assertTrue(capped['truncated'])
+        self.assertNotIn('Page 2 content', capped['text'])
+
+        expired = extract_pdf(pdf_bytes, time_budget_seconds=0)
+        self.assertTrue(expired['timed_out'])
+
+    @override_settings(RESUME_EXTRACTION_SANDBOX={'enabled': False},
+                       RESUME_PDF_EXTRACTION={'parallel_page_threshold': 4, 'max_workers': 2})
+    def test_unsandboxed_parser_uses_parallel_extraction(self):
+        pdf_bytes = self._build_pdf(20)
+        with mock.patch('services.parser.pdf_extractor._extract_parallel',
+                        wraps=pdf_extractor._extract_parallel) as parallel:
+            text, links = ResumeParserService()._extract_from_pdf(pdf_bytes)
+
+        self.assertEqual(parallel.call_count, 1)
+        self.assertEqual(parallel.call_args.args[3], 2)  # max_workers
+        self.assertIn('Page 19 content', text)
+
+
+def _sandbox_pid():
+    return os.getpid()
+
+
+def _sandbox_sleep(seconds):
+    time.sleep(seconds)
+
+
+def _sandbox_allocate(megabytes):
+    return len(bytearray(megabytes * 1024 * 1024))
+
+
+@unittest.skipIf(os.name != 'posix', "Extraction sandbox limits need POSIX rlimits")
+class ExtractionSandboxTest(SimpleTestCase):
+    def setUp(self):
+        self.sandbox = ExtractionSandbox(workers=1, memory_limit_mb=64, cpu_seconds=5, timeout_seconds=2.0,
+                                         max_jobs_per_worker=2)
+
+    def tearDown(self):
+        self.sandbox.close()
+
+    def test_timeout_and_memory_failures_are_structured(self):
+        timed_out = self.sandbox.run(_sandbox_sleep, 10)
+        self.assertFalse(timed_out.ok)
+        self.assertEqual(timed_out.reason, 'timeout')
+        self.assertLess(timed_out.elapsed_seconds, 5)
+
+        out_of_memory = self.sandbox.run(_sandbox_allocate, 256)
+        self.assertFalse(out_of_memory.ok)
+        self.assertEqual(out_of_memory.reason, 'memory')
+
+        self.assertEqual(self.sandbox.run(_sandbox_allocate, 1).value, 1024 * 1024)
+
+    def test_workers_are_recycled_after_max_jobs(self):
+        pids = [self.sandbox.run(_sandbox_pid).value for _ in range(3)]
+        self.assertEqual(pids[0], pids[1])
+        self.assertNotEqual(pids[1], pids[2])
+        self.assertNotIn(os.getpid(), pids)
+
+
+class FakeOpenAI:
+    """Stands in for a live openai.OpenAI client."""
+
+    def __init__(self, content):
+        self.calls = 0
+        self.content = content
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(model=kwargs['model'],
+                               choices=[SimpleNamespace(message=SimpleNamespace(content=self.content),
+                                                        finish_reason='stop')],
+                               usage=SimpleNamespace(prompt_tokens=12, completion_tokens=5))
+
+
+class FakeAsyncChatOpenAI(FakeOpenAI):
+    """Stands in for a live openai.AsyncOpenAI client."""
+
+    async def _create(self, **kwargs):
+        await asyncio.sleep(0)
+        return super()._create(**kwargs)
+
+
+class ClientRegistryTest(SimpleTestCase):
+    def setUp(self):
+        self.registry = ClientRegistry({**DEFAULT_CLIENT_POOL_SETTINGS, 'max_clients': 2})
+
+    def tearDown(self):
+        self.registry.clear()
+
+    def test_clients_are_reused_per_key_and_evicted_lru(self):
+        first = self.registry.openai_client('sk-user-a')
+        self.assertIs(self.registry.openai_client('sk-user-a'), first)
+        self.assertIsNot(self.registry.openai_client('sk-user-b'), first)
+        self.assertNotIn('sk-user-a', repr(list(self.registry._clients.keys())))
+
+        self.registry.gemini_model('g-user-a', 'gemini-pro')  # Third client: evicts the least recently used
+        self.assertIsNot(self.registry.openai_client('sk-user-a'), first)
+        self.assertEqual(self.registry.stats(), {'clients': 2, 'hits': 1, 'misses': 4, 'async_clients': 0})
+
+    def test_gemini_models_are_bound_to_their_own_key(self):
+        model_a = self.registry.gemini_model('g-user-a', 'gemini-pro')
+        model_b = self.registry.gemini_model('g-user-b', 'gemini-pro')
+        self.assertIs(self.registry.gemini_model('g-user-a', 'gemini-1.5-flash')._client, model_a._client)
+        self.assertIsNot(model_a._client, model_b._client)
+        self.assertEqual(model_a._client_manager.client_config['client_options'].api_key, 'g-user-a')
+
+    def test_async_clients_are_pooled_per_event_loop(self):
+        async def two_lookups():
+            return self.registry.async_openai_client('sk-user-a'), self.registry.async_openai_client('sk-user-a')
+
+        sync_client = self.registry.openai_client('sk-user-a')
+        first, again = asyncio.run(two_lookups())
+        self.assertIs(first, again)
+        # Like async views under WSGI: one short-lived loop per request
+        for _ in range(3):
+            other_loop, _ = asyncio.run(two_lookups())
+            self.assertIsNot(other_loop, first)
+        with self.assertRaises(RuntimeError):
+            self.registry.async_openai_client('sk-user-a')  # No running event loop
+
+        self.assertEqual(len(self.registry._async_clients), 1)  # Only the last loop's; closed ones are dropped
+        self.assertIs(self.registry.openai_client('sk-user-a'), sync_client)  # max_clients is 2; not evicted
+
+
+@override_settings(OPENAI_API_KEY='sk-test')
+class ResponseCacheTest(TestCase):
+    def setUp(self):
+        get_response_cache().clear()
+        self.user = CustomUser.objects.create_user(username='cacheuser', email='cache@example.com', password='pass12345')
+        self.client.force_login(self.user)
+        self.live = FakeAsyncChatOpenAI("Cut deploy time by 40% by caching CI builds.")
+
+    def _enhance(self, bullet_text, job_description=''):
+        with mock.patch.object(AIClientManager, 'get_async_openai_client', return_value=self.live):
+            return self.client.get(reverse('job_portal:enhance_bullet'), {
+                'bullet_text': bullet_text, 'ai_engine': 'chatgpt', 'enhancement_type': 'general',
+                'job_description': job_description,
+            }).json()
+
+    def test_identical_requests_skip_provider_and_usage_charge(self):
+        first = self._enhance("Managed deploys", "Python role")
+        second = self._enhance("  Managed   deploys ", "Python  role")
+
+        self.assertEqual(second['enhanced_bullet'], first['enhanced_bullet'])
+        self.assertEqual((first['cached'], second['cached']), (False, True))
+        self.assertEqual(self.live.calls, 1)
+        self.assertEqual(APIUsage.objects.filter(user=self.user).count(), 1)
+
+        self._enhance("Managed deploys", "Go role")  # Different job description: new provider call
+        self.assertEqual(self.live.calls, 2)
+        stats = get_response_cache().stats()['operations']['bullet_enhancement']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+    def test_failures_are_not_cached(self):
+        with mock.patch.object(AIClientManager, 'get_openai_client', return_value=None):
+            self.assertEqual(enhance_bullet_chatgpt("Managed deploys"), ("Managed deploys", 0, 0))
+        self._enhance("Managed deploys")
+        self.assertEqual(self.live.calls, 1)
+
+
+class SingleFlightTest(SimpleTestCase):
+    def setUp(self):
+        self.flight = SingleFlight(wait_timeout_seconds=5)
+
+    def test_concurrent_duplicate_threads_share_one_call(self):
+        release = threading.Event()
+        calls = []
+
+        def slow_call():
+            calls.append(1)
+            release.wait(5)
+            return ['Led a team of 5']
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.flight.do('op', 'key', slow_call)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)  # Let every thread reach the flight before the first call returns
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(shared for _, shared in results), [False, True, True, True])
+        self.assertTrue(all(result == ['Led a team of 5'] for result, _ in results))
+        self.assertEqual(self.flight.stats()['op'], {'calls': 1, 'coalesced': 3, 'coalesced_rate': 0.75})
+
+    def test_async_duplicates_share_one_call_and_errors_propagate(self):
+        calls = []
+
+        async def slow_call():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'Enhanced'
+
+        async def failing_call():
+            await asyncio.sleep(0.01)
+            raise ValueError('provider down')
+
+        async def scenario():
+            shared = await asyncio.gather(*[self.flight.ado('op', 'key', slow_call) for _ in range(5)])
+            failed = await asyncio.gather(*[self.flight.ado('op', 'bad', failing_call) for _ in range(2)],
+                                          return_exceptions=True)
+            return shared, failed
+
+        shared, failed = asyncio.run(scenario())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([flag for _, flag in shared], [False, True, True, True, True])
+        self.assertTrue(all(isinstance(error, ValueError) for error in failed))
+        # Done calls are forgotten, so a later identical call runs again
+        asyncio.run(self.flight.ado('op', 'key', slow_call))
+        self.assertEqual(len(calls), 2)
+
+    @override_settings(OPENAI_API_KEY='sk-test')
+    def test_coalesced_enhancements_are_not_charged(self):
+        get_response_cache().clear()
+        live = FakeAsyncChatOpenAI("Cut deploy time by 40%")
+        original_create = live._create
+
+        async def slow_create(**kwargs):
+            await asyncio.sleep(0.05)
+            return await original_create(**kwargs)
+
+        live.chat.completions.create = slow_create
+
+        async def enhance():
+            result = await aenhance_bullet_chatgpt("Managed deploys", user_api_key='sk-user')
+            return result, last_call_was_cached()
+
+        async def scenario():
+            return await asyncio.gather(enhance(), enhance(), enhance())
+
+        with mock.patch.object(AIClientManager, 'get_async_openai_client', return_value=live), \
+                override_settings(AI_SETTINGS={'response_cache': {'enabled': False}}):
+            results = asyncio.run(scenario())
+
+        self.assertEqual(live.calls, 1)
+        self.assertEqual([tokens for (_, *tokens), _ in results], [[12, 5], [0, 0], [0, 0]])
+        self.assertEqual([cached for _, cached in results], [False, True, True])
+
+
+class ProviderRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ProviderRouter({**DEFAULT_PROVIDER_ROUTER_SETTINGS, 'hedge_default_delay_seconds': 0.05,
+                                      'breaker_failure_threshold': 2, 'breaker_reset_seconds': 60})
+
+    def test_slow_primary_is_hedged_to_alternate(self):
+        def slow_chatgpt():
+            time.sleep(0.5)
+            return 'slow', 10, 10
+
+        routed = self.router.call('op', 'chatgpt', {'chatgpt': slow_chatgpt, 'gemini': lambda: ('fast', 3, 4)})
+
+        self.assertEqual((routed.provider, routed.result, routed.hedged, routed.succeeded), ('gemini', 'fast', True, True))
+        self.assertEqual(self.router.stats()['operations']['op']['wins'], {'gemini': 1})
+
+    def test_breaker_opens_after_repeated_failures_and_fails_over_immediately(self):
+        calls = []
+
+        def failing_chatgpt():
+            calls.append('chatgpt')
+            return 'Error: provider down', 0, 0
+
+        providers = {'chatgpt': failing_chatgpt, 'gemini': lambda: ('ok', 3, 4)}
+        for _ in range(3):
+            routed = self.router.call('op', 'chatgpt', providers)
+            self.assertEqual(routed.provider, 'gemini')
+
+        self.assertEqual(len(calls), 2)  # Third request skipped the open circuit
+        self.assertEqual(self.router.stats()['providers']['chatgpt']['circuit'], 'open')
+        self.assertIsNone(self.router.call('op', 'chatgpt', {'chatgpt': failing_chatgpt}).provider)
+
+    def test_async_loser_is_cancelled(self):
+        cancelled = []
+
+        async def slow_chatgpt():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+            return 'slow', 10, 10
+
+        async def gemini():
+            return 'fast', 3, 4
+
+        async def scenario():
+            routed = await self.router.acall('op', 'chatgpt', {'chatgpt': slow_chatgpt, 'gemini': gemini})
+            await asyncio.sleep(0)
+            return routed
+
+        started = time.monotonic()
+        routed = asyncio.run(scenario())
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual((routed.provider, routed.hedged, cancelled), ('gemini', True, [True]))
+
+
+@override_settings(AI_SETTINGS={'deadlines': {'backoff_base_seconds': 0.01, 'backoff_max_seconds': 0.02,
+                                               'min_attempt_seconds': 0.05}})
+class DeadlineTest(SimpleTestCase):
+    def test_transient_errors_are_retried_within_budget(self):
+        timeouts = []
+
+        def flaky(timeout):
+            timeouts.append(timeout)
+            if len(timeouts) < 3:
+                raise httpx.ConnectError("connection reset")
+            return 'ok'
+
+        with ai_deadline(5) as deadline:
+            self.assertEqual(call_with_deadline(flaky, 'test call'), 'ok')
+        self.assertEqual(len(timeouts), 3)
+        self.assertTrue(timeouts[0] > timeouts[1] > timeouts[2])  # Each attempt gets what's left
+        self.assertFalse(deadline.timed_out)
+
+        with self.assertRaises(ValueError):
+            call_with_deadline(mock.Mock(side_effect=ValueError("bad request")), 'test call')
+
+    def test_stuck_async_call_is_cut_off_at_the_deadline(self):
+        async def stuck(timeout):
+            await asyncio.sleep(5)
+
+        async def scenario():
+            with ai_deadline(0.2) as deadline:
+                with self.assertRaises(TimeoutError):
+                    await acall_with_deadline(stuck, 'test call')
+            return deadline
+
+        started = time.monotonic()
+        deadline = asyncio.run(scenario())
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertTrue(deadline.timed_out)
+
+    def test_nested_deadline_keeps_the_earlier_one(self):
+        with ai_deadline(1) as outer:
+            with ai_deadline(10) as inner:
+                self.assertIs(inner, outer)
+
+
+class RateLimiterTest(SimpleTestCase):
+    def limiter(self, **overrides):
+        return RateLimiter({**DEFAULT_RATE_LIMIT_SETTINGS, **overrides})
+
+    def test_burst_queues_then_rejects_beyond_max_wait(self):
+        limiter = self.limiter(max_wait_seconds=0.15, tiers={'free': {'rate_per_minute': 600, 'burst': 2}})
+        user = SimpleNamespace(pk=1, subscription_type='free')
+        self.assertEqual([limiter.acquire(user, 'chatgpt', 'sk-a') for _ in range(2)], [0.0, 0.0])
+        self.assertAlmostEqual(limiter.acquire(user, 'chatgpt', 'sk-a'), 0.1, delta=0.03)  # Queued, not failed
+
+        slow = self.limiter(max_wait_seconds=0.15, tiers={'free': {'rate_per_minute': 60, 'burst': 1}})
+        slow.acquire(user, 'chatgpt', 'sk-a')
+        with self.assertRaises(RateLimitExceeded) as raised:
+            slow.acquire(user, 'chatgpt', 'sk-a')
+        self.assertEqual(raised.exception.scope, 'user:1')
+        self.assertAlmostEqual(raised.exception.retry_after, 1, delta=0.05)
+        self.assertEqual(slow.rejected, 1)
+
+    def test_busy_user_queues_in_own_bucket_not_the_shared_key(self):
+        # The key takes 10 calls/s and a free user 5/s: five queued requests from one user must not
+        # push back another user's request on the same key
+        limiter = self.limiter(max_wait_seconds=1, api_key={'rate_per_minute': 600, 'burst': 1},
+                               tiers={'free': {'rate_per_minute': 300, 'burst': 1}})
+        busy = SimpleNamespace(pk=1, subscription_type='free')
+        other = SimpleNamespace(pk=2, subscription_type='free')
+
+        async def scenario():
+            busy_calls = [asyncio.ensure_future(limiter.aacquire(busy, 'chatgpt', 'sk-shared')) for _ in range(5)]
+            await asyncio.sleep(0.01)
+            other_wait = await limiter.aacquire(other, 'chatgpt', 'sk-shared')
+            return other_wait, await asyncio.gather(*busy_calls)
+
+        other_wait, busy_waits = asyncio.run(scenario())
+        self.assertLess(other_wait, 0.15)
+        self.assertAlmostEqual(busy_waits[-1], 0.8, delta=0.1)
+
+    def test_limits_follow_subscription_type(self):
+        limiter = self.limiter(max_wait_seconds=0)
+        premium = SimpleNamespace(pk=1, subscription_type='premium')
+        other = SimpleNamespace(pk=2, subscription_type='unknown')  # Falls back to the default tier
+        for _ in range(20):
+            limiter.acquire(premium, 'gemini')
+        for _ in range(5):
+            limiter.acquire(other, 'gemini')
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire(other, 'gemini')
+
+        status = limiter.status(premium, {'shared': ('gemini', 'g-shared')})
+        self.assertEqual(status['buckets']['user']['capacity'], 20)
+        self.assertAlmostEqual(status['buckets']['provider:gemini']['tokens'], 5, delta=0.5)
+        self.assertNotIn('g-shared', json.dumps(status))
+
+    def test_rejected_shared_reservation_refunds_the_user_token(self):
+        limiter = self.limiter(max_wait_seconds=0, api_key={'rate_per_minute': 1, 'burst': 1})
+        user = SimpleNamespace(pk=1, subscription_type='free')
+        limiter.acquire(user, 'chatgpt', 'sk-a')
+        with self.assertRaises(RateLimitExceeded) as raised:
+            limiter.acquire(user, 'chatgpt', 'sk-a')
+        self.assertTrue(raised.exception.scope.startswith('key:chatgpt:'))
+        self.assertAlmostEqual(limiter.status(user, {})['buckets']['user']['tokens'], 4, delta=0.05)
+
+    def test_failover_calls_are_charged_and_rejections_dont_trip_the_breaker(self):
+        limiter = self.limiter(max_wait_seconds=0, api_key={'rate_per_minute': 1, 'burst': 1})
+        router = ProviderRouter({**DEFAULT_PROVIDER_ROUTER_SETTINGS, 'breaker_failure_threshold': 1})
+        providers = {
+            'chatgpt': limiter.limit_call('chatgpt', 'sk-a', lambda: ('Error: provider down', 0, 0)),
+            'gemini': limiter.limit_call('gemini', 'g-a', lambda: ('ok', 3, 4)),
+        }
+        keys = {'chatgpt': ('chatgpt', 'sk-a'), 'gemini': ('gemini', 'g-a')}
+        user = SimpleNamespace(pk=1, subscription_type='free')
+
+        routed = router.call('op', 'chatgpt', providers)
+        self.assertEqual((routed.provider, routed.failed_over), ('gemini', True))
+        buckets = limiter.status(user, keys)['buckets']
+        self.assertLess(buckets['key:gemini']['tokens'], 1)  # The failover call took its own key's token
+        self.assertLess(buckets['provider:gemini']['tokens'], DEFAULT_RATE_LIMIT_SETTINGS['providers']['gemini']['burst'])
+
+        # Both keys are now spent: nothing reaches a provider and the view gets the rejection
+        router.breaker('chatgpt').record_success()
+        routed = router.call('op', 'chatgpt', providers)
+        self.assertIsInstance(routed.error, RateLimitExceeded)
+        self.assertFalse(routed.succeeded)
+        self.assertEqual(router.stats()['providers']['gemini']['circuit'], 'closed')
+
+
+@override_settings(OPENAI_API_KEY='sk-test', GOOGLE_GENAI_API_KEY='g-test')
+class AsyncAIViewsTest(TestCase):
+    def setUp(self):
+        get_response_cache().clear()
+        self.user = CustomUser.objects.create_user(username='asyncuser', email='async@example.com',
+                                                   password='pass12345', gemini_api_key='g-user')
+        self.client.force_login(self.user)
+
+    def test_generate_bullets_awaits_provider_and_logs_usage(self):
+        live = FakeAsyncChatOpenAI("Automated deploys\nResolved 120+ bugs\nMentored 3 engineers")
+        with mock.patch.object(AIClientManager, 'get_async_openai_client', return_value=live):
+            response = self.client.get(reverse('job_portal:ai_generate_bullets'),
+                                       {'job_title': 'Engineer', 'bullet_count': 2, 'ai_engine': 'chatgpt'})
+
+        self.assertContains(response, 'Resolved 120+ bugs')
+        self.assertNotContains(response, 'Mentored 3 engineers')
+        usage = APIUsage.objects.get(user=self.user)
+        self.assertEqual((usage.operation, usage.status, usage.total_tokens),
+                         ('experience_bullet_generation', 'success', 17))
+
+    def test_project_enhancement_logs_one_row_and_skips_cached_repeats(self):
+        model = mock.Mock()
+        model.generate_content_async = mock.AsyncMock(return_value=SimpleNamespace(text="Built billing in Go"))
+        url = reverse('job_portal:enhance_project_bullet')
+        data = {'bullet_text': 'wrote billing', 'ai_engine': 'gemini', 'project_name': 'Billing'}
+        with mock.patch('services.project.project_bullet_point_service.build_gemini_model', return_value=model):
+            first = self.client.post(url, data).json()
+            second = self.client.post(url, data).json()
+
+        self.assertEqual((first['enhanced_bullet'], first['cached'], second['cached']),
+                         ("Built billing in Go", False, True))
+        self.assertEqual(model.generate_content_async.await_count, 1)
+        usage = APIUsage.objects.get(user=self.user)
+        self.assertEqual((usage.operation, usage.status), ('project_bullet_enhancement', 'success'))
+
+    @override_settings(GOOGLE_GENAI_API_KEY='')
+    def test_project_enhancement_without_server_key_is_not_a_provider_failure(self):
+        url = reverse('job_portal:enhance_project_bullet')
+        with mock.patch('job_portal.views.project_enhancement_view.get_provider_router') as router:
+            response = self.client.post(url, {'bullet_text': 'wrote billing', 'ai_engine': 'gemini'})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('not configured', response.json()['error'])
+        router.assert_not_called()  # Never routed, so the shared gemini circuit can't count a failure
+        self.assertFalse(APIUsage.objects.filter(user=self.user).exists())
+
+    @override_settings(AI_SETTINGS={'rate_limits': {'max_wait_seconds': 0,
+                                                    'tiers': {'free': {'rate_per_minute': 1, 'burst': 1}}}})
+    def test_rate_limited_request_gets_429_and_status_shows_buckets(self):
+        model = mock.Mock()
+        model.generate_content_async = mock.AsyncMock(return_value=SimpleNamespace(text="Built billing in Go"))
+        url = reverse('job_portal:enhance_project_bullet')
+        with mock.patch('services.project.project_bullet_point_service.build_gemini_model', return_value=model):
+            first = self.client.post(url, {'bullet_text': 'wrote billing', 'ai_engine': 'gemini'})
+            second = self.client.post(url, {'bullet_text': 'wrote invoices', 'ai_engine': 'gemini'})
+
+        self.assertEqual((first.status_code, second.status_code), (200, 429))
+        self.assertGreater(int(second['Retry-After']), 0)
+        self.assertEqual(model.generate_content_async.await_count, 1)
+        self.assertEqual(APIUsage.objects.filter(user=self.user).count(), 1)
+
+        status = self.client.get(reverse('job_portal:rate_limit_status')).json()
+        self.assertEqual((status['subscription_type'], status['buckets']['user']['capacity']), ('free', 1))
+        self.assertLess(status['buckets']['user']['tokens'], 1)
+        self.assertIn('key:gemini', status['buckets'])
+        self.assertIn('key:chatgpt_shared', status['buckets'])
+        self.assertEqual(status['rejected_total'], 1)
+
+    @override_settings(AI_SETTINGS={'rate_limits': {'max_wait_seconds': 0,
+                                                    'tiers': {'free': {'rate_per_minute': 1, 'burst': 1}}}})
+    def test_open_circuits_refund_the_user_token(self):
+        router = ProviderRouter()
+        for provider in ('chatgpt', 'gemini'):
+            for _ in range(router.router_settings['breaker_failure_threshold']):
+                router.breaker(provider).record_failure()
+        url = reverse('job_portal:enhance_bullet')
+        with mock.patch('job_portal.views.experience_enhancement_view.get_provider_router', return_value=router):
+            first = self.client.get(url, {'bullet_text': 'Managed deploys', 'ai_engine': 'chatgpt'})
+            second = self.client.get(url, {'bullet_text': 'fixed bugs', 'ai_engine': 'chatgpt'})
+
+        # No provider was called, so neither request spent the single token
+        self.assertEqual((first.status_code, second.status_code), (200, 200))
+        self.assertEqual(second.json()['ai_engine'], 'Basic')
+        status = self.client.get(reverse('job_portal:rate_limit_status')).json()
+        self.assertAlmostEqual(status['buckets']['user']['tokens'], 1)
+
+    @override_settings(GOOGLE_GENAI_API_KEY=None,
+                       AI_SETTINGS={'deadlines': {'request_budget_seconds': 0.2, 'min_attempt_seconds': 0.05}})
+    def test_stuck_provider_is_logged_as_timeout(self):
+        self.user.gemini_api_key = None
+        self.user.save()
+        live = FakeAsyncChatOpenAI("never returned")
+
+        async def stuck_create(**kwargs):
+            await asyncio.sleep(5)
+
+        live.chat.completions.create = stuck_create
+        started = time.monotonic()
+        with mock.patch.object(AIClientManager, 'get_async_openai_client', return_value=live):
+            response = self.client.get(reverse('job_portal:enhance_bullet'),
+                                       {'bullet_text': 'Managed deploys', 'ai_engine': 'chatgpt'}).json()
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(response['enhanced_bullet'], 'Managed deploys')
+        self.assertEqual(APIUsage.objects.get(user=self.user).status, 'timeout')
+
+
+@override_settings(OPENAI_API_KEY='sk-test')
+class BatchEnhancementTest(TestCase):
+    def setUp(self):
+        get_response_cache().clear()
+        self.user = CustomUser.objects.create_user(username='batchuser', email='batch@example.com', password='pass12345')
+        self.client.force_login(self.user)
+        self.resume = Resume.objects.create(user=self.user, title='Draft')
+        experience = Experience.objects.create(resume=self.resume, job_title='Engineer', employer='Acme',
+                                               start_date='2019-01-01')
+        project = Project.objects.create(resume=self.resume, project_name='Billing')
+        self.first = ExperienceBulletPoint.objects.create(experience=experience, description='Managed deploys')
+        self.second = ExperienceBulletPoint.objects.create(experience=experience, description='fixed bugs')
+        self.third = ProjectBulletPoint.objects.create(project=project, description='Wrote invoices service')
+
+    def test_whole_resume_in_one_provider_call(self):
+        # The reply skips the project bullet, which falls back to basic enhancement
+        live = FakeOpenAI(json.dumps({'bullets': [
+            {'id': f'experience-{self.first.id}', 'enhanced': 'Automated deploys, cutting release time by 50%'},
+            {'id': f'experience-{self.second.id}', 'enhanced': 'Resolved 120+ production bugs'},
+        ]}))
+        with mock.patch.object(AIClientManager, 'get_openai_client', return_value=live):
+            response = self.client.post(reverse('job_portal:enhance_bullets_batch'),
+                                        {'resume_id': self.resume.id, 'scope': 'resume', 'ai_engine': 'chatgpt'})
+
+        self.assertEqual(live.calls, 1)
+        self.assertContains(response, f'id="enhanced-bullet-experience-{self.first.id}"')
+        self.assertContains(response, 'Resolved 120+ production bugs')
+        self.assertContains(response, 'Delivered wrote invoices service.')
+        usage = APIUsage.objects.get(user=self.user)
+        self.assertEqual((usage.operation, usage.status, usage.total_tokens), ('batch_bullet_enhancement', 'success', 17))
+
+    def test_posted_bullets_and_validation(self):
+        live = FakeOpenAI(json.dumps({'bullets': [{'id': 'bullet_0_0', 'enhanced': 'Led a team of 5'}]}))
+        with mock.patch.object(AIClientManager, 'get_openai_client', return_value=live):
+            response = self.client.post(reverse('job_portal:enhance_bullets_batch'),
+                                        {'bullet_id': ['bullet_0_0'], 'bullet_text': ['led team']})
+        self.assertContains(response, 'Led a team of 5')
+
+        url = reverse('job_portal:enhance_bullets_batch')
+        self.assertEqual(self.client.post(url, {'bullet_id': ['a'], 'bullet_text': ['  ']}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'resume_id': self.resume.id, 'scope': 'job'}).status_code, 400)
+
+    def test_batch_with_a_failed_chunk_is_not_cached(self):
+        bullets = [{'id': 'a', 'text': 'led team'}, {'id': 'b', 'text': 'fixed bugs'}]
+        live = FakeOpenAI(json.dumps({'bullets': [{'id': 'a', 'enhanced': 'Led a team of 5'},
+                                                  {'id': 'b', 'enhanced': 'Resolved 120+ bugs'}]}))
+        create = live.chat.completions.create
+        failing_calls = {2, 4}
+
+        def flaky_create(**kwargs):
+            response = create(**kwargs)
+            if live.calls in failing_calls:
+                raise ValueError("upstream error")
+            return response
+
+        live.chat.completions.create = flaky_create
+        with mock.patch.object(bullets_ai_services, 'BATCH_ENHANCEMENT_MAX_BULLETS', 1), \
+                mock.patch.object(AIClientManager, 'get_openai_client', return_value=live):
+            # The second chunk fails: the first chunk's answer is used and charged, but not cached
+            self.assertEqual(enhance_bullets_batch_chatgpt(bullets), ({'a': 'Led a team of 5', 'b': None}, 12, 5))
+            self.assertEqual(enhance_bullets_batch_chatgpt(bullets), ({'a': 'Led a team of 5', 'b': None}, 12, 5))
+            self.assertFalse(last_call_was_cached())
+            self.assertEqual(live.calls, 4)
+
+            complete = ({'a': 'Led a team of 5', 'b': 'Resolved 120+ bugs'}, 24, 10)
+            self.assertEqual(enhance_bullets_batch_chatgpt(bullets), complete)
+            self.assertEqual(enhance_bullets_batch_chatgpt(bullets), (complete[0], 0, 0))
+            self.assertTrue(last_call_was_cached())
+            self.assertEqual(live.calls, 6)
+
+
+class ReplayProviderTest(SimpleTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _replay_settings(self, **overrides):
+        replay = {'directory': self.temp_dir.name, 'mode': 'replay', 'seed': 7, **overrides}
+        return override_settings(AI_SETTINGS={**settings.AI_SETTINGS, 'replay': replay})
+
+    def test_records_then_replays_without_keys(self):
+        live = FakeOpenAI("Reduced deploy time by 40% with CI caching.")
+        with self._replay_settings(mode='record'):
+            recorder = RecordingOpenAIClient(live)
+            recorder.chat.completions.create(model='gpt-4o-mini', messages=[{"role": "user", "content": "hi"}],
+                                             temperature=0.6, max_tokens=500)
+
+        with self._replay_settings(latency_seconds=0.05):
+            client = build_openai_client(None)
+            started = time.perf_counter()
+            response = client.chat.completions.create(
+                model='gpt-4o-mini', messages=[{"role": "user", "content": "hi"}], temperature=0.6, max_tokens=500)
+            self.assertGreaterEqual(time.perf_counter() - started, 0.05)
+            self.assertEqual(response.choices[0].message.content, live.content)
+            self.assertEqual(response.usage.prompt_tokens, 12)
+
+            # Unrecorded requests get a synthetic answer; JSON mode gets an empty object
+            model = build_gemini_model(None, 'gemini-1.5-flash')
+            config = {'response_mime_type': 'application/json'}
+            self.assertEqual(model.generate_content("parse", generation_config=config).text, "{}")
+
+            # Services work offline: no API key configured
+            with override_settings(OPENAI_API_KEY=None):
+                enhanced, _, _ = enhance_bullet_chatgpt("Managed deploys")
+            self.assertTrue(enhanced.startswith("Replay provider"))
+        self.assertEqual(live.calls, 1)
+
+    def test_error_injection_is_seeded(self):
+        def outcomes():
+            client = build_openai_client(None)
+            results = []
+            for _ in range(20):
+                try:
+                    client.chat.completions.create(model='m', messages=[])
+                    results.append(True)
+                except ReplayInjectedError:
+                    results.append(False)
+            return results
+
+        with self._replay_settings(error_rate=0.5):
+            first = outcomes()
+        with self._replay_settings(error_rate=0.5, seed=8):
+            outcomes()
+        with self._replay_settings(error_rate=0.5):
+            second = outcomes()
+
+        self.assertEqual(first, second)
+        self.assertIn(False, first)
+        self.assertIn(True, first)
+
+
+class DocxExtractorTest(SimpleTestCase):
+    def _build_docx(self):
+        import docx
+        from docx.opc.constants import RELATIONSHIP_TYPE
+        from docx.oxml import OxmlElement
+        from docx.oxml.ns import qn
+
+        document = docx.Document()
+        document.sections[0].header.paragraphs[0].text = "Jane Doe | jane.doe@example.com"
+        paragraph = document.add_paragraph("Portfolio: ")
+        rel_id = document.part.relate_to("https://github.com/jane", RELATIONSHIP_TYPE.HYPERLINK, is_external=True)
+        hyperlink = OxmlElement('w:hyperlink')
+        hyperlink.set(qn('r:id'), rel_id)
+        run = OxmlElement('w:r')
+        text = OxmlElement('w:t')
+        text.text = "GitHub"
+        run.append(text)
+        hyperlink.append(run)
+        paragraph._p.append(hyperlink)
+
+        document.add_paragraph("SKILLS")
+        table = document.add_table(rows=1, cols=2)
+        table.cell(0, 0).text = "Python"
+        table.cell(0, 1).text = "Django"
+
+        buffer = io.BytesIO()
+        document.save(buffer)
+        return buffer.getvalue()
+
+    def test_extracts_headers_tables_and_hyperlinks_in_order(self):
+        text, links = extract_docx(self._build_docx())
+
+        self.assertEqual(text.splitlines(), [
+            "Jane Doe | jane.doe@example.com",
+            "Portfolio: GitHub",
+            "SKILLS",
+            "Python | Django",
+        ])
+        self.assertEqual(links, ["https://github.com/jane"])
+
+    def test_list_items_get_bullet_markers(self):
+        import docx
+        from docx.oxml import OxmlElement
+        from docx.oxml.ns import qn
+
+        def numbered(paragraph, num_id):
+            numbering = OxmlElement('w:numPr')
+            for tag, value in (('w:ilvl', '0'), ('w:numId', num_id)):
+                element = OxmlElement(tag)
+                element.set(qn('w:val'), value)
+                numbering.append(element)
+            paragraph._p.get_or_add_pPr().append(numbering)
+
+        document = docx.Document()
+        document.add_paragraph("EXPERIENCE")
+        document.add_paragraph("Led a team of 5", style='List Bullet')  # Numbered through its style
+        numbered(document.add_paragraph("Grew revenue by 11% YoY"), '1')
+        numbered(document.add_paragraph("Numbering switched off"), '0')
+        buffer = io.BytesIO()
+        document.save(buffer)
+
+        text, _ = extract_docx(buffer.getvalue())
+        self.assertEqual(text.splitlines(), [
+            "EXPERIENCE",
+            "• Led a team of 5",
+            "• Grew revenue by 11% YoY",
+            "Numbering switched off",
+        ])
+
+
+class PromptCompactionTest(SimpleTestCase):
+    def test_strips_page_furniture_and_duplicate_links(self):
+        pages = [
+            "Jane Doe   |  Resume\nEXPERIENCE\nAcme Corp\n\n\n\nPage 1 of 2",
+            "Jane Doe | Resume\nEDUCATION\nUniversity of Texas\nPage 2 of 2",
+        ]
+        links = ["https://github.com/janedoe", "https://GitHub.com/janedoe/", "https://acme.example"]
+
+        compacted = compact_resume_text("\n".join(pages), links + ["https://acme.example"], page_texts=pages)
+
+        self.assertEqual(compacted['text'],
+                         "Jane Doe | Resume\nEXPERIENCE\nAcme Corp\n\nEDUCATION\nUniversity of Texas")
+        self.assertEqual(compacted['links'], links[::2])
+        self.assertLess(compacted['tokens_after'], compacted['tokens_before'])
+
+    def test_enforces_token_budget_with_pluggable_counter(self):
+        def count_words(text):
+            return len(text.split())
+
+        compacted = compact_resume_text(SAMPLE_RESUME_TEXT, max_tokens=20, token_counter=count_words)
+
+        self.assertTrue(compacted['truncated'])
+        self.assertLessEqual(compacted['tokens_after'], 20)
+        self.assertTrue(SAMPLE_RESUME_TEXT.startswith(compacted['text']))
+        self.assertEqual(estimate_tokens("abcdefgh"), 2)
+
+    def test_links_that_use_up_the_budget_never_lift_it(self):
+        long_link = "https://example.com/" + "a" * 400
+        compacted = compact_resume_text(SAMPLE_RESUME_TEXT, ["https://github.com/janedoe", long_link],
+                                        max_tokens=20)
+
+        self.assertTrue(compacted['truncated'])
+        self.assertEqual(compacted['links'], ["https://github.com/janedoe"])
+        self.assertLessEqual(compacted['tokens_after'], 20)
+
+
+class ParserBenchmarkTest(SimpleTestCase):
+    def test_generated_corpus_scores_and_detects_regressions(self):
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            written = generate_corpus(corpus_dir, count=3, sizes=('small',), seed=7)
+            self.assertEqual(len(written), 3)
+            with open(os.path.join(corpus_dir, os.path.splitext(os.path.basename(written[0]))[0] + '.json')) as f:
+                truth = json.load(f)['ground_truth']
+            self.assertEqual(set(score_parse(truth, truth).values()), {True})
+
+            report = run_benchmark(corpus_dir, paths=('basic', 'heuristic'))
+
+        summary = report['summary']
+        self.assertEqual(len(report['results']), 6)
+        self.assertGreater(summary['heuristic']['all']['accuracy'], summary['basic']['all']['accuracy'])
+        self.assertEqual(compare_to_baseline(summary, summary), [])
+
+        worse = json.loads(json.dumps(summary))
+        worse['heuristic']['all']['accuracy'] -= 0.1
+        worse['heuristic']['all']['total_ms'] += 1000
+        regressions = compare_to_baseline(worse, summary)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("heuristic/all: accuracy"))
+
+    def test_replay_path_measures_the_llm_parse(self):
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            generate_corpus(corpus_dir, count=1, sizes=('small',), seed=7)
+            report = run_benchmark(corpus_dir, paths=('replay', 'replay-tiered'))
+
+        tokens_sent = {row['path']: row['tokens_sent'] for row in report['results']}
+        # Every generated section is confident, so only the full replay reaches the (replayed) LLM
+        self.assertGreater(tokens_sent['replay'], 0)
+        self.assertEqual(tokens_sent['replay-tiered'], 0)
+
+
+class HeuristicResumeParserTest(SimpleTestCase):
+    def setUp(self):
+        self.parsed = HeuristicResumeParser().parse(SAMPLE_RESUME_TEXT, ['https://github.com/janedoe'])
+
+    def test_personal_info_and_summary(self):
+        personal_info = self.parsed["Personal Information"]
+        self.assertEqual(personal_info["First name"], "Jane")
+        self.assertEqual(personal_info["Last name"], "Doe")
+        self.assertEqual(personal_info["Email"], "jane.doe@example.com")
+        self.assertEqual(personal_info["Address"], "Austin, TX")
+        self.assertEqual(personal_info["GitHub URL"], "https://github.com/janedoe")
+        self.assertTrue(self.parsed["Professional Summary"].startswith("Backend engineer"))
+
+    def test_sections_fill_llm_schema(self):
+        experience = self.parsed["Work Experience"][0]
+        self.assertEqual(experience["Job title"], "Senior Software Engineer")
+        self.assertEqual(experience["Employer/Company name"], "Acme Corp")
+        self.assertEqual(experience["Start date"], "2019")
+        self.assertTrue(experience["Is current job"])
+        self.assertEqual(len(experience["Bullet points"]), 1)
+
+        education = self.parsed["Education"][0]
+        self.assertEqual(education["School name"], "University of Texas")
+        self.assertEqual(education["Degree type"], "Bachelor")
+        self.assertEqual(education["Graduation date"], "2015")
+
+        self.assertEqual([skill["Skill name"] for skill in self.parsed["Skills"]],
+                         ["Python", "Django", "PostgreSQL", "Docker"])
+
+    def test_wrapped_bullets_continue_until_the_next_header(self):
+        experiences = HeuristicResumeParser().parse_experience([
+            "Senior Software Engineer, Acme Corp, 2019 - Present",
+            "- Launched self-serve billing that grew revenue by",
+            "11% YoY across enterprise accounts",
+            "- Automated deployments with",
+            "Kubernetes and Terraform",
+            "Software Engineer, Initech, 2016 - 2019",
+            "- Built reporting pipelines",
+        ])
+        self.assertEqual(len(experiences), 2)
+        self.assertEqual(experiences[0]["Bullet points"], [
+            "Launched self-serve billing that grew revenue by 11% YoY across enterprise accounts",
+            "Automated deployments with Kubernetes and Terraform",
+        ])
+        self.assertEqual(experiences[1]["Employer/Company name"], "Initech")
+
+    def test_trailing_location_is_split_off_the_company(self):
+        parser = HeuristicResumeParser()
+        for header in ("Software Engineer — Acme Corp, San Francisco, CA",
+                       "Software Engineer at Acme Corp, San Francisco, CA"):
+            experience = parser.parse_experience([header, "- Built billing APIs"])[0]
+            self.assertEqual((experience["Job title"], experience["Employer/Company name"], experience["Location"]),
+                             ("Software Engineer", "Acme Corp", "San Francisco, CA"))
+
+        project = parser.parse_projects(["Resume Parser — open-source parser (github.com/janedoe/parser)"])[0]
+        self.assertEqual((project["Summary/description"], project["GitHub URL"]),
+                         ("open-source parser", "https://github.com/janedoe/parser"))
+
+
+class SchemaMapperTest(SimpleTestCase):
+    def test_openai_shaped_output(self):
+        parsed = generate_ground_truth(random.Random(3), 'large')
+
+        mapped = map_parsed_resume(parsed)
+        self.assertEqual(mapped.warnings, [])
+        data = mapped.data
+        self.assertEqual(data['personal_info']['first_name'], parsed["Personal Information"]["First name"])
+        self.assertEqual(len(data['experiences']), len(parsed["Work Experience"]))
+        current = data['experiences'][0]
+        self.assertTrue(current['is_current'])
+        self.assertIsNone(current['end_date'])
+        self.assertEqual(current['start_date'].isoformat()[:7], parsed["Work Experience"][0]["Start date"])
+        self.assertEqual(current['bullet_points'], parsed["Work Experience"][0]["Bullet points"])
+        self.assertIn(data['educations'][0]['degree_type'], ('bachelor', 'master'))
+        self.assertEqual(data['languages'][0], {'language_name': 'English', 'proficiency': 'NATIVE_OR_BILINGUAL'})
+        self.assertEqual(len(data['certifications']), len(parsed["Certifications"]))
+
+    def test_gemini_shaped_output_quirks(self):
+        parsed = {
+            "Personal Information": {"First name": " Ana ", "LinkedIn URL": "linkedin.com/in/ana", "Phone number": 5551234},
+            "Professional Summary": None,
+            "Skills": ["Python", {"Skill name": "python"},
+                       {"Skill name": "Teamwork", "Category": "Soft skills", "Estimated proficiency level": "85%"},
+                       {"Skill name": "Welding", "Category": "Trades"}],
+            "Work Experience": [
+                {"Job title": "Dev", "Employer/Company name": "X", "Start date": "Mar 2021", "End date": "Present",
+                 "Is current job": "false", "Bullet points": "Shipped A\nShipped B"},
+                {"Job title": "Ghost", "Start date": None},
+                "not an object",
+            ],
+            "Education": [{"School name": "MIT", "Degree": "B.Sc. Physics", "GPA": "3.8/4.0", "Graduation date": 2019}],
+            "Languages": [{"Language name": "Spanish", "Proficiency (0-100 where 100 is native and 0 is basic)": "fluent"},
+                          "spanish"],
+            "Certifications": None,
+            "Custom Sections": [{"Section title": "Awards", "Entries": [
+                {"Entry title": "Best paper", "Description": "NeurIPS", "End date": "2022-05"}]}],
+        }
+
+        mapped = map_parsed_resume(parsed)
+        data = mapped.data
+        self.assertEqual(data['personal_info'], {'first_name': 'Ana', 'linkedin': 'https://linkedin.com/in/ana',
+                                                 'phone': '5551234'})
+        self.assertIsNone(data['summary'])
+        self.assertEqual([skill['skill_name'] for skill in data['skills']], ["Python", "Teamwork", "Welding"])
+        self.assertEqual((data['skills'][1]['skill_category_choice'], data['skills'][1]['proficiency_level']),
+                         ('INTERPERSONAL', 85))
+        self.assertEqual((data['skills'][2]['skill_category_choice'], data['skills'][2]['skill_category_other']),
+                         ('OTHER', 'Trades'))
+        self.assertEqual(len(data['experiences']), 1)
+        self.assertTrue(data['experiences'][0]['is_current'])
+        self.assertEqual(data['experiences'][0]['bullet_points'], ["Shipped A", "Shipped B"])
+        self.assertEqual(mapped.warnings, ["Work Experience: skipped 'Ghost' with no start date"])
+        self.assertEqual((data['educations'][0]['degree_type'], str(data['educations'][0]['gpa'])), ('bachelor', '3.80'))
+        self.assertEqual(data['languages'], [{'language_name': 'Spanish', 'proficiency': 'FULL_PROFESSIONAL'}])
+        self.assertEqual(data['certifications'], [])
+        self.assertEqual(data['custom_sections'][0]['bullet_points'], "Best paper - NeurIPS")
+
+    def test_heuristic_output(self):
+        data = map_parsed_resume(HeuristicResumeParser().parse(SAMPLE_RESUME_TEXT, [])).data
+        self.assertEqual(data['experiences'][0]['start_date'].year, 2019)
+        self.assertEqual(data['educations'][0]['degree_type'], 'bachelor')
+        self.assertEqual(len(data['skills']), 4)
+
+
+@unittest.skipIf(fitz is None, "PyMuPDF not installed")
+class LayoutSegmenterTest(SimpleTestCase):
+    def _build_two_column_pdf(self):
+        doc = fitz.open()
+        page = doc.new_page()
+        page.insert_text((72, 60), "Jane Doe", fontsize=20, fontname="hebo")
+        page.insert_text((72, 80), "jane.doe@example.com | Austin, TX", fontsize=10)
+        columns = (
+            (72, [("SKILLS", True), ("Python, Django", False), ("PostgreSQL", False),
+                  ("LANGUAGES", True), ("English (Native)", False)]),
+            (320, [("EXPERIENCE", True), ("Senior Engineer | Acme Corp", False), ("Jan 2019 - Present", False),
+                   ("- Built billing APIs", False), ("OPEN SOURCE", True), ("Django contributor", False)]),
+        )
+        for column_x, items in columns:
+            y = 120
+            for text, is_heading in items:
+                page.insert_text((column_x, y), text, fontsize=12 if is_heading else 10,
+                                 fontname="hebo" if is_heading else "helv")
+                y += 18
+        return doc.tobytes()
+
+    def test_reads_columns_in_order_and_types_sections(self):
+        result = extract_pdf(self._build_two_column_pdf())
+        sections = LayoutSegmenter().segment(result['layout_lines'])
+
+        self.assertEqual(
+            [(section['type'], section['title']) for section in sections],
+            [('header', ''), ('skills', 'SKILLS'), ('languages', 'LANGUAGES'),
+             ('experience', 'EXPERIENCE'), ('custom', 'OPEN SOURCE')]
+        )
+        self.assertEqual(sections[0]['lines'], ["Jane Doe", "jane.doe@example.com | Austin, TX"])
+        self.assertEqual(sections[3]['lines'][0], "Senior Engineer | Acme Corp")
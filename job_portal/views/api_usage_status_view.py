@@ -5,6 +5,7 @@ from django.http import JsonResponse
 from django.utils import timezone
 
 from job_portal.models import APIUsage
+from services.rate_limiter import get_rate_limiter, provider_api_key
 
 
 @login_required
@@ -69,6 +70,27 @@ def get_ai_usage_stats(request):
 
     return JsonResponse(data)
 
+
+@login_required
+def get_rate_limit_status(request):
+    """
+    Get the current rate-limit state for the current user: their own bucket, the buckets of
+    the API keys their AI calls use and the per-provider buckets.
+    Returns a JSON response with token counts; API keys are never included.
+    """
+    limiter = get_rate_limiter()
+    if limiter is None:
+        return JsonResponse({'enabled': False})
+
+    # A user's own key if set, otherwise the shared key from settings
+    keys = {}
+    for provider, user_key in (('chatgpt', getattr(request.user, 'openai_api_key', None)),
+                               ('gemini', getattr(request.user, 'gemini_api_key', None))):
+        keys[provider if user_key else f"{provider}_shared"] = (provider, provider_api_key(provider, user_key))
+
+    return JsonResponse({'enabled': True, **limiter.status(request.user, keys)})
+
+
 # from django.contrib.auth.decorators import login_required
 # from django.http import JsonResponse
 # from django.utils import timezone
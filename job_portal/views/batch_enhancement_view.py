@@ -0,0 +1,174 @@
+# job_portal/views/batch_enhancement_view.py
+
+import math
+import time
+import logging
+from functools import partial
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.views.decorators.http import require_http_methods
+
+from job_portal.models import APIUsage, Resume, ExperienceBulletPoint, ProjectBulletPoint
+from services.bullets_ai_services import (
+    enhance_bullets_batch_chatgpt,
+    enhance_bullets_batch_gemini,
+    enhance_bullet_basic,
+    BATCH_ENHANCEMENT_MAX_BULLETS,
+)
+from services.providers.provider_router import get_provider_router
+from services.deadlines import ai_deadline
+from services.rate_limiter import RateLimitExceeded, get_rate_limiter, provider_api_key
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_BULLETS = 120  # Upper bound on bullets per request
+BATCH_SCOPES = ('experience', 'project', 'resume')
+
+
+def _stored_bullets(resume, scope, item_id):
+    """Saved bullets of one experience, one project or the whole resume as {'id', 'text'} dicts."""
+    bullets = []
+    if scope in ('experience', 'resume'):
+        query = ExperienceBulletPoint.objects.filter(experience__resume=resume)
+        if scope == 'experience':
+            query = query.filter(experience_id=item_id)
+        bullets += [{'id': f"experience-{pk}", 'text': text}
+                    for pk, text in query.order_by('experience_id', 'id').values_list('id', 'description')]
+    if scope in ('project', 'resume'):
+        query = ProjectBulletPoint.objects.filter(project__resume=resume)
+        if scope == 'project':
+            query = query.filter(project_id=item_id)
+        bullets += [{'id': f"project-{pk}", 'text': text}
+                    for pk, text in query.order_by('project_id', 'id').values_list('id', 'description')]
+    return bullets
+
+
+def _posted_bullets(request):
+    """Bullets sent from the form as repeated bullet_id / bullet_text pairs (unsaved edits included)."""
+    return [{'id': bullet_id, 'text': text}
+            for bullet_id, text in zip(request.POST.getlist('bullet_id'), request.POST.getlist('bullet_text'))]
+
+
+@login_required
+@require_http_methods(["POST"])
+def enhance_bullets_batch(request):
+    """
+    Enhance many bullet points with a single AI request instead of one request per bullet.
+
+    Bullets come from the form (bullet_id / bullet_text pairs) or, when none are posted, from the
+    database: resume_id plus scope 'experience' or 'project' (with item_id) or 'resume'.
+    Returns one HTMX fragment per bullet and logs a single APIUsage row for the whole batch.
+    """
+    ai_engine = request.POST.get('ai_engine', 'chatgpt')
+    enhancement_type = request.POST.get('enhancement_type', 'general')
+    job_description = request.POST.get('job_description', '')
+
+    bullets = _posted_bullets(request)
+    if not bullets and request.POST.get('resume_id'):
+        scope = request.POST.get('scope', 'resume')
+        if scope not in BATCH_SCOPES:
+            return HttpResponse(f"Unknown scope: {scope}", status=400)
+        resume = get_object_or_404(Resume, id=request.POST.get('resume_id'), user=request.user)
+        bullets = _stored_bullets(resume, scope, request.POST.get('item_id'))
+
+    bullets = [{'id': str(bullet['id']), 'text': bullet['text'].strip()} for bullet in bullets
+               if bullet['id'] and bullet['text'] and bullet['text'].strip()]
+    if not bullets:
+        return HttpResponse("No bullet text provided to enhance.", status=400)
+    if len(bullets) > MAX_BATCH_BULLETS:
+        return HttpResponse(f"Too many bullets in one request (max {MAX_BATCH_BULLETS}).", status=400)
+
+    # Get user API keys from their profile
+    user_openai_key = getattr(request.user, 'openai_api_key', None)
+    user_gemini_key = getattr(request.user, 'gemini_api_key', None)
+
+    start_time = time.time()
+    enhanced = {}
+    input_tokens = 0
+    output_tokens = 0
+    service_used = "basic"
+
+    # Providers with a key; the router hedges or fails over between them (services/providers/provider_router.py)
+    providers = {}
+    if settings.OPENAI_API_KEY or user_openai_key:
+        providers['chatgpt'] = partial(enhance_bullets_batch_chatgpt, bullets, enhancement_type, job_description,
+                                       user_api_key=user_openai_key)
+    if settings.GOOGLE_GENAI_API_KEY or user_gemini_key:
+        providers['gemini'] = partial(enhance_bullets_batch_gemini, bullets, enhancement_type, job_description,
+                                      user_api_key=user_gemini_key)
+
+    routed = None
+    limiter = get_rate_limiter()
+    # Charged one token per provider call the batch is split into
+    cost = math.ceil(len(bullets) / BATCH_ENHANCEMENT_MAX_BULLETS)
+    try:
+        if limiter and ai_engine in providers:
+            # User bucket once per request, key/provider buckets for each routed call (hedges and failovers too)
+            limiter.acquire_user(request.user, cost)
+            user_keys = {'chatgpt': user_openai_key, 'gemini': user_gemini_key}
+            providers = {name: limiter.limit_call(name, provider_api_key(name, user_keys[name]), func, cost)
+                         for name, func in providers.items()}
+
+        # One time budget for every provider call (and retry) of this request
+        with ai_deadline() as deadline:
+            if ai_engine in providers:
+                routed = get_provider_router().call('batch_bullet_enhancement', ai_engine, providers)
+        if limiter and routed and not routed.reached_provider:
+            limiter.refund_user(request.user, cost)  # No provider was called
+            if isinstance(routed.error, RateLimitExceeded):
+                raise routed.error
+    except RateLimitExceeded as e:
+        logger.warning(f"Batch enhancement for user {request.user.username} rejected: {str(e)}")
+        response = HttpResponse("Too many AI requests. Please wait a moment and try again.", status=429)
+        response['Retry-After'] = str(math.ceil(e.retry_after))
+        return response
+    if routed and routed.provider:
+        service_used = routed.provider
+        enhanced, input_tokens, output_tokens = routed.result, routed.input_tokens, routed.output_tokens
+    else:
+        logger.info("Selected AI engine '%s' not configured, API key missing or circuit open. Falling back to basic.",
+                    ai_engine)
+    served_from_cache = bool(routed and routed.cached)
+
+    results = []
+    for bullet in bullets:
+        ai_text = enhanced.get(bullet['id'])
+        results.append({
+            'id': bullet['id'],
+            'original': bullet['text'],
+            'enhanced': ai_text or enhance_bullet_basic(bullet['text']),
+            'source': service_used if ai_text else "basic",
+        })
+    enhanced_by_ai = sum(1 for result in results if result['source'] != "basic")
+
+    response_time = time.time() - start_time
+    logger.info(f"Batch enhancement of {len(bullets)} bullets using {service_used} took {response_time:.2f}s "
+                f"({enhanced_by_ai} enhanced by AI{', cached' if served_from_cache else ''}).")
+
+    # One usage row for the whole batch; cache hits made no provider call
+    if service_used != "basic" and not served_from_cache:
+        try:
+            usage = APIUsage(
+                user=request.user,
+                api_name=service_used,
+                operation='batch_bullet_enhancement',
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                response_time_ms=int(response_time * 1000),
+                status='success' if enhanced_by_ai else ('timeout' if deadline.timed_out else 'failed')
+            )
+            if not enhanced_by_ai:
+                usage.error_message = ("AI request timed out" if deadline.timed_out
+                                       else "No bullets enhanced in the AI response")
+            usage.save()  # This will call the calculate_cost method via save() method
+        except Exception as e:
+            logger.error(f"Error logging API usage for batch enhancement ({service_used}): {str(e)}", exc_info=True)
+
+    return render(request, 'resumes/partials/bullet_batch_enhancement_results.html', {
+        'results': results,
+        'ai_engine': service_used.capitalize(),
+        'enhancement_type': enhancement_type,
+        'cached': served_from_cache,
+    })
@@ -1,8 +1,10 @@
 # job_portal/views/experience_enhancement_view.py
 
+import math
 import time
 import logging
 import json
+from functools import partial
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse, JsonResponse
 from django.template.loader import render_to_string
@@ -11,24 +13,28 @@ from django.views.decorators.http import require_http_methods
 from django.conf import settings
 from job_portal.models import APIUsage
 from services.bullets_ai_services import (
-    generate_bullets_chatgpt,
+    agenerate_bullets_chatgpt,
     get_template_bullets,
-    generate_bullets_gemini,
-    enhance_bullet_chatgpt,
-    enhance_bullet_gemini,
+    agenerate_bullets_gemini,
+    aenhance_bullet_chatgpt,
+    aenhance_bullet_gemini,
     enhance_bullet_basic,
 )
+from services.providers.provider_router import get_provider_router
+from services.deadlines import ai_deadline
+from services.rate_limiter import RateLimitExceeded, get_rate_limiter, provider_api_key
 
 logger = logging.getLogger(__name__)
 
 
 @login_required
 @require_http_methods(["GET"])
-def ai_generate_bullets(request):
+async def ai_generate_bullets(request):
     """
     Generate bullet points for an experience entry using either ChatGPT or Gemini.
     This endpoint returns HTML fragments for each bullet point.
     'employer' field is no longer used in this process.
+    Async: under ASGI the provider call is awaited instead of holding a worker thread.
     """
     job_title = request.GET.get('job_title')
     parent_index = request.GET.get('parent_index', '0')
@@ -59,36 +65,60 @@ def ai_generate_bullets(request):
     service_used = "template"  # Default if no AI is used or AI fails
 
     # Get user API keys from their profile
-    user_openai_key = getattr(request.user, 'openai_api_key', None)
-    user_gemini_key = getattr(request.user, 'gemini_api_key', None)
+    user = await request.auser()
+    user_openai_key = getattr(user, 'openai_api_key', None)
+    user_gemini_key = getattr(user, 'gemini_api_key', None)
 
-    # MODIFIED: Pass employer=None to the service functions
-    if ai_engine == 'chatgpt' and (settings.OPENAI_API_KEY or user_openai_key):
-        service_used = "chatgpt"
-        logger.info(f"Attempting to generate {bullet_count} bullets for '{job_title}' using ChatGPT.")
-        bullets, input_tokens, output_tokens = generate_bullets_chatgpt(
-            job_title=job_title,
-            employer=None,  # Employer is now explicitly None
-            target_job_title=target_job_title,
-            skills=skills,
-            responsibilities=responsibilities,
-            num_bullets=bullet_count,
-            api_key=user_openai_key  # Pass user's key
-        )
-    elif ai_engine == 'gemini' and (settings.GOOGLE_GENAI_API_KEY or user_gemini_key):
-        service_used = "gemini"
-        logger.info(f"Attempting to generate {bullet_count} bullets for '{job_title}' using Gemini.")
-        bullets, input_tokens, output_tokens = generate_bullets_gemini(
-            job_title=job_title,
-            employer=None,  # Employer is now explicitly None
-            target_job_title=target_job_title,
-            skills=skills,
-            responsibilities=responsibilities,
-            num_bullets=bullet_count,
-            api_key=user_gemini_key  # Pass user's key
-        )
+    # Every provider with a key; the router starts with the selected one and hedges or fails over
+    # to the other when it is slow or failing (services/providers/provider_router.py)
+    generation_kwargs = {
+        'job_title': job_title,
+        'employer': None,  # Employer is now explicitly None
+        'target_job_title': target_job_title,
+        'skills': skills,
+        'responsibilities': responsibilities,
+        'num_bullets': bullet_count,
+    }
+    providers = {}
+    if settings.OPENAI_API_KEY or user_openai_key:
+        providers['chatgpt'] = partial(agenerate_bullets_chatgpt, **generation_kwargs, user_api_key=user_openai_key)
+    if settings.GOOGLE_GENAI_API_KEY or user_gemini_key:
+        providers['gemini'] = partial(agenerate_bullets_gemini, **generation_kwargs, user_api_key=user_gemini_key)
+
+    routed = None
+    limiter = get_rate_limiter()
+    try:
+        if limiter and ai_engine in providers:
+            # One token per request from the user's bucket; every provider call the router makes,
+            # hedges and failovers included, is charged to its own key and provider buckets
+            await limiter.aacquire_user(user)
+            user_keys = {'chatgpt': user_openai_key, 'gemini': user_gemini_key}
+            providers = {name: limiter.alimit_call(name, provider_api_key(name, user_keys[name]), func)
+                         for name, func in providers.items()}
+
+        # One time budget for every provider call (and retry) of this request
+        with ai_deadline() as deadline:
+            if ai_engine in providers:
+                logger.info(f"Attempting to generate {bullet_count} bullets for '{job_title}' using {ai_engine}.")
+                routed = await get_provider_router().acall('experience_bullet_generation', ai_engine, providers)
+        if limiter and routed and not routed.reached_provider:
+            limiter.refund_user(user)  # No provider was called: circuits open or over the key limits
+            if isinstance(routed.error, RateLimitExceeded):
+                raise routed.error
+    except RateLimitExceeded as e:
+        logger.warning(f"Bullet generation for user {user.username} rejected: {str(e)}")
+        response = HttpResponse("Too many AI requests. Please wait a moment and try again.", status=429)
+        response['Retry-After'] = str(math.ceil(e.retry_after))
+        return response
+
+    if routed and routed.provider:
+        service_used = routed.provider
+        bullets, input_tokens, output_tokens = routed.result, routed.input_tokens, routed.output_tokens
     else:
-        if not settings.OPENAI_API_KEY and not user_openai_key and not settings.GOOGLE_GENAI_API_KEY and not user_gemini_key:
+        if routed:
+            logger.warning("Circuit open for every AI provider. Falling back to template bullets for job: %s",
+                           job_title)
+        elif not providers:
             logger.info("No AI API keys configured. Falling back to template bullets for job: %s", job_title)
         else:
             logger.info(
@@ -106,25 +136,30 @@ def ai_generate_bullets(request):
     logger.info(
         f"Bullet generation for '{job_title}' using {service_used} took {response_time:.2f}s. Generated {len(bullets)} bullets.")
 
+    # Determine status based on whether actual bullet content was returned
+    is_successful_generation = any(
+        "error" not in b.lower() and
+        "could not generate" not in b.lower() and
+        "api key not configured" not in b.lower() and
+        "blocked by gemini" not in b.lower()
+        for b in bullets
+    )
+    # Served from the response cache: no provider call, so nothing to charge
+    served_from_cache = bool(routed and routed.cached)
+
     # Log API usage if an AI service was successfully invoked
-    if service_used in ["chatgpt", "gemini"]:
+    if service_used in ["chatgpt", "gemini"] and not served_from_cache:
         try:
-            # Determine status based on whether actual bullet content was returned
-            is_successful_generation = any(
-                "error" not in b.lower() and
-                "could not generate" not in b.lower() and
-                "api key not configured" not in b.lower() and
-                "blocked by gemini" not in b.lower()
-                for b in bullets
-            )
-
-            usage_status = 'success' if is_successful_generation and bullets else 'failure_ai_response'
+            if is_successful_generation and bullets:
+                usage_status = 'success'
+            else:
+                usage_status = 'timeout' if deadline.timed_out else 'failure_ai_response'
 
             # Convert response time to milliseconds for the DB
             response_time_ms = int(response_time * 1000)
 
             usage = APIUsage(
-                user=request.user,
+                user=user,
                 api_name=service_used,
                 operation='experience_bullet_generation',
                 input_tokens=input_tokens,
@@ -132,9 +167,9 @@ def ai_generate_bullets(request):
                 response_time_ms=response_time_ms,
                 status=usage_status
             )
-            usage.save()  # This will call the calculate_cost method via save() method
+            await usage.asave()  # This will call the calculate_cost method via save() method
             logger.info(
-                f"API usage logged for user {request.user.username}, service: {service_used}, status: {usage_status}")
+                f"API usage logged for user {user.username}, service: {service_used}, status: {usage_status}")
         except Exception as e:
             logger.error(f"Error logging API usage for {service_used}: {str(e)}", exc_info=True)
 
@@ -169,7 +204,7 @@ def ai_generate_bullets(request):
 
 @login_required
 @require_http_methods(["GET"])
-def enhance_bullet(request):
+async def enhance_bullet(request):
     """
     Enhance a single bullet point using AI.
     Returns JSON response with the enhanced bullet text.
@@ -184,8 +219,9 @@ def enhance_bullet(request):
         return JsonResponse({"error": "No bullet text provided to enhance."}, status=400)
 
     # Get user API keys from their profile
-    user_openai_key = getattr(request.user, 'openai_api_key', None)
-    user_gemini_key = getattr(request.user, 'gemini_api_key', None)
+    user = await request.auser()
+    user_openai_key = getattr(user, 'openai_api_key', None)
+    user_gemini_key = getattr(user, 'gemini_api_key', None)
 
     start_time = time.time()
     enhanced_text = ""
@@ -193,19 +229,40 @@ def enhance_bullet(request):
     output_tokens = 0
     service_used = "basic"  # Default
 
+    # Providers with a key; the router hedges or fails over between them (see ai_generate_bullets)
+    providers = {}
+    if settings.OPENAI_API_KEY or user_openai_key:
+        providers['chatgpt'] = partial(aenhance_bullet_chatgpt, bullet_text, enhancement_type, job_description,
+                                       user_api_key=user_openai_key)
+    if settings.GOOGLE_GENAI_API_KEY or user_gemini_key:
+        providers['gemini'] = partial(aenhance_bullet_gemini, bullet_text, enhancement_type, job_description,
+                                      user_api_key=user_gemini_key)
+    routed = None
+    limiter = get_rate_limiter()
+
     try:
-        if ai_engine == 'chatgpt' and (settings.OPENAI_API_KEY or user_openai_key):
-            service_used = "chatgpt"
-            enhanced_text, input_tokens, output_tokens = enhance_bullet_chatgpt(
-                bullet_text, enhancement_type, job_description, api_key=user_openai_key
-            )
-        elif ai_engine == 'gemini' and (settings.GOOGLE_GENAI_API_KEY or user_gemini_key):
-            service_used = "gemini"
-            enhanced_text, input_tokens, output_tokens = enhance_bullet_gemini(
-                bullet_text, enhancement_type, job_description, api_key=user_gemini_key
-            )
+        if limiter and ai_engine in providers:
+            # User bucket once per request, key/provider buckets per provider call (see ai_generate_bullets)
+            await limiter.aacquire_user(user)
+            user_keys = {'chatgpt': user_openai_key, 'gemini': user_gemini_key}
+            providers = {name: limiter.alimit_call(name, provider_api_key(name, user_keys[name]), func)
+                         for name, func in providers.items()}
+
+        with ai_deadline() as deadline:
+            if ai_engine in providers:
+                routed = await get_provider_router().acall('bullet_enhancement', ai_engine, providers)
+        if limiter and routed and not routed.reached_provider:
+            limiter.refund_user(user)  # No provider was called: circuits open or over the key limits
+            if isinstance(routed.error, RateLimitExceeded):
+                raise routed.error
+
+        if routed and routed.provider:
+            service_used = routed.provider
+            enhanced_text, input_tokens, output_tokens = routed.result, routed.input_tokens, routed.output_tokens
         else:
-            if not settings.OPENAI_API_KEY and not user_openai_key and not settings.GOOGLE_GENAI_API_KEY and not user_gemini_key:
+            if routed:
+                logger.warning("Circuit open for every AI provider. Falling back to basic enhancement.")
+            elif not providers:
                 logger.info("No AI API keys for enhancement. Falling back to basic enhancement.")
             else:
                 logger.info(
@@ -217,19 +274,24 @@ def enhance_bullet(request):
         response_time = time.time() - start_time
         logger.info(f"Bullet enhancement using {service_used} took {response_time:.2f}s.")
 
+        is_successful_enhancement = "error" not in enhanced_text.lower() and \
+                                    "blocked by gemini" not in enhanced_text.lower() and \
+                                    "api key not configured" not in enhanced_text.lower()
+        # Served from the response cache: no provider call, so nothing to charge
+        served_from_cache = bool(routed and routed.cached)
+
         # Log API usage
-        if service_used in ["chatgpt", "gemini"]:
+        if service_used in ["chatgpt", "gemini"] and not served_from_cache:
             try:
-                is_successful_enhancement = "error" not in enhanced_text.lower() and \
-                                            "blocked by gemini" not in enhanced_text.lower() and \
-                                            "api key not configured" not in enhanced_text.lower()
-
-                usage_status = 'success' if is_successful_enhancement else 'failure_ai_response'
+                if is_successful_enhancement and routed.succeeded:
+                    usage_status = 'success'
+                else:
+                    usage_status = 'timeout' if deadline.timed_out else 'failure_ai_response'
                 # Convert response time to milliseconds for the DB
                 response_time_ms = int(response_time * 1000)
 
                 usage = APIUsage(
-                    user=request.user,
+                    user=user,
                     api_name=service_used,
                     operation='bullet_enhancement',
                     input_tokens=input_tokens,
@@ -237,9 +299,9 @@ def enhance_bullet(request):
                     response_time_ms=response_time_ms,
                     status=usage_status
                 )
-                usage.save()  # This will call the calculate_cost method via save() method
+                await usage.asave()  # This will call the calculate_cost method via save() method
                 logger.info(
-                    f"API usage logged for bullet enhancement: user {request.user.username}, service: {service_used}, status: {usage_status}")
+                    f"API usage logged for bullet enhancement: user {user.username}, service: {service_used}, status: {usage_status}")
             except Exception as e:
                 logger.error(f"Error logging API usage for enhancement ({service_used}): {str(e)}", exc_info=True)
 
@@ -247,9 +309,16 @@ def enhance_bullet(request):
         return JsonResponse({
             "enhanced_bullet": enhanced_text,
             "ai_engine": service_used.capitalize(),
-            "enhancement_type": enhancement_type
+            "enhancement_type": enhancement_type,
+            "cached": served_from_cache
         })
 
+    except RateLimitExceeded as e:
+        logger.warning(f"Bullet enhancement for user {user.username} rejected: {str(e)}")
+        response = JsonResponse({"error": "Too many AI requests. Please wait a moment and try again.",
+                                 "retry_after": math.ceil(e.retry_after)}, status=429)
+        response['Retry-After'] = str(math.ceil(e.retry_after))
+        return response
     except Exception as e:
         logger.error(f"Error in enhance_bullet: {str(e)}", exc_info=True)
         return JsonResponse({"error": f"Error enhancing bullet: {str(e)[:100]}..."}, status=500)
@@ -258,78 +258,6 @@ def edit_resume_section_view(request, resume_id, section_slug):  #
     return render(request, template_name, context)  #
 
 
-# --- Resume Upload and Direct DB Population ---
-def _populate_resume_from_parsed_data(resume_instance, parsed_data_dict):  #
-    """
-    Helper to populate a Resume instance and its related objects from parsed data.
-    This function expects `parsed_data_dict` to have keys matching model sections
-    and list of dictionaries for items within those sections.
-    It assumes field names in parsed_data_dict items mostly match model field names.
-    """  #
-    with transaction.atomic():  #
-        # Personal Info (direct fields on Resume)
-        p_info = parsed_data_dict.get('personal_info', {})  #
-        for field, value in p_info.items():  #
-            if hasattr(resume_instance, field) and value is not None:  #
-                setattr(resume_instance, field, value)  #
-
-        # Summary (direct field on Resume)
-        summary_text = parsed_data_dict.get('summary', {}).get('summary_text', '')  #
-        if summary_text:  #
-            resume_instance.summary = summary_text  #
-
-        # UPDATED: Set status for uploaded resume using the correct value
-        resume_instance.status = 'uploaded'  # This matches 'Populated from Upload' in your model
-        resume_instance.save()  # Save personal info, summary, and status first #
-
-        # Helper to populate related items
-        def populate_related(model_class, data_key, foreign_key_field='resume'):  #
-            related_manager = getattr(resume_instance, model_class._meta.get_field(foreign_key_field).related_name)  #
-            related_manager.all().delete()  # Clear existing before adding new from parse #
-            items_data = parsed_data_dict.get(data_key, [])  #
-            for item_data in items_data:  #
-                if not item_data: continue  # Skip empty items #
-
-                # Handle bullet points for Experience and Project if present
-                bullets_data = None  #
-                bullet_point_model = None  #
-                bullet_fk_field = None  #
-
-                if data_key == 'experiences' and 'bullet_points' in item_data:  #
-                    bullets_data = item_data.pop('bullet_points', [])  #
-                    bullet_point_model = ExperienceBulletPoint  #
-                    bullet_fk_field = 'experience'  #
-                elif data_key == 'projects' and 'bullet_points' in item_data:  #
-                    bullets_data = item_data.pop('bullet_points', [])  #
-                    bullet_point_model = ProjectBulletPoint  #
-                    bullet_fk_field = 'project'  #
-
-                # Filter out keys not in model to prevent errors with **item_data
-                valid_fields = {f.name for f in model_class._meta.get_fields() if f.concrete and not f.is_relation}  #
-                filtered_item_data = {k: v for k, v in item_data.items() if k in valid_fields}  #
-
-                if filtered_item_data:  # Ensure there's something to save #
-                    obj_kwargs = {foreign_key_field: resume_instance, **filtered_item_data}  #
-                    obj = model_class.objects.create(**obj_kwargs)  #
-
-                    if bullets_data and bullet_point_model and bullet_fk_field:  #
-                        for bullet_text in bullets_data:  #
-                            if isinstance(bullet_text, str) and bullet_text.strip():  #
-                                bullet_point_model.objects.create(
-                                    **{bullet_fk_field: obj, 'description': bullet_text.strip()})  #
-                            elif isinstance(bullet_text, dict) and bullet_text.get('description', '').strip():  #
-                                bullet_point_model.objects.create(
-                                    **{bullet_fk_field: obj, 'description': bullet_text.get('description').strip()})  #
-
-        populate_related(Experience, 'experiences')  #
-        populate_related(Education, 'education')  #
-        populate_related(Skill, 'skills')  #
-        populate_related(Project, 'projects')  #
-        populate_related(Certification, 'certifications')  #
-        populate_related(Language, 'languages')  #
-        populate_related(CustomData, 'custom_data')  # Ensure 'custom_data' matches your parser's output key #
-
-
 # --- Deleting items from formsets (HTMX/AJAX) ---
 @login_required  #
 def htmx_delete_section_item_view(request, resume_id, section_slug, item_id):  #
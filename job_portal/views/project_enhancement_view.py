@@ -1,25 +1,33 @@
 # job_portal/views/project_enhancement_view.py
 
+import math
 import time
 import logging
 import json
+from functools import partial
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse, HttpResponseNotAllowed, JsonResponse
 from django.shortcuts import render
 from django.views.decorators.http import require_http_methods
-from django.db import transaction
 
 from job_portal.models import APIUsage
-from services.project.project_bullet_point_service import enhance_project_bullet_chatgpt, enhance_project_bullet_gemini
+from services.project.project_bullet_point_service import aenhance_project_bullet_chatgpt, aenhance_project_bullet_gemini
+from services.providers.provider_router import get_provider_router
+from services.providers.replay_provider import provider_mode, MODE_REPLAY
+from services.deadlines import ai_deadline
+from services.rate_limiter import RateLimitExceeded, get_rate_limiter, provider_api_key
 
 logger = logging.getLogger(__name__)
 
 
 @login_required
 @require_http_methods(["POST"])
-def enhance_project_bullet(request):
+async def enhance_project_bullet(request):
     """
     Enhance a single project bullet point using AI.
+    Async: under ASGI the provider call is awaited instead of holding a worker thread, and the
+    usage row is written once the call has finished.
     """
     bullet_text = request.POST.get('bullet_text', '')
     ai_engine = request.POST.get('ai_engine', 'chatgpt')
@@ -32,13 +40,14 @@ def enhance_project_bullet(request):
         return JsonResponse({"error": "No bullet text provided to enhance."}, status=400)
 
     # Get API keys from user's profile
+    user = await request.auser()
     if ai_engine == 'chatgpt':
-        api_key = request.user.openai_api_key if hasattr(request.user, 'openai_api_key') else None
+        api_key = user.openai_api_key if hasattr(user, 'openai_api_key') else None
         if not api_key:
             return JsonResponse(
                 {"error": "OpenAI API key not found. Please add your API key in your profile settings."}, status=400)
     elif ai_engine == 'gemini':
-        api_key = request.user.gemini_api_key if hasattr(request.user, 'gemini_api_key') else None
+        api_key = user.gemini_api_key if hasattr(user, 'gemini_api_key') else None
         if not api_key:
             return JsonResponse(
                 {"error": "Gemini API key not found. Please add your API key in your profile settings."}, status=400)
@@ -51,66 +60,101 @@ def enhance_project_bullet(request):
     output_tokens = 0
     service_used = ai_engine
 
+    # Every engine whose settings key is set (the project services only use those) or that is
+    # replayed; the router hedges or fails over between them (services/providers/provider_router.py).
+    # project_title is no longer needed, hence ""
+    enhancement_args = (bullet_text, "", project_name, project_summary, enhancement_type)
+    replaying = provider_mode() == MODE_REPLAY
+    providers = {}
+    if settings.OPENAI_API_KEY or replaying:
+        providers['chatgpt'] = partial(aenhance_project_bullet_chatgpt, *enhancement_args)
+    if settings.GOOGLE_GENAI_API_KEY or replaying:
+        providers['gemini'] = partial(aenhance_project_bullet_gemini, *enhancement_args)
+    if ai_engine not in providers:
+        # A configuration gap, not a provider failure: don't let it open the shared circuit
+        engine_name = 'OpenAI' if ai_engine == 'chatgpt' else 'Gemini'
+        logger.error(f"{engine_name} API key not configured for project bullet enhancement")
+        return JsonResponse({"error": f"{engine_name} API key not configured. Please contact the site administrator."},
+                            status=503)
+
+    limiter = get_rate_limiter()
+
     try:
-        with transaction.atomic():
-            # Create API usage log entry with initial "pending" status
-            api_usage = APIUsage.objects.create(
-                user=request.user,
-                api_name=service_used,
-                operation='project_bullet_enhancement',
-                status='pending'
-            )
-
-            # Call the enhancement service
-            if ai_engine == 'chatgpt':
-                enhanced_text, input_tokens, output_tokens = enhance_project_bullet_chatgpt(
-                    bullet_text,
-                    "",  # Empty string for project_title (no longer needed)
-                    project_name,
-                    project_summary,
-                    enhancement_type
-                )
-            elif ai_engine == 'gemini':
-                enhanced_text, input_tokens, output_tokens = enhance_project_bullet_gemini(
-                    bullet_text,
-                    "",  # Empty string for project_title (no longer needed)
-                    project_name,
-                    project_summary,
-                    enhancement_type
-                )
-
-            response_time = time.time() - start_time
-            response_time_ms = int(response_time * 1000)  # Convert to milliseconds
-
-            # Update the API usage log with results
-            is_successful = "error" not in enhanced_text.lower()
-
-            api_usage.input_tokens = input_tokens
-            api_usage.output_tokens = output_tokens
-            api_usage.total_tokens = input_tokens + output_tokens
-            api_usage.response_time_ms = response_time_ms
-            api_usage.status = 'success' if is_successful else 'failed'
-
-            if not is_successful:
-                api_usage.error_message = enhanced_text[:200]  # Store first 200 chars of error
-
-            # Calculate cost
-            api_usage.save()  # This will trigger the cost calculation
-
-            # Log the enhancement activity
-            logger.info(
-                f"Project bullet enhancement for user {request.user.username} with {service_used}, status: {api_usage.status}, tokens: {api_usage.total_tokens}"
-            )
+        if limiter:
+            # User bucket once per request, key/provider buckets per provider call; the project
+            # services call with the shared settings keys
+            await limiter.aacquire_user(user)
+            providers = {name: limiter.alimit_call(name, provider_api_key(name), func)
+                         for name, func in providers.items()}
+
+        # Call the enhancement service, within one time budget for all provider calls and retries
+        with ai_deadline() as deadline:
+            routed = await get_provider_router().acall('project_bullet_enhancement', ai_engine, providers)
+        if limiter and not routed.reached_provider:
+            limiter.refund_user(user)  # No provider was called: circuits open or over the key limits
+            if isinstance(routed.error, RateLimitExceeded):
+                raise routed.error
+        if not routed.provider:
+            return JsonResponse({"error": "AI providers are temporarily unavailable. Please try again shortly."},
+                                status=503)
+        service_used = routed.provider
+        enhanced_text, input_tokens, output_tokens = routed.result, routed.input_tokens, routed.output_tokens
 
+        if routed.cached:
+            # Served from the response cache: no provider call, so no usage entry or charge
             return JsonResponse({
                 "enhanced_bullet": enhanced_text,
                 "ai_engine": service_used.capitalize(),
                 "enhancement_type": enhancement_type,
-                "bullet_id": bullet_id,  # Return the bullet ID if provided
-                "tokens_used": api_usage.total_tokens,
-                "cost": float(api_usage.cost) if api_usage.cost else 0.0
+                "bullet_id": bullet_id,
+                "tokens_used": 0,
+                "cost": 0.0,
+                "cached": True
             })
 
+        response_time = time.time() - start_time
+        response_time_ms = int(response_time * 1000)  # Convert to milliseconds
+
+        # Log the API usage with results
+        is_successful = "error" not in enhanced_text.lower()
+
+        api_usage = APIUsage(
+            user=user,
+            api_name=service_used,
+            operation='project_bullet_enhancement',
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            response_time_ms=response_time_ms,
+            status='success' if is_successful else ('timeout' if deadline.timed_out else 'failed')
+        )
+
+        if not is_successful:
+            api_usage.error_message = enhanced_text[:200]  # Store first 200 chars of error
+
+        # Calculate cost
+        await api_usage.asave()  # This will trigger the cost calculation
+
+        # Log the enhancement activity
+        logger.info(
+            f"Project bullet enhancement for user {user.username} with {service_used}, status: {api_usage.status}, tokens: {api_usage.total_tokens}"
+        )
+
+        return JsonResponse({
+            "enhanced_bullet": enhanced_text,
+            "ai_engine": service_used.capitalize(),
+            "enhancement_type": enhancement_type,
+            "bullet_id": bullet_id,  # Return the bullet ID if provided
+            "tokens_used": api_usage.total_tokens,
+            "cost": float(api_usage.cost) if api_usage.cost else 0.0,
+            "cached": False
+        })
+
+    except RateLimitExceeded as e:
+        logger.warning(f"Project bullet enhancement for user {user.username} rejected: {str(e)}")
+        response = JsonResponse({"error": "Too many AI requests. Please wait a moment and try again.",
+                                 "retry_after": math.ceil(e.retry_after)}, status=429)
+        response['Retry-After'] = str(math.ceil(e.retry_after))
+        return response
     except Exception as e:
         logger.error(f"Error enhancing project bullet: {str(e)}", exc_info=True)
         return JsonResponse({"error": f"Error enhancing bullet: {str(e)[:100]}..."}, status=500)
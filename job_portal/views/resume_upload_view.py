@@ -1,31 +1,26 @@
 # job_portal/views/resume_upload_view.py
 
-import os
-import traceback
-from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import render, redirect
+from django.http import HttpResponse
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.urls import reverse
-from django.core.files.storage import FileSystemStorage
-from django.db import transaction
 
-# Service and Form imports
-from services.parser.resume_parser_service import ResumeParserService
+# Form imports
 from ..forms.resume_upload_form import ResumeUploadForm
 
 # Model imports
-from ..models import (
-    Resume, Skill, Experience, Education, Certification, Project, Language, CustomData,
-    ExperienceBulletPoint, ProjectBulletPoint
-)
+from ..models import ResumeParseJob
 
 
 @login_required
 def upload_resume(request):
     """
-    Handles resume file uploads. Parses the file, creates a new DRAFT resume,
-    populates it with parsed data, and redirects to the editing wizard.
+    Handles resume file uploads. Stores the file and queues a ResumeParseJob; the
+    process_resume_jobs worker parses it and creates the DRAFT resume, or patches the
+    existing draft when the file turns out to be a revision of an earlier upload.
+    Redirects straight to the job's status page, which polls until the draft is ready
+    (so refreshing it doesn't re-submit the file).
     """
     form = ResumeUploadForm(request.POST or None, request.FILES or None)
     template_name = 'resumes/upload_resume.html'
@@ -33,81 +28,14 @@ def upload_resume(request):
     if request.method == 'POST':
         if form.is_valid():
             resume_file = request.FILES['resume_file']
-            ai_choice = form.cleaned_data.get('ai_engine', 'gemini')
-            ai_parsing_enabled = form.cleaned_data.get('ai_parsing_enabled', True)
-
-            # Define temporary storage location for uploaded resumes
-            temp_storage_location = os.path.join(settings.MEDIA_ROOT, 'temp_resumes')
-            if not os.path.exists(temp_storage_location):
-                os.makedirs(temp_storage_location, exist_ok=True)
-
-            fs = FileSystemStorage(location=temp_storage_location)
-            saved_filename = fs.save(resume_file.name, resume_file)
-            file_path = fs.path(saved_filename)
-
-            parser_service = ResumeParserService(
-                user_openai_key=request.user.openai_api_key if hasattr(request.user, 'openai_api_key') else None,
-                user_gemini_key=request.user.gemini_api_key if hasattr(request.user, 'gemini_api_key') else None
+            job = ResumeParseJob.objects.create(
+                user=request.user,
+                resume_file=resume_file,
+                original_filename=resume_file.name[:255],
+                ai_engine=form.cleaned_data.get('ai_engine', 'gemini') or 'gemini',
+                ai_parsing_enabled=form.cleaned_data.get('ai_parsing_enabled', True),
             )
-
-            file_extension = os.path.splitext(saved_filename)[1].lower().strip('.')
-            parsed_result = parser_service.parse_resume(
-                file_path=file_path,
-                file_type=file_extension,
-                ai_parsing_enabled=ai_parsing_enabled,
-                ai_provider=ai_choice
-            )
-
-            # Prepare for redirection
-            target_url_name_on_error = 'upload_resume'
-            new_resume_id_for_success_redirect = None
-
-            if "error" in parsed_result:
-                messages.error(request, parsed_result["error"])
-            else:
-                # Create a new draft resume
-                new_resume_title = f"Draft from {resume_file.name}"
-                max_title_length = Resume._meta.get_field('title').max_length
-                if len(new_resume_title) > max_title_length:
-                    new_resume_title = new_resume_title[:max_title_length - 3] + "..."
-
-                try:
-                    with transaction.atomic():
-                        new_resume = Resume.objects.create(
-                            user=request.user,
-                            title=new_resume_title,
-                            publication_status=Resume.DRAFT,
-                            status='uploaded',  # Mark as uploaded
-                            source_uploaded_file=resume_file
-                        )
-
-                        # Process the parsed data
-                        _populate_resume_from_parsed_data(new_resume, parsed_result)
-
-                    messages.success(request,
-                                     f"Draft resume '{new_resume.title}' created and populated. You can now review and edit it.")
-                    new_resume_id_for_success_redirect = new_resume.id
-
-                except Exception as e:
-                    messages.error(request,
-                                   f"An error occurred while saving the resume to the database: {str(e)}. {traceback.format_exc()}")
-                    target_url_name_on_error = 'resume_creation_choice'
-
-            # Cleanup the temporary file
-            if fs.exists(saved_filename):
-                try:
-                    fs.delete(saved_filename)
-                except OSError as e:
-                    messages.warning(request, f"Could not remove temporary file '{saved_filename}': {e}")
-
-            if new_resume_id_for_success_redirect:
-                return redirect('job_portal:edit_resume_section',
-                                resume_id=new_resume_id_for_success_redirect,
-                                section_slug='personal-info')
-            else:
-                # If an error occurred (parsing or DB), re-render the upload form or redirect to choice
-                current_form_instance = form if form.is_bound else ResumeUploadForm()
-                return render(request, template_name, {'form': current_form_instance})
+            return redirect('job_portal:upload_job_status', job_id=job.id)
 
         else:  # Form is not valid
             messages.error(request, "There was an error with your submission. Please check the file and options.")
@@ -117,91 +45,34 @@ def upload_resume(request):
     return render(request, template_name, {'form': form})
 
 
-def _populate_resume_from_parsed_data(resume_instance, parsed_data_dict):
+@login_required
+def upload_job_status(request, job_id):
     """
-    Helper to populate a Resume instance and its related objects from parsed data.
+    HTMX endpoint polled by the upload status page. Returns the status fragment while
+    the job is pending/running and redirects to the editing wizard once it succeeds.
+    Revisions of an earlier upload redirect to the draft that was patched.
     """
-    with transaction.atomic():
-        # Personal Info (direct fields on Resume)
-        p_info = parsed_data_dict.get('personal_info', {})
-        for field, value in p_info.items():
-            if hasattr(resume_instance, field) and value is not None:
-                setattr(resume_instance, field, value)
-
-        # Summary (direct field on Resume)
-        summary_text = parsed_data_dict.get('summary', {}).get('summary_text', '')
-        if not summary_text and isinstance(parsed_data_dict.get('summary'), str):
-            summary_text = parsed_data_dict.get('summary')
-
-        if summary_text:
-            resume_instance.summary = summary_text
-        resume_instance.save()
-
-        # Helper to populate related items
-        def populate_related(model_class, data_key, foreign_key_field='resume'):
-            related_manager = getattr(resume_instance, model_class._meta.get_field(foreign_key_field).related_name)
-            items_data = parsed_data_dict.get(data_key, [])
-            for item_data in items_data:
-                if not item_data: continue
-
-                # Handle bullet points for Experience and Project
-                bullets_data = None
-                if data_key == 'experiences' and 'bullet_points' in item_data:
-                    bullets_data = item_data.pop('bullet_points', [])
-                elif data_key == 'projects' and 'bullet_points' in item_data:
-                    bullets_data = item_data.pop('bullet_points', [])
-
-                # Update field names if they don't match the model
-                if data_key == 'educations' or data_key == 'education':
-                    if 'degree' in item_data and 'degree_name' not in item_data:
-                        item_data['degree_name'] = item_data.pop('degree')
-
-                if data_key == 'certifications':
-                    if 'institute' in item_data and 'issuing_organization' not in item_data:
-                        item_data['issuing_organization'] = item_data.pop('institute')
-                    if 'completion_date' in item_data and 'issue_date' not in item_data:
-                        item_data['issue_date'] = item_data.pop('completion_date')
-
-                if data_key == 'projects':
-                    if 'project_name' not in item_data and 'name' in item_data:
-                        item_data['project_name'] = item_data.pop('name')
-
-                # Filter out keys not in model
-                valid_fields = {f.name for f in model_class._meta.get_fields()}
-                filtered_item_data = {k: v for k, v in item_data.items() if k in valid_fields}
-
-                if filtered_item_data:  # Ensure there's something to save
-                    obj = model_class.objects.create(**{foreign_key_field: resume_instance}, **filtered_item_data)
-
-                    # Process bullet points
-                    if bullets_data and data_key in ['experiences', 'experience']:
-                        for bullet in bullets_data:
-                            if isinstance(bullet, dict) and 'description' in bullet:
-                                ExperienceBulletPoint.objects.create(experience=obj, description=bullet['description'])
-                            elif isinstance(bullet, str):
-                                ExperienceBulletPoint.objects.create(experience=obj, description=bullet)
-
-                    elif bullets_data and data_key in ['projects', 'project']:
-                        for bullet in bullets_data:
-                            if isinstance(bullet, dict) and 'description' in bullet:
-                                ProjectBulletPoint.objects.create(project=obj, description=bullet['description'])
-                            elif isinstance(bullet, str):
-                                ProjectBulletPoint.objects.create(project=obj, description=bullet)
+    job = get_object_or_404(ResumeParseJob, id=job_id, user=request.user)
+
+    if job.status == ResumeParseJob.STATUS_SUCCESS and job.resume_id:
+        edit_url = reverse('job_portal:edit_resume_section',
+                           kwargs={'resume_id': job.resume_id, 'section_slug': 'personal-info'})
+        if request.headers.get('HX-Request'):
+            response = HttpResponse()
+            response['HX-Redirect'] = edit_url
+            return response
+        if job.is_revision:
+            messages.success(request, "Recognised this as a new version of an existing upload; "
+                                      "only the changed sections were updated.")
+        else:
+            messages.success(request, "Draft resume created. You can now review and edit it.")
+        return render(request, 'resumes/upload_job_status_page.html', {'job': job, 'edit_url': edit_url})
+
+    template_name = 'resumes/partials/upload_job_status.html'
+    if not request.headers.get('HX-Request'):
+        template_name = 'resumes/upload_job_status_page.html'
+    return render(request, template_name, {'job': job})
 
-        # Populate all related sections
-        populate_related(Experience, 'experiences')
-        populate_related(Experience, 'experience')  # Handle alternate key name
-        populate_related(Education, 'educations')
-        populate_related(Education, 'education')  # Handle alternate key name
-        populate_related(Skill, 'skills')
-        populate_related(Project, 'projects')
-        populate_related(Project, 'project')  # Handle alternate key name
-        populate_related(Certification, 'certifications')
-        populate_related(Certification, 'certification')  # Handle alternate key name
-        populate_related(Language, 'languages')
-        populate_related(Language, 'language')  # Handle alternate key name
-        populate_related(CustomData, 'custom_sections')
-        populate_related(CustomData, 'custom_data')  # Handle alternate key name
 
 # Ensure any obsolete views like preview_upload_data or create_resume_from_upload
 # that might have been in this file originally are removed.
@@ -1,18 +1,22 @@
 # File: services/bullets_ai_services.py
 # services/bullets_ai_services.py
 
+import re
 import time
 import logging
 import json
-import openai
-import google.generativeai as genai
 from django.conf import settings
+from services.providers.replay_provider import build_openai_client, build_gemini_model, provider_mode, MODE_REPLAY
+from services.providers.client_registry import get_client_registry
+from services.response_cache import cache_ai_response
+from services.deadlines import openai_chat, aopenai_chat, gemini_generate, agemini_generate
 from services.prompts.experience_prompts import (
     get_dynamic_bullet_generation_prompt,
     BULLET_ENHANCEMENT_PROMPT,
     ATS_OPTIMIZATION_PROMPT,
     RESUME_WRITER_SYSTEM_MESSAGE,
-    ATS_EXPERT_SYSTEM_MESSAGE
+    ATS_EXPERT_SYSTEM_MESSAGE,
+    get_batch_enhancement_prompt
 )
 
 logger = logging.getLogger(__name__)
@@ -20,41 +24,92 @@ logger = logging.getLogger(__name__)
 
 class AIClientManager:
     """
-    Manages AI client initialization with user-provided API keys
+    Manages AI client initialization with user-provided API keys.
+    Live clients are pooled per API key (see services.providers.client_registry), so repeated
+    calls reuse open connections instead of building a new client each time.
     """
 
     @staticmethod
     def get_openai_client(user_api_key=None):
         """Initialize and return OpenAI client with user's API key or fallback to settings"""
         api_key = user_api_key or getattr(settings, 'OPENAI_API_KEY', None)
-        if not api_key:
+        if not api_key and provider_mode() != MODE_REPLAY:
             logger.warning("No OpenAI API key available")
             return None
 
         try:
-            return openai.OpenAI(api_key=api_key)
+            return build_openai_client(api_key)
         except Exception as e:
             logger.error(f"Failed to initialize OpenAI client: {str(e)}")
             return None
 
+    @staticmethod
+    def get_async_openai_client(user_api_key=None):
+        """
+        Return the AsyncOpenAI client for the running event loop (pooled per loop and key).
+        Must be called from a coroutine; the client is shared, so callers don't close it.
+        """
+        api_key = user_api_key or getattr(settings, 'OPENAI_API_KEY', None)
+        if not api_key and provider_mode() != MODE_REPLAY:
+            logger.warning("No OpenAI API key available")
+            return None
+
+        try:
+            return build_openai_client(api_key, async_client=True, shared=True)
+        except Exception as e:
+            logger.error(f"Failed to initialize async OpenAI client: {str(e)}")
+            return None
+
     @staticmethod
     def get_gemini_client(user_api_key=None):
         """Initialize and return Gemini client with user's API key or fallback to settings"""
         api_key = user_api_key or getattr(settings, 'GOOGLE_GENAI_API_KEY', None)
-        if not api_key:
+        if not api_key and provider_mode() != MODE_REPLAY:
             logger.warning("No Gemini API key available")
             return None
 
         try:
-            genai.configure(api_key=api_key)
-            model_name = getattr(settings, 'GEMINI_MODEL_NAME', 'gemini-pro')
-            return genai.GenerativeModel(model_name)
+            return build_gemini_model(api_key, _gemini_model_name())
         except Exception as e:
             logger.error(f"Failed to initialize Gemini client: {str(e)}")
             return None
 
+    @staticmethod
+    def pool_stats():
+        """Pooled client count and hit/miss counters of the shared client registry"""
+        return get_client_registry().stats()
+
+
+def _openai_model_name():
+    return getattr(settings, 'OPENAI_MODEL', 'gpt-3.5-turbo')
+
+
+def _gemini_model_name():
+    return getattr(settings, 'GEMINI_MODEL_NAME', 'gemini-pro')
+
+
+def _bullet_lines(response_text, num_bullets):
+    """Non-empty lines of a generation reply, limited to the requested number of bullets."""
+    return [line.strip() for line in response_text.split('\n') if line.strip()][:num_bullets]
+
+
+def _enhancement_prompt(bullet_text, enhancement_type, job_description):
+    """Return (prompt, system message) for enhancing one bullet."""
+    if enhancement_type == 'ats' and job_description:
+        # Include job description for ATS optimization
+        job_description_section = f"Job Description Context: {job_description[:500]}..."
+        prompt = ATS_OPTIMIZATION_PROMPT.format(
+            bullet_text=bullet_text,
+            job_description_section=job_description_section
+        )
+        return prompt, ATS_EXPERT_SYSTEM_MESSAGE
+    # General enhancement
+    return BULLET_ENHANCEMENT_PROMPT.format(bullet_text=bullet_text), RESUME_WRITER_SYSTEM_MESSAGE
+
 
 # Experience Bullet Point Generation
+@cache_ai_response('experience_bullet_generation', 'chatgpt', _openai_model_name, temperature=0.7,
+                   exclude_args=('user_api_key',))
 def generate_bullets_chatgpt(
         job_title,
         employer=None,
@@ -87,8 +142,9 @@ def generate_bullets_chatgpt(
         )
 
         # Request to ChatGPT
-        model = getattr(settings, 'OPENAI_MODEL', 'gpt-3.5-turbo')
-        response = openai_client.chat.completions.create(
+        model = _openai_model_name()
+        response = openai_chat(
+            openai_client, "ChatGPT bullet generation",
             model=model,
             messages=[
                 {"role": "system", "content": RESUME_WRITER_SYSTEM_MESSAGE},
@@ -98,12 +154,9 @@ def generate_bullets_chatgpt(
             temperature=0.7
         )
 
-        # Process response
+        # Process response, limited to the requested number of bullets
         response_text = response.choices[0].message.content.strip()
-        bullets = [line.strip() for line in response_text.split('\n') if line.strip()]
-
-        # Limit bullets to requested number
-        bullets = bullets[:num_bullets]
+        bullets = _bullet_lines(response_text, num_bullets)
 
         input_tokens = response.usage.prompt_tokens
         output_tokens = response.usage.completion_tokens
@@ -117,6 +170,7 @@ def generate_bullets_chatgpt(
         return [error_msg], 0, 0
 
 
+@cache_ai_response('experience_bullet_generation', 'gemini', _gemini_model_name, exclude_args=('user_api_key',))
 def generate_bullets_gemini(
         job_title,
         employer=None,
@@ -149,14 +203,11 @@ def generate_bullets_gemini(
         )
 
         # Request to Gemini
-        response = gemini_client.generate_content(prompt)
+        response = gemini_generate(gemini_client, prompt, "Gemini bullet generation")
         response_text = response.text.strip()
 
-        # Process response
-        bullets = [line.strip() for line in response_text.split('\n') if line.strip()]
-
-        # Limit bullets to requested number
-        bullets = bullets[:num_bullets]
+        # Process response, limited to the requested number of bullets
+        bullets = _bullet_lines(response_text, num_bullets)
 
         # Estimate token count (Gemini doesn't provide token counts directly)
         input_chars = len(prompt)
@@ -239,6 +290,8 @@ def get_template_bullets(job_title, employer=None, num_bullets=3):
 
 
 # Bullet Enhancement
+@cache_ai_response('bullet_enhancement', 'chatgpt', _openai_model_name, temperature=0.6,
+                   digest_args=('job_description',), exclude_args=('user_api_key',))
 def enhance_bullet_chatgpt(bullet_text, enhancement_type='general', job_description='', user_api_key=None):
     """
     Enhance a bullet point using ChatGPT.
@@ -252,22 +305,12 @@ def enhance_bullet_chatgpt(bullet_text, enhancement_type='general', job_descript
         return bullet_text, 0, 0
 
     try:
-        if enhancement_type == 'ats' and job_description:
-            # Include job description for ATS optimization
-            job_description_section = f"Job Description Context: {job_description[:500]}..."
-            prompt = ATS_OPTIMIZATION_PROMPT.format(
-                bullet_text=bullet_text,
-                job_description_section=job_description_section
-            )
-            system_msg = ATS_EXPERT_SYSTEM_MESSAGE
-        else:
-            # General enhancement
-            prompt = BULLET_ENHANCEMENT_PROMPT.format(bullet_text=bullet_text)
-            system_msg = RESUME_WRITER_SYSTEM_MESSAGE
+        prompt, system_msg = _enhancement_prompt(bullet_text, enhancement_type, job_description)
 
         # Request to ChatGPT
-        model = getattr(settings, 'OPENAI_MODEL', 'gpt-3.5-turbo')
-        response = openai_client.chat.completions.create(
+        model = _openai_model_name()
+        response = openai_chat(
+            openai_client, "ChatGPT bullet enhancement",
             model=model,
             messages=[
                 {"role": "system", "content": system_msg},
@@ -290,6 +333,8 @@ def enhance_bullet_chatgpt(bullet_text, enhancement_type='general', job_descript
         return bullet_text, 0, 0
 
 
+@cache_ai_response('bullet_enhancement', 'gemini', _gemini_model_name, digest_args=('job_description',),
+                   exclude_args=('user_api_key',))
 def enhance_bullet_gemini(bullet_text, enhancement_type='general', job_description='', user_api_key=None):
     """
     Enhance a bullet point using Google's Gemini.
@@ -303,19 +348,10 @@ def enhance_bullet_gemini(bullet_text, enhancement_type='general', job_descripti
         return bullet_text, 0, 0
 
     try:
-        if enhancement_type == 'ats' and job_description:
-            # Include job description for ATS optimization
-            job_description_section = f"Job Description Context: {job_description[:500]}..."
-            prompt = ATS_OPTIMIZATION_PROMPT.format(
-                bullet_text=bullet_text,
-                job_description_section=job_description_section
-            )
-        else:
-            # General enhancement
-            prompt = BULLET_ENHANCEMENT_PROMPT.format(bullet_text=bullet_text)
+        prompt, _ = _enhancement_prompt(bullet_text, enhancement_type, job_description)
 
         # Request to Gemini
-        response = gemini_client.generate_content(prompt)
+        response = gemini_generate(gemini_client, prompt, "Gemini bullet enhancement")
         enhanced_text = response.text.strip()
 
         # Estimate token count
@@ -376,6 +412,274 @@ def ats_optimize_gemini(bullet_text, job_description, user_api_key=None):
     """Optimize a bullet point for ATS using Gemini."""
     return enhance_bullet_gemini(bullet_text, 'ats', job_description, user_api_key)
 
+
+# Batch Bullet Enhancement
+BATCH_ENHANCEMENT_MAX_BULLETS = 40  # Bullets per provider call; larger batches are split
+
+
+def _batch_chunks(bullets):
+    return [bullets[start:start + BATCH_ENHANCEMENT_MAX_BULLETS]
+            for start in range(0, len(bullets), BATCH_ENHANCEMENT_MAX_BULLETS)]
+
+
+def _parse_batch_reply(reply_text, bullets):
+    """
+    Map a {"bullets": [{"id", "enhanced"}]} reply back to the requested ids.
+    Ids missing from the reply (or with an empty value) map to None.
+    """
+    try:
+        data = json.loads(re.sub(r'^```(?:json)?\s*|\s*```$', '', reply_text.strip()))
+    except ValueError as e:
+        logger.error(f"Batch enhancement reply is not valid JSON: {str(e)}")
+        data = {}
+    items = data.get('bullets') if isinstance(data, dict) else data
+    enhanced = {}
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, dict) and isinstance(item.get('enhanced'), str) and item['enhanced'].strip():
+            enhanced[str(item.get('id'))] = item['enhanced'].strip()
+    return {bullet['id']: enhanced.get(bullet['id']) for bullet in bullets}
+
+
+def _batch_complete(results):
+    """Only batches with an enhancement for every requested id are cached; the rest are retried."""
+    return all(results.values())
+
+
+@cache_ai_response('batch_bullet_enhancement', 'chatgpt', _openai_model_name, temperature=0.6,
+                   digest_args=('job_description',), exclude_args=('user_api_key',), cacheable=_batch_complete)
+def enhance_bullets_batch_chatgpt(bullets, enhancement_type='general', job_description='', user_api_key=None):
+    """
+    Enhance many bullet points with ChatGPT in one structured-JSON request
+    (one per BATCH_ENHANCEMENT_MAX_BULLETS bullets).
+
+    Args:
+        bullets (list of dict): {'id': str, 'text': str} per bullet
+
+    Returns:
+        tuple: ({id: enhanced text, or None if the reply had none for it}, input_tokens, output_tokens)
+    """
+    start_time = time.time()
+    openai_client = AIClientManager.get_openai_client(user_api_key)
+
+    if not openai_client:
+        logger.error("OpenAI client could not be initialized for batch bullet enhancement")
+        return {bullet['id']: None for bullet in bullets}, 0, 0
+
+    results = {}
+    input_tokens = 0
+    output_tokens = 0
+    system_msg = ATS_EXPERT_SYSTEM_MESSAGE if enhancement_type == 'ats' else RESUME_WRITER_SYSTEM_MESSAGE
+    for chunk in _batch_chunks(bullets):
+        # A failed chunk leaves its bullets None (basic fallback) without losing the other chunks
+        try:
+            response = openai_chat(
+                openai_client, "ChatGPT batch enhancement",
+                model=_openai_model_name(),
+                messages=[
+                    {"role": "system", "content": system_msg},
+                    {"role": "user", "content": get_batch_enhancement_prompt(chunk, enhancement_type, job_description)}
+                ],
+                max_tokens=min(4000, 100 + 120 * len(chunk)),
+                temperature=0.6,
+                response_format={"type": "json_object"}
+            )
+            results.update(_parse_batch_reply(response.choices[0].message.content, chunk))
+            input_tokens += response.usage.prompt_tokens
+            output_tokens += response.usage.completion_tokens
+        except Exception as e:
+            logger.error(f"Error enhancing bullets in batch with ChatGPT: {str(e)}")
+
+    logger.info(f"Enhanced {sum(1 for text in results.values() if text)}/{len(bullets)} bullets with ChatGPT "
+                f"in {time.time() - start_time:.2f}s")
+    return {bullet['id']: results.get(bullet['id']) for bullet in bullets}, input_tokens, output_tokens
+
+
+@cache_ai_response('batch_bullet_enhancement', 'gemini', _gemini_model_name, digest_args=('job_description',),
+                   exclude_args=('user_api_key',), cacheable=_batch_complete)
+def enhance_bullets_batch_gemini(bullets, enhancement_type='general', job_description='', user_api_key=None):
+    """
+    Enhance many bullet points with Gemini in one structured-JSON request
+    (see enhance_bullets_batch_chatgpt).
+    """
+    start_time = time.time()
+    gemini_client = AIClientManager.get_gemini_client(user_api_key)
+
+    if not gemini_client:
+        logger.error("Gemini client could not be initialized for batch bullet enhancement")
+        return {bullet['id']: None for bullet in bullets}, 0, 0
+
+    results = {}
+    input_tokens = 0
+    output_tokens = 0
+    system_msg = ATS_EXPERT_SYSTEM_MESSAGE if enhancement_type == 'ats' else RESUME_WRITER_SYSTEM_MESSAGE
+    for chunk in _batch_chunks(bullets):
+        try:
+            prompt = f"{system_msg}\n\n{get_batch_enhancement_prompt(chunk, enhancement_type, job_description)}"
+            response = gemini_generate(
+                gemini_client, prompt, "Gemini batch enhancement",
+                generation_config={'temperature': 0.6, 'response_mime_type': 'application/json'}
+            )
+            results.update(_parse_batch_reply(response.text, chunk))
+            # Estimate token count
+            input_tokens += len(prompt) // 4
+            output_tokens += len(response.text) // 4
+        except Exception as e:
+            logger.error(f"Error enhancing bullets in batch with Gemini: {str(e)}")
+
+    logger.info(f"Enhanced {sum(1 for text in results.values() if text)}/{len(bullets)} bullets with Gemini "
+                f"in {time.time() - start_time:.2f}s")
+    return {bullet['id']: results.get(bullet['id']) for bullet in bullets}, input_tokens, output_tokens
+
+
+# Async variants for the ASGI views: the same prompts and cache entries, but the provider call is
+# awaited, so a waiting request holds no worker thread.
+@cache_ai_response('experience_bullet_generation', 'chatgpt', _openai_model_name, temperature=0.7,
+                   exclude_args=('user_api_key',))
+async def agenerate_bullets_chatgpt(
+        job_title,
+        employer=None,
+        target_job_title=None,
+        skills=None,
+        responsibilities=None,
+        num_bullets=3,
+        user_api_key=None
+):
+    """Async version of generate_bullets_chatgpt."""
+    start_time = time.time()
+    openai_client = AIClientManager.get_async_openai_client(user_api_key)
+
+    if not openai_client:
+        logger.error("OpenAI client could not be initialized for bullet generation")
+        return ["Error: OpenAI API key not configured or invalid."], 0, 0
+
+    try:
+        prompt = get_dynamic_bullet_generation_prompt(
+            job_title=job_title,
+            employer=employer,
+            target_job_title=target_job_title,
+            skills=skills,
+            responsibilities=responsibilities,
+            bullet_count=num_bullets
+        )
+        response = await aopenai_chat(
+            openai_client, "ChatGPT bullet generation",
+            model=_openai_model_name(),
+            messages=[
+                {"role": "system", "content": RESUME_WRITER_SYSTEM_MESSAGE},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=1000,
+            temperature=0.7
+        )
+        bullets = _bullet_lines(response.choices[0].message.content.strip(), num_bullets)
+
+        logger.info(f"Generated {len(bullets)} bullet points using ChatGPT in {time.time() - start_time:.2f}s")
+        return bullets, response.usage.prompt_tokens, response.usage.completion_tokens
+
+    except Exception as e:
+        logger.error(f"Error generating bullets with ChatGPT: {str(e)}")
+        error_msg = f"Error generating bullets: {str(e)[:100]}..."
+        return [error_msg], 0, 0
+
+
+@cache_ai_response('experience_bullet_generation', 'gemini', _gemini_model_name, exclude_args=('user_api_key',))
+async def agenerate_bullets_gemini(
+        job_title,
+        employer=None,
+        target_job_title=None,
+        skills=None,
+        responsibilities=None,
+        num_bullets=3,
+        user_api_key=None
+):
+    """Async version of generate_bullets_gemini."""
+    start_time = time.time()
+    gemini_client = AIClientManager.get_gemini_client(user_api_key)
+
+    if not gemini_client:
+        logger.error("Gemini client could not be initialized for bullet generation")
+        return ["Error: Gemini API key not configured or invalid."], 0, 0
+
+    try:
+        prompt = get_dynamic_bullet_generation_prompt(
+            job_title=job_title,
+            employer=employer,
+            target_job_title=target_job_title,
+            skills=skills,
+            responsibilities=responsibilities,
+            bullet_count=num_bullets
+        )
+        response = await agemini_generate(gemini_client, prompt, "Gemini bullet generation")
+        response_text = response.text.strip()
+        bullets = _bullet_lines(response_text, num_bullets)
+
+        logger.info(f"Generated {len(bullets)} bullet points using Gemini in {time.time() - start_time:.2f}s")
+        # Estimate token count (1 token ≈ 4 characters)
+        return bullets, len(prompt) // 4, len(response_text) // 4
+
+    except Exception as e:
+        logger.error(f"Error generating bullets with Gemini: {str(e)}")
+        error_msg = f"Error generating bullets: {str(e)[:100]}..."
+        return [error_msg], 0, 0
+
+
+@cache_ai_response('bullet_enhancement', 'chatgpt', _openai_model_name, temperature=0.6,
+                   digest_args=('job_description',), exclude_args=('user_api_key',))
+async def aenhance_bullet_chatgpt(bullet_text, enhancement_type='general', job_description='', user_api_key=None):
+    """Async version of enhance_bullet_chatgpt."""
+    start_time = time.time()
+    openai_client = AIClientManager.get_async_openai_client(user_api_key)
+
+    if not openai_client:
+        logger.error("OpenAI client could not be initialized for bullet enhancement")
+        return bullet_text, 0, 0
+
+    try:
+        prompt, system_msg = _enhancement_prompt(bullet_text, enhancement_type, job_description)
+        response = await aopenai_chat(
+            openai_client, "ChatGPT bullet enhancement",
+            model=_openai_model_name(),
+            messages=[
+                {"role": "system", "content": system_msg},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=500,
+            temperature=0.6
+        )
+        enhanced_text = response.choices[0].message.content.strip()
+
+        logger.info(f"Enhanced bullet with ChatGPT in {time.time() - start_time:.2f}s")
+        return enhanced_text, response.usage.prompt_tokens, response.usage.completion_tokens
+
+    except Exception as e:
+        logger.error(f"Error enhancing bullet with ChatGPT: {str(e)}")
+        return bullet_text, 0, 0
+
+
+@cache_ai_response('bullet_enhancement', 'gemini', _gemini_model_name, digest_args=('job_description',),
+                   exclude_args=('user_api_key',))
+async def aenhance_bullet_gemini(bullet_text, enhancement_type='general', job_description='', user_api_key=None):
+    """Async version of enhance_bullet_gemini."""
+    start_time = time.time()
+    gemini_client = AIClientManager.get_gemini_client(user_api_key)
+
+    if not gemini_client:
+        logger.error("Gemini client could not be initialized for bullet enhancement")
+        return bullet_text, 0, 0
+
+    try:
+        prompt, _ = _enhancement_prompt(bullet_text, enhancement_type, job_description)
+        response = await agemini_generate(gemini_client, prompt, "Gemini bullet enhancement")
+        enhanced_text = response.text.strip()
+
+        logger.info(f"Enhanced bullet with Gemini in {time.time() - start_time:.2f}s")
+        # Estimate token count
+        return enhanced_text, len(prompt) // 4, len(enhanced_text) // 4
+
+    except Exception as e:
+        logger.error(f"Error enhancing bullet with Gemini: {str(e)}")
+        return bullet_text, 0, 0
+
 # import openai
 # import google.generativeai as genai
 # import json
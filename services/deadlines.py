@@ -0,0 +1,199 @@
+# services/deadlines.py
+
+import time
+import random
+import asyncio
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+import httpx
+import openai
+from google.api_core import exceptions as google_exceptions
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEADLINE_SETTINGS = {
+    'request_budget_seconds': 30.0,  # Shared by every provider call made for one request
+    'call_budget_seconds': 60.0,  # For a provider call made outside any request deadline
+    'max_attempts': 3,
+    'backoff_base_seconds': 0.5,
+    'backoff_max_seconds': 4.0,
+    'min_attempt_seconds': 0.5,  # An attempt (or retry) needs at least this much budget left
+}
+
+RETRYABLE_ERRORS = (
+    httpx.TransportError,
+    openai.APIConnectionError,  # Includes APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.InternalServerError,
+)
+
+TIMEOUT_ERRORS = (
+    TimeoutError,  # Also asyncio.TimeoutError
+    httpx.TimeoutException,
+    openai.APITimeoutError,
+    google_exceptions.DeadlineExceeded,
+)
+
+
+def get_deadline_settings():
+    """Return AI_SETTINGS['deadlines'] merged over the defaults."""
+    return {**DEFAULT_DEADLINE_SETTINGS, **getattr(settings, 'AI_SETTINGS', {}).get('deadlines', {})}
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the time budget is spent before a provider call could be made."""
+
+
+class Deadline:
+    """
+    Point in time by which every provider call of a request must have finished.
+    timed_out is set when a call ran out of time, so the caller can log a 'timeout' status.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.timed_out = False
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+
+_current_deadline = ContextVar('ai_request_deadline', default=None)
+
+
+@contextmanager
+def ai_deadline(seconds=None):
+    """
+    Request-scoped deadline for the AI provider calls made inside the block, including those in
+    asyncio tasks and router threads started from it (they run in copies of this context).
+    Inside an earlier deadline, the earlier one stays in force.
+
+    Usage:
+        with ai_deadline() as deadline:
+            ...
+        if deadline.timed_out: ...
+    """
+    outer = _current_deadline.get()
+    deadline = Deadline(seconds if seconds is not None else get_deadline_settings()['request_budget_seconds'])
+    if outer is not None and outer.expires_at <= deadline.expires_at:
+        deadline = outer
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline():
+    """The deadline in force for this request, or None."""
+    return _current_deadline.get()
+
+
+def is_timeout(error):
+    return isinstance(error, TIMEOUT_ERRORS)
+
+
+def backoff_delay(retry, policy):
+    """Capped exponential backoff with full jitter for the given retry (1-based)."""
+    return random.uniform(0, min(policy['backoff_max_seconds'], policy['backoff_base_seconds'] * 2 ** (retry - 1)))
+
+
+def _next_retry_delay(error, retry, deadline, policy, description):
+    """Seconds to wait before retrying after error, or None if the error must be raised."""
+    if isinstance(error, RETRYABLE_ERRORS) and retry < policy['max_attempts']:
+        delay = backoff_delay(retry, policy)
+        if delay + policy['min_attempt_seconds'] <= deadline.remaining():
+            logger.warning(f"{description} failed ({type(error).__name__}: {str(error)}); "
+                           f"retry {retry} in {delay:.2f}s")
+            return delay
+    if is_timeout(error):
+        deadline.timed_out = True
+    return None
+
+
+def _check_budget(deadline, policy, description):
+    remaining = deadline.remaining()
+    if remaining < policy['min_attempt_seconds']:
+        deadline.timed_out = True
+        raise DeadlineExceeded(f"No time left for {description} ({deadline.seconds:.1f}s budget)")
+    return remaining
+
+
+def call_with_deadline(func, description):
+    """
+    Call func(timeout) with the remaining budget as its timeout, retrying transient errors with
+    capped, jittered exponential backoff that never sleeps past the deadline.
+    """
+    policy = get_deadline_settings()
+    deadline = current_deadline() or Deadline(policy['call_budget_seconds'])
+    retry = 0
+    while True:
+        remaining = _check_budget(deadline, policy, description)
+        try:
+            return func(remaining)
+        except Exception as e:
+            retry += 1
+            delay = _next_retry_delay(e, retry, deadline, policy, description)
+            if delay is None:
+                raise
+            time.sleep(delay)
+
+
+async def acall_with_deadline(func, description):
+    """Async version of call_with_deadline; func(timeout) returns an awaitable, also cut off at the deadline."""
+    policy = get_deadline_settings()
+    deadline = current_deadline() or Deadline(policy['call_budget_seconds'])
+    retry = 0
+    while True:
+        remaining = _check_budget(deadline, policy, description)
+        try:
+            return await asyncio.wait_for(func(remaining), remaining)
+        except Exception as e:
+            retry += 1
+            delay = _next_retry_delay(e, retry, deadline, policy, description)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+
+
+def _without_sdk_retries(client):
+    # The SDK's own retries would ignore the deadline; live clients get a per-call copy without them
+    if isinstance(client, (openai.OpenAI, openai.AsyncOpenAI)):
+        return client.with_options(max_retries=0)
+    return client
+
+
+def openai_chat(client, description, **kwargs):
+    """client.chat.completions.create(**kwargs) under the current deadline and retry policy."""
+    client = _without_sdk_retries(client)
+    return call_with_deadline(lambda timeout: client.chat.completions.create(**kwargs, timeout=timeout), description)
+
+
+async def aopenai_chat(client, description, **kwargs):
+    """Async version of openai_chat."""
+    client = _without_sdk_retries(client)
+    return await acall_with_deadline(lambda timeout: client.chat.completions.create(**kwargs, timeout=timeout),
+                                     description)
+
+
+def gemini_generate(model, contents, description, **kwargs):
+    """model.generate_content(contents, **kwargs) under the current deadline and retry policy."""
+    return call_with_deadline(
+        lambda timeout: model.generate_content(contents, **kwargs, request_options={'timeout': timeout}), description
+    )
+
+
+async def agemini_generate(model, contents, description, **kwargs):
+    """Async version of gemini_generate."""
+    return await acall_with_deadline(
+        lambda timeout: model.generate_content_async(contents, **kwargs, request_options={'timeout': timeout}),
+        description
+    )
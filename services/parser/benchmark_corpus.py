@@ -0,0 +1,303 @@
+# services/parser/benchmark_corpus.py
+
+import os
+import io
+import json
+import random
+import logging
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+try:
+    import docx
+except ImportError:
+    docx = None
+
+CORPUS_FORMATS = ('txt', 'docx', 'pdf')
+CORPUS_LAYOUTS = ('single', 'two_column')  # two_column only applies to PDFs
+
+# (jobs, bullets per job, skills, certifications) for each size
+CORPUS_SIZES = {
+    'small': (2, 2, 6, 0),
+    'medium': (4, 4, 10, 1),
+    'large': (8, 6, 16, 3),
+}
+
+FIRST_NAMES = ["Jane", "Omar", "Priya", "Lucas", "Mei", "Daniel", "Amara", "Sofia", "Kenji", "Elena"]
+LAST_NAMES = ["Doe", "Haddad", "Raman", "Silva", "Chen", "Okafor", "Novak", "Garcia", "Tanaka", "Ivanova"]
+CITIES = ["Austin, TX", "Seattle, WA", "Denver, CO", "Boston, MA", "Chicago, IL", "Atlanta, GA"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Enterprises",
+             "Hooli", "Vandelay Industries", "Soylent Systems", "Cyberdyne"]
+JOB_TITLES = ["Software Engineer", "Senior Software Engineer", "Data Analyst", "Product Manager",
+              "DevOps Engineer", "Backend Developer", "Engineering Manager", "QA Engineer"]
+SCHOOLS = ["University of Texas", "University of Washington", "Boston University", "Georgia Tech",
+           "University of Colorado"]
+DEGREES = [
+    ("Bachelor of Science", "Bachelor", "Computer Science"),
+    ("Master of Science", "Master", "Data Science"),
+    ("Bachelor of Arts", "Bachelor", "Economics"),
+    ("Master of Business Administration", "Master", "Business Administration"),
+]
+SKILLS = ["Python", "Django", "PostgreSQL", "Docker", "Kubernetes", "AWS", "React", "TypeScript", "Redis",
+          "Terraform", "GraphQL", "Celery", "Pandas", "Airflow", "Kafka", "Go", "Java", "Spark", "Linux", "Git"]
+BULLET_TEMPLATES = [
+    "Built {thing} that cut {metric} by {pct}%",
+    "Led migration of {thing} to {tech}, reducing {metric} by {pct}%",
+    "Designed and shipped {thing} used by {count} customers",
+    "Automated {thing} with {tech}, saving {count} hours per month",
+    "Mentored {count} engineers and introduced code review standards for {thing}",
+]
+BULLET_THINGS = ["billing services", "the reporting pipeline", "a feature flag system", "the search API",
+                 "onboarding flows", "CI pipelines", "data ingestion jobs", "the mobile backend"]
+BULLET_METRICS = ["latency", "infrastructure cost", "error rates", "deploy time", "support tickets"]
+CERTIFICATIONS = [("AWS Certified Solutions Architect", "Amazon Web Services"),
+                  ("Certified Kubernetes Administrator", "Cloud Native Computing Foundation"),
+                  ("Professional Scrum Master I", "Scrum.org")]
+LANGUAGES = [("English", 100), ("Spanish", 70), ("French", 50), ("German", 40)]
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def _month_label(date):
+    year, month = date.split('-')
+    return f"{MONTH_NAMES[int(month) - 1]} {year}"
+
+
+def generate_ground_truth(rng, size='medium'):
+    """Build a random resume in the LLM parsing schema (the same keys ResumeParserService returns)."""
+    job_count, bullet_count, skill_count, certification_count = CORPUS_SIZES[size]
+    first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    handle = f"{first_name}{last_name}".lower()
+    city = rng.choice(CITIES)
+
+    jobs = []
+    year, month = 2024, rng.randint(1, 12)
+    for index in range(job_count):
+        start_year, start_month = year - rng.randint(1, 3), rng.randint(1, 12)
+        is_current = index == 0
+        jobs.append({
+            "Job title": rng.choice(JOB_TITLES),
+            "Employer/Company name": rng.choice(COMPANIES),
+            "Location": rng.choice(CITIES),
+            "Start date": f"{start_year}-{start_month:02d}",
+            "End date": None if is_current else f"{year}-{month:02d}",
+            "Is current job": is_current,
+            "Bullet points": [
+                rng.choice(BULLET_TEMPLATES).format(
+                    thing=rng.choice(BULLET_THINGS), metric=rng.choice(BULLET_METRICS), tech=rng.choice(SKILLS),
+                    pct=rng.randint(10, 60), count=rng.randint(3, 400))
+                for _ in range(bullet_count)
+            ],
+        })
+        year, month = start_year, max(1, start_month - 1)
+
+    degree, degree_type, field = rng.choice(DEGREES)
+    education = [{
+        "School name": rng.choice(SCHOOLS),
+        "Location": rng.choice(CITIES),
+        "Degree": degree,
+        "Degree type": degree_type,
+        "Field of study": field,
+        "Graduation date": str(year - rng.randint(0, 2)),
+        "GPA": None,
+        "Description": None,
+    }]
+
+    return {
+        "Personal Information": {
+            "First name": first_name,
+            "Middle name": None,
+            "Last name": last_name,
+            "Email": f"{handle}@example.com",
+            "Phone number": f"({rng.randint(200, 989)}) {rng.randint(200, 989)}-{rng.randint(1000, 9999)}",
+            "Address": city,
+            "LinkedIn URL": f"https://linkedin.com/in/{handle}",
+            "GitHub URL": f"https://github.com/{handle}",
+            "Portfolio URL": None,
+        },
+        "Professional Summary": (f"{jobs[0]['Job title']} with {2024 - year} years of experience building "
+                                 f"{rng.choice(BULLET_THINGS)} and {rng.choice(BULLET_THINGS)}."),
+        "Skills": [{"Skill name": skill, "Category": None, "Other category": None,
+                    "Estimated proficiency level": None} for skill in rng.sample(SKILLS, skill_count)],
+        "Work Experience": jobs,
+        "Education": education,
+        "Projects": [],
+        "Certifications": [
+            {"Name": name, "Institute/Issuing organization": issuer,
+             "Completion date": str(2018 + index), "Expiration date": None, "Score": None,
+             "URL/Link": None, "Description": None}
+            for index, (name, issuer) in enumerate(rng.sample(CERTIFICATIONS, certification_count))
+        ],
+        "Languages": [{"Language name": name, "Proficiency (0-100 where 100 is native and 0 is basic)": level}
+                      for name, level in LANGUAGES[:rng.randint(1, 3)]],
+        "Custom Sections": [],
+    }
+
+
+def resume_blocks(truth):
+    """
+    Lay the ground truth out as resume blocks: (column, kind, text) where column is 'header',
+    'main' or 'side' and kind is 'name', 'contact', 'heading', 'entry', 'bullet' or 'text'.
+    """
+    info = truth["Personal Information"]
+    blocks = [
+        ('header', 'name', f"{info['First name']} {info['Last name']}"),
+        ('header', 'contact', f"{info['Email']} | {info['Phone number']} | {info['Address']}"),
+        ('header', 'contact', f"{info['LinkedIn URL']} | {info['GitHub URL']}"),
+        ('main', 'heading', "SUMMARY"),
+        ('main', 'text', truth["Professional Summary"]),
+        ('main', 'heading', "EXPERIENCE"),
+    ]
+    for job in truth["Work Experience"]:
+        end = "Present" if job["Is current job"] else _month_label(job["End date"])
+        blocks.append(('main', 'entry', f"{job['Job title']} | {job['Employer/Company name']} | {job['Location']} | "
+                                        f"{_month_label(job['Start date'])} - {end}"))
+        blocks.extend(('main', 'bullet', f"- {bullet}") for bullet in job["Bullet points"])
+
+    blocks.append(('main', 'heading', "EDUCATION"))
+    for education in truth["Education"]:
+        blocks.append(('main', 'entry', f"{education['Degree']} in {education['Field of study']} | "
+                                        f"{education['School name']} | {education['Graduation date']}"))
+
+    blocks.append(('side', 'heading', "SKILLS"))
+    blocks.append(('side', 'text', ", ".join(skill["Skill name"] for skill in truth["Skills"])))
+    if truth["Certifications"]:
+        blocks.append(('side', 'heading', "CERTIFICATIONS"))
+        blocks.extend(('side', 'entry', f"{cert['Name']} | {cert['Institute/Issuing organization']} | "
+                                        f"{cert['Completion date']}") for cert in truth["Certifications"])
+    blocks.append(('side', 'heading', "LANGUAGES"))
+    blocks.append(('side', 'text', ", ".join(
+        language["Language name"] for language in truth["Languages"])))
+    return blocks
+
+
+def render_txt(truth):
+    lines = []
+    for _, kind, text in resume_blocks(truth):
+        if kind == 'heading' and lines:
+            lines.append("")
+        lines.append(text)
+    return ("\n".join(lines) + "\n").encode('utf-8')
+
+
+def render_docx(truth, contact_in_header=False):
+    """Render a DOCX; contact lines optionally go in the page header, as many templates do."""
+    document = docx.Document()
+    for column, kind, text in resume_blocks(truth):
+        if kind == 'contact' and contact_in_header:
+            document.sections[0].header.add_paragraph(text)
+        elif kind == 'name':
+            document.add_heading(text, level=0)
+        elif kind == 'heading':
+            document.add_heading(text, level=1)
+        elif kind == 'bullet':
+            document.add_paragraph(text[2:], style='List Bullet')
+        else:
+            document.add_paragraph(text)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+PDF_STYLES = {
+    'name': ("hebo", 18),
+    'heading': ("hebo", 12),
+    'entry': ("hebo", 10),
+    'contact': ("helv", 9),
+    'bullet': ("helv", 10),
+    'text': ("helv", 10),
+}
+
+
+def _wrap(text, fontname, fontsize, width):
+    lines, current = [], ""
+    for word in text.split():
+        candidate = f"{current} {word}".strip()
+        if current and fitz.get_text_length(candidate, fontname=fontname, fontsize=fontsize) > width:
+            lines.append(current)
+            current = f"  {word}" if text.startswith("- ") else word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+
+def render_pdf(truth, layout='single'):
+    """Render a PDF, single column or with a narrow sidebar (skills, certifications, languages) on the left."""
+    document = fitz.open()
+    page = document.new_page()
+    top, bottom = 56, page.rect.height - 56
+    columns = {'header': (56, page.rect.width - 56), 'main': (56, page.rect.width - 56)}
+    columns['side'] = columns['main']
+    if layout == 'two_column':
+        columns['side'] = (40, 190)
+        columns['main'] = (215, page.rect.width - 40)
+
+    cursors = {}
+
+    def write(column, kind, text):
+        fontname, fontsize = PDF_STYLES[kind]
+        x0, x1 = columns[column]
+        key = column if layout == 'two_column' else 'main'
+        page_index, y = cursors.get(key, (0, top))
+        if kind == 'heading':
+            y += 8
+        for line in _wrap(text, fontname, fontsize, x1 - x0):
+            if y + fontsize > bottom:
+                page_index, y = page_index + 1, top
+                if page_index == document.page_count:
+                    document.new_page()
+            document[page_index].insert_text((x0, y + fontsize), line, fontname=fontname, fontsize=fontsize)
+            y += fontsize + 4
+        cursors[key] = (page_index, y)
+        if column == 'header':
+            # Columns start below the banner
+            cursors['main'] = cursors['side'] = (page_index, y + 6)
+
+    for column, kind, text in resume_blocks(truth):
+        write(column if layout == 'two_column' or column == 'header' else 'main', kind, text)
+    return document.tobytes()
+
+
+def generate_corpus(directory, count=18, formats=CORPUS_FORMATS, sizes=tuple(CORPUS_SIZES), layouts=CORPUS_LAYOUTS,
+                    seed=0):
+    """
+    Write count synthetic resumes, cycling through formats, sizes and layouts, each next to a
+    <name>.json ground-truth file. The same seed always produces the same corpus.
+
+    Returns:
+        list of str: Paths of the generated resume files
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    formats = [fmt for fmt in formats if (fmt != 'pdf' or fitz) and (fmt != 'docx' or docx)]
+    written = []
+    for index in range(count):
+        file_format = formats[index % len(formats)]
+        size = sizes[(index // len(formats)) % len(sizes)]
+        layout = layouts[(index // (len(formats) * len(sizes))) % len(layouts)] if file_format == 'pdf' else 'single'
+        truth = generate_ground_truth(rng, size)
+
+        if file_format == 'pdf':
+            content = render_pdf(truth, layout)
+        elif file_format == 'docx':
+            content = render_docx(truth, contact_in_header=bool(index % 2))
+        else:
+            content = render_txt(truth)
+
+        name = f"resume_{index:04d}_{size}_{layout}"
+        path = os.path.join(directory, f"{name}.{file_format}")
+        with open(path, 'wb') as resume_file:
+            resume_file.write(content)
+        with open(os.path.join(directory, f"{name}.json"), 'w', encoding='utf-8') as truth_file:
+            json.dump({'format': file_format, 'size': size, 'layout': layout, 'ground_truth': truth},
+                      truth_file, indent=2)
+        written.append(path)
+    logger.info(f"Generated {len(written)} benchmark resumes in {directory}")
+    return written
@@ -0,0 +1,258 @@
+# services/parser/docx_extractor.py
+
+import io
+import re
+import logging
+import zipfile
+import posixpath
+from lxml import etree
+
+from services.parser.pdf_extractor import normalize_link
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+MC_NS = 'http://schemas.openxmlformats.org/markup-compatibility/2006'
+PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+HYPERLINK_REL_TYPE = R_NS + '/hyperlink'
+HEADER_REL_TYPE = R_NS + '/header'
+STYLES_REL_TYPE = R_NS + '/styles'
+
+W_P = f'{{{W_NS}}}p'
+W_T = f'{{{W_NS}}}t'
+W_TAB = f'{{{W_NS}}}tab'
+W_BR = f'{{{W_NS}}}br'
+W_CR = f'{{{W_NS}}}cr'
+W_TC = f'{{{W_NS}}}tc'
+W_TR = f'{{{W_NS}}}tr'
+W_HYPERLINK = f'{{{W_NS}}}hyperlink'
+W_PPR = f'{{{W_NS}}}pPr'
+W_PSTYLE = f'{{{W_NS}}}pStyle'
+W_NUM_ID = f'{{{W_NS}}}numId'
+W_NUMPR = f'{{{W_NS}}}numPr'
+W_STYLE = f'{{{W_NS}}}style'
+W_BASED_ON = f'{{{W_NS}}}basedOn'
+W_VAL = f'{{{W_NS}}}val'
+W_STYLE_ID = f'{{{W_NS}}}styleId'
+W_INSTR_TEXT = f'{{{W_NS}}}instrText'
+W_FLD_SIMPLE = f'{{{W_NS}}}fldSimple'
+MC_FALLBACK = f'{{{MC_NS}}}Fallback'
+R_ID = f'{{{R_NS}}}id'
+
+FIELD_HYPERLINK_PATTERN = re.compile(r'HYPERLINK\s+"([^"]+)"')
+TABLE_CELL_SEPARATOR = " | "
+LIST_ITEM_PREFIX = "• "  # Marks Word list items so the parsers see them as bullets
+
+
+def _read_relationships(archive, part_name):
+    """Return {relationship id: (type, target, external)} for an OPC part, or {} if it has none."""
+    directory, filename = posixpath.split(part_name)
+    rels_name = posixpath.join(directory, '_rels', f'{filename}.rels')
+    try:
+        rels_xml = archive.read(rels_name)
+    except KeyError:
+        return {}
+
+    relationships = {}
+    for rel in etree.fromstring(rels_xml).iter(f'{{{PKG_REL_NS}}}Relationship'):
+        relationships[rel.get('Id')] = (
+            rel.get('Type'),
+            rel.get('Target'),
+            rel.get('TargetMode') == 'External',
+        )
+    return relationships
+
+
+def _read_list_styles(archive, relationships):
+    """Ids of paragraph styles that number their paragraphs (w:numPr), directly or via w:basedOn."""
+    targets = [target for rel_type, target, external in relationships.values()
+               if rel_type == STYLES_REL_TYPE and not external]
+    if not targets:
+        return frozenset()
+    try:
+        styles_xml = archive.read(posixpath.normpath(posixpath.join('word', targets[0])))
+    except KeyError:
+        return frozenset()
+
+    numbered = {}  # styleId -> True/False when the style sets w:numPr itself (numId 0 turns it off)
+    based_on = {}
+    for style in etree.fromstring(styles_xml).iter(W_STYLE):
+        style_id = style.get(W_STYLE_ID)
+        num_id = style.find(f'{W_PPR}/{W_NUMPR}/{W_NUM_ID}')
+        if num_id is not None:
+            numbered[style_id] = num_id.get(W_VAL) != '0'
+        parent = style.find(W_BASED_ON)
+        if parent is not None:
+            based_on[style_id] = parent.get(W_VAL)
+
+    list_styles = set()
+    for style_id in based_on.keys() | numbered.keys():
+        seen = set()
+        current = style_id
+        while current is not None and current not in numbered and current not in seen:
+            seen.add(current)
+            current = based_on.get(current)
+        if numbered.get(current):
+            list_styles.add(style_id)
+    return frozenset(list_styles)
+
+
+class _PartReader:
+    """
+    Streams one WordprocessingML part with iterparse and collects lines in reading order.
+    Paragraphs become lines, table rows become one line with cells joined by " | ",
+    text boxes are read where they are anchored, and mc:Fallback copies are skipped.
+    List items (w:numPr on the paragraph or its style) are prefixed with a bullet.
+    """
+
+    def __init__(self, relationships, add_link, list_styles=frozenset()):
+        self.relationships = relationships
+        self.add_link = add_link
+        self.list_styles = list_styles
+        self.lines = []
+        self.paragraphs = []  # Stack: text boxes nest paragraphs inside paragraphs
+        self.list_items = []  # Parallel to paragraphs: whether each one is a list item
+        self.cells = []  # Stack of cell buffers for (possibly nested) tables
+        self.rows = []  # Stack of row buffers
+        self.fallback_depth = 0
+
+    def _emit(self, text):
+        if self.cells:
+            self.cells[-1].append(text)
+        else:
+            self.lines.append(text)
+
+    def _append_text(self, text):
+        if self.paragraphs and text:
+            self.paragraphs[-1].append(text)
+
+    def read(self, xml_stream):
+        for event, elem in etree.iterparse(xml_stream, events=('start', 'end'), huge_tree=True):
+            tag = elem.tag
+
+            if event == 'start':
+                if tag == MC_FALLBACK:
+                    self.fallback_depth += 1
+                elif self.fallback_depth:
+                    continue
+                elif tag == W_P:
+                    self.paragraphs.append([])
+                    self.list_items.append(False)
+                elif tag == W_TR:
+                    self.rows.append([])
+                elif tag == W_TC:
+                    self.cells.append([])
+                elif tag == W_HYPERLINK:
+                    self._add_relationship_link(elem.get(R_ID))
+                elif tag == W_FLD_SIMPLE:
+                    self._add_field_link(elem.get(f'{{{W_NS}}}instr'))
+                continue
+
+            # End events
+            if tag == MC_FALLBACK:
+                self.fallback_depth -= 1
+            elif self.fallback_depth:
+                pass
+            elif tag == W_T:
+                self._append_text(elem.text)
+            elif tag == W_TAB:
+                self._append_text("\t")
+            elif tag in (W_BR, W_CR):
+                self._append_text("\n")
+            elif tag == W_INSTR_TEXT:
+                self._add_field_link(elem.text)
+            elif tag == W_PSTYLE and self._in_paragraph_properties(elem):
+                self.list_items[-1] = elem.get(W_VAL) in self.list_styles
+            elif tag == W_NUM_ID and self._in_paragraph_properties(elem.getparent()):
+                self.list_items[-1] = elem.get(W_VAL) != '0'
+            elif tag == W_P and self.paragraphs:
+                text = "".join(self.paragraphs.pop())
+                if self.list_items.pop() and text.strip():
+                    text = LIST_ITEM_PREFIX + text.lstrip()
+                self._emit(text)
+            elif tag == W_TC and self.cells:
+                cell_text = " ".join(line.strip() for line in self.cells.pop() if line.strip())
+                if self.rows:
+                    self.rows[-1].append(cell_text)
+            elif tag == W_TR and self.rows:
+                row_text = TABLE_CELL_SEPARATOR.join(cell for cell in self.rows.pop() if cell)
+                if row_text:
+                    self._emit(row_text)
+
+            # Free parsed subtrees as we go so memory stays flat on large documents
+            elem.clear(keep_tail=False)
+            parent = elem.getparent()
+            if parent is not None and tag in (W_P, W_TR):
+                while elem.getprevious() is not None:
+                    del parent[0]
+        return self.lines
+
+    def _in_paragraph_properties(self, elem):
+        """True for a direct child of the current paragraph's w:pPr (not e.g. a w:pPrChange copy)."""
+        properties = elem.getparent() if elem is not None else None
+        return (bool(self.list_items) and properties is not None and properties.tag == W_PPR
+                and properties.getparent() is not None and properties.getparent().tag == W_P)
+
+    def _add_relationship_link(self, rel_id):
+        rel = self.relationships.get(rel_id) if rel_id else None
+        if rel and rel[0] == HYPERLINK_REL_TYPE and rel[2]:
+            self.add_link(rel[1])
+
+    def _add_field_link(self, instruction):
+        if not instruction:
+            return
+        match = FIELD_HYPERLINK_PATTERN.search(instruction)
+        if match:
+            self.add_link(match.group(1))
+
+
+def extract_docx(file_bytes):
+    """
+    Extract text in reading order and hyperlink targets from DOCX bytes.
+
+    Streams word/document.xml (and any header parts) with lxml iterparse instead of
+    building python-docx's object model, so tables, text boxes and header contact
+    details are included and hyperlinks are returned like the PDF path's links.
+
+    Returns:
+        tuple: (extracted_text, extracted_links)
+    """
+    seen_links = set()
+    links = []
+
+    def add_link(uri):
+        link = normalize_link(uri)
+        if link and link not in seen_links:
+            seen_links.add(link)
+            links.append(link)
+
+    with zipfile.ZipFile(io.BytesIO(file_bytes)) as archive:
+        document_part = 'word/document.xml'
+        relationships = _read_relationships(archive, document_part)
+        list_styles = _read_list_styles(archive, relationships)
+
+        lines = []
+        # Headers often hold the candidate's name and contact details
+        header_targets = sorted(
+            target for rel_type, target, external in relationships.values()
+            if rel_type == HEADER_REL_TYPE and not external
+        )
+        for target in header_targets:
+            header_part = posixpath.normpath(posixpath.join('word', target))
+            try:
+                with archive.open(header_part) as header_stream:
+                    reader = _PartReader(_read_relationships(archive, header_part), add_link, list_styles)
+                    # First-page/even/default headers usually repeat the same lines
+                    lines.extend(line for line in reader.read(header_stream) if line not in lines)
+            except KeyError:
+                logger.warning(f"DOCX header part missing: {header_part}")
+
+        with archive.open(document_part) as document_stream:
+            reader = _PartReader(relationships, add_link, list_styles)
+            lines.extend(reader.read(document_stream))
+
+    text = "".join(f"{line}\n" for line in lines)
+    return text, links
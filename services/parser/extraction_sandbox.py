@@ -0,0 +1,279 @@
+# services/parser/extraction_sandbox.py
+
+import os
+import time
+import queue
+import signal
+import atexit
+import logging
+import threading
+import multiprocessing
+from dataclasses import dataclass
+from typing import Any, Optional
+from django.conf import settings
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; only the timeout is enforced there
+    resource = None
+
+DEFAULT_EXTRACTION_SANDBOX_SETTINGS = {
+    'enabled': True,
+    'workers': 2,  # Pre-forked extraction processes
+    'memory_limit_mb': 512,  # Address space each worker may grow by (RLIMIT_AS)
+    'cpu_seconds': 30,  # CPU time per job (RLIMIT_CPU)
+    'timeout_seconds': 30.0,  # Wall-clock limit per job; the worker is killed past it
+    'max_jobs_per_worker': 50,  # Recycle workers so leaks and fragmentation don't accumulate
+}
+
+# Failure reasons reported in SandboxResult.reason
+REASON_TIMEOUT = 'timeout'
+REASON_MEMORY = 'memory'
+REASON_CPU = 'cpu'
+REASON_CRASHED = 'crashed'
+REASON_ERROR = 'error'
+REASON_BUSY = 'busy'
+
+
+@dataclass
+class SandboxResult:
+    ok: bool
+    value: Any = None
+    reason: Optional[str] = None
+    detail: str = ""
+    elapsed_seconds: float = 0.0
+
+    def as_dict(self):
+        return {'reason': self.reason, 'detail': self.detail, 'elapsed_seconds': round(self.elapsed_seconds, 3)}
+
+
+class ExtractionSandboxError(Exception):
+    """Raised by callers that want an exception for a failed sandboxed extraction."""
+
+    def __init__(self, result):
+        super().__init__(f"Sandboxed extraction failed ({result.reason}): {result.detail}")
+        self.result = result
+
+
+def get_sandbox_settings():
+    """Return settings.RESUME_EXTRACTION_SANDBOX merged over the defaults."""
+    return {**DEFAULT_EXTRACTION_SANDBOX_SETTINGS, **getattr(settings, 'RESUME_EXTRACTION_SANDBOX', {})}
+
+
+def _current_address_space():
+    """Bytes of virtual memory this process already maps (Linux), or 0 if unknown."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _apply_memory_limit(memory_limit_mb):
+    if resource is None or not memory_limit_mb:
+        return
+    # A forked worker inherits the parent's mappings, so the ceiling is relative to them
+    limit = _current_address_space() + memory_limit_mb * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError) as e:
+        logger.warning(f"Could not set extraction worker memory limit: {str(e)}")
+
+
+def _apply_cpu_limit(cpu_seconds):
+    """Allow cpu_seconds more CPU time from now; exceeding it raises SIGXCPU, which kills the worker."""
+    if resource is None or not cpu_seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft_limit = int(usage.ru_utime + usage.ru_stime) + int(cpu_seconds) + 1
+    _, hard_limit = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard_limit != resource.RLIM_INFINITY:
+        soft_limit = min(soft_limit, hard_limit)
+    try:
+        resource.setrlimit(resource.RLIMIT_CPU, (soft_limit, hard_limit))
+    except (ValueError, OSError) as e:
+        logger.warning(f"Could not set extraction worker CPU limit: {str(e)}")
+
+
+def _worker_main(connection, memory_limit_mb, cpu_seconds):
+    """Worker loop: run (func, args, kwargs) jobs from the pipe until told to stop."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is the parent's to handle
+    _apply_memory_limit(memory_limit_mb)
+    while True:
+        try:
+            job = connection.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+
+        func, args, kwargs = job
+        _apply_cpu_limit(cpu_seconds)
+        try:
+            connection.send(('ok', func(*args, **kwargs)))
+        except MemoryError:
+            connection.send((REASON_MEMORY, "Memory limit exceeded"))
+        except Exception as e:
+            connection.send((REASON_ERROR, f"{type(e).__name__}: {str(e)}"))
+
+
+class _Worker:
+    def __init__(self, context, memory_limit_mb, cpu_seconds):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_connection, memory_limit_mb, cpu_seconds), daemon=True
+        )
+        self.process.start()
+        child_connection.close()
+        self.jobs = 0
+
+    def stop(self, kill=False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.connection.send(None)
+            except (OSError, ValueError):
+                pass
+        self.process.join(timeout=1.0)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=1.0)
+        self.connection.close()
+
+
+class ExtractionSandbox:
+    """
+    Pool of pre-forked processes that run document extractors under rlimit-enforced
+    memory and CPU ceilings and a hard wall-clock timeout.
+
+    A worker that times out, dies or has served max_jobs_per_worker jobs is replaced
+    with a fresh one. Callers always get a SandboxResult back, never a stalled call.
+    Workers are daemonic, so extractors run here must not start process pools themselves.
+    """
+
+    def __init__(self, workers=2, memory_limit_mb=512, cpu_seconds=30, timeout_seconds=30.0,
+                 max_jobs_per_worker=50):
+        self.memory_limit_mb = memory_limit_mb
+        self.cpu_seconds = cpu_seconds
+        self.timeout_seconds = timeout_seconds
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._context = multiprocessing.get_context()
+        self._idle = queue.Queue()
+        self._workers = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(max(1, workers)):
+            self._idle.put(self._spawn())
+
+    def _spawn(self):
+        worker = _Worker(self._context, self.memory_limit_mb, self.cpu_seconds)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _retire(self, worker, kill=False):
+        with self._lock:
+            self._workers.discard(worker)
+        worker.stop(kill=kill)
+
+    def run(self, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) in a sandboxed worker. func and its arguments must be picklable.
+
+        Returns:
+            SandboxResult
+        """
+        started = time.monotonic()
+        try:
+            worker = self._idle.get(timeout=self.timeout_seconds)
+        except queue.Empty:
+            return SandboxResult(False, reason=REASON_BUSY, detail="No extraction worker became free in time",
+                                 elapsed_seconds=time.monotonic() - started)
+
+        replace = False
+        try:
+            result = self._run_on_worker(worker, func, args, kwargs, started)
+            replace = not result.ok and result.reason != REASON_ERROR
+        except Exception as e:
+            logger.error(f"Extraction sandbox failure: {str(e)}")
+            result = SandboxResult(False, reason=REASON_CRASHED, detail=str(e),
+                                   elapsed_seconds=time.monotonic() - started)
+            replace = True
+        finally:
+            worker.jobs += 1
+            if replace or worker.jobs >= self.max_jobs_per_worker or self._closed:
+                self._retire(worker, kill=replace)
+                worker = None if self._closed else self._spawn()
+            if worker is not None:
+                self._idle.put(worker)
+        return result
+
+    def _run_on_worker(self, worker, func, args, kwargs, started):
+        worker.connection.send((func, args, kwargs))
+        remaining = max(self.timeout_seconds - (time.monotonic() - started), 0)
+        if not worker.connection.poll(remaining):
+            logger.warning(f"Extraction worker {worker.process.pid} timed out after {self.timeout_seconds}s")
+            return SandboxResult(False, reason=REASON_TIMEOUT,
+                                 detail=f"Extraction exceeded {self.timeout_seconds}s",
+                                 elapsed_seconds=time.monotonic() - started)
+        try:
+            status, payload = worker.connection.recv()
+        except (EOFError, OSError):
+            worker.process.join(timeout=1.0)
+            return self._died_result(worker, started)
+
+        elapsed = time.monotonic() - started
+        if status == 'ok':
+            return SandboxResult(True, value=payload, elapsed_seconds=elapsed)
+        return SandboxResult(False, reason=status, detail=payload, elapsed_seconds=elapsed)
+
+    @staticmethod
+    def _died_result(worker, started):
+        exit_code = worker.process.exitcode
+        sigxcpu = getattr(signal, 'SIGXCPU', None)
+        if sigxcpu and exit_code == -sigxcpu:
+            reason, detail = REASON_CPU, "CPU time limit exceeded"
+        elif exit_code == -signal.SIGKILL:
+            reason, detail = REASON_MEMORY, "Worker was killed (likely out of memory)"
+        else:
+            reason, detail = REASON_CRASHED, f"Worker exited with code {exit_code}"
+        logger.warning(f"Extraction worker {worker.process.pid} died: {detail}")
+        return SandboxResult(False, reason=reason, detail=detail, elapsed_seconds=time.monotonic() - started)
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
+
+
+_shared_sandbox = None
+_shared_sandbox_pid = None
+_shared_sandbox_lock = threading.Lock()
+
+
+def get_extraction_sandbox():
+    """Return the process-wide sandbox built from settings, or None when sandboxing is disabled."""
+    global _shared_sandbox, _shared_sandbox_pid
+    sandbox_settings = get_sandbox_settings()
+    if not sandbox_settings['enabled']:
+        return None
+    with _shared_sandbox_lock:
+        # A forked child (e.g. an import_resumes worker) must not share its parent's worker pipes
+        if _shared_sandbox is None or _shared_sandbox_pid != os.getpid():
+            _shared_sandbox_pid = os.getpid()
+            _shared_sandbox = ExtractionSandbox(
+                workers=sandbox_settings['workers'],
+                memory_limit_mb=sandbox_settings['memory_limit_mb'],
+                cpu_seconds=sandbox_settings['cpu_seconds'],
+                timeout_seconds=sandbox_settings['timeout_seconds'],
+                max_jobs_per_worker=sandbox_settings['max_jobs_per_worker'],
+            )
+            atexit.register(_shared_sandbox.close)
+        return _shared_sandbox
@@ -0,0 +1,760 @@
+# services/parser/heuristic_parser.py
+
+import re
+import logging
+from urllib.parse import urlparse
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Bump when the parsing rules change so cached heuristic parses are invalidated
+HEURISTIC_PARSER_VERSION = "1"
+
+# Canonical section -> header spellings (normalized: lowercase, '&' as 'and', no trailing colon)
+SECTION_ALIASES = {
+    'summary': [
+        'summary', 'professional summary', 'profile', 'professional profile', 'career summary',
+        'objective', 'career objective', 'about me', 'about', 'executive summary', 'summary of qualifications',
+    ],
+    'experience': [
+        'experience', 'work experience', 'professional experience', 'employment', 'employment history',
+        'work history', 'career history', 'relevant experience', 'professional background', 'experience summary',
+    ],
+    'education': [
+        'education', 'academic background', 'education and training', 'academic qualifications',
+        'educational background', 'academics', 'qualifications',
+    ],
+    'skills': [
+        'skills', 'technical skills', 'core competencies', 'key skills', 'technologies', 'skills and tools',
+        'areas of expertise', 'expertise', 'tools and technologies', 'technical proficiencies', 'skill set',
+        'core skills', 'competencies',
+    ],
+    'projects': [
+        'projects', 'personal projects', 'academic projects', 'key projects', 'selected projects',
+        'project experience', 'side projects', 'notable projects',
+    ],
+    'certifications': [
+        'certifications', 'certificates', 'certification', 'licenses and certifications',
+        'certifications and licenses', 'courses', 'courses and certifications', 'training and certifications',
+        'professional development',
+    ],
+    'languages': ['languages', 'language skills', 'spoken languages'],
+    'custom': [
+        'awards', 'honors', 'honors and awards', 'awards and honors', 'achievements', 'accomplishments',
+        'publications', 'volunteer experience', 'volunteering', 'volunteer work', 'interests', 'hobbies',
+        'activities', 'leadership', 'extracurricular activities', 'references', 'patents', 'memberships',
+        'affiliations', 'presentations', 'conferences',
+    ],
+}
+SECTION_HEADER_INDEX = {alias: section for section, aliases in SECTION_ALIASES.items() for alias in aliases}
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+DATE_TOKEN = (
+    r"(?:(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?,?\s+(?:19|20)\d{2}"
+    r"|\d{1,2}/(?:19|20)\d{2}|(?:19|20)\d{2}[-/]\d{1,2}|(?:19|20)\d{2})"
+)
+DATE_RANGE_RE = re.compile(
+    rf"(?P<start>{DATE_TOKEN})\s*(?:-|–|—|to|until|through)\s*(?P<end>{DATE_TOKEN}|present|current|now|today|ongoing)",
+    re.IGNORECASE
+)
+DATE_RE = re.compile(DATE_TOKEN, re.IGNORECASE)
+MONTH_YEAR_RE = re.compile(r"(?P<month>[a-z]{3})[a-z]*\.?,?\s+(?P<year>\d{4})", re.IGNORECASE)
+NUMERIC_MONTH_YEAR_RE = re.compile(r"(?P<month>\d{1,2})/(?P<year>\d{4})|(?P<year2>\d{4})[-/](?P<month2>\d{1,2})")
+
+EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+PHONE_RE = re.compile(r'(?:\+\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b')
+EXPLICIT_URL_RE = re.compile(r'https?://[^\s|,;]+|(?:www\.)?(?:linkedin|github)\.com/[^\s|,;]+', re.IGNORECASE)
+BULLET_RE = re.compile(r'^\s*(?:[-•*▪●◦‣∙·➢➤►■□✓✔]|\d{1,2}[.)])\s*')
+GPA_RE = re.compile(r'\b(?:GPA|CGPA)\s*[:\-]?\s*(?P<gpa>\d(?:\.\d{1,2})?)(?:\s*/\s*\d(?:\.\d{1,2})?)?', re.IGNORECASE)
+LOCATION_RE = re.compile(
+    r"^(?:remote|hybrid|(?:[A-Z][A-Za-z.'\-]*\s?){1,4},\s*(?:[A-Z]{2}|(?:[A-Z][A-Za-z.'\-]*\s?){1,4})"
+    r"(?:,\s*(?:[A-Z][A-Za-z.'\-]*\s?){1,4})?)$"
+)
+PRIMARY_SEPARATOR_RE = re.compile(r'\s*[|•·–—]\s*|\s+-\s+')
+ROLE_SEPARATOR_RE = re.compile(r'\s*[|•·–—]\s*|\s+-\s+|\s+(?:at|@)\s+')
+LIST_SEPARATOR_RE = re.compile(r'\s*[,;|•·\t]\s*')
+STATE_CODE_RE = re.compile(r'^[A-Z]{2}$')
+DEGREE_RE = re.compile(
+    r"\b(?:bachelor(?:'s)?(?:\s+of\s+(?:arts|science|engineering|technology|business administration|fine arts|commerce))?"
+    r"|master(?:'s)?(?:\s+of\s+(?:arts|science|engineering|technology|business administration|fine arts))?"
+    r"|associate(?:'s)?(?:\s+of\s+(?:arts|science|applied science))?|doctor(?:ate)?(?:\s+of\s+\w+)?"
+    r"|ph\.?\s?d\.?|m\.?b\.?a\.?|b\.?\s?s\.?c?\.?|b\.?\s?a\.?|m\.?\s?s\.?c?\.?|m\.?\s?a\.?|b\.?\s?tech|m\.?\s?tech"
+    r"|b\.?\s?e\.?|m\.?\s?e\.?|b\.?\s?com|high school diploma|diploma|ged)(?=[\s,.|()]|$)",
+    re.IGNORECASE
+)
+SCHOOL_RE = re.compile(r'\b(?:university|college|institute|school|academy|polytechnic|universidad|universit[eé])\b',
+                       re.IGNORECASE)
+COMPANY_HINT_RE = re.compile(
+    r'\b(?:inc|llc|ltd|limited|corp|corporation|company|co|gmbh|plc|technologies|solutions|labs|group|systems|'
+    r'consulting|partners|agency|bank|studios?)\b\.?',
+    re.IGNORECASE
+)
+TITLE_HINT_RE = re.compile(
+    r'\b(?:engineer|developer|manager|analyst|intern|designer|consultant|lead|director|scientist|architect|'
+    r'specialist|administrator|coordinator|associate|officer|assistant|head|vp|president|founder|teacher|'
+    r'researcher|programmer|technician|accountant|representative|supervisor|executive|strategist|editor|'
+    r'writer|nurse|advisor|instructor|owner|cto|ceo|cfo)s?\b',
+    re.IGNORECASE
+)
+LANGUAGE_LEVELS = (
+    ('native', 100), ('bilingual', 100), ('mother tongue', 100), ('fluent', 90), ('full professional', 85),
+    ('professional', 75), ('advanced', 75), ('conversational', 50), ('intermediate', 50),
+    ('limited', 35), ('elementary', 25), ('basic', 25), ('beginner', 20),
+)
+DEGREE_TYPES = (
+    (re.compile(r'high school|ged', re.IGNORECASE), 'High School Diploma'),
+    (re.compile(r'ph\.?\s?d|doctor', re.IGNORECASE), 'Doctorate'),
+    (re.compile(r'master|m\.?b\.?a|^m\.?\s?(?:s|a|sc|tech|e)\b', re.IGNORECASE), 'Master'),
+    (re.compile(r'bachelor|^b\.?\s?(?:s|a|sc|tech|e|com)\b', re.IGNORECASE), 'Bachelor'),
+    (re.compile(r'associate', re.IGNORECASE), 'Associate'),
+    (re.compile(r'certificate', re.IGNORECASE), 'Certificate'),
+)
+# Index key used by index_sections() -> top-level key of the parsing schema
+SECTION_SCHEMA_KEYS = {
+    'header': "Personal Information",
+    'summary': "Professional Summary",
+    'experience': "Work Experience",
+    'education': "Education",
+    'skills': "Skills",
+    'projects': "Projects",
+    'certifications': "Certifications",
+    'languages': "Languages",
+    'custom': "Custom Sections",
+}
+STRIP_CHARS = " \t|,;:-–—•·"
+EMPTY_PARENS_RE = re.compile(r'\(\s*\)|\[\s*\]')
+
+
+def normalize_header(line):
+    """Normalize a line for section-header lookup; returns '' for lines too long to be a header."""
+    candidate = line.strip().strip(':').strip()
+    if not candidate or len(candidate) > 45:
+        return ''
+    candidate = candidate.lower().replace('&', 'and')
+    return " ".join(candidate.split())
+
+
+def normalize_date(token):
+    """Convert a date token like 'Jan 2020', '03/2019' or '2018' to 'YYYY-MM' or 'YYYY'."""
+    if not token:
+        return None
+    token = token.strip()
+    match = MONTH_YEAR_RE.match(token)
+    if match and match.group('month').lower() in MONTHS:
+        return f"{match.group('year')}-{MONTHS[match.group('month').lower()]:02d}"
+    match = NUMERIC_MONTH_YEAR_RE.match(token)
+    if match:
+        year = match.group('year') or match.group('year2')
+        month = int(match.group('month') or match.group('month2'))
+        if 1 <= month <= 12:
+            return f"{year}-{month:02d}"
+        return year
+    match = re.match(r'(?:19|20)\d{2}', token)
+    return match.group(0) if match else None
+
+
+def extract_date_range(line):
+    """
+    Find a date range (or single date) in a line.
+
+    Returns:
+        tuple: (start_date, end_date, is_current, line_without_dates)
+    """
+    match = DATE_RANGE_RE.search(line)
+    if match:
+        end_token = match.group('end')
+        is_current = end_token.lower() in ('present', 'current', 'now', 'today', 'ongoing')
+        remainder = EMPTY_PARENS_RE.sub('', line[:match.start()] + " " + line[match.end():]).strip(STRIP_CHARS)
+        return normalize_date(match.group('start')), None if is_current else normalize_date(end_token), \
+            is_current, remainder
+    match = DATE_RE.search(line)
+    if match:
+        remainder = EMPTY_PARENS_RE.sub('', line[:match.start()] + " " + line[match.end():]).strip(STRIP_CHARS)
+        return None, normalize_date(match.group(0)), False, remainder
+    return None, None, False, line
+
+
+def split_pieces(text, separator_re=PRIMARY_SEPARATOR_RE):
+    """Split an entry header into pieces on |, bullets and dashes and, failing those, on commas."""
+    pieces = [piece.strip(STRIP_CHARS) for piece in separator_re.split(text)]
+    pieces = [piece for piece in pieces if piece]
+    if len(pieces) == 1 and ',' in pieces[0]:
+        comma_pieces = [piece.strip() for piece in pieces[0].split(',') if piece.strip()]
+        # Re-attach US state codes so "Austin, TX" stays one location piece
+        pieces = []
+        for piece in comma_pieces:
+            if pieces and STATE_CODE_RE.match(piece):
+                pieces[-1] = f"{pieces[-1]}, {piece}"
+            else:
+                pieces.append(piece)
+    return pieces
+
+
+def is_location(piece):
+    return bool(LOCATION_RE.match(piece.strip()))
+
+
+def split_trailing_location(piece):
+    """
+    Split a trailing location off a header piece: 'Acme Corp, San Francisco, CA' ->
+    ('Acme Corp', 'San Francisco, CA'). Returns (piece, None) when there is none.
+    """
+    parts = [part.strip() for part in piece.split(',')]
+    if len(parts) < 2 or not all(parts):
+        return piece, None
+    if parts[-1].lower() in ('remote', 'hybrid'):
+        return ", ".join(parts[:-1]), parts[-1]
+    # A state code in the middle means the piece is itself a location ('Austin, TX, USA')
+    if len(parts) < 3 or STATE_CODE_RE.match(parts[-2]):
+        return piece, None
+    location = ", ".join(parts[-2:])
+    if not is_location(location):
+        return piece, None
+    return ", ".join(parts[:-2]), location
+
+
+def strip_bullet(line):
+    return BULLET_RE.sub('', line, count=1).strip()
+
+
+class HeuristicResumeParser:
+    """
+    Rule-based resume parser that fills the same JSON schema the LLM prompt asks for.
+
+    Lines are indexed into sections in one pass by looking each candidate header up in
+    SECTION_HEADER_INDEX; each section is then parsed once with precompiled patterns.
+    Used as the no-API-key path and as the fallback when an AI provider fails.
+    """
+
+    def parse(self, resume_text, extracted_links=None):
+        """
+        Parse resume text into the LLM schema ("Personal Information", "Work Experience", ...).
+
+        Args:
+            resume_text (str): Extracted resume text
+            extracted_links (list, optional): Hyperlink targets found during extraction
+
+        Returns:
+            dict: Parsed resume data
+        """
+        sections = self.index_sections(resume_text)
+        return self.parse_sections(sections, extracted_links)
+
+    def index_sections(self, resume_text):
+        """
+        Split the resume into sections in a single pass.
+
+        Returns:
+            dict: canonical section name -> list of lines. Lines before the first header are
+                  under 'header'; unrecognised custom headers become ('custom', title) keys.
+        """
+        sections = {'header': []}
+        current = 'header'
+        for raw_line in str(resume_text).splitlines():
+            line = raw_line.strip()
+            if not line:
+                continue
+            section = SECTION_HEADER_INDEX.get(normalize_header(line))
+            if section:
+                current = ('custom', line.strip(':').strip()) if section == 'custom' else section
+                sections.setdefault(current, [])
+                continue
+            sections.setdefault(current, []).append(line)
+        return sections
+
+    def parse_sections(self, sections, extracted_links=None):
+        """Build the schema dict from an index_sections() result."""
+        header_lines = sections.get('header', [])
+        personal_info, header_summary = self.parse_personal_info(header_lines, sections, extracted_links or [])
+
+        summary_lines = sections.get('summary')
+        summary = " ".join(summary_lines) if summary_lines else header_summary
+
+        custom_sections = []
+        for key, lines in sections.items():
+            if isinstance(key, tuple) and lines:
+                custom_sections.append(self.parse_custom_section(key[1], lines))
+
+        return {
+            "Personal Information": personal_info,
+            "Professional Summary": summary or None,
+            "Skills": self.parse_skills(sections.get('skills', [])),
+            "Work Experience": self.parse_experience(sections.get('experience', [])),
+            "Education": self.parse_education(sections.get('education', [])),
+            "Projects": self.parse_projects(sections.get('projects', [])),
+            "Certifications": self.parse_certifications(sections.get('certifications', [])),
+            "Languages": self.parse_languages(sections.get('languages', [])),
+            "Custom Sections": custom_sections,
+        }
+
+    def score_sections(self, sections, parsed):
+        """
+        Estimate how complete the heuristic result is for each schema section present.
+
+        Scores run from 0.0 (nothing usable extracted) to 1.0 (every expected field found),
+        averaged over entries for list sections. Sections missing from the resume are omitted.
+
+        Returns:
+            dict: schema key -> confidence
+        """
+        scores = {}
+
+        personal_info = parsed["Personal Information"]
+        identity_fields = [personal_info["First name"], personal_info["Last name"], personal_info["Email"]]
+        scores["Personal Information"] = sum(1 for value in identity_fields if value) / len(identity_fields)
+
+        if sections.get('summary'):
+            scores["Professional Summary"] = 1.0 if parsed["Professional Summary"] else 0.0
+
+        entry_fields = {
+            "Work Experience": ('experience', ("Job title", "Employer/Company name", "Start date", "Bullet points")),
+            "Education": ('education', ("School name", "Degree", "Graduation date")),
+            "Projects": ('projects', ("Project name", ("Bullet points", "Summary/description"))),
+            "Certifications": ('certifications', ("Name", ("Institute/Issuing organization", "Completion date"))),
+            "Languages": ('languages', ("Language name",)),
+        }
+        for schema_key, (section_key, fields) in entry_fields.items():
+            lines = sections.get(section_key)
+            if not lines:
+                continue
+            scores[schema_key] = self._entry_completeness(parsed[schema_key], fields)
+
+        if sections.get('skills'):
+            skills = parsed["Skills"]
+            # Long "skills" usually mean sentences or unsplit lists the rules could not handle
+            short_skills = sum(1 for skill in skills if len(skill["Skill name"].split()) <= 4)
+            scores["Skills"] = short_skills / len(skills) if skills else 0.0
+
+        custom_lines = [lines for key, lines in sections.items() if isinstance(key, tuple) and lines]
+        if custom_lines:
+            scores["Custom Sections"] = 0.8 if parsed["Custom Sections"] else 0.0
+
+        return scores
+
+    @staticmethod
+    def _entry_completeness(entries, fields):
+        """Average share of expected fields filled per entry; a tuple of fields counts if any is filled."""
+        if not entries:
+            return 0.0
+        total = 0.0
+        for entry in entries:
+            filled = 0
+            for field in fields:
+                names = field if isinstance(field, tuple) else (field,)
+                if any(entry.get(name) for name in names):
+                    filled += 1
+            total += filled / len(fields)
+        return total / len(entries)
+
+    @staticmethod
+    def section_text(sections, schema_key):
+        """Return the raw text of the index sections that feed one schema key."""
+        if schema_key == "Custom Sections":
+            parts = []
+            for key, lines in sections.items():
+                if isinstance(key, tuple) and lines:
+                    parts.append(key[1])
+                    parts.extend(lines)
+            return "\n".join(parts)
+        section_key = next(key for key, value in SECTION_SCHEMA_KEYS.items() if value == schema_key)
+        return "\n".join(sections.get(section_key, []))
+
+    def parse_personal_info(self, header_lines, sections, extracted_links):
+        """Return (personal info dict, summary text found in the header block)."""
+        email = phone = linkedin = github = portfolio = address = None
+
+        for link in extracted_links:
+            if link.startswith('mailto:') and not email:
+                email = link[len('mailto:'):].split('?')[0]
+        urls = list(extracted_links)
+
+        search_lines = header_lines or next((lines for lines in sections.values() if lines), [])
+        header_text = "\n".join(search_lines)
+
+        email_match = EMAIL_RE.search(header_text) or EMAIL_RE.search(
+            "\n".join(line for lines in sections.values() for line in lines))
+        if email_match and not email:
+            email = email_match.group(0)
+        phone_match = PHONE_RE.search(header_text)
+        if phone_match:
+            phone = phone_match.group(0).strip()
+
+        urls.extend(EXPLICIT_URL_RE.findall(header_text))
+        for url in urls:
+            if url.startswith('mailto:'):
+                continue
+            clean_url = self._clean_url(url)
+            if not clean_url:
+                continue
+            if 'linkedin.com/in/' in clean_url and not linkedin:
+                linkedin = clean_url
+            elif 'github.com/' in clean_url and not github:
+                github = clean_url
+            elif not any(x in clean_url for x in ['linkedin.com', 'github.com']) and not portfolio:
+                if not any(ext in clean_url for ext in ['.pdf', '.png', '.jpg', '.jpeg', '.gif']):
+                    portfolio = clean_url
+
+        name = ""
+        summary_lines = []
+        for line in search_lines:
+            for piece in split_pieces(line) if not name or not address else []:
+                if not address and is_location(piece) and not EMAIL_RE.search(piece):
+                    address = piece
+            if not name and self._looks_like_name(line):
+                name = line
+            elif len(line) > 80 and not EMAIL_RE.search(line):
+                summary_lines.append(line)
+
+        if name.isupper():
+            name = name.title()
+        name_parts = name.split()
+        return {
+            "First name": name_parts[0] if name_parts else None,
+            "Middle name": " ".join(name_parts[1:-1]) if len(name_parts) > 2 else None,
+            "Last name": name_parts[-1] if len(name_parts) > 1 else None,
+            "Email": email,
+            "Phone number": phone,
+            "Address": address,
+            "LinkedIn URL": linkedin,
+            "GitHub URL": github,
+            "Portfolio URL": portfolio,
+        }, " ".join(summary_lines)
+
+    @staticmethod
+    def _looks_like_name(line):
+        if EMAIL_RE.search(line) or 'http' in line.lower() or any(char.isdigit() for char in line):
+            return False
+        words = line.replace(',', ' ').split()
+        return 1 < len(words) <= 5 and all(word[0].isalpha() for word in words) and not TITLE_HINT_RE.search(line)
+
+    @staticmethod
+    def _clean_url(url):
+        url = url.strip().rstrip('.,;)')
+        if not url.lower().startswith('http'):
+            url = f"https://{url}"
+        try:
+            parsed = urlparse(url)
+        except ValueError:
+            return None
+        if not parsed.netloc or '.' not in parsed.netloc:
+            return None
+        return f"{parsed.scheme or 'https'}://{parsed.netloc.replace('www.', '')}{parsed.path or ''}".rstrip('/')
+
+    def parse_skills(self, lines):
+        skills = []
+        seen = set()
+        for line in lines:
+            line = strip_bullet(line)
+            category = None
+            if ':' in line:
+                prefix, rest = line.split(':', 1)
+                if 0 < len(prefix) <= 40:
+                    category, line = prefix.strip(), rest
+            for item in LIST_SEPARATOR_RE.split(line):
+                item = item.strip(STRIP_CHARS + '.')
+                key = item.lower()
+                if not item or len(item) > 50 or key in seen:
+                    continue
+                seen.add(key)
+                skills.append({
+                    "Skill name": item,
+                    "Category": category,
+                    "Other category": None,
+                    "Estimated proficiency level": None,
+                })
+        return skills
+
+    @staticmethod
+    def _continues_bullet(line, bullet):
+        """Return True when a non-bullet line reads as the wrapped tail of the previous bullet."""
+        if DATE_RE.search(line) or LOCATION_RE.match(line) or line.isupper():
+            return False
+        if not line[0].isupper():
+            return True  # Lowercase, digits and symbols ("11% YoY") never open a header
+        if ROLE_SEPARATOR_RE.search(line) or TITLE_HINT_RE.search(line) or COMPANY_HINT_RE.search(line) \
+                or SCHOOL_RE.search(line) or DEGREE_RE.search(line):
+            return False
+        return not bullet.rstrip().endswith(('.', '!', '?'))
+
+    def _group_entries(self, lines):
+        """
+        Group section lines into entries of header lines followed by bullet lines.
+        A header-like line after bullets, or a second dated header line, starts a new entry.
+        Any other non-bullet line after a bullet is treated as a wrapped continuation.
+        """
+        entries = []
+        current = None
+        in_bullets = False
+        for line in lines:
+            if BULLET_RE.match(line):
+                if current is None:
+                    current = {'header': [], 'bullets': [], 'dated': False}
+                    entries.append(current)
+                bullet = strip_bullet(line)
+                if bullet:
+                    current['bullets'].append(bullet)
+                in_bullets = True
+                continue
+
+            has_date = bool(DATE_RE.search(line))
+            if current is not None and in_bullets and current['bullets'] \
+                    and self._continues_bullet(line, current['bullets'][-1]):
+                current['bullets'][-1] = f"{current['bullets'][-1]} {line}"
+                continue
+            if current is None or in_bullets or (has_date and current['dated']):
+                current = {'header': [], 'bullets': [], 'dated': False}
+                entries.append(current)
+                in_bullets = False
+            current['header'].append(line)
+            current['dated'] = current['dated'] or has_date
+        return entries
+
+    def parse_experience(self, lines):
+        experiences = []
+        for entry in self._group_entries(lines):
+            start_date = end_date = None
+            is_current = False
+            pieces = []
+            description = []
+            for line in entry['header']:
+                if len(line) > 100 and pieces:
+                    description.append(line)  # Paragraph-style descriptions instead of bullets
+                    continue
+                line_start, line_end, line_current, remainder = extract_date_range(line)
+                if line_start or line_end or line_current:
+                    start_date = start_date or line_start
+                    end_date = end_date or line_end
+                    is_current = is_current or line_current
+                # 'Engineer at Acme' style headers only make sense for roles
+                pieces.extend(split_pieces(remainder, ROLE_SEPARATOR_RE))
+
+            job_title, company, location = self._classify_role_pieces(pieces)
+            if not (job_title or company):
+                continue
+            experiences.append({
+                "Job title": job_title,
+                "Employer/Company name": company,
+                "Location": location,
+                "Start date": start_date,
+                "End date": end_date,
+                "Is current job": is_current,
+                "Bullet points": entry['bullets'] + description,
+            })
+        return experiences
+
+    @staticmethod
+    def _classify_role_pieces(pieces):
+        """Assign header pieces to (job title, company, location) using title/company keyword hints."""
+        job_title = company = location = None
+        remaining = []
+        for piece in pieces:
+            if not location:
+                # 'Title — Company, City, ST': the comma-joined piece holds company and location
+                prefix, trailing = split_trailing_location(piece)
+                if trailing:
+                    location, piece = trailing, prefix
+                elif is_location(piece):
+                    location = piece
+                    continue
+            remaining.append(piece)
+
+        for piece in remaining:
+            if not company and COMPANY_HINT_RE.search(piece) and not TITLE_HINT_RE.search(piece):
+                company = piece
+            elif not job_title and TITLE_HINT_RE.search(piece):
+                job_title = piece
+
+        leftovers = [piece for piece in remaining if piece not in (job_title, company)]
+        if not job_title and leftovers:
+            job_title = leftovers.pop(0)
+        if not company and leftovers:
+            company = leftovers.pop(0)
+        return job_title, company, location
+
+    def parse_education(self, lines):
+        educations = []
+        current = None
+        for line in lines:
+            if BULLET_RE.match(line):
+                if current:
+                    current['description'].append(strip_bullet(line))
+                continue
+
+            gpa_match = GPA_RE.search(line)
+            _, _, _, without_gpa = extract_date_range(GPA_RE.sub('', line))
+            start_date, end_date, is_current, _ = extract_date_range(line)
+            pieces = split_pieces(without_gpa)
+            school = next((piece for piece in pieces if SCHOOL_RE.search(piece)), None)
+            degree_piece = next((piece for piece in pieces if DEGREE_RE.search(piece) and piece != school), None)
+
+            if current is None or (school and current['school']) or (degree_piece and current['degree']):
+                current = {'school': None, 'degree': None, 'field': None, 'location': None, 'date': None,
+                           'gpa': None, 'description': []}
+                educations.append(current)
+
+            if school:
+                current['school'] = school
+            if degree_piece:
+                current['degree'], current['field'] = self._split_degree(degree_piece)
+            for piece in pieces:
+                if piece not in (school, degree_piece) and is_location(piece) and not current['location']:
+                    current['location'] = piece
+            if end_date or start_date:
+                current['date'] = None if is_current else (end_date or start_date)
+            if gpa_match:
+                try:
+                    current['gpa'] = float(gpa_match.group('gpa'))
+                except ValueError:
+                    pass
+            if not (school or degree_piece or end_date or start_date or gpa_match):
+                current['description'].append(line)
+
+        return [
+            {
+                "School name": education['school'],
+                "Location": education['location'],
+                "Degree": education['degree'],
+                "Degree type": self._degree_type(education['degree']),
+                "Field of study": education['field'],
+                "Graduation date": education['date'],
+                "GPA": education['gpa'],
+                "Description": " ".join(education['description']) or None,
+            }
+            for education in educations if education['school'] or education['degree']
+        ]
+
+    @staticmethod
+    def _split_degree(piece):
+        """Split 'Bachelor of Science in Computer Science' / 'B.S. Computer Science' into (degree, field)."""
+        if ' in ' in piece:
+            degree, field = piece.split(' in ', 1)
+            return degree.strip(STRIP_CHARS), field.strip(STRIP_CHARS) or None
+        match = DEGREE_RE.search(piece)
+        if match and match.start() == 0:
+            field = piece[match.end():].strip(STRIP_CHARS + '.')
+            return match.group(0).strip(), field or None
+        return piece, None
+
+    @staticmethod
+    def _degree_type(degree):
+        if not degree:
+            return None
+        for pattern, degree_type in DEGREE_TYPES:
+            if pattern.search(degree):
+                return degree_type
+        return 'Other'
+
+    def parse_projects(self, lines):
+        projects = []
+        for entry in self._group_entries(lines):
+            if not entry['header']:
+                continue
+            first_line = entry['header'][0]
+            start_date, end_date, _, remainder = extract_date_range(first_line)
+            urls = EXPLICIT_URL_RE.findall(" ".join(entry['header']))
+            for url in urls:
+                # The URL match swallows the ")" of "(github.com/x)", so drop the "(" with it
+                remainder = re.sub(rf"\(?\s*{re.escape(url)}\s*\)?", '', remainder)
+            pieces = split_pieces(remainder)
+            name = pieces[0] if pieces else first_line
+            summary_parts = pieces[1:] + entry['header'][1:]
+
+            github_url = next((self._clean_url(url) for url in urls if 'github.com' in url.lower()), None)
+            project_url = next((self._clean_url(url) for url in urls if 'github.com' not in url.lower()), None)
+            projects.append({
+                "Project name": name,
+                "Summary/description": " ".join(part for part in summary_parts if part not in urls) or None,
+                "Start date": start_date,
+                "Completion date": end_date,
+                "Project URL": project_url,
+                "GitHub URL": github_url,
+                "Bullet points": entry['bullets'],
+            })
+        return projects
+
+    def parse_certifications(self, lines):
+        certifications = []
+        for line in lines:
+            is_bullet = bool(BULLET_RE.match(line))
+            text = strip_bullet(line)
+            if not text:
+                continue
+            if certifications and not is_bullet and text[0].islower():
+                previous = certifications[-1]
+                previous["Description"] = f"{previous['Description'] or ''} {text}".strip()
+                continue
+
+            start_date, end_date, _, remainder = extract_date_range(text)
+            urls = EXPLICIT_URL_RE.findall(remainder)
+            for url in urls:
+                remainder = remainder.replace(url, '')
+
+            organization = None
+            paren_match = re.search(r'\(([^)]+)\)', remainder)
+            if paren_match:
+                organization = paren_match.group(1).strip()
+                remainder = (remainder[:paren_match.start()] + remainder[paren_match.end():]).strip()
+            pieces = split_pieces(remainder)
+            if not pieces:
+                continue
+            if not organization and len(pieces) > 1:
+                organization = pieces[1]
+
+            certifications.append({
+                "Name": pieces[0],
+                "Institute/Issuing organization": organization,
+                "Completion date": end_date or start_date,
+                "Expiration date": None,
+                "Score": None,
+                "URL/Link": self._clean_url(urls[0]) if urls else None,
+                "Description": None,
+            })
+        return certifications
+
+    def parse_languages(self, lines):
+        languages = []
+        seen = set()
+        for line in lines:
+            for item in LIST_SEPARATOR_RE.split(strip_bullet(line)):
+                item = item.strip(STRIP_CHARS)
+                if not item:
+                    continue
+                level_match = re.match(r'^([^(:\-–]+?)\s*(?:[(:\-–]\s*(.*?)\)?)?$', item)
+                name = level_match.group(1).strip() if level_match else item
+                level_text = (level_match.group(2) or '') if level_match else ''
+                if not name or len(name) > 30 or name.lower() in seen:
+                    continue
+                seen.add(name.lower())
+                proficiency = next(
+                    (score for keyword, score in LANGUAGE_LEVELS if keyword in level_text.lower()), None
+                )
+                languages.append({
+                    "Language name": name,
+                    "Proficiency (0-100 where 100 is native and 0 is basic)": proficiency,
+                })
+        return languages
+
+    def parse_custom_section(self, title, lines):
+        entries = []
+        for line in lines:
+            is_bullet = bool(BULLET_RE.match(line))
+            text = strip_bullet(line)
+            if entries and not is_bullet and text[:1].islower():
+                previous = entries[-1]
+                previous["Description"] = f"{previous['Description'] or ''} {text}".strip()
+                continue
+            start_date, end_date, _, remainder = extract_date_range(text)
+            urls = EXPLICIT_URL_RE.findall(text)
+            entries.append({
+                "Entry title": remainder or text,
+                "Description": None,
+                "Start date": start_date,
+                "End date": end_date,
+                "Link": self._clean_url(urls[0]) if urls else None,
+            })
+        return {"Section title": title.title() if title.isupper() else title, "Entries": entries}
+
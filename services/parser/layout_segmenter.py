@@ -0,0 +1,186 @@
+# services/parser/layout_segmenter.py
+
+import logging
+from collections import Counter
+
+from services.parser.heuristic_parser import SECTION_HEADER_INDEX, normalize_header
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+BOLD_FLAG = 16  # PyMuPDF span flag bit for bold fonts
+SAME_ROW_TOLERANCE = 2.5  # Points; spans closer than this vertically share a row
+COLUMN_MIN_LINES = 4  # Each column needs at least this many lines to count as a two-column layout
+COLUMN_MAX_CROSSING_RATIO = 0.15  # Share of lines allowed to span the gutter (name banner, full-width headings)
+HEADING_SIZE_DELTA = 1.5  # Points above body text size that marks a heading
+
+
+def page_layout_lines(page_dict, page_number):
+    """
+    Flatten a PyMuPDF get_text("dict") page into layout lines.
+
+    Returns:
+        list of tuples: (page, x0, y0, x1, y1, font_size, is_bold, text)
+    """
+    lines = []
+    for block in page_dict.get('blocks', []):
+        if block.get('type', 0) != 0:  # Skip image blocks
+            continue
+        for line in block.get('lines', []):
+            spans = [span for span in line.get('spans', []) if span.get('text', '').strip()]
+            if not spans:
+                continue
+            text = " ".join(" ".join(span['text'].split()) for span in spans)
+            # The dominant span decides the line's style
+            main_span = max(spans, key=lambda span: len(span['text'].strip()))
+            x0, y0, x1, y1 = line['bbox']
+            lines.append((
+                page_number, x0, y0, x1, y1,
+                round(main_span.get('size', 0), 1),
+                bool(main_span.get('flags', 0) & BOLD_FLAG),
+                text,
+            ))
+    return lines
+
+
+def _merge_rows(lines):
+    """Join lines on the same baseline (e.g. a title with a right-aligned date) into one line."""
+    rows = []
+    for line in sorted(lines, key=lambda line: (line[2], line[1])):
+        if rows and abs(rows[-1][0][2] - line[2]) <= SAME_ROW_TOLERANCE:
+            rows[-1].append(line)
+        else:
+            rows.append([line])
+
+    merged = []
+    for row in rows:
+        row.sort(key=lambda line: line[1])
+        first = row[0]
+        merged.append((
+            first[0], first[1], min(line[2] for line in row), row[-1][3], max(line[4] for line in row),
+            max(line[5] for line in row), any(line[6] for line in row), " | ".join(line[7] for line in row),
+        ) if len(row) > 1 else first)
+    return merged
+
+
+def find_column_split(lines, page_width):
+    """
+    Return the x coordinate of a two-column gutter, or None for single-column pages.
+    A split is accepted when few lines cross it and both sides hold enough lines.
+    """
+    if len(lines) < COLUMN_MIN_LINES * 2 or not page_width:
+        return None
+
+    best_split = None
+    best_balance = 0
+    for step in range(20, 81, 2):
+        split = page_width * step / 100
+        left = right = crossing = 0
+        for line in lines:
+            if line[3] <= split:
+                left += 1
+            elif line[1] >= split:
+                right += 1
+            else:
+                crossing += 1
+        if crossing > len(lines) * COLUMN_MAX_CROSSING_RATIO:
+            continue
+        if left >= COLUMN_MIN_LINES and right >= COLUMN_MIN_LINES and min(left, right) > best_balance:
+            best_balance = min(left, right)
+            best_split = split
+    return best_split
+
+
+def order_page_lines(lines, page_width):
+    """
+    Put one page's lines in reading order. On two-column pages lines above the columns come
+    first, then the left column top to bottom, then the right column, then any full-width
+    lines inside or below the columns.
+    """
+    lines = sorted(lines, key=lambda line: (line[2], line[1]))
+    split = find_column_split(lines, page_width)
+    if split is None:
+        return _merge_rows(lines), False
+
+    # The columns start where both sides have content; anything higher (name banner, contact
+    # line) is read as a single column even if it happens to fit on one side of the gutter
+    columns_top = max(
+        min(line[2] for line in lines if line[3] <= split),
+        min(line[2] for line in lines if line[1] >= split),
+    ) - SAME_ROW_TOLERANCE
+    above = [line for line in lines if line[2] < columns_top]
+    body = [line for line in lines if line[2] >= columns_top]
+    left = [line for line in body if line[3] <= split]
+    right = [line for line in body if line[1] >= split]
+    below = [line for line in body if line[3] > split and line[1] < split]
+    return _merge_rows(above) + _merge_rows(left) + _merge_rows(right) + _merge_rows(below), True
+
+
+def _body_font_size(lines):
+    """Most common font size weighted by text length."""
+    sizes = Counter()
+    for line in lines:
+        sizes[line[5]] += len(line[7])
+    return sizes.most_common(1)[0][0] if sizes else 0
+
+
+class LayoutSegmenter:
+    """
+    Splits a PDF into typed sections using font size, weight and block geometry from
+    PyMuPDF's get_text("dict") output.
+
+    Headings are lines whose text matches a known section alias, or lines styled like
+    the known headings (or clearly larger than body text) when the text is unfamiliar;
+    the latter become custom sections.
+    """
+
+    def segment(self, ordered_lines):
+        """
+        Args:
+            ordered_lines (list): Layout lines already in reading order (see order_page_lines)
+
+        Returns:
+            list of dict: [{'type': 'header'|'summary'|'experience'|...|'custom', 'title': str,
+                            'lines': [str, ...], 'page': int}, ...]
+        """
+        body_size = _body_font_size(ordered_lines)
+        known_headings = [line for line in ordered_lines if SECTION_HEADER_INDEX.get(normalize_header(line[7]))]
+        # Styles shared with plain body text say nothing about headings
+        known_heading_styles = {(line[5], line[6]) for line in known_headings} - {(body_size, False)}
+        uppercase_headings = bool(known_headings) and all(line[7].isupper() for line in known_headings)
+
+        sections = [{'type': 'header', 'title': '', 'lines': [], 'page': ordered_lines[0][0] if ordered_lines else 0}]
+        for line in ordered_lines:
+            text = line[7].strip()
+            section_type = SECTION_HEADER_INDEX.get(normalize_header(text))
+            if not section_type and sections[-1]['type'] != 'header' and self._styled_as_heading(
+                    line, body_size, known_heading_styles, uppercase_headings):
+                section_type = 'custom'
+
+            if section_type:
+                sections.append({'type': section_type, 'title': text.strip(':').strip(), 'lines': [],
+                                 'page': line[0]})
+            else:
+                sections[-1]['lines'].append(text)
+
+        return [section for section in sections if section['lines'] or section['type'] != 'header']
+
+    @staticmethod
+    def _styled_as_heading(line, body_size, known_heading_styles, uppercase_headings):
+        text = line[7].strip()
+        if len(text) > 45 or len(text.split()) > 5 or text[-1:] in '.,;' or any(char.isdigit() for char in text):
+            return False
+        if uppercase_headings and not text.isupper():
+            return False
+        if known_heading_styles:
+            return (line[5], line[6]) in known_heading_styles
+        return body_size and line[5] >= body_size + HEADING_SIZE_DELTA
+
+
+def sections_to_index(sections):
+    """Convert segmented sections to the index format used by HeuristicResumeParser.parse_sections."""
+    index = {'header': []}
+    for section in sections:
+        key = ('custom', section['title']) if section['type'] == 'custom' else section['type']
+        index.setdefault(key, []).extend(section['lines'])
+    return index
@@ -0,0 +1,211 @@
+# services/parser/parse_cache.py
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from django.conf import settings
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SETTINGS = {
+    'enabled': True,
+    'directory': None,  # Defaults to BASE_DIR/parse_cache
+    'max_entries': 500,
+    'max_size_bytes': 50 * 1024 * 1024,  # 50MB
+    'max_age_seconds': 7 * 24 * 60 * 60,  # 7 days
+}
+
+
+def hash_bytes(data):
+    """Return the SHA-256 hex digest of in-memory file contents."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ParseResultCache:
+    """
+    Persistent, content-addressed cache for parsed resume data.
+
+    Entries are stored as JSON files named by a SHA-256 key derived from the file
+    contents, the AI provider, the model name and the parsing prompt version, so
+    re-uploading the same file skips both extraction and the LLM round trip.
+    Eviction is age-based (max_age_seconds) and size-based (max_entries /
+    max_size_bytes, least recently used first).
+    """
+
+    def __init__(self, directory, max_entries=500, max_size_bytes=50 * 1024 * 1024,
+                 max_age_seconds=7 * 24 * 60 * 60):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_size_bytes = max_size_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def build_key(content_hash, provider, model_name, prompt_version):
+        """Build the cache key for a file hash parsed by a provider/model/prompt combination."""
+        raw_key = "|".join([content_hash, provider or '', model_name or '', prompt_version or ''])
+        return hashlib.sha256(raw_key.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """Return the cached parse result for key, or None on a miss or expired entry."""
+        entry = self.get_entry(key)
+        return entry.get('parsed_data') if entry is not None else None
+
+    def get_entry(self, key):
+        """Return the whole cached entry (parsed_data, metadata, stored_at) for key, or None."""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+
+            if self.max_age_seconds and time.time() - entry.get('stored_at', 0) > self.max_age_seconds:
+                self._remove(path)
+                raise FileNotFoundError(path)
+
+            # Touch the file so size-based eviction drops least recently used entries first
+            os.utime(path, None)
+        except (FileNotFoundError, json.JSONDecodeError, OSError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def set(self, key, parsed_data, metadata=None):
+        """Store a parse result under key and evict entries beyond the configured limits."""
+        entry = {
+            'parsed_data': parsed_data,
+            'metadata': metadata or {},
+            'stored_at': time.time(),
+        }
+        path = self._entry_path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(entry, file)
+            os.replace(temp_path, path)  # Atomic so concurrent readers never see partial JSON
+        except (TypeError, ValueError, OSError) as e:
+            logger.error(f"Could not write parse cache entry {key}: {str(e)}")
+            self._remove(temp_path)
+            return False
+
+        self.evict()
+        return True
+
+    def evict(self):
+        """Drop expired entries, then least recently used entries until within size limits."""
+        now = time.time()
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for dir_entry in it:
+                    if not dir_entry.name.endswith('.json'):
+                        continue
+                    try:
+                        stat = dir_entry.stat()
+                    except OSError:
+                        continue
+                    # mtime is the last access time, so anything idle past max_age is also expired
+                    if self.max_age_seconds and now - stat.st_mtime > self.max_age_seconds:
+                        self._remove(dir_entry.path)
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, dir_entry.path))
+        except OSError as e:
+            logger.error(f"Could not scan parse cache directory {self.directory}: {str(e)}")
+            return
+
+        entries.sort()  # Oldest access first
+        total_size = sum(size for _, size, _ in entries)
+        while entries and (
+                (self.max_entries and len(entries) > self.max_entries) or
+                (self.max_size_bytes and total_size > self.max_size_bytes)
+        ):
+            _, size, path = entries.pop(0)
+            self._remove(path)
+            total_size -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.warning(f"Could not remove parse cache file {path}: {str(e)}")
+            return
+        if path.endswith('.json'):
+            with self._lock:
+                self.evictions += 1
+
+    def clear(self):
+        """Remove every cached entry."""
+        with os.scandir(self.directory) as it:
+            for dir_entry in it:
+                if dir_entry.name.endswith('.json'):
+                    self._remove(dir_entry.path)
+
+    def stats(self):
+        """Return hit/miss counters for this process and the current on-disk footprint."""
+        entry_count = 0
+        total_size = 0
+        with os.scandir(self.directory) as it:
+            for dir_entry in it:
+                if dir_entry.name.endswith('.json'):
+                    entry_count += 1
+                    total_size += dir_entry.stat().st_size
+
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': entry_count,
+            'size_bytes': total_size,
+        }
+
+
+_shared_cache = None
+_shared_cache_settings = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_parse_cache():
+    """
+    Return the process-wide ParseResultCache configured from settings.RESUME_PARSE_CACHE,
+    or None if caching is disabled. Rebuilt if the settings change (e.g. under override_settings).
+    """
+    global _shared_cache, _shared_cache_settings
+
+    cache_settings = {**DEFAULT_CACHE_SETTINGS, **getattr(settings, 'RESUME_PARSE_CACHE', {})}
+    if not cache_settings['enabled']:
+        return None
+
+    with _shared_cache_lock:
+        if _shared_cache is None or _shared_cache_settings != cache_settings:
+            _shared_cache_settings = cache_settings
+            directory = cache_settings['directory'] or os.path.join(settings.BASE_DIR, 'parse_cache')
+            try:
+                _shared_cache = ParseResultCache(
+                    directory=directory,
+                    max_entries=cache_settings['max_entries'],
+                    max_size_bytes=cache_settings['max_size_bytes'],
+                    max_age_seconds=cache_settings['max_age_seconds'],
+                )
+            except OSError as e:
+                logger.error(f"Could not initialize parse cache at {directory}: {str(e)}")
+                _shared_cache = _shared_cache_settings = None
+                return None
+        return _shared_cache
@@ -0,0 +1,261 @@
+# services/parser/parser_benchmark.py
+
+import os
+import re
+import json
+import time
+import logging
+import statistics
+import tracemalloc
+from django.conf import settings
+from django.test.utils import override_settings
+
+from services.parser.resume_parser_service import ResumeParserService
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+BENCHMARK_PATHS = ('basic', 'heuristic', 'replay', 'replay-tiered')
+# Parsing mode of each replayed LLM path: 'replay' sends the whole resume, 'replay-tiered' only
+# the sections the heuristic parser is unsure of (none, on a clean generated corpus)
+REPLAY_PARSING_MODES = {'replay': 'full', 'replay-tiered': 'tiered'}
+
+# Regression thresholds used by compare_to_baseline
+ACCURACY_TOLERANCE = 0.02  # Absolute drop in mean field accuracy
+TIME_TOLERANCE = 0.25  # Relative increase in mean time...
+TIME_FLOOR_MS = 5.0  # ...ignored when the absolute increase is below this
+TOKEN_TOLERANCE = 0.10  # Relative increase in mean tokens sent
+
+
+def load_corpus(directory):
+    """Return [(resume path, metadata with 'ground_truth')] for every resume with a ground-truth JSON."""
+    corpus = []
+    for filename in sorted(os.listdir(directory)):
+        name, extension = os.path.splitext(filename)
+        if extension.lower() not in ('.pdf', '.docx', '.txt'):
+            continue
+        truth_path = os.path.join(directory, f"{name}.json")
+        if not os.path.exists(truth_path):
+            continue
+        with open(truth_path, 'r', encoding='utf-8') as truth_file:
+            corpus.append((os.path.join(directory, filename), json.load(truth_file)))
+    return corpus
+
+
+def _normalize(value):
+    if value is None:
+        return ""
+    return re.sub(r'[^a-z0-9@.+/]', '', str(value).lower())
+
+
+def _normalize_url(value):
+    return _normalize(re.sub(r'^(https?://)?(www\.)?', '', str(value or '')))
+
+
+def _date_matches(parsed, truth):
+    if not truth:
+        return not parsed
+    return bool(parsed) and str(parsed)[:len(truth)] == truth
+
+
+def score_parse(parsed, truth):
+    """
+    Field-level comparison of a parse against its ground truth.
+
+    Returns:
+        dict: {field name: bool}; list entries are matched by position
+    """
+    fields = {}
+    parsed = parsed if isinstance(parsed, dict) else {}
+    info = parsed.get("Personal Information") or {}
+    truth_info = truth["Personal Information"]
+    for key in ("First name", "Last name", "Email", "Address"):
+        fields[f"personal.{key}"] = _normalize(info.get(key)) == _normalize(truth_info[key])
+    fields["personal.Phone number"] = (re.sub(r'\D', '', str(info.get("Phone number") or ''))
+                                       == re.sub(r'\D', '', truth_info["Phone number"]))
+    for key in ("LinkedIn URL", "GitHub URL"):
+        fields[f"personal.{key}"] = _normalize_url(info.get(key)) == _normalize_url(truth_info[key])
+
+    fields["summary"] = _normalize(parsed.get("Professional Summary")) == _normalize(truth["Professional Summary"])
+
+    parsed_skills = {_normalize(skill.get("Skill name")) for skill in parsed.get("Skills") or []
+                     if isinstance(skill, dict)}
+    for skill in truth["Skills"]:
+        fields[f"skills.{skill['Skill name']}"] = _normalize(skill["Skill name"]) in parsed_skills
+
+    parsed_jobs = [job for job in parsed.get("Work Experience") or [] if isinstance(job, dict)]
+    for index, job in enumerate(truth["Work Experience"]):
+        parsed_job = parsed_jobs[index] if index < len(parsed_jobs) else {}
+        prefix = f"experience[{index}]"
+        fields[f"{prefix}.title"] = _normalize(parsed_job.get("Job title")) == _normalize(job["Job title"])
+        fields[f"{prefix}.company"] = (_normalize(parsed_job.get("Employer/Company name"))
+                                       == _normalize(job["Employer/Company name"]))
+        fields[f"{prefix}.start"] = _date_matches(parsed_job.get("Start date"), job["Start date"])
+        fields[f"{prefix}.end"] = _date_matches(parsed_job.get("End date"), job["End date"])
+        fields[f"{prefix}.current"] = bool(parsed_job.get("Is current job")) == job["Is current job"]
+        fields[f"{prefix}.bullets"] = len(parsed_job.get("Bullet points") or []) == len(job["Bullet points"])
+
+    parsed_education = [entry for entry in parsed.get("Education") or [] if isinstance(entry, dict)]
+    for index, entry in enumerate(truth["Education"]):
+        parsed_entry = parsed_education[index] if index < len(parsed_education) else {}
+        prefix = f"education[{index}]"
+        fields[f"{prefix}.school"] = _normalize(parsed_entry.get("School name")) == _normalize(entry["School name"])
+        fields[f"{prefix}.degree_type"] = parsed_entry.get("Degree type") == entry["Degree type"]
+        fields[f"{prefix}.graduation"] = _date_matches(parsed_entry.get("Graduation date"), entry["Graduation date"])
+
+    parsed_certifications = {_normalize(cert.get("Name")) for cert in parsed.get("Certifications") or []
+                             if isinstance(cert, dict)}
+    for cert in truth["Certifications"]:
+        fields[f"certifications.{cert['Name']}"] = _normalize(cert["Name"]) in parsed_certifications
+    return fields
+
+
+def _peak_rss_mb():
+    """Process high-water RSS for this process and its (sandbox) children, in MB (Linux reports KB)."""
+    if resource is None:
+        return None, None
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024)
+
+
+def _replay_settings():
+    return override_settings(AI_SETTINGS={
+        **getattr(settings, 'AI_SETTINGS', {}),
+        'replay': {**getattr(settings, 'AI_SETTINGS', {}).get('replay', {}), 'mode': 'replay'},
+    })
+
+
+def _run_one(path_name, resume_path, file_type):
+    """Parse one file on one path and return (parsed, extraction_seconds, total_seconds, tokens_sent)."""
+    with open(resume_path, 'rb') as resume_file:
+        file_bytes = resume_file.read()
+
+    # parse_cache=False: every run must actually parse
+    service = ResumeParserService(parse_cache=False)
+    started = time.perf_counter()
+    if path_name == 'basic':
+        text, _ = service._extract_text_and_links(file_bytes, file_type)
+        extraction_seconds = time.perf_counter() - started
+        parsed = service._basic_resume_parsing(text)
+        return parsed, extraction_seconds, time.perf_counter() - started, 0
+
+    replay_parsing_mode = REPLAY_PARSING_MODES.get(path_name)
+    parsed = service.parse_resume(file_bytes=file_bytes, file_type=file_type,
+                                  ai_parsing_enabled=replay_parsing_mode is not None, ai_provider='chatgpt',
+                                  parsing_mode=replay_parsing_mode)
+    timings = service.last_timings or {}
+    return (parsed, timings.get('extraction_seconds', 0.0), time.perf_counter() - started,
+            service.last_prompt_tokens)
+
+
+def run_benchmark(corpus_dir, paths=BENCHMARK_PATHS, repeat=1):
+    """
+    Parse every corpus file on each path and measure it.
+
+    Returns:
+        dict: {'results': [per file/path rows], 'summary': {path: {format: metrics}}}
+    """
+    corpus = load_corpus(corpus_dir)
+    results = []
+    for path_name in paths:
+        context = _replay_settings() if path_name in REPLAY_PARSING_MODES else None
+        if context:
+            context.enable()
+        try:
+            for resume_path, metadata in corpus:
+                file_type = os.path.splitext(resume_path)[1].lower().strip('.')
+                for _ in range(repeat):
+                    tracemalloc.start()
+                    try:
+                        parsed, extraction_seconds, total_seconds, tokens_sent = _run_one(
+                            path_name, resume_path, file_type)
+                        error = parsed.get("error") if isinstance(parsed, dict) else None
+                    except Exception as e:
+                        logger.error(f"Benchmark run failed for {resume_path} ({path_name}): {str(e)}")
+                        parsed, extraction_seconds, total_seconds, tokens_sent, error = {}, 0.0, 0.0, 0, str(e)
+                    _, peak_alloc = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+
+                    fields = score_parse(parsed, metadata['ground_truth'])
+                    results.append({
+                        'path': path_name,
+                        'file': os.path.basename(resume_path),
+                        'format': file_type,
+                        'size': metadata.get('size'),
+                        'layout': metadata.get('layout'),
+                        'extraction_ms': extraction_seconds * 1000,
+                        'total_ms': total_seconds * 1000,
+                        'peak_python_alloc_mb': peak_alloc / (1024 * 1024),
+                        'tokens_sent': tokens_sent,
+                        'accuracy': sum(fields.values()) / len(fields) if fields else 0.0,
+                        'missed_fields': [name for name, ok in fields.items() if not ok],
+                        'error': error,
+                    })
+        finally:
+            if context:
+                context.disable()
+
+    return {'results': results, 'summary': summarize(results)}
+
+
+def summarize(results):
+    """Aggregate rows into {path: {format or 'all': metrics}}."""
+    summary = {}
+    groups = {}
+    for row in results:
+        groups.setdefault((row['path'], row['format']), []).append(row)
+        groups.setdefault((row['path'], 'all'), []).append(row)
+
+    rss_self, rss_children = _peak_rss_mb()
+    for (path_name, file_format), rows in sorted(groups.items()):
+        totals = sorted(row['total_ms'] for row in rows)
+        summary.setdefault(path_name, {})[file_format] = {
+            'files': len(rows),
+            'errors': sum(1 for row in rows if row['error']),
+            'accuracy': statistics.mean(row['accuracy'] for row in rows),
+            'extraction_ms': statistics.mean(row['extraction_ms'] for row in rows),
+            'total_ms': statistics.mean(totals),
+            'p95_total_ms': totals[min(len(totals) - 1, int(len(totals) * 0.95))],
+            'tokens_sent': statistics.mean(row['tokens_sent'] for row in rows),
+            'peak_python_alloc_mb': max(row['peak_python_alloc_mb'] for row in rows),
+            'process_peak_rss_mb': rss_self,
+            'children_peak_rss_mb': rss_children,
+        }
+    return summary
+
+
+def save_baseline(summary, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump({'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'summary': summary}, baseline_file, indent=2)
+
+
+def load_baseline(path):
+    with open(path, 'r', encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)['summary']
+
+
+def compare_to_baseline(summary, baseline):
+    """Return human-readable regressions of summary against a saved baseline summary."""
+    regressions = []
+    for path_name, formats in summary.items():
+        for file_format, metrics in formats.items():
+            before = baseline.get(path_name, {}).get(file_format)
+            if not before:
+                continue
+            label = f"{path_name}/{file_format}"
+            if metrics['accuracy'] < before['accuracy'] - ACCURACY_TOLERANCE:
+                regressions.append(f"{label}: accuracy {before['accuracy']:.3f} -> {metrics['accuracy']:.3f}")
+            for key in ('extraction_ms', 'total_ms'):
+                increase = metrics[key] - before[key]
+                if increase > TIME_FLOOR_MS and increase > before[key] * TIME_TOLERANCE:
+                    regressions.append(f"{label}: {key} {before[key]:.1f} -> {metrics[key]:.1f}")
+            if before['tokens_sent'] and metrics['tokens_sent'] > before['tokens_sent'] * (1 + TOKEN_TOLERANCE):
+                regressions.append(
+                    f"{label}: tokens_sent {before['tokens_sent']:.0f} -> {metrics['tokens_sent']:.0f}")
+    return regressions
@@ -0,0 +1,252 @@
+# services/parser/pdf_extractor.py
+
+import os
+import re
+import time
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+
+from services.parser.layout_segmenter import page_layout_lines, order_page_lines
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+DEFAULT_PDF_EXTRACTION_SETTINGS = {
+    'max_pages': 50,  # Pages beyond this are ignored
+    'time_budget_seconds': 20.0,  # Wall-clock budget for the whole document
+    'parallel_page_threshold': 12,  # Documents with more pages are sharded across processes
+    'max_workers': min(4, os.cpu_count() or 1),
+    'layout_analysis': True,  # Use font/geometry data for column order and section segmentation
+}
+
+EMAIL_PATTERN = re.compile(r"[^@]+@[^@]+\.[^@]+")
+
+
+def get_pdf_extraction_settings():
+    """Return PDF extraction limits from settings.RESUME_PDF_EXTRACTION merged over the defaults."""
+    return {**DEFAULT_PDF_EXTRACTION_SETTINGS, **getattr(settings, 'RESUME_PDF_EXTRACTION', {})}
+
+
+def normalize_link(uri):
+    """Return a usable http(s)/mailto link for a PDF URI annotation, or None."""
+    if not uri or not isinstance(uri, str):
+        return None
+    if uri.startswith('http') or uri.startswith('mailto:'):
+        return uri
+    if '@' in uri and '.' in uri and EMAIL_PATTERN.match(uri):
+        return f"mailto:{uri}"
+    return None
+
+
+def _extract_page_range(file_bytes, start, stop, deadline, with_layout=False):
+    """
+    Extract pages [start, stop) from a PDF.
+    Runs in the calling process for small documents and in pool workers for large ones.
+    With with_layout, text comes from get_text("dict") in column-aware reading order and
+    the styled layout lines are returned for section segmentation.
+
+    Returns:
+        tuple: (list of (page_number, text, links, seconds, layout_lines), timed_out)
+    """
+    pages = []
+    doc = fitz.open(stream=file_bytes, filetype='pdf')
+    try:
+        for page_num in range(start, stop):
+            if time.time() > deadline:
+                return pages, True
+            page_started = time.perf_counter()
+            page = doc.load_page(page_num)
+            layout_lines = None
+            if with_layout:
+                lines = page_layout_lines(page.get_text("dict"), page_num)
+                layout_lines, _ = order_page_lines(lines, page.rect.width)
+                text = "".join(f"{line[7]}\n" for line in layout_lines)
+            else:
+                text = page.get_text("text")
+            links = [link.get('uri') for link in page.get_links()
+                     if link.get('kind') == fitz.LINK_URI and link.get('uri')]
+            pages.append((page_num, text, links, time.perf_counter() - page_started, layout_lines))
+    finally:
+        doc.close()
+    return pages, False
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(max_workers):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=max_workers)
+        return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def extract_pdf(file_bytes, max_pages=None, time_budget_seconds=None, parallel_page_threshold=None,
+                max_workers=None, with_layout=None):
+    """
+    Extract text and links from PDF bytes within page and time budgets.
+
+    Small documents are read page by page in-process. Documents with more than
+    parallel_page_threshold pages are split into contiguous page ranges that run
+    in a shared process pool, then joined back in page order with one str.join.
+
+    Returns:
+        dict: text, page_texts, links, page_count, pages_extracted, truncated, timed_out,
+              page_timings (list of (page_number, seconds)), elapsed_seconds and
+              layout_lines (reading-ordered styled lines, or None without layout analysis)
+    """
+    if fitz is None:
+        raise RuntimeError("PyMuPDF (fitz) is not installed")
+
+    limits = get_pdf_extraction_settings()
+    max_pages = max_pages if max_pages is not None else limits['max_pages']
+    time_budget_seconds = time_budget_seconds if time_budget_seconds is not None else limits['time_budget_seconds']
+    parallel_page_threshold = (parallel_page_threshold if parallel_page_threshold is not None
+                               else limits['parallel_page_threshold'])
+    max_workers = max_workers or limits['max_workers']
+    with_layout = with_layout if with_layout is not None else limits['layout_analysis']
+
+    started = time.perf_counter()
+    deadline = time.time() + time_budget_seconds
+
+    doc = fitz.open(stream=file_bytes, filetype='pdf')
+    try:
+        page_count = len(doc)
+    finally:
+        doc.close()
+
+    pages_to_read = min(page_count, max_pages) if max_pages else page_count
+    timed_out = False
+
+    if pages_to_read > parallel_page_threshold and max_workers > 1:
+        pages, timed_out = _extract_parallel(file_bytes, pages_to_read, deadline, max_workers, with_layout)
+    else:
+        pages, timed_out = _extract_page_range(file_bytes, 0, pages_to_read, deadline, with_layout)
+
+    pages.sort(key=lambda page: page[0])
+
+    # Dedupe links with a set while keeping first-seen order
+    seen_links = set()
+    links = []
+    for _, _, page_links, _, _ in pages:
+        for uri in page_links:
+            link = normalize_link(uri)
+            if link and link not in seen_links:
+                seen_links.add(link)
+                links.append(link)
+
+    text = "\n".join(page_text for _, page_text, _, _, _ in pages)
+    if pages:
+        text += "\n"
+
+    result = {
+        'text': text,
+        'page_texts': [page_text for _, page_text, _, _, _ in pages],
+        'links': links,
+        'page_count': page_count,
+        'pages_extracted': len(pages),
+        'truncated': len(pages) < page_count,
+        'timed_out': timed_out,
+        'page_timings': [(page_num, seconds) for page_num, _, _, seconds, _ in pages],
+        'elapsed_seconds': time.perf_counter() - started,
+        'layout_lines': [line for page in pages for line in page[4]] if with_layout else None,
+    }
+
+    if result['truncated']:
+        logger.warning(
+            f"PDF extraction stopped at {len(pages)}/{page_count} pages "
+            f"(max_pages={max_pages}, timed_out={timed_out})"
+        )
+    return result
+
+
+def extract_pdf_text_pypdf2(file_bytes, max_pages=None):
+    """
+    Text-only PDF extraction with PyPDF2, used when PyMuPDF is not installed.
+    Applies the same page cap as extract_pdf. Returns "" for PDFs that can't be decrypted.
+    """
+    import io
+    import PyPDF2
+
+    max_pages = max_pages if max_pages is not None else get_pdf_extraction_settings()['max_pages']
+    with io.BytesIO(file_bytes) as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+
+        # Check if PDF is encrypted
+        if pdf_reader.is_encrypted:
+            try:
+                if pdf_reader.decrypt('') == 0:  # Failed decryption
+                    logger.warning("Could not decrypt PDF")
+                    return ""
+            except Exception as e:
+                logger.error(f"Error decrypting PDF: {str(e)}")
+                return ""
+
+        page_texts = []
+        for page in pdf_reader.pages[:max_pages or len(pdf_reader.pages)]:
+            page_text = page.extract_text()
+            if page_text:
+                page_texts.append(page_text + "\n")
+    return "".join(page_texts)
+
+
+def _extract_parallel(file_bytes, pages_to_read, deadline, max_workers, with_layout=False):
+    """Shard the page range across the process pool and collect whatever finishes within the deadline."""
+    shard_size = -(-pages_to_read // max_workers)  # Ceiling division
+    ranges = [(start, min(start + shard_size, pages_to_read)) for start in range(0, pages_to_read, shard_size)]
+
+    try:
+        executor = _get_executor(max_workers)
+        futures = [executor.submit(_extract_page_range, file_bytes, start, stop, deadline, with_layout)
+                   for start, stop in ranges]
+    except (BrokenProcessPool, RuntimeError) as e:
+        logger.error(f"PDF process pool unavailable, extracting in-process: {str(e)}")
+        _reset_executor()
+        return _extract_page_range(file_bytes, 0, pages_to_read, deadline, with_layout)
+
+    # Small grace period so workers that noticed the deadline can return partial pages
+    done, not_done = wait(futures, timeout=max(deadline - time.time(), 0) + 1.0)
+
+    pages = []
+    timed_out = bool(not_done)
+    for future in not_done:
+        future.cancel()
+    for future in done:
+        try:
+            shard_pages, shard_timed_out = future.result()
+        except BrokenProcessPool as e:
+            logger.error(f"PDF extraction worker died: {str(e)}")
+            _reset_executor()
+            continue
+        except Exception as e:
+            logger.error(f"Error extracting PDF page range: {str(e)}")
+            continue
+        pages.extend(shard_pages)
+        timed_out = timed_out or shard_timed_out
+
+    # Keep only the contiguous prefix of pages so a gap from a failed shard doesn't scramble the resume
+    pages.sort(key=lambda page: page[0])
+    contiguous = []
+    for expected, page in enumerate(pages):
+        if page[0] != expected:
+            break
+        contiguous.append(page)
+    return contiguous, timed_out
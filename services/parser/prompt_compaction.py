@@ -0,0 +1,202 @@
+# services/parser/prompt_compaction.py
+
+import re
+import logging
+import unicodedata
+from collections import Counter
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+DEFAULT_PROMPT_COMPACTION_SETTINGS = {
+    'enabled': True,
+    'token_counter': None,  # Dotted path to a callable(text) -> int; None picks tiktoken if installed
+    'furniture_edge_lines': 3,  # Lines at the top/bottom of each page checked for headers and footers
+}
+
+PAGE_NUMBER_RE = re.compile(r'^(?:page\s*)?\d{1,3}(?:\s*(?:of|/)\s*\d{1,3})?$', re.IGNORECASE)
+INVISIBLE_CHARS_RE = re.compile(r'[\u00ad\u200b\u200c\u200d\u2060\ufeff]')  # Soft hyphen, zero-width spaces, BOM
+HORIZONTAL_SPACE_RE = re.compile(r'[^\S\n]+')
+BLANK_LINES_RE = re.compile(r'\n{3,}')
+DIGITS_RE = re.compile(r'\d+')
+
+
+def estimate_tokens(text):
+    """Rough token count for English text (about four characters per token)."""
+    return -(-len(text) // 4)
+
+
+_tiktoken_encoding = None
+
+
+def count_tiktoken_tokens(text):
+    """Exact token count with tiktoken's cl100k_base encoding."""
+    global _tiktoken_encoding
+    if _tiktoken_encoding is None:
+        _tiktoken_encoding = tiktoken.get_encoding("cl100k_base")
+    return len(_tiktoken_encoding.encode(text))
+
+
+def get_compaction_settings():
+    """Return settings.RESUME_PROMPT_COMPACTION merged over the defaults."""
+    return {**DEFAULT_PROMPT_COMPACTION_SETTINGS, **getattr(settings, 'RESUME_PROMPT_COMPACTION', {})}
+
+
+def get_token_counter():
+    """Resolve the configured token counter, falling back to the character estimate."""
+    counter_path = get_compaction_settings()['token_counter']
+    if counter_path:
+        try:
+            return import_string(counter_path)
+        except ImportError as e:
+            logger.error(f"Could not import token counter '{counter_path}': {str(e)}")
+    return count_tiktoken_tokens if tiktoken is not None else estimate_tokens
+
+
+def normalize_whitespace(text):
+    """Collapse runs of spaces, strip line ends, drop invisible characters and squeeze blank lines."""
+    text = unicodedata.normalize('NFKC', text)
+    text = INVISIBLE_CHARS_RE.sub('', text)
+    text = text.replace('\r\n', '\n').replace('\r', '\n').replace('\f', '\n')
+    lines = [HORIZONTAL_SPACE_RE.sub(' ', line).strip() for line in text.split('\n')]
+    return BLANK_LINES_RE.sub('\n\n', '\n'.join(lines)).strip()
+
+
+def _furniture_key(line):
+    return DIGITS_RE.sub('#', " ".join(line.lower().split()))
+
+
+def find_page_furniture(page_texts, edge_lines=3):
+    """
+    Return normalized lines that repeat at the top or bottom of most pages (running headers,
+    footers). Digits are masked so "Jane Doe - Page 2" and "Jane Doe - Page 3" match.
+    """
+    if not page_texts or len(page_texts) < 2:
+        return set()
+
+    edge_counts = Counter()
+    for page_text in page_texts:
+        lines = [line.strip() for line in page_text.splitlines() if line.strip()]
+        edges = {_furniture_key(line) for line in lines[:edge_lines] + lines[-edge_lines:]}
+        edge_counts.update(edges)
+
+    min_pages = max(2, (len(page_texts) + 1) // 2)
+    return {line for line, count in edge_counts.items() if count >= min_pages}
+
+
+def strip_page_furniture(text, furniture):
+    """
+    Remove page numbers and repeated headers/footers. The first occurrence of a repeated
+    line is kept, since a running header usually starts with the candidate's name.
+    """
+    kept = []
+    seen_furniture = set()
+    for line in text.split('\n'):
+        stripped = line.strip()
+        if PAGE_NUMBER_RE.match(stripped):
+            continue
+        key = _furniture_key(stripped)
+        if key in furniture:
+            if key in seen_furniture:
+                continue
+            seen_furniture.add(key)
+        kept.append(line)
+    return '\n'.join(kept)
+
+
+def dedupe_links(links, text=""):
+    """
+    Drop duplicate links (ignoring case of scheme/host and trailing slashes) and links the
+    text already spells out in full, keeping first-seen order.
+    """
+    seen = set()
+    unique = []
+    for link in links or []:
+        key = _link_key(link)
+        if key in seen or link in text:
+            continue
+        seen.add(key)
+        unique.append(link)
+    return unique
+
+
+def _link_key(link):
+    match = re.match(r'^([a-z]+:(?://)?)([^/?#]*)(.*)$', link, re.IGNORECASE)
+    if not match:
+        return link.rstrip('/')
+    scheme, host, rest = match.groups()
+    return f"{scheme.lower()}{host.lower()}{rest.rstrip('/')}"
+
+
+def truncate_to_budget(text, max_tokens, token_counter):
+    """Cut text at a line boundary so it fits max_tokens (None: no limit). Returns (text, truncated)."""
+    if max_tokens is None or token_counter(text) <= max_tokens:
+        return text, False
+
+    lines = text.split('\n')
+    # Binary search for the longest line prefix that fits
+    low, high = 0, len(lines)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if token_counter('\n'.join(lines[:middle])) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return '\n'.join(lines[:low]), True
+
+
+def compact_resume_text(text, links=None, page_texts=None, max_tokens=None, token_counter=None):
+    """
+    Shrink extracted resume text before it is sent to an LLM.
+
+    Args:
+        text (str): Extracted resume text
+        links (list, optional): Extracted links
+        page_texts (list, optional): Per-page text (PDFs), used to find running headers/footers
+        max_tokens (int, optional): Token budget for the text, e.g. AI_SETTINGS['max_resume_tokens']
+        token_counter (callable, optional): callable(text) -> int, defaults to get_token_counter()
+
+    Returns:
+        dict: text, links, tokens_before, tokens_after, truncated
+    """
+    compaction_settings = get_compaction_settings()
+    token_counter = token_counter or get_token_counter()
+    tokens_before = token_counter(text) + sum(token_counter(link) for link in links or [])
+
+    if compaction_settings['enabled']:
+        furniture = find_page_furniture(page_texts, compaction_settings['furniture_edge_lines'])
+        text = normalize_whitespace(strip_page_furniture(text, furniture))
+        links = dedupe_links(links, text)
+
+    kept_links = []
+    link_tokens = 0
+    for link in links or []:
+        # Links are sent whole; the ones that don't fit the budget are dropped
+        tokens = token_counter(link)
+        if not max_tokens or link_tokens + tokens <= max_tokens:
+            kept_links.append(link)
+            link_tokens += tokens
+    links_dropped = len(kept_links) < len(links or [])
+    links = kept_links
+
+    # What the links leave, possibly 0 (an empty text), never "no limit"
+    budget = max_tokens - link_tokens if max_tokens else None
+    text, truncated = truncate_to_budget(text, budget, token_counter)
+    truncated = truncated or links_dropped
+    if truncated:
+        logger.warning(f"Resume text truncated to fit the {max_tokens}-token budget")
+
+    return {
+        'text': text,
+        'links': links,
+        'tokens_before': tokens_before,
+        'tokens_after': token_counter(text) + link_tokens,
+        'truncated': truncated,
+    }
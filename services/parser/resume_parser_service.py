@@ -1,23 +1,48 @@
 # services/parser/resume_parser_service.py
 
 import os
-import uuid
-import tempfile
+import io
+import copy
 import docx
 import re
 import json
+import time
+import textwrap
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
-import openai
 import google.generativeai as genai
 from django.utils import timezone
 from datetime import datetime
 from urllib.parse import urlparse
 import traceback
+import hashlib
+from services.parser.parse_cache import get_parse_cache, hash_bytes, ParseResultCache
+from services.parser.pdf_extractor import extract_pdf, extract_pdf_text_pypdf2
+from services.parser.extraction_sandbox import get_extraction_sandbox, ExtractionSandboxError, REASON_ERROR
+from services.parser.docx_extractor import extract_docx
+from services.parser.heuristic_parser import HeuristicResumeParser, HEURISTIC_PARSER_VERSION
+from services.parser.layout_segmenter import LayoutSegmenter, sections_to_index
+from services.parser.prompt_compaction import compact_resume_text, normalize_whitespace, get_token_counter
+from services.parser.revision_diff import get_revision_settings, find_revision_base, changed_sections
+from services.providers.replay_provider import build_openai_client, build_gemini_model, provider_mode, MODE_REPLAY
+from services.prompts.resume_parsing_prompts import (
+    SECTION_SCHEMAS, SECTION_PARSING_SYSTEM_MESSAGE, get_section_parsing_prompt
+)
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+DEFAULT_SECTION_PARSING_SETTINGS = {
+    'mode': 'tiered',  # "tiered", "sectioned" or "full" (one request for the whole resume)
+    'confidence_threshold': 0.75,  # In tiered mode, sections the heuristic parser scores below this go to the LLM
+    'max_tokens_per_section': 1500,
+    'max_concurrency': 6,  # Section requests in flight at once
+}
+
+PARSING_MODES = ("tiered", "sectioned", "full")
+
 # Try to import PyMuPDF (fitz) for enhanced PDF processing
 try:
     import fitz  # PyMuPDF
@@ -32,45 +57,76 @@ class ResumeParserService:
     Uses user-provided API keys instead of global settings.
     """
 
-    def __init__(self, user_openai_key=None, user_gemini_key=None):
+    PARSING_SYSTEM_MESSAGE = "Parse resume text into the specified JSON format. Ensure all values are correct types. List individual skills, do not categorize them. Output only valid JSON."
+
+    def __init__(self, user_openai_key=None, user_gemini_key=None, parse_cache=None):
         """
         Initialize the parser service with user-specific API keys.
         Args:
             user_openai_key (str, optional): User's OpenAI API key
             user_gemini_key (str, optional): User's Google Gemini API key
+            parse_cache (ParseResultCache, optional): Cache for parse results, defaults to the shared cache;
+                pass False to disable caching (e.g. when benchmarking)
         """
         self.user_openai_key = user_openai_key
         self.user_gemini_key = user_gemini_key
         self.openai_client = None
         self.gemini_model = None
-
-        # Initialize clients if keys are provided
-        if self.user_openai_key:
+        self.openai_model_name = getattr(settings, 'OPENAI_MODEL', 'gpt-4o-mini')
+        self.gemini_model_name = getattr(settings, 'GEMINI_MODEL_NAME', 'gemini-1.5-flash')
+        self.parse_cache = parse_cache if parse_cache is not None else get_parse_cache()
+        self.used_fallback = False
+        self.last_pdf_extraction = None
+        self.layout_sections = None
+        self.page_texts = None
+        self.extraction_failure = None
+        self.last_compaction_stats = None
+        self.last_prompt_tokens = 0
+        self.last_timings = None
+        self.last_parser_used = None
+        self.last_resume_text = None
+        self.last_section_texts = None
+        self.last_revision = None
+        self.section_settings = {**DEFAULT_SECTION_PARSING_SETTINGS, **getattr(settings, 'RESUME_SECTION_PARSING', {})}
+        self.last_section_stats = None
+
+        # Initialize clients if keys are provided (replay mode needs no keys); live clients are
+        # pooled per key, so constructing a service per request doesn't open new connections
+        replaying = provider_mode() == MODE_REPLAY
+        if self.user_openai_key or replaying:
             try:
-                self.openai_client = openai.OpenAI(api_key=self.user_openai_key)
+                self.openai_client = build_openai_client(self.user_openai_key)
                 logger.info("OpenAI client initialized with user API key")
             except Exception as e:
                 logger.error(f"Failed to initialize OpenAI client: {str(e)}")
 
-        if self.user_gemini_key:
+        if self.user_gemini_key or replaying:
             try:
-                # Configure Gemini with user API key
-                genai.configure(api_key=self.user_gemini_key)
-                model_name = getattr(settings, 'GEMINI_MODEL_NAME', 'gemini-1.5-flash')
-                self.gemini_model = genai.GenerativeModel(model_name)
-                logger.info(f"Gemini model '{model_name}' initialized with user API key")
+                self.gemini_model = build_gemini_model(self.user_gemini_key, self.gemini_model_name)
+                logger.info(f"Gemini model '{self.gemini_model_name}' initialized with user API key")
             except Exception as e:
                 logger.error(f"Failed to initialize Gemini model: {str(e)}")
 
-    def parse_resume(self, file_path, file_type=None, ai_parsing_enabled=True, ai_provider="gemini"):
+    def parse_resume(self, file_path=None, file_type=None, ai_parsing_enabled=True, ai_provider="gemini",
+                     file_bytes=None, parsing_mode=None, previous_versions=None):
         """
         Parse a resume file and extract structured data.
 
+        The file is read into memory exactly once; hashing for the parse cache and
+        text extraction both work on the same bytes, so no temporary copy is needed.
+
         Args:
-            file_path (str): Path to the resume file
+            file_path (str, optional): Path to the resume file, used when file_bytes is not given
             file_type (str, optional): File extension to override auto-detection
             ai_parsing_enabled (bool): Whether to use AI for parsing
             ai_provider (str): Which AI provider to use ("gemini" or "chatgpt")
+            file_bytes (bytes or file-like, optional): Resume contents already in memory (e.g. an upload)
+            parsing_mode (str, optional): "tiered" sends only low-confidence sections to the LLM,
+                "sectioned" sends every section concurrently, "full" sends the whole resume in one
+                request; defaults to RESUME_SECTION_PARSING['mode']
+            previous_versions (list of dict, optional): Snapshots (see build_parse_snapshot) of this
+                user's earlier uploads. When the new text is a close revision of one of them, only
+                the sections whose text changed are re-parsed and the rest are reused; see last_revision
 
         Returns:
             dict: Parsed resume data in structured format
@@ -78,10 +134,72 @@ class ResumeParserService:
         try:
             # Determine file type if not provided
             if not file_type:
-                file_type = os.path.splitext(file_path)[1].lower().strip('.')
+                source_name = file_path or getattr(file_bytes, 'name', '') or ''
+                file_type = os.path.splitext(source_name)[1].lower().strip('.')
+
+            self.layout_sections = None
+            self.page_texts = None
+            self.extraction_failure = None
+            self.last_timings = None
+            self.last_resume_text = None
+            self.last_section_texts = None
+            self.last_revision = None
+            file_bytes = self._read_file_bytes(file_path, file_bytes)
+            if not file_bytes:
+                return {"error": "The uploaded resume file is empty."}
+
+            # Resolve which parser will actually run, so the cache key matches the result
+            if ai_parsing_enabled:
+                if ai_provider == "chatgpt" and self.openai_client:
+                    parser_used = "chatgpt"
+                elif ai_provider == "gemini" and self.gemini_model:
+                    parser_used = "gemini"
+                else:
+                    logger.warning(f"AI provider '{ai_provider}' not available or no API key. Using heuristic parsing.")
+                    parser_used = "heuristic"
+            else:
+                logger.info("AI parsing disabled. Using heuristic parsing.")
+                parser_used = "heuristic"
+
+            parsing_mode = parsing_mode or self.section_settings['mode']
+            if parsing_mode not in PARSING_MODES:
+                logger.warning(f"Unknown parsing mode '{parsing_mode}'. Using full parsing.")
+                parsing_mode = "full"
+            if parser_used == "heuristic":
+                parsing_mode = "full"
+            self.last_parser_used = parser_used
+
+            # Serve previously parsed files straight from the cache. Entries carry the extracted
+            # text and section texts, so snapshots and the revision diff need no re-extraction
+            cache_key = self._get_cache_key(file_bytes, file_type, parser_used, parsing_mode)
+            cache_entry = self.parse_cache.get_entry(cache_key) if cache_key else None
+            cached_data = cache_entry.get('parsed_data') if cache_entry else None
+            cached_text = cache_entry.get('metadata', {}).get('text') if cached_data is not None else None
+            if cached_text is not None:
+                self.last_resume_text = cached_text
+                self.last_section_texts = cache_entry['metadata'].get('section_texts')
+            # Entries written before the text was stored still need extraction for revision checks
+            if cached_data is not None and (previous_versions is None or cached_text is not None):
+                logger.info(f"Parse cache hit for {parser_used} ({cache_key[:12]})")
+                if previous_versions is not None:
+                    if self.last_section_texts is None:
+                        self.last_section_texts = self._section_texts(cached_text)
+                    revision_data = self._parse_as_revision(parser_used, cached_text, None, previous_versions,
+                                                            cached_data=cached_data)
+                    if revision_data is not None:
+                        return revision_data
+                return cached_data
 
             # Extract text and links from the resume file
-            resume_text, extracted_links = self._extract_text_and_links(file_path, file_type)
+            extraction_started = time.perf_counter()
+            resume_text, extracted_links = self._extract_text_and_links(file_bytes, file_type)
+            self.last_timings = {'extraction_seconds': time.perf_counter() - extraction_started}
+            if self.extraction_failure:
+                return {
+                    "error": "The resume could not be processed safely "
+                             f"({self.extraction_failure['reason']}). Please try a different file.",
+                    "extraction_failure": self.extraction_failure,
+                }
 
             # Check if text extraction was successful
             if not resume_text or len(resume_text.strip()) < 50:
@@ -89,17 +207,39 @@ class ResumeParserService:
                 return {"error": "Could not extract sufficient text from the resume. Please check the file format."}
 
             # Parse the resume text
-            if ai_parsing_enabled:
-                if ai_provider == "chatgpt" and self.openai_client:
-                    parsed_data = self._parse_with_openai(resume_text, extracted_links)
-                elif ai_provider == "gemini" and self.gemini_model:
-                    parsed_data = self._parse_with_gemini(resume_text, extracted_links)
-                else:
-                    logger.warning(f"AI provider '{ai_provider}' not available or no API key. Using basic parsing.")
-                    parsed_data = self._basic_resume_parsing(resume_text)
+            self.used_fallback = False
+            self.last_prompt_tokens = 0
+            self.last_resume_text = resume_text
+            parsing_started = time.perf_counter()
+            if previous_versions is not None:
+                self.last_section_texts = self._section_texts(resume_text)
+                revision_data = self._parse_as_revision(parser_used, resume_text, extracted_links, previous_versions)
+                if revision_data is not None:
+                    # Built on an earlier parse, so never cached as this file's own result
+                    self.last_timings['parsing_seconds'] = time.perf_counter() - parsing_started
+                    return revision_data
+
+            if cached_data is not None:
+                logger.info(f"Parse cache hit for {parser_used} ({cache_key[:12]})")
+                return cached_data
+
+            if parsing_mode in ("tiered", "sectioned"):
+                parsed_data = self._parse_by_sections(parser_used, resume_text, extracted_links, parsing_mode)
+            elif parser_used == "chatgpt":
+                parsed_data = self._parse_with_openai(resume_text, extracted_links)
+            elif parser_used == "gemini":
+                parsed_data = self._parse_with_gemini(resume_text, extracted_links)
             else:
-                logger.info("AI parsing disabled. Using basic parsing.")
-                parsed_data = self._basic_resume_parsing(resume_text)
+                parsed_data = self._heuristic_parsing(resume_text, extracted_links)
+            self.last_timings['parsing_seconds'] = time.perf_counter() - parsing_started
+
+            # Only cache genuine results, never a fallback standing in for a failed AI call
+            if cache_key and not self.used_fallback:
+                self.parse_cache.set(cache_key, parsed_data, metadata={
+                    'parser': parser_used, 'file_type': file_type, 'mode': parsing_mode,
+                    'text': resume_text,
+                    'section_texts': self.last_section_texts or self._section_texts(resume_text),
+                })
 
             return parsed_data
 
@@ -108,133 +248,512 @@ class ResumeParserService:
             traceback.print_exc()
             return {"error": f"Resume parsing failed: {str(e)}"}
 
-    def _extract_text_and_links(self, file_path, file_type):
+    @staticmethod
+    def _read_file_bytes(file_path, file_bytes):
+        """Return the resume contents as bytes from a bytes object, a file-like object or a path."""
+        if file_bytes is None:
+            with open(file_path, 'rb') as file:
+                return file.read()
+        if isinstance(file_bytes, (bytes, bytearray, memoryview)):
+            return bytes(file_bytes)
+        # File-like object such as an UploadedFile or BytesIO
+        if hasattr(file_bytes, 'seek'):
+            file_bytes.seek(0)
+        return file_bytes.read()
+
+    def _get_cache_key(self, file_bytes, file_type, parser_used, parsing_mode="full"):
+        """
+        Build the parse cache key from the file's SHA-256 plus the provider, model and prompt version.
+        Returns None when caching is disabled.
+        """
+        if not self.parse_cache:
+            return None
+
+        content_hash = hash_bytes(file_bytes)
+
+        if parser_used == "chatgpt":
+            model_name = self.openai_model_name
+        elif parser_used == "gemini":
+            model_name = self.gemini_model_name
+        else:
+            model_name = f"{parser_used}-v{HEURISTIC_PARSER_VERSION}"
+
+        return ParseResultCache.build_key(
+            content_hash=content_hash,
+            provider=f"{parser_used}:{file_type}:{parsing_mode}",
+            model_name=model_name,
+            prompt_version=self.get_prompt_version() if parser_used in ("chatgpt", "gemini") else None
+        )
+
+    def get_prompt_version(self):
+        """Hash of the parsing prompts and system messages, so prompt edits invalidate cached parses."""
+        prompt_template = self.PARSING_SYSTEM_MESSAGE + self._get_parsing_prompt("{context_text}")
+        prompt_template += SECTION_PARSING_SYSTEM_MESSAGE + "".join(
+            get_section_parsing_prompt(schema_key, "{section_text}") for schema_key in SECTION_SCHEMAS
+        )
+        return hashlib.sha256(prompt_template.encode('utf-8')).hexdigest()[:16]
+
+    def _fallback_parsing(self, resume_text, extracted_links=None):
+        """Fallback used when AI parsing fails; flags the result so it is not cached."""
+        self.used_fallback = True
+        return self._heuristic_parsing(resume_text, extracted_links)
+
+    def _parse_by_sections(self, provider, resume_text, extracted_links, parsing_mode):
+        """
+        Parse the resume section by section, with the section prompts in flight concurrently.
+
+        The heuristic parser runs first: it splits the resume into sections, scores them and
+        provides a fallback for any section whose LLM call fails. In "tiered" mode only
+        sections scored below RESUME_SECTION_PARSING['confidence_threshold'] go to the LLM;
+        in "sectioned" mode every non-empty section does. Results are merged in schema
+        order, so the output doesn't depend on which request finished first.
+        """
+        parser = HeuristicResumeParser()
+        sections = self._index_sections(parser, resume_text)
+
+        try:
+            parsed_data = parser.parse_sections(sections, extracted_links)
+        except Exception as e:
+            logger.error(f"Heuristic pass of section parsing failed, using full AI parsing: {str(e)}")
+            if provider == "chatgpt":
+                return self._parse_with_openai(resume_text, extracted_links)
+            return self._parse_with_gemini(resume_text, extracted_links)
+
+        confidences = parser.score_sections(sections, parsed_data)
+        if parsing_mode == "tiered":
+            threshold = self.section_settings['confidence_threshold']
+            schema_keys = [key for key, score in confidences.items() if score < threshold]
+        else:
+            schema_keys = list(SECTION_SCHEMAS)
+
+        section_requests = []
+        for schema_key in schema_keys:
+            section_text = normalize_whitespace(parser.section_text(sections, schema_key))
+            if section_text:
+                section_requests.append((schema_key, section_text))
+
+        started = time.perf_counter()
+        results = self._parse_sections_concurrently(provider, section_requests, extracted_links)
+        elapsed = time.perf_counter() - started
+
+        for schema_key, _ in section_requests:
+            value = results.get(schema_key)
+            if value is None:
+                self.used_fallback = True  # Keep the heuristic section, but don't cache a partial result
+                continue
+            parsed_data[schema_key] = self._merge_section(schema_key, parsed_data.get(schema_key), value)
+
+        sent_chars = sum(len(section_text) for _, section_text in section_requests)
+        self.last_section_stats = {
+            'provider': provider,
+            'mode': parsing_mode,
+            'confidences': confidences,
+            'sections_sent': [schema_key for schema_key, _ in section_requests],
+            'chars_sent': sent_chars,
+            'chars_total': len(resume_text),
+            'tokens_sent': self.last_prompt_tokens,
+            'elapsed_seconds': elapsed,
+        }
+        logger.info(
+            f"{parsing_mode.capitalize()} parsing sent {len(section_requests)}/{len(confidences)} sections "
+            f"to {provider} ({sent_chars}/{len(resume_text)} chars) in {elapsed:.2f}s"
+        )
+        return parsed_data
+
+    def _index_sections(self, parser, resume_text):
+        """Section index from the PDF layout when available, otherwise from the text's headers."""
+        if self.layout_sections:
+            return sections_to_index(self.layout_sections)
+        return parser.index_sections(resume_text)
+
+    def _section_texts(self, resume_text):
+        """Normalized raw text of each schema section present in the resume."""
+        parser = HeuristicResumeParser()
+        sections = self._index_sections(parser, resume_text)
+        section_texts = {}
+        for schema_key in SECTION_SCHEMAS:
+            text = normalize_whitespace(parser.section_text(sections, schema_key))
+            if text:
+                section_texts[schema_key] = text
+        return section_texts
+
+    def build_parse_snapshot(self, parsed_data):
+        """
+        Everything a later upload needs to be re-parsed incrementally against this one:
+        the parser used, the extracted text, per-section texts and the parsed result.
+        Returns None when the last parse_resume call extracted no text.
+        """
+        if self.last_resume_text is None:
+            return None
+        return {
+            'parser': self.last_parser_used,
+            'text': self.last_resume_text,
+            'section_texts': self.last_section_texts or self._section_texts(self.last_resume_text),
+            'parsed_data': parsed_data,
+        }
+
+    def _parse_as_revision(self, provider, resume_text, extracted_links, previous_versions, cached_data=None):
+        """
+        Treat the resume as a revision of the closest earlier snapshot parsed by the same
+        provider: reuse its unchanged sections and re-parse only the changed ones (heuristic
+        pass first, then the LLM for those sections alone). On a parse-cache hit, cached_data
+        (this file's own cached parse) supplies the changed sections instead. Returns None when
+        no snapshot is similar enough, in which case the caller does a normal parse.
+        """
+        revision_settings = get_revision_settings()
+        if not revision_settings['enabled']:
+            return None
+        candidates = [snapshot for snapshot in previous_versions
+                      if snapshot.get('parser') == provider and isinstance(snapshot.get('parsed_data'), dict)]
+        base, similarity = find_revision_base(resume_text, candidates, revision_settings['similarity_threshold'])
+        if base is None:
+            return None
+
+        changed = changed_sections(base.get('section_texts') or {}, self.last_section_texts, list(SECTION_SCHEMAS))
+        parsed_data = copy.deepcopy(base['parsed_data'])
+        section_requests = []
+        if changed and cached_data is not None:
+            for schema_key in changed:
+                parsed_data[schema_key] = copy.deepcopy(cached_data.get(schema_key))
+        elif changed:
+            parser = HeuristicResumeParser()
+            heuristic_data = parser.parse_sections(self._index_sections(parser, resume_text), extracted_links)
+            if provider != "heuristic":
+                section_requests = [(schema_key, self.last_section_texts[schema_key]) for schema_key in changed
+                                    if schema_key in self.last_section_texts]
+            results = self._parse_sections_concurrently(provider, section_requests, extracted_links)
+            for schema_key in changed:
+                value = results.get(schema_key)
+                if value is None:
+                    if schema_key in dict(section_requests):
+                        self.used_fallback = True  # The LLM call failed; keep the heuristic section
+                    parsed_data[schema_key] = heuristic_data.get(schema_key)
+                else:
+                    parsed_data[schema_key] = self._merge_section(schema_key, heuristic_data.get(schema_key), value)
+
+        self.last_revision = {
+            'base': base.get('key'),
+            'similarity': similarity,
+            'changed_sections': changed,
+            'sections_sent': [schema_key for schema_key, _ in section_requests],
+        }
+        logger.info(
+            f"Resume is a revision of {base.get('key')} (similarity {similarity:.2f}); "
+            f"re-parsed {len(changed)} changed section(s), {len(section_requests)} sent to {provider}"
+        )
+        return parsed_data
+
+    def _parse_sections_concurrently(self, provider, section_requests, extracted_links):
+        """
+        Send every (schema_key, section_text) request at once and return {schema_key: value or None}.
+        OpenAI requests run on asyncio with the async client; Gemini's SDK call is blocking, so
+        its requests (and OpenAI's when an event loop is already running) use a thread pool.
+        """
+        if not section_requests:
+            return {}
+
+        section_requests, extracted_links = self._compact_section_requests(section_requests, extracted_links)
+        prompts = [
+            (schema_key, get_section_parsing_prompt(
+                schema_key, section_text, extracted_links if schema_key == "Personal Information" else None))
+            for schema_key, section_text in section_requests
+        ]
+        self.last_prompt_tokens = sum(
+            self._count_prompt_tokens(SECTION_PARSING_SYSTEM_MESSAGE, prompt) for _, prompt in prompts
+        )
+        max_concurrency = max(1, self.section_settings['max_concurrency'])
+
+        if provider == "chatgpt" and not self._event_loop_running():
+            values = asyncio.run(self._aparse_sections_with_openai(prompts, max_concurrency))
+        else:
+            with ThreadPoolExecutor(max_workers=min(max_concurrency, len(prompts))) as executor:
+                values = list(executor.map(
+                    lambda item: self._parse_section_with_provider(provider, *item), prompts
+                ))
+        return {schema_key: value for (schema_key, _), value in zip(prompts, values)}
+
+    def _compact_section_requests(self, section_requests, extracted_links):
+        """
+        Compact section texts the way _prepare_context_text compacts the whole resume: page
+        furniture is stripped and, when the sections together exceed AI_SETTINGS['max_resume_tokens'],
+        the budget is split evenly: sections under their share are kept whole and what they leave
+        over goes to the longer ones, which are truncated. Returns (section_requests, extracted_links).
+        """
+        max_tokens = getattr(settings, 'AI_SETTINGS', {}).get('max_resume_tokens')
+        token_counter = get_token_counter()
+        compacted = {
+            schema_key: compact_resume_text(
+                section_text, extracted_links if schema_key == "Personal Information" else None,
+                page_texts=self.page_texts, token_counter=token_counter
+            )
+            for schema_key, section_text in section_requests
+        }
+        tokens_before = sum(result['tokens_before'] for result in compacted.values())
+        tokens_compacted = sum(result['tokens_after'] for result in compacted.values())
+        if max_tokens and tokens_compacted > max_tokens:
+            budget_left = max_tokens
+            by_size = sorted(compacted, key=lambda schema_key: compacted[schema_key]['tokens_after'])
+            for position, schema_key in enumerate(by_size):
+                share = max(1, budget_left // (len(by_size) - position))
+                result = compacted[schema_key]
+                if result['tokens_after'] > share:
+                    compacted[schema_key] = result = compact_resume_text(
+                        result['text'], result['links'], max_tokens=share, token_counter=token_counter)
+                budget_left = max(0, budget_left - result['tokens_after'])
+
+        truncated = any(result['truncated'] for result in compacted.values())
+        self.last_compaction_stats = {
+            'tokens_before': tokens_before,
+            'tokens_after': sum(result['tokens_after'] for result in compacted.values()),
+            'truncated': truncated,
+        }
+        logger.info(
+            f"Section prompt compaction: {tokens_before} -> {self.last_compaction_stats['tokens_after']} tokens"
+            f"{' (truncated)' if truncated else ''}"
+        )
+
+        links = compacted["Personal Information"]['links'] if "Personal Information" in compacted else extracted_links
+        return [(schema_key, compacted[schema_key]['text']) for schema_key, _ in section_requests], links
+
+    @staticmethod
+    def _count_prompt_tokens(system_message, prompt):
+        token_counter = get_token_counter()
+        return token_counter(system_message) + token_counter(prompt)
+
+    @staticmethod
+    def _event_loop_running():
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return True
+
+    async def _aparse_sections_with_openai(self, prompts, max_concurrency):
+        """Run the section prompts on one AsyncOpenAI client; results come back in prompt order."""
+        client = self._make_async_openai_client()
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def parse_section(schema_key, prompt):
+            async with semaphore:
+                try:
+                    response = await client.chat.completions.create(
+                        **self._openai_request_kwargs(SECTION_PARSING_SYSTEM_MESSAGE, prompt,
+                                                      self.section_settings['max_tokens_per_section'])
+                    )
+                    result = self._decode_json_response(response.choices[0].message.content)
+                except Exception as e:
+                    logger.error(f"Error parsing section '{schema_key}' with chatgpt: {str(e)}")
+                    return None
+            return self._section_value("chatgpt", schema_key, result)
+
+        try:
+            return await asyncio.gather(*(parse_section(schema_key, prompt) for schema_key, prompt in prompts))
+        finally:
+            await client.close()
+
+    def _make_async_openai_client(self):
+        # Created per parse: an async client's connection pool is bound to the event loop that used it
+        return build_openai_client(self.user_openai_key, async_client=True)
+
+    def _parse_section_with_provider(self, provider, schema_key, prompt):
+        """Parse one section with the LLM; returns the section's value or None on failure."""
+        try:
+            result = self._request_json(provider, SECTION_PARSING_SYSTEM_MESSAGE, prompt,
+                                        max_tokens=self.section_settings['max_tokens_per_section'])
+        except Exception as e:
+            logger.error(f"Error parsing section '{schema_key}' with {provider}: {str(e)}")
+            return None
+        return self._section_value(provider, schema_key, result)
+
+    @staticmethod
+    def _section_value(provider, schema_key, result):
+        """Pull the section out of a {"<schema_key>": value} reply, or None if it has the wrong shape."""
+        value = result.get(schema_key) if isinstance(result, dict) else None
+        expected_type = dict if schema_key == "Personal Information" else (str if schema_key == "Professional Summary" else list)
+        if not isinstance(value, expected_type):
+            logger.error(f"Section '{schema_key}' from {provider} has unexpected type {type(value)}")
+            return None
+        return value
+
+    def _openai_request_kwargs(self, system_message, prompt, max_tokens):
+        return {
+            'model': self.openai_model_name,
+            'messages': [
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt}
+            ],
+            'temperature': 0.1,
+            'max_tokens': max_tokens,
+            'response_format': {"type": "json_object"},
+        }
+
+    def _request_json(self, provider, system_message, prompt, max_tokens=4000):
+        """Send a prompt to the provider in JSON mode and return the decoded object."""
+        if provider == "chatgpt":
+            response = self.openai_client.chat.completions.create(
+                **self._openai_request_kwargs(system_message, prompt, max_tokens)
+            )
+            result = response.choices[0].message.content
+        else:
+            response = self.gemini_model.generate_content(
+                f"{system_message}\n\n{prompt}",
+                generation_config=genai.types.GenerationConfig(
+                    temperature=0.2,
+                    max_output_tokens=max_tokens,
+                    response_mime_type="application/json"
+                )
+            )
+            result = response.text
+        return self._decode_json_response(result)
+
+    @staticmethod
+    def _decode_json_response(result):
+        result = re.sub(r'^```json\s*|\s*```$', '', result.strip(), flags=re.MULTILINE)
+        result = re.sub(r'^\s*//.*$', '', result, flags=re.MULTILINE)
+        return json.loads(result)
+
+    @staticmethod
+    def _merge_section(schema_key, heuristic_value, llm_value):
+        """LLM output wins, but Personal Information keeps heuristic fields the LLM left empty."""
+        if schema_key == "Personal Information" and isinstance(heuristic_value, dict):
+            merged = dict(heuristic_value)
+            merged.update({key: value for key, value in llm_value.items() if value})
+            return merged
+        return llm_value
+
+    def _heuristic_parsing(self, resume_text, extracted_links=None):
+        """Full-schema rule-based parsing without an LLM; falls back to basic parsing on error."""
+        try:
+            parser = HeuristicResumeParser()
+            if self.layout_sections:
+                # PDF font/geometry segmentation is more reliable than text-only header matching
+                return parser.parse_sections(sections_to_index(self.layout_sections), extracted_links)
+            return parser.parse(resume_text, extracted_links)
+        except Exception as e:
+            logger.error(f"Heuristic resume parsing failed: {str(e)}")
+            return self._basic_resume_parsing(resume_text)
+
+    def _extract_text_and_links(self, file_bytes, file_type):
         """
-        Extract text and links from a resume file based on file type.
+        Extract text and links from in-memory resume contents based on file type.
 
         Args:
-            file_path (str): Path to the file
+            file_bytes (bytes): Raw file contents
             file_type (str): File extension (pdf, docx, doc, txt)
 
         Returns:
             tuple: (extracted_text, extracted_links)
         """
         if file_type == 'pdf':
-            return self._extract_from_pdf(file_path)
+            return self._extract_from_pdf(file_bytes)
         elif file_type in ['docx', 'doc']:
-            return self._extract_from_docx(file_path), []
+            return self._extract_from_docx(file_bytes)
         elif file_type in ['txt', 'text', 'odt']:
-            return self._extract_from_txt(file_path), []
+            return self._extract_from_txt(file_bytes), []
         else:
             logger.warning(f"Unsupported file type: {file_type}")
             return "", []
 
-    def _extract_from_pdf(self, file_path):
-        """Extract text and links from a PDF file."""
-        text_content = ""
-        extracted_links = []
-
+    def _run_extractor(self, extractor, *args, sandboxed_kwargs=None, **kwargs):
+        """
+        Run an extractor in the extraction sandbox (see RESUME_EXTRACTION_SANDBOX), or in-process
+        when sandboxing is disabled. sandboxed_kwargs are only passed when it runs in the sandbox.
+        Raises ExtractionSandboxError on failure; failures caused by the sandbox's limits are also
+        recorded in self.extraction_failure.
+        """
+        sandbox = get_extraction_sandbox()
+        if sandbox is None:
+            return extractor(*args, **kwargs)
+
+        result = sandbox.run(extractor, *args, **kwargs, **(sandboxed_kwargs or {}))
+        if not result.ok:
+            if result.reason != REASON_ERROR:
+                self.extraction_failure = result.as_dict()
+            raise ExtractionSandboxError(result)
+        return result.value
+
+    def _extract_from_pdf(self, file_bytes):
+        """Extract text and links from PDF bytes, bounded by the RESUME_PDF_EXTRACTION budgets."""
         # Use PyMuPDF if available
         if fitz:
-            doc = None
             try:
-                doc = fitz.open(file_path)
-                for page_num in range(len(doc)):
-                    page = doc.load_page(page_num)
-                    text_content += page.get_text("text") + "\n"
-
-                    # Extract links from the page
-                    links = page.get_links()
-                    for link in links:
-                        if link.get('kind') == fitz.LINK_URI and 'uri' in link:
-                            uri = link['uri']
-                            if uri and uri not in extracted_links:
-                                if isinstance(uri, str) and (uri.startswith('http') or uri.startswith('mailto:')):
-                                    extracted_links.append(uri)
-                                elif isinstance(uri, str) and '@' in uri and '.' in uri and not uri.startswith(
-                                        'mailto:'):
-                                    if re.match(r"[^@]+@[^@]+\.[^@]+", uri):
-                                        extracted_links.append(f"mailto:{uri}")
+                # Page ranges can't fan out to a process pool from inside a sandbox worker; in-process
+                # extraction uses the RESUME_PDF_EXTRACTION worker count
+                result = self._run_extractor(extract_pdf, file_bytes, sandboxed_kwargs={'max_workers': 1})
             except Exception as e:
                 logger.error(f"Error extracting text/links from PDF with PyMuPDF: {str(e)}")
                 return "", []
-            finally:
-                if doc:
-                    try:
-                        doc.close()
-                    except Exception as e:
-                        logger.error(f"Error closing PDF document: {str(e)}")
 
-            logger.info(f"PyMuPDF extracted text length: {len(text_content)}, links: {len(extracted_links)}")
-            return text_content, extracted_links
+            self.last_pdf_extraction = {key: value for key, value in result.items()
+                                        if key not in ('text', 'page_texts', 'layout_lines')}
+            self.page_texts = result['page_texts']
+            if result['layout_lines']:
+                self.layout_sections = LayoutSegmenter().segment(result['layout_lines'])
+            slowest_pages = sorted(result['page_timings'], key=lambda timing: timing[1], reverse=True)[:3]
+            logger.info(
+                f"PyMuPDF extracted text length: {len(result['text'])}, links: {len(result['links'])}, "
+                f"pages: {result['pages_extracted']}/{result['page_count']} in {result['elapsed_seconds']:.3f}s, "
+                f"slowest pages: {[(page, round(seconds, 3)) for page, seconds in slowest_pages]}"
+            )
+            return result['text'], result['links']
 
         # Fallback to PyPDF2 if PyMuPDF is not available
         else:
             try:
-                import PyPDF2
-                with open(file_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-
-                    # Check if PDF is encrypted
-                    if pdf_reader.is_encrypted:
-                        try:
-                            if pdf_reader.decrypt('') == 0:  # Failed decryption
-                                logger.warning(f"Could not decrypt PDF {file_path}")
-                                return "", []
-                        except Exception as e:
-                            logger.error(f"Error decrypting PDF {file_path}: {str(e)}")
-                            return "", []
-
-                    # Extract text from each page
-                    for page in pdf_reader.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text_content += page_text + "\n"
-
+                text_content = self._run_extractor(extract_pdf_text_pypdf2, file_bytes)
                 logger.info(f"PyPDF2 extracted text length: {len(text_content)}")
                 return text_content, []  # PyPDF2 doesn't extract links
             except Exception as e:
                 logger.error(f"Error during fallback PDF text extraction with PyPDF2: {str(e)}")
                 return "", []
 
-    def _extract_from_docx(self, file_path):
-        """Extract text from a DOCX file."""
+    def _extract_from_docx(self, file_bytes):
+        """Extract text (paragraphs, tables, text boxes, headers) and hyperlinks from DOCX bytes."""
+        try:
+            text, extracted_links = self._run_extractor(extract_docx, file_bytes)
+            logger.info(f"DOCX extracted text length: {len(text)}, links: {len(extracted_links)}")
+            return text, extracted_links
+        except ExtractionSandboxError as e:
+            # Don't retry a document that hung or blew the memory limit in-process
+            logger.error(f"Error extracting DOCX: {str(e)}")
+            if self.extraction_failure:
+                return "", []
+        except Exception as e:
+            logger.error(f"Error streaming DOCX XML, falling back to python-docx: {str(e)}")
+
         text = ""
         try:
-            doc = docx.Document(file_path)
-            for para in doc.paragraphs:
-                text += para.text + "\n"
+            doc = docx.Document(io.BytesIO(file_bytes))
+            text = "".join(para.text + "\n" for para in doc.paragraphs)
         except Exception as e:
             logger.error(f"Error extracting text from DOCX: {str(e)}")
-        return text
+        return text, []
 
-    def _extract_from_txt(self, file_path):
-        """Extract text from a plain text file."""
+    def _extract_from_txt(self, file_bytes):
+        """Extract text from plain text bytes."""
         text = ""
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-                text = file.read()
+            text = file_bytes.decode('utf-8', errors='ignore')
         except Exception as e:
-            logger.error(f"Error reading TXT file {file_path}: {str(e)}")
+            logger.error(f"Error decoding TXT file: {str(e)}")
             try:
                 # Fallback to latin-1 encoding
-                with open(file_path, 'r', encoding='latin-1', errors='ignore') as file:
-                    text = file.read()
+                text = file_bytes.decode('latin-1', errors='ignore')
             except Exception as e:
-                logger.error(f"Error reading TXT with latin-1: {str(e)}")
+                logger.error(f"Error decoding TXT with latin-1: {str(e)}")
         return text
 
     def _parse_with_openai(self, resume_text, extracted_links):
         """Parse resume text using OpenAI API."""
         context_text = self._prepare_context_text(resume_text, extracted_links)
         prompt = self._get_parsing_prompt(context_text)
+        self.last_prompt_tokens = self._count_prompt_tokens(self.PARSING_SYSTEM_MESSAGE, prompt)
 
         try:
             response = self.openai_client.chat.completions.create(
-                model=getattr(settings, 'OPENAI_MODEL', 'gpt-4o-mini'),
+                model=self.openai_model_name,
                 messages=[
-                    {"role": "system",
-                     "content": "Parse resume text into the specified JSON format. Ensure all values are correct types. List individual skills, do not categorize them. Output only valid JSON."},
+                    {"role": "system", "content": self.PARSING_SYSTEM_MESSAGE},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.1,
@@ -254,21 +773,22 @@ class ResumeParserService:
             # Validate the structure
             if not isinstance(parsed_data, dict):
                 logger.error(f"Parsed data is not a dictionary (type: {type(parsed_data)})")
-                return self._basic_resume_parsing(resume_text)
+                return self._fallback_parsing(resume_text, extracted_links)
 
             return parsed_data
 
         except json.JSONDecodeError as e:
             logger.error(f"JSON decode error from OpenAI: {str(e)}")
-            return self._basic_resume_parsing(resume_text)
+            return self._fallback_parsing(resume_text, extracted_links)
         except Exception as e:
             logger.error(f"Error parsing with OpenAI: {str(e)}")
-            return self._basic_resume_parsing(resume_text)
+            return self._fallback_parsing(resume_text, extracted_links)
 
     def _parse_with_gemini(self, resume_text, extracted_links):
         """Parse resume text using Google Gemini API."""
         context_text = self._prepare_context_text(resume_text, extracted_links)
         prompt = self._get_parsing_prompt(context_text)
+        self.last_prompt_tokens = self._count_prompt_tokens(self.PARSING_SYSTEM_MESSAGE, prompt)
 
         try:
             response = self.gemini_model.generate_content(
@@ -291,21 +811,35 @@ class ResumeParserService:
             # Validate the structure
             if not isinstance(parsed_data, dict):
                 logger.error(f"Parsed data is not a dictionary (type: {type(parsed_data)})")
-                return self._basic_resume_parsing(resume_text)
+                return self._fallback_parsing(resume_text, extracted_links)
 
             return parsed_data
 
         except json.JSONDecodeError as e:
             logger.error(f"JSON decode error from Gemini: {str(e)}")
-            return self._basic_resume_parsing(resume_text)
+            return self._fallback_parsing(resume_text, extracted_links)
         except Exception as e:
             logger.error(f"Error parsing with Gemini: {str(e)}")
-            return self._basic_resume_parsing(resume_text)
+            return self._fallback_parsing(resume_text, extracted_links)
 
     def _prepare_context_text(self, resume_text, extracted_links):
-        """Prepare the context text with resume text and extracted links."""
-        context_text = resume_text
-
+        """
+        Prepare the context text with resume text and extracted links, compacted to fit
+        AI_SETTINGS['max_resume_tokens'] (see services/parser/prompt_compaction.py).
+        """
+        ai_settings = getattr(settings, 'AI_SETTINGS', {})
+        compacted = compact_resume_text(
+            resume_text, extracted_links, page_texts=self.page_texts,
+            max_tokens=ai_settings.get('max_resume_tokens')
+        )
+        self.last_compaction_stats = {key: value for key, value in compacted.items() if key not in ('text', 'links')}
+        logger.info(
+            f"Prompt compaction: {compacted['tokens_before']} -> {compacted['tokens_after']} tokens"
+            f"{' (truncated)' if compacted['truncated'] else ''}"
+        )
+
+        context_text = compacted['text']
+        extracted_links = compacted['links']
         if extracted_links:
             context_text += "\n\n--- Extracted Links (Prioritize these for URLs/Email) ---\n"
             for link in extracted_links:
@@ -318,7 +852,7 @@ class ResumeParserService:
         """
         Returns the prompt for the AI model to parse resume data.
         """
-        return f"""
+        instructions = textwrap.dedent(f"""
         You are an expert resume parser. Your task is to extract all relevant information from the provided resume text
         and structure it into a comprehensive JSON object. Ensure all fields are extracted accurately and completely.
 
@@ -420,7 +954,8 @@ class ResumeParserService:
         - Pay close attention to date formats.
         - Bullet points should be extracted verbatim as individual strings in a list.
         - For skills, list individual skills. Do not group skills into broad categories unless specifically asked in the "Category" field.
-        """
+        """)
+        return f"{instructions}\nResume text:\n{context_text}\n"
 
     def _basic_resume_parsing(self, resume_text):
         """Basic fallback parsing for when AI parsing fails."""
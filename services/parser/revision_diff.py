@@ -0,0 +1,53 @@
+# services/parser/revision_diff.py
+
+import difflib
+import logging
+from django.conf import settings
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_REVISION_SETTINGS = {
+    'enabled': True,
+    'similarity_threshold': 0.6,  # Line similarity above which an upload counts as a revision of an earlier one
+    'max_candidates': 5,  # Most recent parsed uploads of the same user compared against
+}
+
+
+def get_revision_settings():
+    """Return settings.RESUME_REVISION_DETECTION merged over the defaults."""
+    return {**DEFAULT_REVISION_SETTINGS, **getattr(settings, 'RESUME_REVISION_DETECTION', {})}
+
+
+def _comparable_lines(text):
+    return [" ".join(line.split()).lower() for line in str(text or '').splitlines() if line.strip()]
+
+
+def find_revision_base(resume_text, previous_versions, threshold):
+    """
+    Pick the earlier parse this text is most likely a revision of.
+
+    Args:
+        resume_text (str): Newly extracted resume text
+        previous_versions (list of dict): Snapshots with at least a 'text' key
+        threshold (float): Minimum similarity to count as a revision
+
+    Returns:
+        tuple: (best snapshot or None, its similarity)
+    """
+    new_lines = _comparable_lines(resume_text)
+    best, best_similarity = None, 0.0
+    for snapshot in previous_versions:
+        matcher = difflib.SequenceMatcher(None, _comparable_lines(snapshot.get('text')), new_lines, autojunk=False)
+        # quick_ratio() is a cheap upper bound on ratio(), so most non-matches skip the full diff
+        if matcher.quick_ratio() < max(threshold, best_similarity):
+            continue
+        similarity = matcher.ratio()
+        if similarity >= threshold and similarity > best_similarity:
+            best, best_similarity = snapshot, similarity
+    return best, best_similarity
+
+
+def changed_sections(old_section_texts, new_section_texts, schema_keys):
+    """Schema keys whose section text differs between two parses, in schema order."""
+    return [key for key in schema_keys if old_section_texts.get(key, '') != new_section_texts.get(key, '')]
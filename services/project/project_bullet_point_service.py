@@ -2,9 +2,10 @@
 
 import time
 import logging
-import openai
-import google.generativeai as genai
 from django.conf import settings
+from services.providers.replay_provider import build_openai_client, build_gemini_model, provider_mode, MODE_REPLAY
+from services.response_cache import cache_ai_response
+from services.deadlines import openai_chat, aopenai_chat, gemini_generate, agemini_generate
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +72,8 @@ Instructions:
 Provide only the enhanced bullet point text with no additional commentary."""
 
 
+@cache_ai_response('project_bullet_enhancement', 'chatgpt',
+                   lambda: getattr(settings, 'OPENAI_MODEL', 'gpt-3.5-turbo'), temperature=0.7)
 def enhance_project_bullet_chatgpt(bullet_text, project_title, project_name, project_summary="",
                                    enhancement_type="general"):
     """
@@ -87,12 +90,12 @@ def enhance_project_bullet_chatgpt(bullet_text, project_title, project_name, pro
         tuple: (enhanced_text, input_tokens, output_tokens)
     """
     api_key = getattr(settings, 'OPENAI_API_KEY', None)
-    if not api_key:
+    if not api_key and provider_mode() != MODE_REPLAY:
         return f"Error: OpenAI API key not configured. Please provide your API key in account settings. Original: {bullet_text}", 0, 0
 
     try:
         # Initialize OpenAI client
-        client = openai.OpenAI(api_key=api_key)
+        client = build_openai_client(api_key)
 
         # Generate the prompt with project context
         prompt = get_project_enhancement_prompt(
@@ -103,7 +106,8 @@ def enhance_project_bullet_chatgpt(bullet_text, project_title, project_name, pro
         )
 
         # Call OpenAI API
-        response = client.chat.completions.create(
+        response = openai_chat(
+            client, "ChatGPT project bullet enhancement",
             model=getattr(settings, 'OPENAI_MODEL', 'gpt-3.5-turbo'),
             messages=[
                 {"role": "system", "content": PROJECT_ENHANCEMENT_SYSTEM_MESSAGE},
@@ -128,6 +132,7 @@ def enhance_project_bullet_chatgpt(bullet_text, project_title, project_name, pro
         return f"Error enhancing with ChatGPT: {str(e)}. Original: {bullet_text}", 0, 0
 
 
+@cache_ai_response('project_bullet_enhancement', 'gemini', lambda: getattr(settings, 'GEMINI_MODEL', 'gemini-pro'))
 def enhance_project_bullet_gemini(bullet_text, project_title, project_name, project_summary="",
                                   enhancement_type="general"):
     """
@@ -144,13 +149,12 @@ def enhance_project_bullet_gemini(bullet_text, project_title, project_name, proj
         tuple: (enhanced_text, input_tokens, output_tokens)
     """
     api_key = getattr(settings, 'GOOGLE_GENAI_API_KEY', None)
-    if not api_key:
+    if not api_key and provider_mode() != MODE_REPLAY:
         return f"Error: Gemini API key not configured. Please provide your API key in account settings. Original: {bullet_text}", 0, 0
 
     try:
         # Configure the model
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(getattr(settings, 'GEMINI_MODEL', 'gemini-pro'))
+        model = build_gemini_model(api_key, getattr(settings, 'GEMINI_MODEL', 'gemini-pro'))
 
         # Generate the prompt with project context
         prompt = get_project_enhancement_prompt(
@@ -161,7 +165,7 @@ def enhance_project_bullet_gemini(bullet_text, project_title, project_name, proj
         )
 
         # Call Gemini API
-        response = model.generate_content(prompt)
+        response = gemini_generate(model, prompt, "Gemini project bullet enhancement")
 
         # Extract enhanced text from response
         enhanced_text = response.text.strip()
@@ -179,6 +183,80 @@ def enhance_project_bullet_gemini(bullet_text, project_title, project_name, proj
         logger.error(f"Gemini API error: {str(e)}")
         # Return original text with error message
         return f"Error enhancing with Gemini: {str(e)}. Original: {bullet_text}", 0, 0
+
+
+# Async variants for the ASGI view: same prompts and cache entries, awaited provider calls
+@cache_ai_response('project_bullet_enhancement', 'chatgpt',
+                   lambda: getattr(settings, 'OPENAI_MODEL', 'gpt-3.5-turbo'), temperature=0.7)
+async def aenhance_project_bullet_chatgpt(bullet_text, project_title, project_name, project_summary="",
+                                          enhancement_type="general"):
+    """
+    Async version of enhance_project_bullet_chatgpt, using the pooled AsyncOpenAI client
+    of the running event loop.
+
+    Returns:
+        tuple: (enhanced_text, input_tokens, output_tokens)
+    """
+    api_key = getattr(settings, 'OPENAI_API_KEY', None)
+    if not api_key and provider_mode() != MODE_REPLAY:
+        return f"Error: OpenAI API key not configured. Please provide your API key in account settings. Original: {bullet_text}", 0, 0
+
+    try:
+        client = build_openai_client(api_key, async_client=True, shared=True)
+        prompt = get_project_enhancement_prompt(
+            bullet_text,
+            project_name,
+            project_summary,
+            enhancement_type
+        )
+        response = await aopenai_chat(
+            client, "ChatGPT project bullet enhancement",
+            model=getattr(settings, 'OPENAI_MODEL', 'gpt-3.5-turbo'),
+            messages=[
+                {"role": "system", "content": PROJECT_ENHANCEMENT_SYSTEM_MESSAGE},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=200,
+            temperature=0.7,
+        )
+        enhanced_text = response.choices[0].message.content.strip()
+        return enhanced_text, response.usage.prompt_tokens, response.usage.completion_tokens
+
+    except Exception as e:
+        logger.error(f"OpenAI API error: {str(e)}")
+        return f"Error enhancing with ChatGPT: {str(e)}. Original: {bullet_text}", 0, 0
+
+
+@cache_ai_response('project_bullet_enhancement', 'gemini', lambda: getattr(settings, 'GEMINI_MODEL', 'gemini-pro'))
+async def aenhance_project_bullet_gemini(bullet_text, project_title, project_name, project_summary="",
+                                         enhancement_type="general"):
+    """
+    Async version of enhance_project_bullet_gemini.
+
+    Returns:
+        tuple: (enhanced_text, input_tokens, output_tokens)
+    """
+    api_key = getattr(settings, 'GOOGLE_GENAI_API_KEY', None)
+    if not api_key and provider_mode() != MODE_REPLAY:
+        return f"Error: Gemini API key not configured. Please provide your API key in account settings. Original: {bullet_text}", 0, 0
+
+    try:
+        model = build_gemini_model(api_key, getattr(settings, 'GEMINI_MODEL', 'gemini-pro'))
+        prompt = get_project_enhancement_prompt(
+            bullet_text,
+            project_name,
+            project_summary,
+            enhancement_type
+        )
+        response = await agemini_generate(model, prompt, "Gemini project bullet enhancement")
+        enhanced_text = response.text.strip()
+
+        # Rough estimation: 1 token ≈ 4 characters
+        return enhanced_text, len(prompt) // 4, len(enhanced_text) // 4
+
+    except Exception as e:
+        logger.error(f"Gemini API error: {str(e)}")
+        return f"Error enhancing with Gemini: {str(e)}. Original: {bullet_text}", 0, 0
 # # File: services/project/project_bullet_point_service.py
 #
 # import openai
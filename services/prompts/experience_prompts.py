@@ -1,5 +1,8 @@
 # services/ai_prompts/prompts.py
 
+import json
+
+
 def get_dynamic_bullet_generation_prompt(job_title, employer=None, target_job_title=None, skills=None, responsibilities=None, bullet_count=3):
     """
     Get prompt for generating bullet points, making employer optional.
@@ -95,6 +98,44 @@ RESUME_WRITER_SYSTEM_MESSAGE = "You are an expert AI resume writer. Your goal is
 
 ATS_EXPERT_SYSTEM_MESSAGE = "You are an AI assistant specializing in optimizing resume content for Applicant Tracking Systems (ATS) while ensuring the content remains compelling and readable for human reviewers. You understand how to incorporate keywords naturally and highlight relevant skills and achievements."
 
+# Batch Enhancement Prompt: many bullets in one structured-JSON request
+BATCH_BULLET_ENHANCEMENT_PROMPT = """Enhance each of the following resume bullet points to be more impactful.
+
+{job_description_section}Bullet points (JSON, each with an "id" and its "text"):
+{bullets_json}
+
+Instructions for every bullet:
+1. Ensure it starts with a strong action verb.
+2. Add specific metrics and quantifiable results if appropriate and not forced; never invent employers or tools.
+3. Focus on achievements rather than just responsibilities.
+4. Keep it concise yet impactful (ideally 100-200 characters).
+{type_instruction}
+Return only a JSON object of the form {{"bullets": [{{"id": "<id>", "enhanced": "<enhanced bullet>"}}]}} with exactly one entry per input id, in the same order."""
+
+BATCH_ENHANCEMENT_TYPE_INSTRUCTIONS = {
+    'ats': "5. Optimize for Applicant Tracking Systems: use keywords from the job description naturally, without keyword stuffing.\n",
+    'metrics': "5. Emphasize measurable outcomes and scale.\n",
+    'leadership': "5. Emphasize leadership, ownership and collaboration.\n",
+    'technical': "5. Emphasize the technical skills, tools and complexity involved.\n",
+}
+
+
+def get_batch_enhancement_prompt(bullets, enhancement_type='general', job_description=''):
+    """
+    Build one prompt enhancing many bullets.
+
+    Args:
+        bullets (list of dict): {'id': str, 'text': str} per bullet
+    """
+    job_description_section = ""
+    if job_description and job_description.strip():
+        job_description_section = f"Job Description Context: {job_description.strip()[:1500]}\n\n"
+    return BATCH_BULLET_ENHANCEMENT_PROMPT.format(
+        job_description_section=job_description_section,
+        bullets_json=json.dumps([{'id': bullet['id'], 'text': bullet['text']} for bullet in bullets], ensure_ascii=False),
+        type_instruction=BATCH_ENHANCEMENT_TYPE_INSTRUCTIONS.get(enhancement_type, ''),
+    )
+
 
 # # experience_prompts.py
 #
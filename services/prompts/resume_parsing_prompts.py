@@ -0,0 +1,112 @@
+# services/prompts/resume_parsing_prompts.py
+
+# JSON shape for each top-level key of the full parsing schema, used by the per-section prompts.
+SECTION_SCHEMAS = {
+    "Personal Information": """{
+    "First name": "string",
+    "Middle name": "string | null",
+    "Last name": "string",
+    "Email": "string",
+    "Phone number": "string | null",
+    "Address": "string (e.g., 'City, State/Province, Country') | null",
+    "LinkedIn URL": "string (full URL) | null",
+    "GitHub URL": "string (full URL) | null",
+    "Portfolio URL": "string (full URL) | null"
+  }""",
+    "Professional Summary": '"string | null"',
+    "Skills": """[
+    {
+      "Skill name": "string",
+      "Category": "string (e.g., 'Programming Languages', 'Frameworks', 'Tools', 'Soft Skills', 'Other') | null",
+      "Other category": "string | null",
+      "Estimated proficiency level": "integer (0-100)"
+    }
+  ]""",
+    "Work Experience": """[
+    {
+      "Job title": "string",
+      "Employer/Company name": "string",
+      "Location": "string | null",
+      "Start date": "string | null (YYYY-MM-DD or YYYY-MM or YYYY)",
+      "End date": "string | null (YYYY-MM-DD or YYYY-MM or YYYY)",
+      "Is current job": "boolean",
+      "Bullet points": ["string", ...]
+    }
+  ]""",
+    "Education": """[
+    {
+      "School name": "string",
+      "Location": "string | null",
+      "Degree": "string",
+      "Degree type": "string ('High School Diploma', 'Associate', 'Bachelor', 'Master', 'Doctorate', 'Certificate', 'Other')",
+      "Field of study": "string | null",
+      "Graduation date": "string | null (YYYY-MM-DD or YYYY-MM or YYYY)",
+      "GPA": "float | null",
+      "Description": "string | null"
+    }
+  ]""",
+    "Projects": """[
+    {
+      "Project name": "string",
+      "Summary/description": "string | null",
+      "Start date": "string | null",
+      "Completion date": "string | null",
+      "Project URL": "string | null",
+      "GitHub URL": "string | null",
+      "Bullet points": ["string", ...]
+    }
+  ]""",
+    "Certifications": """[
+    {
+      "Name": "string",
+      "Institute/Issuing organization": "string | null",
+      "Completion date": "string | null",
+      "Expiration date": "string | null",
+      "Score": "string | null",
+      "URL/Link": "string | null",
+      "Description": "string | null"
+    }
+  ]""",
+    "Languages": """[
+    {
+      "Language name": "string",
+      "Proficiency (0-100 where 100 is native and 0 is basic)": "integer | null"
+    }
+  ]""",
+    "Custom Sections": """[
+    {
+      "Section title": "string",
+      "Entries": [
+        {
+          "Entry title": "string",
+          "Description": "string | null",
+          "Start date": "string | null",
+          "End date": "string | null",
+          "Link": "string | null"
+        }
+      ]
+    }
+  ]""",
+}
+
+SECTION_PARSING_SYSTEM_MESSAGE = "Parse one resume section into the specified JSON format. Output only valid JSON."
+
+
+def get_section_parsing_prompt(schema_key, section_text, extracted_links=None):
+    """
+    Get a compact prompt that parses a single resume section into its part of the schema.
+    The model must answer with {"<schema_key>": <value>} so results merge straight back.
+    """
+    schema = SECTION_SCHEMAS[schema_key]
+
+    links_text = ""
+    if extracted_links:
+        links_text = "\nLinks found in the document: " + ", ".join(extracted_links)
+
+    return f"""Extract the "{schema_key}" section of a resume as JSON.
+Dates use YYYY-MM-DD, YYYY-MM or YYYY. Copy bullet points verbatim. List individual skills.
+Return exactly: {{"{schema_key}": {schema}}}
+Use null for missing values.{links_text}
+
+Section text:
+{section_text}"""
@@ -0,0 +1,179 @@
+# services/providers/client_registry.py
+
+import asyncio
+import hashlib
+import logging
+import threading
+from django.conf import settings
+from cachetools import TTLCache
+import httpx
+import openai
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_CLIENT_POOL_SETTINGS = {
+    'max_clients': 64,  # Distinct (provider, API key) clients kept; least recently used are dropped first
+    'ttl_seconds': 900,  # Age after which a client is rebuilt on next use
+    'max_connections': 20,  # Per OpenAI client
+    'max_keepalive_connections': 10,  # Idle connections kept open for reuse, per OpenAI client
+    'keepalive_expiry_seconds': 30.0,
+    'timeout_seconds': 60.0,
+}
+
+
+def get_client_pool_settings():
+    """Return AI_SETTINGS['client_pool'] merged over the defaults."""
+    return {**DEFAULT_CLIENT_POOL_SETTINGS, **getattr(settings, 'AI_SETTINGS', {}).get('client_pool', {})}
+
+
+def key_fingerprint(api_key):
+    """Stable, non-reversible identifier for an API key; raw keys are never used as cache keys."""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:32]
+
+
+class _KeyedGenerativeModel(genai.GenerativeModel):
+    """
+    GenerativeModel bound to one API key's client manager instead of the process-wide
+    genai.configure() state, so concurrent users with different keys never see each other's key.
+    """
+
+    def __init__(self, model_name, client_manager, **kwargs):
+        self._client_manager = client_manager
+        self._keyed_async_client = None
+        super().__init__(model_name, **kwargs)
+        self._client = client_manager.get_default_client('generative')
+
+    @property
+    def _async_client(self):
+        # gRPC asyncio channels belong to the event loop that created them, so these stay per model
+        if self._keyed_async_client is None:
+            self._keyed_async_client = self._client_manager.make_client('generative_async')
+        return self._keyed_async_client
+
+    @_async_client.setter
+    def _async_client(self, value):
+        self._keyed_async_client = value
+
+
+class ClientRegistry:
+    """
+    Process-wide pool of live provider clients keyed by provider and API key fingerprint.
+
+    An OpenAI client owns an httpx connection pool with keep-alive, so reusing it skips the
+    TCP/TLS setup on every request after the first. For Gemini, each key gets its own client
+    manager (and gRPC channel); models built from it are cheap and safe to create per call.
+    Both client types are thread-safe. Async OpenAI clients are pooled per event loop in a
+    separate pool, since an httpx async pool can only be used from the loop that opened it.
+    Under an ASGI server the loop lives as long as the worker, so its connections are reused
+    across requests; under WSGI each async view gets a short-lived loop, whose clients are
+    dropped once it has closed and can't evict the sync clients. Evicted clients are not
+    closed explicitly because a caller may still be using one; they release their
+    connections when garbage-collected.
+    """
+
+    def __init__(self, pool_settings=None):
+        self.pool_settings = pool_settings or get_client_pool_settings()
+        self._clients = TTLCache(maxsize=self.pool_settings['max_clients'], ttl=self.pool_settings['ttl_seconds'])
+        self._async_clients = {}  # Event loop -> its own TTLCache of AsyncOpenAI clients
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_or_create(self, provider, api_key, factory):
+        cache_key = (provider, key_fingerprint(api_key))
+        with self._lock:
+            client = self._clients.get(cache_key)
+            if client is not None:
+                self.hits += 1
+                return client
+            self.misses += 1
+            # Built under the lock so concurrent first requests for one key share a single client
+            client = factory()
+            self._clients[cache_key] = client
+            logger.info(f"Created pooled {provider} client ({len(self._clients)} pooled)")
+            return client
+
+    def _http_limits(self):
+        return httpx.Limits(
+            max_connections=self.pool_settings['max_connections'],
+            max_keepalive_connections=self.pool_settings['max_keepalive_connections'],
+            keepalive_expiry=self.pool_settings['keepalive_expiry_seconds'],
+        )
+
+    def openai_client(self, api_key):
+        def factory():
+            http_client = openai.DefaultHttpxClient(
+                limits=self._http_limits(),
+                timeout=self.pool_settings['timeout_seconds'],
+            )
+            return openai.OpenAI(api_key=api_key, http_client=http_client)
+
+        return self._get_or_create('openai', api_key, factory)
+
+    def async_openai_client(self, api_key):
+        """AsyncOpenAI client for the running event loop; must be called from a coroutine."""
+        loop = asyncio.get_running_loop()
+        cache_key = key_fingerprint(api_key)
+        with self._lock:
+            # Closed loops (e.g. the per-request loops of async views under WSGI) release their clients
+            for closed_loop in [pooled_loop for pooled_loop in self._async_clients if pooled_loop.is_closed()]:
+                del self._async_clients[closed_loop]
+            clients = self._async_clients.get(loop)
+            if clients is None:
+                clients = self._async_clients[loop] = TTLCache(maxsize=self.pool_settings['max_clients'],
+                                                               ttl=self.pool_settings['ttl_seconds'])
+            client = clients.get(cache_key)
+            if client is not None:
+                self.hits += 1
+                return client
+            self.misses += 1
+            http_client = openai.DefaultAsyncHttpxClient(
+                limits=self._http_limits(),
+                timeout=self.pool_settings['timeout_seconds'],
+            )
+            client = clients[cache_key] = openai.AsyncOpenAI(api_key=api_key, http_client=http_client)
+            logger.info(f"Created pooled async openai client ({len(self._async_clients)} event loop(s) pooled)")
+            return client
+
+    def gemini_model(self, api_key, model_name):
+        def factory():
+            client_manager = genai_client._ClientManager()
+            client_manager.configure(api_key=api_key)
+            return client_manager
+
+        return _KeyedGenerativeModel(model_name, self._get_or_create('gemini', api_key, factory))
+
+    def stats(self):
+        with self._lock:
+            return {'clients': len(self._clients), 'hits': self.hits, 'misses': self.misses,
+                    'async_clients': sum(len(clients) for clients in self._async_clients.values())}
+
+    def clear(self):
+        """Drop every pooled client, closing OpenAI connection pools (for tests and key rotation)."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._async_clients.clear()  # Async clients can only be closed on their own event loop
+        for client in clients:
+            close = getattr(client, 'close', None)
+            if close:
+                try:
+                    close()
+                except Exception as e:
+                    logger.error(f"Error closing pooled client: {str(e)}")
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_client_registry():
+    """The shared registry, rebuilt if the pool settings change (e.g. under override_settings)."""
+    global _registry
+    with _registry_lock:
+        if _registry is None or _registry.pool_settings != get_client_pool_settings():
+            _registry = ClientRegistry(get_client_pool_settings())
+        return _registry
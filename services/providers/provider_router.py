@@ -0,0 +1,418 @@
+# services/providers/provider_router.py
+
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from django.conf import settings
+
+from services.response_cache import last_call_was_cached
+from services.rate_limiter import RateLimitExceeded
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROVIDER_ROUTER_SETTINGS = {
+    'hedging_enabled': True,
+    'latency_window': 200,  # Recent successful call latencies kept per provider
+    'hedge_min_samples': 20,  # Below this, hedge after hedge_default_delay_seconds instead of the p95
+    'hedge_default_delay_seconds': 8.0,
+    'hedge_min_delay_seconds': 1.0,
+    'hedge_max_delay_seconds': 15.0,
+    'breaker_failure_threshold': 5,  # Consecutive failures that open a provider's circuit
+    'breaker_reset_seconds': 30.0,  # How long an open circuit rejects calls before one trial call
+    'max_hedge_threads': 16,  # Thread pool for sync calls
+}
+
+
+def get_provider_router_settings():
+    """Return AI_SETTINGS['provider_router'] merged over the defaults."""
+    return {**DEFAULT_PROVIDER_ROUTER_SETTINGS, **getattr(settings, 'AI_SETTINGS', {}).get('provider_router', {})}
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker: closed until failure_threshold consecutive failures, then open
+    (calls rejected) for reset_seconds, then half-open: one trial call closes it on success or
+    reopens it on failure.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_seconds=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def release_trial(self):
+        """An abandoned trial call (e.g. a cancelled hedge) neither closes nor reopens the circuit."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """Sliding window of successful call latencies for one provider."""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, fraction):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+@dataclass
+class RoutedCall:
+    """
+    Outcome of a routed call. provider is the one whose answer was used (None when every
+    provider's circuit was open); result/input_tokens/output_tokens are its return value.
+    error is the exception of a failed call, e.g. RateLimitExceeded when every provider was
+    over its rate limit.
+    """
+    provider: str = None
+    result: object = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    succeeded: bool = False
+    cached: bool = False
+    hedged: bool = False
+    failed_over: bool = False
+    error: Exception = None
+
+    @property
+    def reached_provider(self):
+        # False when every circuit was open or every call was rejected by the rate limiter;
+        # a rejection is only reported when no other attempt reached a provider
+        return self.provider is not None and not isinstance(self.error, RateLimitExceeded)
+
+
+@dataclass
+class _Attempt:
+    provider: str
+    result: object = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached: bool = False
+    error: Exception = None
+    latency: float = 0.0
+
+    @property
+    def succeeded(self):
+        # The AI service functions return a fallback with 0 tokens instead of raising
+        return self.error is None and (self.cached or bool(self.input_tokens or self.output_tokens))
+
+    @property
+    def rate_limited(self):
+        # Rejected by services/rate_limiter.py before reaching the provider
+        return isinstance(self.error, RateLimitExceeded)
+
+
+class ProviderRouter:
+    """
+    Routes one AI operation across providers so a slow or failing provider can't hold a request
+    for the full client timeout.
+
+    The preferred provider is called first. If it hasn't answered after its observed p95
+    latency, the same request is hedged to the alternate provider and the first successful
+    answer wins; if it fails, the alternate is tried right away. Each provider has a circuit
+    breaker, so during an outage calls skip it without waiting. Async losers are cancelled; a
+    losing sync call can't be and finishes in the background (its result still fills the
+    response cache and its breaker, but its tokens aren't logged).
+
+    providers maps provider name -> zero-argument callable returning
+    (result, input_tokens, output_tokens); for acall() the callable returns an awaitable.
+    """
+
+    def __init__(self, router_settings=None):
+        self.router_settings = router_settings or get_provider_router_settings()
+        self._breakers = {}
+        self._latencies = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def breaker(self, provider):
+        with self._lock:
+            if provider not in self._breakers:
+                self._breakers[provider] = CircuitBreaker(self.router_settings['breaker_failure_threshold'],
+                                                          self.router_settings['breaker_reset_seconds'])
+            return self._breakers[provider]
+
+    def latency(self, provider):
+        with self._lock:
+            if provider not in self._latencies:
+                self._latencies[provider] = LatencyTracker(self.router_settings['latency_window'])
+            return self._latencies[provider]
+
+    def hedge_delay(self, provider):
+        """Seconds to wait for provider before hedging: its p95, clamped to the configured bounds."""
+        tracker = self.latency(provider)
+        if len(tracker) < self.router_settings['hedge_min_samples']:
+            return self.router_settings['hedge_default_delay_seconds']
+        return min(max(tracker.percentile(0.95), self.router_settings['hedge_min_delay_seconds']),
+                   self.router_settings['hedge_max_delay_seconds'])
+
+    def _next_provider(self, pending):
+        """Pop and return the next pending provider whose circuit lets a call through, or None."""
+        while pending:
+            name = pending.pop(0)
+            if self.breaker(name).allow_request():
+                return name
+            logger.warning(f"Circuit open for {name}; skipping it")
+        return None
+
+    def _record(self, attempt):
+        breaker = self.breaker(attempt.provider)
+        if attempt.rate_limited:
+            # Our own limit, not a provider failure: leave the circuit as it was
+            breaker.release_trial()
+            logger.warning(f"{attempt.provider} call not made: {str(attempt.error)}")
+        elif attempt.succeeded:
+            breaker.record_success()
+            if not attempt.cached:
+                self.latency(attempt.provider).add(attempt.latency)
+        else:
+            breaker.record_failure()
+            if attempt.error is not None:
+                logger.error(f"{attempt.provider} call failed: {str(attempt.error)}")
+
+    def _count(self, operation, routed):
+        with self._lock:
+            counters = self._counters.setdefault(
+                operation, {'calls': 0, 'hedged': 0, 'failed_over': 0, 'failed': 0, 'wins': {}}
+            )
+            counters['calls'] += 1
+            counters['hedged'] += routed.hedged
+            counters['failed_over'] += routed.failed_over
+            if routed.succeeded:
+                counters['wins'][routed.provider] = counters['wins'].get(routed.provider, 0) + 1
+            else:
+                counters['failed'] += 1
+        logger.info(f"Routed {operation}: provider={routed.provider} succeeded={routed.succeeded} "
+                    f"hedged={routed.hedged} failed_over={routed.failed_over}")
+
+    def _finish(self, operation, attempt, hedged, failed_over):
+        routed = RoutedCall(
+            provider=attempt.provider if attempt else None,
+            result=attempt.result if attempt else None,
+            input_tokens=attempt.input_tokens if attempt else 0,
+            output_tokens=attempt.output_tokens if attempt else 0,
+            succeeded=bool(attempt and attempt.succeeded),
+            cached=bool(attempt and attempt.cached),
+            hedged=hedged,
+            failed_over=failed_over,
+            error=attempt.error if attempt else None,
+        )
+        self._count(operation, routed)
+        return routed
+
+    @staticmethod
+    def _run(provider, func):
+        started = time.monotonic()
+        try:
+            result, input_tokens, output_tokens = func()
+            return _Attempt(provider, result, input_tokens, output_tokens, last_call_was_cached(),
+                            latency=time.monotonic() - started)
+        except Exception as e:
+            return _Attempt(provider, error=e, latency=time.monotonic() - started)
+
+    @staticmethod
+    async def _arun(provider, func):
+        started = time.monotonic()
+        try:
+            result, input_tokens, output_tokens = await func()
+            return _Attempt(provider, result, input_tokens, output_tokens, last_call_was_cached(),
+                            latency=time.monotonic() - started)
+        except Exception as e:
+            return _Attempt(provider, error=e, latency=time.monotonic() - started)
+
+    @staticmethod
+    def _reported_failure(reported, attempt):
+        """The failed attempt to report: the first one that reached a provider, if any did."""
+        if reported is None or (reported.rate_limited and not attempt.rate_limited):
+            return attempt
+        return reported
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.router_settings['max_hedge_threads'],
+                                                    thread_name_prefix='ai-hedge')
+            return self._executor
+
+    def call(self, operation, primary, providers):
+        """Route a sync call; returns a RoutedCall."""
+        pending = [primary] + [name for name in providers if name != primary]
+        first = self._next_provider(pending)
+        if first is None:
+            return self._finish(operation, None, False, False)
+
+        executor = self._get_executor()
+        running = {}
+
+        def launch(provider):
+            # Each call runs in a copy of this context so last_call_was_cached() reads its own flag
+            future = executor.submit(contextvars.copy_context().run, self._run, provider, providers[provider])
+            running[future] = provider
+
+        launch(first)
+        hedge_at = time.monotonic() + self.hedge_delay(first)
+        hedged = failed_over = False
+        last_attempt = None
+        while running:
+            can_hedge = pending and not hedged and self.router_settings['hedging_enabled']
+            timeout = max(0.0, hedge_at - time.monotonic()) if can_hedge else None
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                alternate = self._next_provider(pending)  # Empties pending if every circuit is open
+                hedged = alternate is not None
+                if alternate:
+                    logger.info(f"{first} slower than {self.hedge_delay(first):.1f}s for {operation}; "
+                                f"hedging to {alternate}")
+                    launch(alternate)
+                continue
+            for future in done:
+                running.pop(future)
+                attempt = future.result()
+                self._record(attempt)
+                if attempt.succeeded:
+                    for loser in running:
+                        # Still feeds the breaker and latency window once it finishes
+                        loser.add_done_callback(lambda finished: self._record(finished.result()))
+                    return self._finish(operation, attempt, hedged, failed_over)
+                last_attempt = self._reported_failure(last_attempt, attempt)
+            if not running:
+                alternate = self._next_provider(pending)
+                if alternate:
+                    failed_over = True
+                    launch(alternate)
+        return self._finish(operation, last_attempt, hedged, failed_over)
+
+    async def acall(self, operation, primary, providers):
+        """Route an async call; losing attempts are cancelled. Returns a RoutedCall."""
+        pending = [primary] + [name for name in providers if name != primary]
+        first = self._next_provider(pending)
+        if first is None:
+            return self._finish(operation, None, False, False)
+
+        running = {}
+
+        def launch(provider):
+            # Tasks copy the current context, so each attempt has its own last_call_was_cached() flag
+            running[asyncio.ensure_future(self._arun(provider, providers[provider]))] = provider
+
+        launch(first)
+        hedge_at = time.monotonic() + self.hedge_delay(first)
+        hedged = failed_over = False
+        last_attempt = None
+        try:
+            while running:
+                can_hedge = pending and not hedged and self.router_settings['hedging_enabled']
+                timeout = max(0.0, hedge_at - time.monotonic()) if can_hedge else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    alternate = self._next_provider(pending)  # Empties pending if every circuit is open
+                    hedged = alternate is not None
+                    if alternate:
+                        logger.info(f"{first} slower than {self.hedge_delay(first):.1f}s for {operation}; "
+                                    f"hedging to {alternate}")
+                        launch(alternate)
+                    continue
+                for task in done:
+                    running.pop(task)
+                    attempt = task.result()
+                    self._record(attempt)
+                    if attempt.succeeded:
+                        return self._finish(operation, attempt, hedged, failed_over)
+                    last_attempt = self._reported_failure(last_attempt, attempt)
+                if not running:
+                    alternate = self._next_provider(pending)
+                    if alternate:
+                        failed_over = True
+                        launch(alternate)
+            return self._finish(operation, last_attempt, hedged, failed_over)
+        finally:
+            for task in running:
+                task.cancel()
+            self._release(running.values())
+
+    def _release(self, providers):
+        for provider in providers:
+            self.breaker(provider).release_trial()
+
+    def stats(self):
+        """Per-operation wins/hedges/failovers and per-provider circuit state and p95 latency."""
+        with self._lock:
+            operations = {operation: {**counters, 'wins': dict(counters['wins'])}
+                          for operation, counters in self._counters.items()}
+            names = set(self._breakers) | set(self._latencies)
+        providers = {}
+        for name in sorted(names):
+            breaker = self.breaker(name)
+            p95 = self.latency(name).percentile(0.95)
+            providers[name] = {'circuit': breaker.state, 'trips': breaker.trips,
+                               'p95_seconds': round(p95, 3) if p95 is not None else None}
+        return {'operations': operations, 'providers': providers}
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_provider_router():
+    """The shared router, rebuilt if its settings change (e.g. under override_settings)."""
+    global _router
+    with _router_lock:
+        if _router is None or _router.router_settings != get_provider_router_settings():
+            _router = ProviderRouter(get_provider_router_settings())
+        return _router
@@ -0,0 +1,382 @@
+# services/providers/replay_provider.py
+
+import os
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import tempfile
+import threading
+import dataclasses
+from types import SimpleNamespace
+from django.conf import settings
+import openai
+from services.providers.client_registry import get_client_registry
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+MODE_LIVE = 'live'
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+
+DEFAULT_REPLAY_SETTINGS = {
+    'mode': MODE_LIVE,  # "live", "record" (call providers and save responses) or "replay" (serve saved ones)
+    'directory': os.path.join(getattr(settings, 'BASE_DIR', '.'), 'replay_recordings'),
+    'latency_scale': 1.0,  # Multiplier on recorded latency when replaying
+    'latency_seconds': None,  # Fixed synthetic latency instead of the recorded one
+    'latency_jitter_seconds': 0.0,  # Uniform +/- jitter added to the latency
+    'error_rate': 0.0,  # Share of replayed calls that raise ReplayInjectedError
+    'miss_policy': 'synthetic',  # Unrecorded requests: "synthetic" answer or "error"
+    'seed': None,  # Seed for latency jitter and error injection, for repeatable runs
+}
+
+
+class ReplayMissError(Exception):
+    """No recording exists for a request and miss_policy is "error"."""
+
+
+class ReplayInjectedError(Exception):
+    """Synthetic provider failure injected at the configured error_rate."""
+
+
+def get_replay_settings():
+    """Return AI_SETTINGS['replay'] merged over the defaults."""
+    return {**DEFAULT_REPLAY_SETTINGS, **getattr(settings, 'AI_SETTINGS', {}).get('replay', {})}
+
+
+def provider_mode():
+    """Current provider mode. DEFAULT_AI_SERVICE = 'replay' is shorthand for replay mode."""
+    if getattr(settings, 'DEFAULT_AI_SERVICE', None) == MODE_REPLAY:
+        return MODE_REPLAY
+    return get_replay_settings()['mode']
+
+
+def _jsonable(value):
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return str(value)
+
+
+def request_key(provider, request):
+    """Stable hash of a provider request (model, messages/prompt and sampling parameters)."""
+    canonical = json.dumps({'provider': provider, 'request': _jsonable(request)}, sort_keys=True)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class RecordingStore:
+    """One JSON file per recorded request under directory, written atomically."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def load(self, key):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as recording_file:
+                return json.load(recording_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"Unreadable replay recording {key[:12]}: {str(e)}")
+            return None
+
+    def save(self, key, recording):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as temp_file:
+                json.dump(recording, temp_file, indent=2)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.error(f"Could not save replay recording {key[:12]}: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+class ReplayTiming:
+    """Latency and error injection shared by all replay clients."""
+
+    def __init__(self, replay_settings):
+        self.settings = replay_settings
+        self._random = random.Random(replay_settings['seed'])
+        self._lock = threading.Lock()
+
+    def plan(self, recorded_latency):
+        """Return (delay_seconds, should_fail) for one replayed call."""
+        with self._lock:
+            base = self.settings['latency_seconds']
+            if base is None:
+                base = (recorded_latency or 0.0) * self.settings['latency_scale']
+            jitter = self.settings['latency_jitter_seconds']
+            delay = max(0.0, base + (self._random.uniform(-jitter, jitter) if jitter else 0.0))
+            should_fail = self._random.random() < self.settings['error_rate']
+        return delay, should_fail
+
+
+def _openai_response(recording):
+    response = recording['response']
+    return SimpleNamespace(
+        model=response.get('model'),
+        choices=[SimpleNamespace(message=SimpleNamespace(content=response['content']),
+                                 finish_reason=response.get('finish_reason', 'stop'))],
+        usage=SimpleNamespace(prompt_tokens=response.get('prompt_tokens', 0),
+                              completion_tokens=response.get('completion_tokens', 0)),
+    )
+
+
+def _gemini_response(recording):
+    response = recording['response']
+    return SimpleNamespace(
+        text=response['content'],
+        usage_metadata=SimpleNamespace(prompt_token_count=response.get('prompt_tokens', 0),
+                                       candidates_token_count=response.get('completion_tokens', 0)),
+    )
+
+
+def _synthetic_content(request):
+    """Answer for an unrecorded request: empty JSON in JSON mode, placeholder text otherwise."""
+    response_format = request.get('response_format') or {}
+    generation_config = _jsonable(request.get('generation_config')) or {}
+    if response_format.get('type') == 'json_object' or (
+            isinstance(generation_config, dict) and generation_config.get('response_mime_type') == 'application/json'):
+        return "{}"
+    return "Replay provider: no recording for this request."
+
+
+def _openai_request(kwargs):
+    return {key: kwargs.get(key) for key in ('model', 'messages', 'temperature', 'max_tokens', 'response_format')}
+
+
+def _gemini_request(model_name, contents, kwargs):
+    return {'model': model_name, 'contents': contents, 'generation_config': kwargs.get('generation_config')}
+
+
+class _ReplaySource:
+    """Looks up recordings and applies timing; shared by the sync and async replay clients."""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.settings = get_replay_settings()
+        self.store = RecordingStore(self.settings['directory'])
+        self.timing = _shared_timing()
+
+    def lookup(self, request):
+        key = request_key(self.provider, request)
+        recording = self.store.load(key)
+        if recording is None:
+            if self.settings['miss_policy'] == 'error':
+                raise ReplayMissError(f"No {self.provider} recording for request {key[:12]}")
+            logger.info(f"Replay miss for {self.provider} request {key[:12]}, answering synthetically")
+            recording = {'latency_seconds': 0.0, 'response': {'content': _synthetic_content(request)}}
+        delay, should_fail = self.timing.plan(recording.get('latency_seconds'))
+        return recording, delay, should_fail
+
+
+class ReplayOpenAIClient:
+    """Drop-in for openai.OpenAI serving recorded chat completions."""
+
+    def __init__(self):
+        self._source = _ReplaySource('openai')
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        recording, delay, should_fail = self._source.lookup(_openai_request(kwargs))
+        time.sleep(delay)
+        if should_fail:
+            raise ReplayInjectedError("Injected OpenAI failure")
+        return _openai_response(recording)
+
+    def close(self):
+        pass
+
+
+class ReplayAsyncOpenAIClient:
+    """Drop-in for openai.AsyncOpenAI serving recorded chat completions."""
+
+    def __init__(self):
+        self._source = _ReplaySource('openai')
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        recording, delay, should_fail = self._source.lookup(_openai_request(kwargs))
+        await asyncio.sleep(delay)
+        if should_fail:
+            raise ReplayInjectedError("Injected OpenAI failure")
+        return _openai_response(recording)
+
+    async def close(self):
+        pass
+
+
+class ReplayGeminiModel:
+    """Drop-in for genai.GenerativeModel serving recorded generate_content responses."""
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self._source = _ReplaySource('gemini')
+
+    def generate_content(self, contents, **kwargs):
+        recording, delay, should_fail = self._source.lookup(_gemini_request(self.model_name, contents, kwargs))
+        time.sleep(delay)
+        if should_fail:
+            raise ReplayInjectedError("Injected Gemini failure")
+        return _gemini_response(recording)
+
+    async def generate_content_async(self, contents, **kwargs):
+        recording, delay, should_fail = self._source.lookup(_gemini_request(self.model_name, contents, kwargs))
+        await asyncio.sleep(delay)
+        if should_fail:
+            raise ReplayInjectedError("Injected Gemini failure")
+        return _gemini_response(recording)
+
+
+class _RecordingCompletions:
+    def __init__(self, completions, store, is_async):
+        self._completions = completions
+        self._store = store
+        self._is_async = is_async
+
+    def create(self, **kwargs):
+        if self._is_async:
+            return self._create_async(**kwargs)
+        started = time.perf_counter()
+        response = self._completions.create(**kwargs)
+        self._save(kwargs, response, time.perf_counter() - started)
+        return response
+
+    async def _create_async(self, **kwargs):
+        started = time.perf_counter()
+        response = await self._completions.create(**kwargs)
+        self._save(kwargs, response, time.perf_counter() - started)
+        return response
+
+    def _save(self, kwargs, response, latency):
+        request = _openai_request(kwargs)
+        usage = getattr(response, 'usage', None)
+        self._store.save(request_key('openai', request), {
+            'provider': 'openai',
+            'request': _jsonable(request),
+            'latency_seconds': latency,
+            'response': {
+                'model': getattr(response, 'model', None),
+                'content': response.choices[0].message.content,
+                'finish_reason': getattr(response.choices[0], 'finish_reason', 'stop'),
+                'prompt_tokens': getattr(usage, 'prompt_tokens', 0),
+                'completion_tokens': getattr(usage, 'completion_tokens', 0),
+            },
+        })
+
+
+class RecordingOpenAIClient:
+    """Wraps a live (sync or async) OpenAI client and saves every chat completion it makes."""
+
+    def __init__(self, client, is_async=False):
+        self._client = client
+        store = RecordingStore(get_replay_settings()['directory'])
+        self.chat = SimpleNamespace(completions=_RecordingCompletions(client.chat.completions, store, is_async))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class RecordingGeminiModel:
+    """Wraps a live GenerativeModel and saves every generate_content response."""
+
+    def __init__(self, model, model_name):
+        self._model = model
+        self.model_name = model_name
+        self._store = RecordingStore(get_replay_settings()['directory'])
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+    def generate_content(self, contents, **kwargs):
+        started = time.perf_counter()
+        response = self._model.generate_content(contents, **kwargs)
+        self._save(contents, kwargs, response, time.perf_counter() - started)
+        return response
+
+    async def generate_content_async(self, contents, **kwargs):
+        started = time.perf_counter()
+        response = await self._model.generate_content_async(contents, **kwargs)
+        self._save(contents, kwargs, response, time.perf_counter() - started)
+        return response
+
+    def _save(self, contents, kwargs, response, latency):
+        request = _gemini_request(self.model_name, contents, kwargs)
+        usage = getattr(response, 'usage_metadata', None)
+        self._store.save(request_key('gemini', request), {
+            'provider': 'gemini',
+            'request': _jsonable(request),
+            'latency_seconds': latency,
+            'response': {
+                'content': response.text,
+                'prompt_tokens': getattr(usage, 'prompt_token_count', 0),
+                'completion_tokens': getattr(usage, 'candidates_token_count', 0),
+            },
+        })
+
+
+_timing = None
+_timing_lock = threading.Lock()
+
+
+def _shared_timing():
+    # One random stream per process, so a seeded run injects the same errors in the same order
+    global _timing
+    with _timing_lock:
+        if _timing is None or _timing.settings != get_replay_settings():
+            _timing = ReplayTiming(get_replay_settings())
+        return _timing
+
+
+def build_openai_client(api_key, async_client=False, shared=False):
+    """
+    Return the OpenAI client for the current provider mode: a replay client (no key needed),
+    a recording wrapper around a live client, or a plain live client. None without a key.
+    Live sync clients come from the shared client registry and are reused across calls. Async
+    clients are created per call (the caller closes them) unless shared=True, which returns the
+    registry's client for the running event loop; callers must not close a shared client.
+    """
+    mode = provider_mode()
+    if mode == MODE_REPLAY:
+        return ReplayAsyncOpenAIClient() if async_client else ReplayOpenAIClient()
+    if not api_key:
+        return None
+    if not async_client:
+        client = get_client_registry().openai_client(api_key)
+    elif shared:
+        client = get_client_registry().async_openai_client(api_key)
+    else:
+        client = openai.AsyncOpenAI(api_key=api_key)
+    if mode == MODE_RECORD:
+        return RecordingOpenAIClient(client, is_async=async_client)
+    return client
+
+
+def build_gemini_model(api_key, model_name):
+    """
+    Return the Gemini model for the current provider mode (see build_openai_client). Live models
+    use the registry's per-key client rather than the process-global genai.configure().
+    """
+    mode = provider_mode()
+    if mode == MODE_REPLAY:
+        return ReplayGeminiModel(model_name)
+    if not api_key:
+        return None
+    model = get_client_registry().gemini_model(api_key, model_name)
+    if mode == MODE_RECORD:
+        return RecordingGeminiModel(model, model_name)
+    return model
@@ -0,0 +1,286 @@
+# services/rate_limiter.py
+
+import math
+import time
+import asyncio
+import logging
+import threading
+from functools import wraps
+from django.conf import settings
+from cachetools import TTLCache
+
+from services.providers.client_registry import key_fingerprint
+from services.response_cache import last_call_was_cached
+from services.deadlines import current_deadline
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_LIMIT_SETTINGS = {
+    'enabled': True,
+    'max_wait_seconds': 10.0,  # Longest a request queues for tokens before it is rejected
+    # Per-user buckets by CustomUser.subscription_type; unknown types use default_tier
+    'tiers': {
+        'free': {'rate_per_minute': 10, 'burst': 5},
+        'premium': {'rate_per_minute': 60, 'burst': 20},
+    },
+    'default_tier': 'free',
+    # One bucket per API key, so the shared settings key can't be exhausted by a few users
+    'api_key': {'rate_per_minute': 120, 'burst': 30},
+    # One bucket per provider across all keys
+    'providers': {
+        'chatgpt': {'rate_per_minute': 500, 'burst': 50},
+        'gemini': {'rate_per_minute': 300, 'burst': 30},
+    },
+    'idle_bucket_ttl_seconds': 3600,
+    'max_buckets': 10000,
+}
+
+
+def get_rate_limit_settings():
+    """Return AI_SETTINGS['rate_limits'] merged over the defaults."""
+    return {**DEFAULT_RATE_LIMIT_SETTINGS, **getattr(settings, 'AI_SETTINGS', {}).get('rate_limits', {})}
+
+
+class RateLimitExceeded(Exception):
+    """The request would have to queue longer than max_wait_seconds."""
+
+    def __init__(self, scope, retry_after):
+        self.scope = scope
+        self.retry_after = retry_after
+        super().__init__(f"Rate limit reached for {scope}; retry in {retry_after:.1f}s")
+
+
+class TokenBucket:
+    """
+    Token bucket that queues by reservation: a caller that finds it empty takes a token anyway
+    (the balance goes negative) and is told how long to wait for it, so waiters are served in
+    arrival order without any wake-up machinery. Not locked; RateLimiter serializes access.
+    """
+
+    def __init__(self, rate_per_minute, burst):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        # now may predate a bucket created after it was read; never refill by a negative amount
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, cost, now):
+        """Seconds until cost tokens would be available, after refilling to now."""
+        self._refill(now)
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate if self.rate else float('inf')
+
+    def take(self, cost):
+        self.tokens -= cost
+
+    def refund(self, cost):
+        self.tokens = min(self.capacity, self.tokens + cost)
+
+    def state(self, now):
+        self._refill(now)
+        return {
+            'tokens': round(self.tokens, 2),
+            'capacity': self.capacity,
+            'rate_per_minute': round(self.rate * 60, 2),
+            'queued': math.ceil(-self.tokens) if self.tokens < 0 else 0,  # Reservations waiting for a refill
+        }
+
+
+class RateLimiter:
+    """
+    Per-user, per-API-key and per-provider token buckets, checked before provider calls.
+
+    Reservation happens in two phases. A request first takes a token from the user's own bucket
+    (acquire_user, once per request); then every provider call it makes, including hedged and
+    failover calls, takes a token from that call's key and provider buckets (acquire_shared, or
+    the limit_call/alimit_call wrappers). A user's backlog therefore queues in their own bucket
+    and reaches the shared buckets only at that user's rate, so one busy user can't push
+    everyone else's requests back. Bursts within max_wait_seconds wait; longer waits raise
+    RateLimitExceeded with the time to retry.
+    """
+
+    def __init__(self, limit_settings=None):
+        self.limit_settings = limit_settings or get_rate_limit_settings()
+        self._buckets = TTLCache(maxsize=self.limit_settings['max_buckets'],
+                                 ttl=self.limit_settings['idle_bucket_ttl_seconds'])
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def tier_limits(self, subscription_type):
+        tiers = self.limit_settings['tiers']
+        return tiers.get(subscription_type) or tiers[self.limit_settings['default_tier']]
+
+    def _bucket(self, name, limits):
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            bucket = self._buckets[name] = TokenBucket(limits['rate_per_minute'], limits['burst'])
+        return bucket
+
+    def _user_scopes(self, user):
+        """[(bucket name, limits)] for the user's own bucket."""
+        return [(f"user:{user.pk}", self.tier_limits(getattr(user, 'subscription_type', None)))]
+
+    def _shared_scopes(self, provider, api_key):
+        """[(bucket name, limits)] for the key and provider buckets a provider call uses."""
+        scopes = []
+        if api_key:
+            scopes.append((f"key:{provider}:{key_fingerprint(api_key)}", self.limit_settings['api_key']))
+        if provider in self.limit_settings['providers']:
+            scopes.append((f"provider:{provider}", self.limit_settings['providers'][provider]))
+        return scopes
+
+    def _reserve(self, scopes, cost, max_wait):
+        """Take cost tokens from every bucket in scopes if the wait fits in max_wait; returns the wait."""
+        with self._lock:
+            now = time.monotonic()
+            buckets = [(name, self._bucket(name, limits)) for name, limits in scopes]
+            waits = [(bucket.wait_time(cost, now), name) for name, bucket in buckets]
+            wait, scope = max(waits) if waits else (0.0, None)
+            if wait > max_wait:
+                self.rejected += 1
+                raise RateLimitExceeded(scope, wait)
+            for _, bucket in buckets:
+                bucket.take(cost)
+            return wait
+
+    def _refund(self, scopes, cost):
+        with self._lock:
+            for name, limits in scopes:
+                self._bucket(name, limits).refund(cost)
+
+    def _shared_max_wait(self, max_wait):
+        # A provider call can't queue past the request's deadline (services/deadlines.py)
+        max_wait = self.limit_settings['max_wait_seconds'] if max_wait is None else max_wait
+        deadline = current_deadline()
+        return min(max_wait, deadline.remaining()) if deadline else max_wait
+
+    def acquire_user(self, user, cost=1):
+        """Wait for cost tokens in the user's bucket; returns the seconds waited."""
+        waited = self._reserve(self._user_scopes(user), cost, self.limit_settings['max_wait_seconds'])
+        time.sleep(waited)
+        return waited
+
+    async def aacquire_user(self, user, cost=1):
+        """Async version of acquire_user(); waiting doesn't block the event loop."""
+        waited = self._reserve(self._user_scopes(user), cost, self.limit_settings['max_wait_seconds'])
+        await asyncio.sleep(waited)
+        return waited
+
+    def refund_user(self, user, cost=1):
+        """Give back a user token whose request never reached a provider."""
+        self._refund(self._user_scopes(user), cost)
+
+    def acquire_shared(self, provider, api_key=None, cost=1, max_wait=None):
+        """Wait for cost tokens in the key and provider buckets of one provider call."""
+        waited = self._reserve(self._shared_scopes(provider, api_key), cost, self._shared_max_wait(max_wait))
+        time.sleep(waited)
+        return waited
+
+    async def aacquire_shared(self, provider, api_key=None, cost=1, max_wait=None):
+        """Async version of acquire_shared()."""
+        waited = self._reserve(self._shared_scopes(provider, api_key), cost, self._shared_max_wait(max_wait))
+        await asyncio.sleep(waited)
+        return waited
+
+    def acquire(self, user, provider, api_key=None, cost=1):
+        """Both phases for a single call; returns the seconds waited. Raises RateLimitExceeded."""
+        waited = self.acquire_user(user, cost)
+        try:
+            return waited + self.acquire_shared(provider, api_key, cost,
+                                                self.limit_settings['max_wait_seconds'] - waited)
+        except RateLimitExceeded:
+            self.refund_user(user, cost)
+            raise
+
+    async def aacquire(self, user, provider, api_key=None, cost=1):
+        """Async version of acquire()."""
+        waited = await self.aacquire_user(user, cost)
+        try:
+            return waited + await self.aacquire_shared(provider, api_key, cost,
+                                                       self.limit_settings['max_wait_seconds'] - waited)
+        except RateLimitExceeded:
+            self.refund_user(user, cost)
+            raise
+
+    def limit_call(self, provider, api_key, func, cost=1):
+        """
+        Wrap a provider callable (as handed to the provider router) so every call first takes its
+        key and provider tokens. Answers served from the response cache get their tokens back.
+        """
+        scopes = self._shared_scopes(provider, api_key)
+
+        @wraps(func)
+        def limited(*args, **kwargs):
+            self.acquire_shared(provider, api_key, cost)
+            result = func(*args, **kwargs)
+            if last_call_was_cached():
+                self._refund(scopes, cost)
+            return result
+        return limited
+
+    def alimit_call(self, provider, api_key, func, cost=1):
+        """Async version of limit_call() for coroutine functions."""
+        scopes = self._shared_scopes(provider, api_key)
+
+        @wraps(func)
+        async def limited(*args, **kwargs):
+            await self.aacquire_shared(provider, api_key, cost)
+            result = await func(*args, **kwargs)
+            if last_call_was_cached():
+                self._refund(scopes, cost)
+            return result
+        return limited
+
+    def status(self, user, keys):
+        """
+        Bucket state for a user: their own bucket, each of keys ({label: (provider, api_key)})
+        and the provider buckets. Raw keys are never included.
+        """
+        scopes = {'user': self._user_scopes(user)[0]}
+        for label, (provider, api_key) in keys.items():
+            if api_key:
+                scopes[f"key:{label}"] = (f"key:{provider}:{key_fingerprint(api_key)}", self.limit_settings['api_key'])
+        for provider, limits in self.limit_settings['providers'].items():
+            scopes[f"provider:{provider}"] = (f"provider:{provider}", limits)
+        with self._lock:
+            now = time.monotonic()
+            buckets = {label: self._bucket(name, limits).state(now) for label, (name, limits) in scopes.items()}
+            rejected = self.rejected
+        return {
+            'subscription_type': getattr(user, 'subscription_type', None),
+            'max_wait_seconds': self.limit_settings['max_wait_seconds'],
+            'buckets': buckets,
+            'rejected_total': rejected,
+        }
+
+
+def provider_api_key(provider, user_api_key=None):
+    """The key a provider call will use: the user's own, else the shared key from settings."""
+    if provider == 'chatgpt':
+        return user_api_key or getattr(settings, 'OPENAI_API_KEY', None)
+    if provider == 'gemini':
+        return user_api_key or getattr(settings, 'GOOGLE_GENAI_API_KEY', None)
+    return user_api_key
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """The shared limiter, or None when disabled. Rebuilt if its settings change."""
+    global _rate_limiter
+    limit_settings = get_rate_limit_settings()
+    if not limit_settings['enabled']:
+        return None
+    with _rate_limiter_lock:
+        if _rate_limiter is None or _rate_limiter.limit_settings != limit_settings:
+            _rate_limiter = RateLimiter(limit_settings)
+        return _rate_limiter
@@ -0,0 +1,227 @@
+# services/response_cache.py
+
+import copy
+import json
+import hashlib
+import inspect
+import logging
+import threading
+from contextvars import ContextVar
+from functools import wraps
+from django.conf import settings
+from cachetools import TTLCache
+from services.single_flight import get_single_flight
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESPONSE_CACHE_SETTINGS = {
+    'enabled': True,
+    'max_entries': 2048,
+    'ttl_seconds': 24 * 60 * 60,  # 1 day
+}
+
+
+# Whether the latest cache_ai_response call in this thread/task was answered without its own
+# provider call: from the cache, or by sharing an identical in-flight call's result
+_last_call_cached = ContextVar('last_ai_call_cached', default=False)
+
+
+def get_response_cache_settings():
+    """Return AI_SETTINGS['response_cache'] merged over the defaults."""
+    return {**DEFAULT_RESPONSE_CACHE_SETTINGS, **getattr(settings, 'AI_SETTINGS', {}).get('response_cache', {})}
+
+
+def normalize_text(value):
+    """Collapse whitespace so inputs differing only in spacing share a cache entry."""
+    return " ".join(str(value).split()) if value is not None else ''
+
+
+def text_digest(value):
+    """SHA-256 of normalized text, for long inputs such as job descriptions ('' when empty)."""
+    normalized = normalize_text(value)
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest() if normalized else ''
+
+
+class AIResponseCache:
+    """
+    In-process, bounded (LRU + TTL) cache of AI text responses, with hit/miss counters per operation.
+
+    Values are stored and returned as deep copies so callers can't mutate a cached entry.
+    """
+
+    def __init__(self, max_entries=2048, ttl_seconds=24 * 60 * 60):
+        self._entries = TTLCache(maxsize=max_entries, ttl=ttl_seconds)
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    @staticmethod
+    def build_key(operation, provider, model_name, temperature, inputs):
+        raw_key = json.dumps([operation, provider, model_name, temperature, inputs], sort_keys=True, default=str)
+        return hashlib.sha256(raw_key.encode('utf-8')).hexdigest()
+
+    def _count(self, operation, outcome):
+        counters = self._counters.setdefault(operation, {'hits': 0, 'misses': 0})
+        counters[outcome] += 1
+
+    def get(self, operation, key):
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            value = self._entries.get(key)
+            self._count(operation, 'misses' if value is None else 'hits')
+        return copy.deepcopy(value)
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = copy.deepcopy(value)
+
+    def stats(self):
+        """{'entries': n, 'operations': {operation: {'hits', 'misses', 'hit_rate'}}}"""
+        with self._lock:
+            operations = {
+                operation: {**counters, 'hit_rate': round(counters['hits'] / max(1, sum(counters.values())), 3)}
+                for operation, counters in self._counters.items()
+            }
+            return {'entries': len(self._entries), 'operations': operations}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters = {}
+
+
+_response_cache = None
+_response_cache_settings = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """The shared cache, or None when disabled. Rebuilt if the cache settings change."""
+    global _response_cache, _response_cache_settings
+    cache_settings = get_response_cache_settings()
+    if not cache_settings['enabled']:
+        return None
+    with _response_cache_lock:
+        if _response_cache is None or _response_cache_settings != cache_settings:
+            _response_cache = AIResponseCache(cache_settings['max_entries'], cache_settings['ttl_seconds'])
+            _response_cache_settings = cache_settings
+        return _response_cache
+
+
+def cache_ai_response(operation, provider, model_name, temperature=None, digest_args=(), exclude_args=(),
+                      cacheable=None):
+    """
+    Cache and coalesce a provider call that returns (result, input_tokens, output_tokens).
+
+    The key combines the operation, provider, model and temperature with the call's arguments:
+    strings are whitespace-normalized, digest_args (long texts) are reduced to a SHA-256 digest
+    and exclude_args (e.g. API keys) are left out, so different users sending the same input
+    share an entry. Only answers that consumed tokens are stored, never error fallbacks. A hit
+    returns the cached result with 0 tokens; last_call_was_cached() tells callers to skip the
+    usage charge.
+
+    On a miss the call goes through the single-flight layer (services/single_flight.py) under
+    the same key, so concurrent duplicates (double-clicks, HTMX retries) wait for the first
+    call and get its result with 0 tokens instead of making their own provider call.
+
+    Coroutine functions get an async wrapper with the same key, so the sync and async variants
+    of one call share entries.
+
+    Args:
+        model_name (callable): Returns the model name at call time (it comes from settings)
+        cacheable (callable): Optional check on the result; answers it rejects (e.g. a partial
+            batch) are returned and charged as usual but not stored
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def build_key(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            inputs = {}
+            for name, value in bound.arguments.items():
+                if name in exclude_args:
+                    continue
+                if name in digest_args:
+                    inputs[name] = text_digest(value)
+                else:
+                    inputs[name] = normalize_text(value) if isinstance(value, str) else value
+            return AIResponseCache.build_key(operation, provider, model_name(), temperature, inputs)
+
+        def lookup(cache, key):
+            cached = cache.get(operation, key)
+            if cached is not None:
+                logger.info(f"Response cache hit for {operation} ({provider})")
+                _last_call_cached.set(True)
+            return cached
+
+        def store(cache, key, result, input_tokens, output_tokens):
+            if cache is not None and (input_tokens or output_tokens):
+                if cacheable is None or cacheable(result):
+                    cache.set(key, result)
+                else:
+                    logger.info(f"Not caching incomplete {operation} answer ({provider})")
+            return result, input_tokens, output_tokens
+
+        def shared_result(flight_result):
+            (result, input_tokens, output_tokens), shared = flight_result
+            if not shared:
+                return result, input_tokens, output_tokens
+            # Another caller paid for this answer; a failed call (no tokens) is passed on as is
+            if input_tokens or output_tokens:
+                logger.info(f"Coalesced duplicate {operation} call ({provider})")
+                _last_call_cached.set(True)
+            return result, 0, 0
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                _last_call_cached.set(False)
+                cache = get_response_cache()
+                flight = get_single_flight()
+                if cache is None and flight is None:
+                    return await func(*args, **kwargs)
+                key = build_key(args, kwargs)
+                cached = lookup(cache, key) if cache is not None else None
+                if cached is not None:
+                    return cached, 0, 0
+
+                async def call():
+                    return store(cache, key, *(await func(*args, **kwargs)))
+
+                if flight is None:
+                    return await call()
+                return shared_result(await flight.ado(operation, key, call))
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            _last_call_cached.set(False)
+            cache = get_response_cache()
+            flight = get_single_flight()
+            if cache is None and flight is None:
+                return func(*args, **kwargs)
+            key = build_key(args, kwargs)
+            cached = lookup(cache, key) if cache is not None else None
+            if cached is not None:
+                return cached, 0, 0
+
+            def call():
+                return store(cache, key, *func(*args, **kwargs))
+
+            if flight is None:
+                return call()
+            return shared_result(flight.do(operation, key, call))
+
+        return wrapper
+
+    return decorator
+
+
+def last_call_was_cached():
+    """
+    True if the latest cached AI call in this thread (or asyncio task) made no provider call of
+    its own: a cache hit, or a duplicate coalesced onto an identical in-flight call.
+    """
+    return _last_call_cached.get()
@@ -0,0 +1,161 @@
+# services/single_flight.py
+
+import copy
+import asyncio
+import logging
+import threading
+from django.conf import settings
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_SINGLE_FLIGHT_SETTINGS = {
+    'enabled': True,
+    'wait_timeout_seconds': 90.0,  # A duplicate waiting longer than this makes its own call
+}
+
+
+def get_single_flight_settings():
+    """Return AI_SETTINGS['single_flight'] merged over the defaults."""
+    return {**DEFAULT_SINGLE_FLIGHT_SETTINGS, **getattr(settings, 'AI_SETTINGS', {}).get('single_flight', {})}
+
+
+class _Call:
+    """One in-flight call in a thread; duplicates wait on its event."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: while a call for a key is running, duplicates wait
+    for its result instead of running their own.
+
+    Threads (sync views) and asyncio tasks (async views) are tracked separately; async calls
+    only coalesce within one event loop, since a future belongs to the loop that created it.
+    A leader's exception is raised in its waiters too. Waiters get deep copies of the result.
+    """
+
+    def __init__(self, wait_timeout_seconds=90.0):
+        self.wait_timeout_seconds = wait_timeout_seconds
+        self._calls = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def _count(self, operation, outcome):
+        with self._lock:
+            counters = self._counters.setdefault(operation, {'calls': 0, 'coalesced': 0})
+            counters[outcome] += 1
+
+    def do(self, operation, key, func):
+        """
+        Run func() unless an identical call is already running in another thread.
+
+        Returns:
+            tuple: (result, shared) where shared is True if the result came from another caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if call.done.wait(self.wait_timeout_seconds):
+                self._count(operation, 'coalesced')
+                if call.error is not None:
+                    raise call.error
+                return copy.deepcopy(call.result), True
+            logger.warning(f"Timed out waiting for in-flight {operation} call; calling the provider directly")
+            self._count(operation, 'calls')
+            return func(), False
+
+        self._count(operation, 'calls')
+        try:
+            call.result = func()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    async def ado(self, operation, key, func):
+        """Async version of do(): func is a coroutine function, duplicates are tasks on the same loop."""
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        with self._lock:
+            future = self._futures.get(flight_key)
+            leader = future is None
+            if leader:
+                future = self._futures[flight_key] = loop.create_future()
+
+        if not leader:
+            try:
+                # shield() so a waiter that times out or is cancelled doesn't cancel the leader's future
+                result = await asyncio.wait_for(asyncio.shield(future), self.wait_timeout_seconds)
+            except asyncio.TimeoutError:
+                logger.warning(f"Timed out waiting for in-flight {operation} call; calling the provider directly")
+                self._count(operation, 'calls')
+                return await func(), False
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # The leader's request was cancelled (e.g. client disconnect), not this one
+                self._count(operation, 'calls')
+                return await func(), False
+            self._count(operation, 'coalesced')
+            return copy.deepcopy(result), True
+
+        self._count(operation, 'calls')
+        try:
+            result = await func()
+            future.set_result(result)
+            return result, False
+        except asyncio.CancelledError:
+            future.cancel()  # Waiters then make their own call
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark it retrieved, or the loop logs it when there were no waiters
+            raise
+        finally:
+            with self._lock:
+                self._futures.pop(flight_key, None)
+
+    def stats(self):
+        """{operation: {'calls', 'coalesced', 'coalesced_rate'}}"""
+        with self._lock:
+            return {
+                operation: {**counters,
+                            'coalesced_rate': round(counters['coalesced'] / max(1, sum(counters.values())), 3)}
+                for operation, counters in self._counters.items()
+            }
+
+    def clear_stats(self):
+        with self._lock:
+            self._counters = {}
+
+
+_single_flight = None
+_single_flight_settings = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight():
+    """The shared coalescer, or None when disabled. Rebuilt if its settings change."""
+    global _single_flight, _single_flight_settings
+    flight_settings = get_single_flight_settings()
+    if not flight_settings['enabled']:
+        return None
+    with _single_flight_lock:
+        if _single_flight is None or _single_flight_settings != flight_settings:
+            _single_flight = SingleFlight(flight_settings['wait_timeout_seconds'])
+            _single_flight_settings = flight_settings
+        return _single_flight